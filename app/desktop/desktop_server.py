@@ -11,6 +11,7 @@ import kiln_server.server as kiln_server
 import uvicorn
 from fastapi import FastAPI
 from kiln_ai.adapters.remote_config import load_remote_models
+from kiln_ai.datamodel.model_cache import ModelCache
 from kiln_ai.utils.logging import setup_litellm_logging
 
 from app.desktop.log_config import log_config
@@ -44,6 +45,8 @@ async def lifespan(app: FastAPI):
     yield
     # Reset datamodel strict mode on shutdown
     datamodel_strict_mode.set_strict_mode(original_strict_mode)
+    # Persist the model cache for a warm start next launch (if enabled)
+    ModelCache.shared().flush_snapshot()
 
 
 def make_app(tk_root: tk.Tk | None = None):
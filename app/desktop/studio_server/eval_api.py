@@ -210,9 +210,8 @@ class UpdateEvalRequest(BaseModel):
 def dataset_ids_in_filter(
     task: Task, filter_id: DatasetFilterId, readonly: bool
 ) -> Set[ID_TYPE]:
-    # Fetch all the dataset items IDs in a filter
-    filter = dataset_filter_from_id(filter_id)
-    return {run.id for run in task.runs(readonly=readonly) if filter(run)}
+    # Fetch all the dataset items IDs in a filter. Uses the run index, no need to load the runs.
+    return set(task.run_index().ids_in_filter(filter_id))
 
 
 def runs_in_filter(
@@ -762,7 +761,9 @@ def connect_evals_api(app: FastAPI):
         # Build a set of all the dataset items IDs we expect to have scores for
         # Fetch all the dataset items in a filter, and return a map of dataset_id -> TaskRun
         filter = dataset_filter_from_id(eval.eval_configs_filter_id)
-        expected_dataset_items = {run.id: run for run in task.runs() if filter(run)}
+        expected_dataset_items = {
+            run.id: run for run in task.runs(readonly=True) if filter(run)
+        }
         expected_dataset_ids = set(expected_dataset_items.keys())
         if len(expected_dataset_ids) == 0:
             return EvalConfigCompareSummary(
@@ -30,11 +30,7 @@ from kiln_ai.datamodel import (
     Task,
 )
 from kiln_ai.datamodel.datamodel_enums import THINKING_DATA_STRATEGIES, ChatStrategy
-from kiln_ai.datamodel.dataset_filters import (
-    DatasetFilterId,
-    HighRatingDatasetFilter,
-    ThinkingModelDatasetFilter,
-)
+from kiln_ai.datamodel.dataset_filters import DatasetFilterId
 from kiln_ai.datamodel.dataset_split import (
     AllSplitDefinition,
     Train60Test20Val20SplitDefinition,
@@ -42,6 +38,7 @@ from kiln_ai.datamodel.dataset_split import (
     Train80Test20SplitDefinition,
     Train80Val20SplitDefinition,
 )
+from kiln_ai.datamodel.run_frame import HighRatingFrameFilter, ThinkingModelFrameFilter
 from kiln_ai.utils.config import Config
 from kiln_ai.utils.name_generator import generate_memorable_name
 from kiln_server.task_api import task_from_id
@@ -291,24 +288,30 @@ def connect_fine_tune_api(app: FastAPI):
         existing_datasets = task.dataset_splits()
         existing_finetunes = task.finetunes()
 
+        # Tag counts come from the task's tag index, the per-tag breakdowns from vectorized masks over the run frame. No run files are loaded.
+        index = task.run_index()
+        finetune_tags = [
+            tag for tag in index.tag_counts() if tag.startswith("fine_tune")
+        ]
         finetune_tag_counts: Dict[str, int] = {}
         reasoning_count: Dict[str, int] = {}
         high_quality_count: Dict[str, int] = {}
         reasoning_and_high_quality_count: Dict[str, int] = {}
-        for sample in task.runs(readonly=True):
-            for tag in sample.tags:
-                if tag.startswith("fine_tune"):
-                    finetune_tag_counts[tag] = finetune_tag_counts.get(tag, 0) + 1
-                    is_reasoning = ThinkingModelDatasetFilter(sample)
-                    is_high_quality = HighRatingDatasetFilter(sample)
-                    if is_reasoning:
-                        reasoning_count[tag] = reasoning_count.get(tag, 0) + 1
-                    if is_high_quality:
-                        high_quality_count[tag] = high_quality_count.get(tag, 0) + 1
-                    if is_reasoning and is_high_quality:
-                        reasoning_and_high_quality_count[tag] = (
-                            reasoning_and_high_quality_count.get(tag, 0) + 1
-                        )
+        if finetune_tags:
+            frame = index.frame()
+            is_reasoning = ThinkingModelFrameFilter(frame)
+            is_high_quality = HighRatingFrameFilter(frame)
+            for tag in finetune_tags:
+                tag_mask = frame.tag_mask(tag)
+                count = int(tag_mask.sum())
+                if not count:
+                    continue
+                finetune_tag_counts[tag] = count
+                reasoning_count[tag] = int((tag_mask & is_reasoning).sum())
+                high_quality_count[tag] = int((tag_mask & is_high_quality).sum())
+                reasoning_and_high_quality_count[tag] = int(
+                    (tag_mask & is_reasoning & is_high_quality).sum()
+                )
 
         return FinetuneDatasetInfo(
             existing_datasets=existing_datasets,
@@ -36,6 +36,26 @@ def use_temp_settings_dir(tmp_path):
         yield
 
 
+# run indexes are stored in the settings dir, keep them out of the user's during tests
+@pytest.fixture(autouse=True)
+def use_temp_run_index_dir(tmp_path):
+    with patch(
+        "kiln_ai.datamodel.run_index.run_index_dir",
+        return_value=tmp_path / "run_indexes",
+    ):
+        yield
+
+
+# process locks are stored in the settings dir, keep them out of the user's during tests
+@pytest.fixture(autouse=True)
+def use_temp_process_lock_dir(tmp_path):
+    with patch(
+        "kiln_ai.datamodel.process_lock.process_lock_dir",
+        return_value=tmp_path / "process_locks",
+    ):
+        yield
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_logging():
     from kiln_ai.utils.logging import setup_litellm_logging
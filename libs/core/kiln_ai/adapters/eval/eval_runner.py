@@ -4,6 +4,7 @@ from typing import AsyncGenerator, Dict, List, Literal, Set
 
 from kiln_ai.adapters.eval.base_eval import BaseEval
 from kiln_ai.adapters.eval.registry import eval_adapter_from_type
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from kiln_ai.datamodel.basemodel import ID_TYPE
 from kiln_ai.datamodel.dataset_filters import dataset_filter_from_id
 from kiln_ai.datamodel.eval import EvalConfig, EvalRun, EvalScores
@@ -75,6 +76,8 @@ class EvalRunner:
         self.run_configs = run_configs
         self.task = target_task
         self.eval = target_eval
+        # Eval runs waiting to be saved. None when not batching (run_job called directly), save immediately.
+        self._pending_eval_runs: List[EvalRun] | None = None
 
     def collect_tasks(self) -> List[EvalJob]:
         if self.eval_run_type == "eval_config_eval":
@@ -160,9 +163,32 @@ class EvalRunner:
         """
         jobs = self.collect_tasks()
 
-        runner = AsyncJobRunner(concurrency=concurrency)
-        async for progress in runner.run(jobs, self.run_job):
-            yield progress
+        # Save completed eval runs in batches (one bulk write, off the event loop) rather than a file at a time. A batch
+        # is whatever completed since the last progress update: flush before each update, so a run is never reported
+        # complete before it's on disk. Also flush when the run is cancelled or closed early.
+        self._pending_eval_runs = []
+        try:
+            runner = AsyncJobRunner(concurrency=concurrency)
+            async for progress in runner.run(jobs, self.run_job):
+                await self._flush_eval_runs()
+                yield progress
+        finally:
+            await self._flush_eval_runs()
+            self._pending_eval_runs = None
+
+    def _save_eval_run(self, eval_run: EvalRun) -> None:
+        if self._pending_eval_runs is None:
+            eval_run.save_to_file()
+        else:
+            self._pending_eval_runs.append(eval_run)
+
+    async def _flush_eval_runs(self) -> None:
+        if not self._pending_eval_runs:
+            return
+        eval_runs = self._pending_eval_runs
+        self._pending_eval_runs = []
+        # The save runs to completion on the IO pool even if this await is cancelled
+        await run_datamodel_io(EvalRun.save_many, eval_runs)
 
     async def run_job(self, job: EvalJob) -> bool:
         try:
@@ -207,7 +233,7 @@ class EvalRunner:
                 intermediate_outputs=intermediate_outputs,
                 task_run_usage=task_run_usage,
             )
-            eval_run.save_to_file()
+            self._save_eval_run(eval_run)
 
             return True
         except Exception as e:
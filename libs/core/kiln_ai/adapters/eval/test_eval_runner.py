@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from typing import Dict
 from unittest.mock import AsyncMock, patch
 
@@ -142,6 +144,150 @@ async def test_async_eval_runner_status_updates(mock_eval_runner, concurrency):
     assert mock_eval_runner.run_job.call_count == job_count
 
 
+@pytest.mark.asyncio
+async def test_eval_runner_saves_runs_before_reporting_progress(mock_eval_runner):
+    job_count = 60
+    jobs = [{} for _ in range(job_count)]
+    mock_eval_runner.collect_tasks = lambda: jobs
+
+    async def run_job(job):
+        await asyncio.sleep(0.001)
+        mock_eval_runner._save_eval_run(object())
+        return True
+
+    mock_eval_runner.run_job = run_job
+
+    with patch.object(EvalRun, "save_many") as mock_save_many:
+        async for progress in mock_eval_runner.run(concurrency=5):
+            # Every run reported complete is already saved
+            saved = sum(len(c.args[0]) for c in mock_save_many.call_args_list)
+            assert saved >= progress.complete
+
+    batch_sizes = [len(c.args[0]) for c in mock_save_many.call_args_list]
+    assert sum(batch_sizes) == job_count
+    assert len(batch_sizes) <= job_count
+    # Not batching outside of run()
+    assert mock_eval_runner._pending_eval_runs is None
+
+
+@pytest.mark.asyncio
+async def test_eval_runner_flushes_runs_when_closed_early(mock_eval_runner):
+    jobs = [{} for _ in range(10)]
+    mock_eval_runner.collect_tasks = lambda: jobs
+    completed = []
+
+    async def run_job(job):
+        await asyncio.sleep(0.001)
+        eval_run = object()
+        completed.append(eval_run)
+        mock_eval_runner._save_eval_run(eval_run)
+        return True
+
+    mock_eval_runner.run_job = run_job
+
+    with patch.object(EvalRun, "save_many") as mock_save_many:
+        progress_stream = mock_eval_runner.run(concurrency=1)
+        async for progress in progress_stream:
+            if progress.complete == 3:
+                break
+        await progress_stream.aclose()
+
+    saved = [run for c in mock_save_many.call_args_list for run in c.args[0]]
+    assert saved == completed
+    assert len(saved) >= 3
+    assert mock_eval_runner._pending_eval_runs is None
+
+
+@pytest.mark.asyncio
+async def test_eval_runner_flushes_runs_when_cancelled(mock_eval_runner):
+    jobs = [{} for _ in range(10)]
+    mock_eval_runner.collect_tasks = lambda: jobs
+    completed = []
+    third_reported = asyncio.Event()
+
+    async def run_job(job):
+        if len(completed) == 3:
+            # Still running when the consumer is cancelled
+            await asyncio.sleep(10)
+        eval_run = object()
+        completed.append(eval_run)
+        mock_eval_runner._save_eval_run(eval_run)
+        return True
+
+    mock_eval_runner.run_job = run_job
+
+    async def consume():
+        async for progress in mock_eval_runner.run(concurrency=1):
+            if progress.complete == 3:
+                third_reported.set()
+
+    with patch.object(EvalRun, "save_many") as mock_save_many:
+        consumer = asyncio.create_task(consume())
+        await third_reported.wait()
+        await asyncio.sleep(0.01)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+
+    saved = [run for c in mock_save_many.call_args_list for run in c.args[0]]
+    assert saved == completed
+    assert len(saved) == 3
+
+
+@pytest.mark.asyncio
+async def test_eval_runner_saves_finished_runs_when_cancelled_mid_batch(
+    mock_eval_runner,
+):
+    jobs = [{} for _ in range(20)]
+    mock_eval_runner.collect_tasks = lambda: jobs
+    loop = asyncio.get_running_loop()
+    completed = []
+    saved = []
+    saving_fifth = asyncio.Event()
+    unblock_save = threading.Event()
+
+    def save_many(eval_runs):
+        saved.extend(eval_runs)
+        if len(completed) >= 5 and completed[4] in eval_runs:
+            # Hold this batch on the IO pool while the next run finishes
+            loop.call_soon_threadsafe(saving_fifth.set)
+            unblock_save.wait(5)
+
+    async def run_job(job):
+        index = len(completed)
+        if index == 5:
+            await saving_fifth.wait()
+        elif index > 5:
+            # Still running when the consumer is cancelled
+            await asyncio.sleep(10)
+        eval_run = object()
+        completed.append(eval_run)
+        mock_eval_runner._save_eval_run(eval_run)
+        return True
+
+    mock_eval_runner.run_job = run_job
+
+    async def consume():
+        async for _ in mock_eval_runner.run(concurrency=1):
+            pass
+
+    try:
+        with patch.object(EvalRun, "save_many", side_effect=save_many):
+            consumer = asyncio.create_task(consume())
+            while len(completed) < 6:
+                await asyncio.sleep(0.001)
+            # The 6th run is finished but waiting for the next batch
+            consumer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await consumer
+    finally:
+        unblock_save.set()
+
+    assert len(completed) == 6
+    assert saved == completed
+    assert mock_eval_runner._pending_eval_runs is None
+
+
 def test_collect_tasks_filtering(
     mock_eval,
     mock_eval_runner,
@@ -0,0 +1,58 @@
+"""
+Run datamodel disk work off the event loop.
+
+Loading, saving and listing models is blocking file I/O plus CPU bound parsing. Called directly from an async handler, one large listing blocks the event loop, stalling every other request, LLM call and progress stream. The async datamodel methods (aload_from_file, asave, adelete, afrom_id_and_parent_path, and an async twin of every child listing like task.aruns()) run the sync method on a shared, bounded thread pool instead.
+
+The pool is bounded (KILN_DATAMODEL_IO_WORKERS, default DEFAULT_IO_WORKERS) so a burst of requests queues up rather than starting hundreds of threads competing for the disk and the GIL. Context variables are carried into the worker thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from typing_extensions import ParamSpec
+
+from kiln_ai.utils.config import Config
+
+DEFAULT_IO_WORKERS = 8
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def datamodel_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = Config.shared().datamodel_io_workers
+            if not isinstance(max_workers, int) or max_workers < 1:
+                max_workers = DEFAULT_IO_WORKERS
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="kiln_datamodel_io"
+            )
+        return _executor
+
+
+def shutdown_datamodel_executor() -> None:
+    """Stop the pool (after running queued work). A new pool is created on next use."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def run_datamodel_io(fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    """
+    Run a blocking datamodel call on the datamodel I/O pool, and await the result. Exceptions are raised in the caller.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(datamodel_executor(), call)
@@ -1,4 +1,3 @@
-import json
 import os
 import re
 import shutil
@@ -6,9 +5,22 @@ import unicodedata
 import uuid
 from abc import ABCMeta
 from builtins import classmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from pydantic import (
     BaseModel,
@@ -23,7 +35,22 @@ from pydantic import (
 from pydantic_core import ErrorDetails
 from typing_extensions import Annotated, Self
 
-from kiln_ai.datamodel.model_cache import ModelCache
+from kiln_ai.datamodel.async_io import run_datamodel_io
+from kiln_ai.datamodel.blob_store import (
+    blob_save_context,
+    load_blob_value,
+)
+from kiln_ai.datamodel.child_id_map import CHILD_DIRNAME_SEPARATOR, ChildIdMap
+from kiln_ai.datamodel.json_codec import compact_json_enabled, json_codec
+from kiln_ai.datamodel.json_projection import load_json_fields, project_json_fields
+from kiln_ai.datamodel.model_cache import ModelCache, copy_model_structure
+from kiln_ai.datamodel.packed_storage import PackStore, read_packed_model_file
+from kiln_ai.datamodel.sharded_layout import (
+    ShardLayout,
+    iterate_child_dirs,
+    relationship_folder_of_child_path,
+    shard_for_dirname,
+)
 from kiln_ai.utils.config import Config
 from kiln_ai.utils.formatting import snake_case
 
@@ -35,6 +62,8 @@ ID_FIELD = Field(default_factory=lambda: str(uuid.uuid4().int)[:12])
 ID_TYPE = Optional[str]
 T = TypeVar("T", bound="KilnBaseModel")
 PT = TypeVar("PT", bound="KilnParentedModel")
+# Parallel child loading only pays off past this many uncached children. Below it, thread overhead outweighs the overlap (see test_benchmark_all_children_crossover).
+PARALLEL_LOAD_MIN_CHILDREN = 100
 
 
 # Naming conventions:
@@ -117,6 +146,8 @@ class KilnBaseModel(BaseModel):
     created_by: str = Field(default_factory=lambda: Config.shared().user_id)
 
     _loaded_from_file: bool = False
+    # Fields which may be saved in the blob store (see blob_store.py), in load_fields dot notation
+    blob_fields: ClassVar[FrozenSet[str]] = frozenset()
 
     @computed_field()
     def model_type(self) -> str:
@@ -165,16 +196,59 @@ class KilnBaseModel(BaseModel):
         cached_model = ModelCache.shared().get_model(path, cls, readonly=readonly)
         if cached_model is not None:
             return cached_model
-        with open(path, "r", encoding="utf-8") as file:
-            # modified time of file for cache invalidation. From file descriptor so it's atomic w read.
-            mtime_ns = os.fstat(file.fileno()).st_mtime_ns
-            file_data = file.read()
-            parsed_json = json.loads(file_data)
-            m = cls.model_validate(parsed_json, context={"loading_from_file": True})
-            if not isinstance(m, cls):
-                raise ValueError(f"Loaded model is not of type {cls.__name__}")
-            m._loaded_from_file = True
-            file_data = None
+        m, mtime_ns, size_bytes = cls._read_model_file(path)
+        cache = ModelCache.shared()
+        # Pin parent models: many children reference them, evicting them first would cause churn
+        cache.set_model(
+            path,
+            m,
+            mtime_ns,
+            size_bytes=size_bytes,
+            pinned=isinstance(m, KilnParentModel),
+        )
+        if not readonly and cache.holds_instance(path, m):
+            # The cache keeps this instance for readonly callers
+            return copy_model_structure(m)
+        return m
+
+    @classmethod
+    async def aload_from_file(
+        cls: Type[T], path: Path | str, readonly: bool = False
+    ) -> T:
+        """Async load_from_file: reads and parses on the datamodel I/O pool, without blocking the event loop. See async_io.py."""
+        return await run_datamodel_io(cls.load_from_file, path, readonly=readonly)
+
+    @classmethod
+    def _read_model_file(cls: Type[T], path: Path) -> Tuple[T, int, int]:
+        """Read, parse and validate a model file, without using the model cache.
+
+        Has no side effects, so it's safe to call from worker threads or processes.
+
+        Returns:
+            Tuple[T, int, int]: The model, the file's mtime_ns (for packed children, the record's stamp), and the file's size (for the cache budget)
+        """
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            # Children in a packed relationship folder are records, not files. See packed_storage.py.
+            packed = read_packed_model_file(path)
+            if packed is None:
+                raise
+            file_data, mtime_ns = packed
+        else:
+            with file:
+                # modified time of file for cache invalidation. From file descriptor so it's atomic w read.
+                mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+                file_data = file.read()
+        size_bytes = len(file_data)
+        parsed_json = json_codec().loads(file_data)
+        file_data = None
+        m = cls.model_validate(
+            parsed_json, context={"loading_from_file": True, "file_path": path}
+        )
+        if not isinstance(m, cls):
+            raise ValueError(f"Loaded model is not of type {cls.__name__}")
+        m._loaded_from_file = True
         m.path = path
         if m.v > m.max_schema_version():
             raise ValueError(
@@ -188,8 +262,31 @@ class KilnBaseModel(BaseModel):
                 f"Class: {m.__class__.__name__}, id: {getattr(m, 'id', None)}, path: {path}, "
                 f"version: {m.v}, max version: {m.max_schema_version()}"
             )
-        ModelCache.shared().set_model(path, m, mtime_ns)
-        return m
+        return m, mtime_ns, size_bytes
+
+    @classmethod
+    def load_fields(cls, path: Path | str, fields: List[str]) -> Dict[str, Any]:
+        """Read only the requested fields from a model file, without validating or building the model.
+
+        Cheaper than load_from_file when only a few fields of a model are needed: the file is parsed natively (json_codec.py), but not validated. The result is not cached.
+
+        Args:
+            path (Path): Path to the model file
+            fields (List[str]): Field names to read. Nested fields use dot notation, for example "output.rating".
+
+        Returns:
+            Dict[str, Any]: Field name to raw JSON value (not validated, no legacy format upgrades). Missing fields are None.
+        """
+        try:
+            values = load_json_fields(path, fields)
+        except FileNotFoundError:
+            packed = read_packed_model_file(Path(path))
+            if packed is None:
+                raise
+            values = project_json_fields(packed[0], fields)
+        for field in cls.blob_fields.intersection(values):
+            values[field] = load_blob_value(values[field], path)
+        return values
 
     def loaded_from_file(self, info: ValidationInfo | None = None) -> bool:
         # Two methods of indicated it's loaded from file:
@@ -222,19 +319,53 @@ class KilnBaseModel(BaseModel):
                 f"Cannot save to file because 'path' is not set. Class: {self.__class__.__name__}, "
                 f"id: {getattr(self, 'id', None)}, path: {path}"
             )
-        path.parent.mkdir(parents=True, exist_ok=True)
-        json_data = self.model_dump_json(indent=2, exclude={"path"})
-        with open(path, "w", encoding="utf-8") as file:
-            file.write(json_data)
+        store = self._pack_store_for_path(path)
+        if store is not None:
+            store.put(path.parent.name, self.file_json(path, compact=True))
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            json_data = self.file_json(path, compact=compact_json_enabled())
+            with open(path, "wb") as file:
+                file.write(json_data)
         # save the path so even if something like name changes, the file doesn't move
         self.path = path
         # We could save, but invalidating will trigger load on next use.
         # This ensures everything in cache is loaded from disk, and the cache perfectly reflects what's on disk
         ModelCache.shared().invalidate(path)
 
+    def file_json(self, path: Path, compact: bool = False) -> bytes:
+        """The file contents for this model, saved to path. Large blob fields become blob references if the blob store is enabled (see blob_store.py)."""
+        return json_codec().dumps(
+            self, compact=compact, exclude={"path"}, context=blob_save_context(path)
+        )
+
+    async def asave(self) -> None:
+        """Async save_to_file: writes on the datamodel I/O pool, without blocking the event loop. See async_io.py."""
+        await run_datamodel_io(self.save_to_file)
+
+    @classmethod
+    def save_many(cls, models: Sequence["KilnBaseModel"]) -> None:
+        """Save many models at once: staged, written in parallel, and published atomically. See bulk_writer.py.
+
+        Raises:
+            ValueError: If the path of any model is not set. Nothing is saved.
+        """
+        # Avoid circular import
+        from kiln_ai.datamodel.bulk_writer import bulk_writer
+
+        with bulk_writer() as writer:
+            writer.add_all(models)
+
     def delete(self) -> None:
         if self.path is None:
             raise ValueError("Cannot delete model because path is not set")
+        store = self._pack_store_for_path(self.path)
+        if store is not None:
+            if not store.delete(self.path.parent.name):
+                raise FileNotFoundError(f"No such model: {self.path}")
+            ModelCache.shared().invalidate(self.path)
+            self.path = None
+            return
         dir_path = self.path.parent if self.path.is_file() else self.path
         if dir_path is None:
             raise ValueError("Cannot delete model because path is not set")
@@ -242,11 +373,19 @@ class KilnBaseModel(BaseModel):
         ModelCache.shared().invalidate(self.path)
         self.path = None
 
+    async def adelete(self) -> None:
+        """Async delete: removes files on the datamodel I/O pool, without blocking the event loop. See async_io.py."""
+        await run_datamodel_io(self.delete)
+
     def build_path(self) -> Path | None:
         if self.path is not None:
             return self.path
         return None
 
+    def _pack_store_for_path(self, path: Path) -> PackStore | None:
+        """The pack this model is saved in, or None if it's saved as its own file. Only children can be packed."""
+        return None
+
     # increment for breaking changes
     def max_schema_version(self) -> int:
         return 1
@@ -277,6 +416,8 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
     def load_parent(self) -> Optional[KilnBaseModel]:
         """Get the parent model instance, loading it from disk if necessary.
 
+        Read-only children (the model cache's own instances, handed to readonly=True callers) all resolve to the cache's read-only parent instance, so resolving a parent costs one stat and no copy. It must not be mutated. Any other child loads a private copy of its parent, so editing `child.parent` never reaches the cache.
+
         Returns:
             Optional[KilnBaseModel]: The parent model instance or None if not set
         """
@@ -288,16 +429,21 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
         if self.path is None:
             return None
         # Note: this only works with base_filename. If we every support custom names, we need to change this.
-        parent_path = (
-            self.path.parent.parent.parent
-            / self.__class__.parent_type().base_filename()
+        parent_type = self.__class__.parent_type()
+        relationship_folder = relationship_folder_of_child_path(
+            self.path, self.__class__.relationship_name()
         )
-        if parent_path is None:
+        parent_path = relationship_folder.parent / parent_type.base_filename()
+        # A child which may be edited (and its parent with it) never gets the cache's instance
+        readonly = ModelCache.shared().holds_instance(self.path, self)
+        try:
+            loaded_parent = parent_type.load_from_file(parent_path, readonly=readonly)
+        except FileNotFoundError:
             return None
-        if not parent_path.exists():
+        if loaded_parent is None:
             return None
-        loaded_parent = self.__class__.parent_type().load_from_file(parent_path)
-        self.parent = loaded_parent
+        # Set directly: it's the expected parent type, and validating the assignment would re-run every model validator of the child
+        vars(self)["parent"] = loaded_parent
         return loaded_parent
 
     # Dynamically implemented by KilnParentModel method injection
@@ -321,6 +467,13 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
                 )
         return self
 
+    def _pack_store_for_path(self, path: Path) -> PackStore | None:
+        store = PackStore.for_child_path(path)
+        # A loose file left in a packed folder takes precedence, keep saving it in place
+        if store is None or path.exists():
+            return None
+        return store
+
     def build_child_dirname(self) -> Path:
         # Default implementation for readable folder names.
         # {id} - {name}/{type}.kiln
@@ -330,7 +483,7 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
         path = self.id
         name = getattr(self, "name", None)
         if name is not None:
-            path = f"{path} - {name[:32]}"
+            path = f"{path}{CHILD_DIRNAME_SEPARATOR}{name[:32]}"
         return Path(path)
 
     def build_path(self) -> Path | None:
@@ -348,12 +501,15 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
         parent_folder = parent_path.parent
         if parent_folder is None:
             return None
-        return (
-            parent_folder
-            / self.__class__.relationship_name()
-            / self.build_child_dirname()
-            / self.__class__.base_filename()
-        )
+        child_dirname = self.build_child_dirname()
+        relationship_folder = parent_folder / self.__class__.relationship_name()
+        # New children of a sharded folder go in their shard. See sharded_layout.py.
+        layout = ShardLayout.for_folder(relationship_folder)
+        if layout is not None:
+            relationship_folder = relationship_folder / shard_for_dirname(
+                layout, child_dirname.name
+            )
+        return relationship_folder / child_dirname / self.__class__.base_filename()
 
     @classmethod
     def iterate_children_paths_of_parent_path(cls: Type[PT], parent_path: Path | None):
@@ -367,7 +523,7 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
         else:
             parent_folder = parent_path
 
-        parent = cls.parent_type().load_from_file(parent_path)
+        parent = cls.parent_type().load_from_file(parent_path, readonly=True)
         if parent is None:
             raise ValueError("Parent must be set to load children")
 
@@ -381,50 +537,294 @@ class KilnParentedModel(KilnBaseModel, metaclass=ABCMeta):
         # manual code instead of glob for performance (5x speedup over glob)
 
         base_filename = cls.base_filename()
-        # Iterate through immediate subdirectories using scandir for better performance
+        loose_dirnames = set()
+        # Iterate through immediate subdirectories (and shards, see sharded_layout.py) using scandir for better performance
         # Benchmark: scandir is 10x faster than glob, so worth the extra code
-        with os.scandir(relationship_folder) as entries:
-            for entry in entries:
-                if not entry.is_dir():
-                    continue
-
-                child_file = Path(entry.path) / base_filename
-                if child_file.is_file():
-                    yield child_file
+        for dirname, child_folder in iterate_child_dirs(
+            relationship_folder, base_filename
+        ):
+            child_file = Path(child_folder) / base_filename
+            if child_file.is_file():
+                loose_dirnames.add(dirname)
+                yield child_file
+
+        # Packed children have no file of their own, but use the same path. See packed_storage.py.
+        store = PackStore.for_folder(relationship_folder)
+        if store is not None:
+            for dirname in store.dirnames():
+                if dirname not in loose_dirnames:
+                    yield relationship_folder / dirname / base_filename
 
     @classmethod
     def all_children_of_parent_path(
-        cls: Type[PT], parent_path: Path | None, readonly: bool = False
+        cls: Type[PT],
+        parent_path: Path | None,
+        readonly: bool = False,
+        max_workers: int = 1,
     ) -> list[PT]:
+        """Load all children of this type under the parent.
+
+        Args:
+            parent_path (Path): Path to the parent model file
+            readonly (bool): If True, return cached instances instead of copies (not safe to mutate)
+            max_workers (int): Opt-in parallel loading of files not already in the cache, in a thread pool. 1 loads sequentially. Only used past PARALLEL_LOAD_MIN_CHILDREN uncached children, where reads overlap enough to win (about 1.3-1.6x at 1000 children, see test_model_perf.py).
+        """
+        if max_workers > 1:
+            return cls._all_children_parallel(parent_path, readonly, max_workers)
         children = []
         for child_path in cls.iterate_children_paths_of_parent_path(parent_path):
             item = cls.load_from_file(child_path, readonly=readonly)
             children.append(item)
         return children
 
+    @classmethod
+    def count_children_of_parent_path(cls, parent_path: Path | None) -> int:
+        """Number of children of this type under the parent, without loading them."""
+        return sum(1 for _ in cls.iterate_children_paths_of_parent_path(parent_path))
+
+    @classmethod
+    def child_exists(cls, id: str, parent_path: Path | None) -> bool:
+        """
+        Whether the parent has a child with this ID. Only reads the ID field of candidates (see _child_paths_for_ids), the child isn't loaded.
+        """
+        if parent_path is None:
+            return False
+        return id in cls._child_paths_for_ids([id], parent_path)
+
+    @classmethod
+    def _all_children_parallel(
+        cls: Type[PT],
+        parent_path: Path | None,
+        readonly: bool,
+        max_workers: int,
+    ) -> list[PT]:
+        child_paths = list(cls.iterate_children_paths_of_parent_path(parent_path))
+        cache = ModelCache.shared()
+        children: list[PT | None] = [
+            cache.get_model(child_path, cls, readonly=readonly)
+            for child_path in child_paths
+        ]
+        uncached = [i for i, child in enumerate(children) if child is None]
+        if not uncached:
+            return children  # type: ignore
+        if len(uncached) < PARALLEL_LOAD_MIN_CHILDREN:
+            return [
+                child or cls.load_from_file(child_path, readonly=readonly)
+                for child, child_path in zip(children, child_paths)
+            ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map yields in order and raises the first failure in path order, matching sequential loading
+            results = list(
+                executor.map(cls._read_model_file, [child_paths[i] for i in uncached])
+            )
+
+        cache.set_models(
+            [
+                (
+                    child_paths[i],
+                    model,
+                    mtime_ns,
+                    size_bytes,
+                    isinstance(model, KilnParentModel),
+                )
+                for i, (model, mtime_ns, size_bytes) in zip(uncached, results)
+            ]
+        )
+        for i, (model, _, _) in zip(uncached, results):
+            if not readonly and cache.holds_instance(child_paths[i], model):
+                # The cache keeps this instance for readonly callers
+                model = copy_model_structure(model)
+            children[i] = model
+        return children  # type: ignore
+
     @classmethod
     def from_id_and_parent_path(
         cls: Type[PT], id: str, parent_path: Path | None
     ) -> PT | None:
         """
-        Fast search by ID using the cache. Avoids the model_copy overhead on all but the exact match.
+        Find a child by ID.
 
-        Uses cache so still slow on first load.
+        The child folder is found by ID from folder names ("{id} - {name}"), or the pack index for packed folders: one stat when nothing changed. On a miss the folder map is rebuilt once (catching changes within the filesystem's timestamp granularity) before returning None, without loading any other child. The in-file ID is always verified: if a folder's name doesn't match its file (folders swapped by hand), the children's IDs are read (not full models) to find the right one.
         """
         if parent_path is None:
             return None
 
-        # Note: we're using the in-file ID. We could make this faster using the path-ID if this becomes perf bottleneck, but it's better to have 1 source of truth.
-        for child_path in cls.iterate_children_paths_of_parent_path(parent_path):
-            child_id = ModelCache.shared().get_model_id(child_path, cls)
-            if child_id == id:
-                return cls.load_from_file(child_path)
-            if child_id is None:
-                child = cls.load_from_file(child_path)
-                if child.id == id:
-                    return child
+        parent_folder = parent_path.parent if parent_path.is_file() else parent_path
+        relationship_folder = parent_folder / cls.relationship_name()
+        store = PackStore.for_folder(relationship_folder)
+        layout = ShardLayout.for_folder(relationship_folder)
+        found = cls._child_dirname_for_id(relationship_folder, id, store, layout)
+        if found is None:
+            for id_folder in cls._id_folders(relationship_folder, id, layout):
+                ChildIdMap.shared().invalidate(id_folder)
+            found = cls._child_dirname_for_id(relationship_folder, id, store, layout)
+        if found is None:
+            return None
+
+        id_folder, dirname = found
+        child_path = id_folder / dirname / cls.base_filename()
+        if child_path.is_file() or (store is not None and store.contains(dirname)):
+            child = cls.load_from_file(child_path)
+            if child.id == id:
+                return child
+
+        # Folder name and file disagree: resolve by in-file ID, loading only the match
+        child_path = cls._child_paths_for_ids([id], parent_path).get(id)
+        if child_path is None:
+            return None
+        return cls.load_from_file(child_path)
+
+    @classmethod
+    def _id_folders(
+        cls, relationship_folder: Path, id: str, layout: ShardLayout | None
+    ) -> List[Path]:
+        # Children of a sharded folder are in their ID's shard, or at the top level if saved before sharding
+        if layout is None:
+            return [relationship_folder]
+        return [relationship_folder / layout.shard_for_id(id), relationship_folder]
+
+    @classmethod
+    def _child_dirname_for_id(
+        cls,
+        relationship_folder: Path,
+        id: str,
+        store: PackStore | None,
+        layout: ShardLayout | None,
+    ) -> Tuple[Path, str] | None:
+        """The folder containing the child's folder, and the child's folder name, from folder names or the pack index."""
+        for id_folder in cls._id_folders(relationship_folder, id, layout):
+            dirname = ChildIdMap.shared().dirname_for_id(id_folder, id)
+            if dirname is not None:
+                return id_folder, dirname
+        if store is not None:
+            dirname = store.dirname_for_id(id)
+            if dirname is not None:
+                return relationship_folder, dirname
         return None
 
+    @classmethod
+    async def afrom_id_and_parent_path(
+        cls: Type[PT], id: str, parent_path: Path | None
+    ) -> PT | None:
+        """Async from_id_and_parent_path: searches on the datamodel I/O pool, without blocking the event loop. See async_io.py."""
+        return await run_datamodel_io(cls.from_id_and_parent_path, id, parent_path)
+
+    @classmethod
+    def _child_paths_for_ids(cls, ids: List[str], parent_path: Path) -> Dict[str, Path]:
+        """
+        Find the paths of many children by ID: from folder names (or the pack index) where possible, then one pass over the remaining children. Only reads the ID field of each candidate, the models aren't loaded.
+        """
+        parent_folder = parent_path.parent if parent_path.is_file() else parent_path
+        relationship_folder = parent_folder / cls.relationship_name()
+        if not relationship_folder.is_dir():
+            return {}
+        store = PackStore.for_folder(relationship_folder)
+        layout = ShardLayout.for_folder(relationship_folder)
+        base_filename = cls.base_filename()
+
+        def file_id(path: Path) -> str | None:
+            id = ModelCache.shared().get_model_id(path, cls)
+            if id is None:
+                try:
+                    id = cls.load_fields(path, ["id"])["id"]
+                except FileNotFoundError:
+                    return None
+            return id
+
+        found: Dict[str, Path] = {}
+        for id in ids:
+            hint = cls._child_dirname_for_id(relationship_folder, id, store, layout)
+            if hint is None:
+                continue
+            id_folder, dirname = hint
+            child_path = id_folder / dirname / base_filename
+            if file_id(child_path) == id:
+                found[id] = child_path
+
+        # Fallback for folders renamed by hand: one pass, reading only IDs
+        remaining = set(ids) - found.keys()
+        if remaining:
+            for child_path in cls.iterate_children_paths_of_parent_path(parent_path):
+                child_id = file_id(child_path)
+                if child_id in remaining:
+                    found[child_id] = child_path
+                    remaining.discard(child_id)
+                    if not remaining:
+                        break
+        return found
+
+    @classmethod
+    def delete_many_by_id(
+        cls,
+        ids: List[str],
+        parent_path: Path | None,
+        max_workers: int = 8,
+    ) -> Dict[str, Exception]:
+        """
+        Delete many children of a parent by ID, for example TaskRun.delete_many_by_id(run_ids, task.path).
+
+        Much faster than from_id_and_parent_path and delete per ID: IDs are resolved together, child folders are removed in parallel, packed children are removed with one write per pack, and caches are invalidated once.
+
+        Returns:
+            Dict[str, Exception]: ID to error, for each ID which wasn't found or couldn't be deleted. Empty on success.
+        """
+        ids = list(dict.fromkeys(ids))
+        if parent_path is None:
+            return {
+                id: ValueError("Parent must be saved to delete children") for id in ids
+            }
+
+        paths = cls._child_paths_for_ids(ids, parent_path)
+        failures: Dict[str, Exception] = {
+            id: FileNotFoundError(f"{cls.__name__} not found. ID: {id}")
+            for id in ids
+            if id not in paths
+        }
+
+        loose: Dict[str, Path] = {}
+        packed: Dict[PackStore, List[Tuple[str, str]]] = {}
+        for id, path in paths.items():
+            store = None if path.is_file() else PackStore.for_child_path(path)
+            if store is not None:
+                packed.setdefault(store, []).append((id, path.parent.name))
+            else:
+                loose[id] = path
+
+        def remove_folder(item: Tuple[str, Path]) -> Tuple[str, Exception | None]:
+            id, path = item
+            try:
+                shutil.rmtree(path.parent)
+            except Exception as e:
+                return id, e
+            return id, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for id, error in executor.map(remove_folder, loose.items()):
+                if error is not None:
+                    failures[id] = error
+
+        for store, records in packed.items():
+            try:
+                # One tombstone append per pack
+                store.write_many([(dirname, None) for _, dirname in records])
+            except Exception as e:
+                for id, _ in records:
+                    failures[id] = e
+
+        # Invalidate all at once. Removed folders change the relationship folder mtime too, but don't rely on timestamp granularity.
+        ModelCache.shared().invalidate_many(paths.values())
+        for folder in {path.parent.parent for path in loose.values()}:
+            ChildIdMap.shared().invalidate(folder)
+        return failures
+
+    @classmethod
+    async def adelete_many_by_id(
+        cls, ids: List[str], parent_path: Path | None
+    ) -> Dict[str, Exception]:
+        """Async delete_many_by_id: deletes on the datamodel I/O pool, without blocking the event loop. See async_io.py."""
+        return await run_datamodel_io(cls.delete_many_by_id, ids, parent_path)
+
 
 # Parent create methods for all child relationships
 # You must pass in parent_of in the subclass definition, defining the child relationships
@@ -442,13 +842,78 @@ class KilnParentModel(KilnBaseModel, metaclass=ABCMeta):
     def _create_child_method(
         cls, relationship_name: str, child_class: Type[KilnParentedModel]
     ):
-        def child_method(self, readonly: bool = False) -> list[child_class]:
-            return child_class.all_children_of_parent_path(self.path, readonly=readonly)
+        def child_method(
+            self, readonly: bool = False, max_workers: int = 1
+        ) -> List[KilnParentedModel]:
+            return child_class.all_children_of_parent_path(
+                self.path, readonly=readonly, max_workers=max_workers
+            )
 
         child_method.__name__ = relationship_name
         child_method.__annotations__ = {"return": List[child_class]}
         setattr(cls, relationship_name, child_method)
 
+        # Async twin, for example task.aruns(). See async_io.py.
+        async def async_child_method(
+            self, readonly: bool = False, max_workers: int = 1
+        ) -> List[KilnParentedModel]:
+            return await run_datamodel_io(
+                child_class.all_children_of_parent_path,
+                self.path,
+                readonly=readonly,
+                max_workers=max_workers,
+            )
+
+        async_child_method.__name__ = f"a{relationship_name}"
+        async_child_method.__annotations__ = {"return": List[child_class]}
+        setattr(cls, f"a{relationship_name}", async_child_method)
+
+    @classmethod
+    def _child_class(cls, relationship: str) -> Type[KilnParentedModel]:
+        child_class = cls._parent_of.get(relationship)
+        if child_class is None:
+            raise ValueError(
+                f"{cls.__name__} has no child relationship named '{relationship}'"
+            )
+        return child_class
+
+    def count_children(self, relationship: str) -> int:
+        """
+        Number of children in a relationship, for example task.count_children("runs"). Cheaper than len(task.runs()): children are counted from the file system, not loaded.
+
+        Raises:
+            ValueError: If the relationship doesn't exist
+        """
+        return self._child_class(relationship).count_children_of_parent_path(self.path)
+
+    async def acount_children(self, relationship: str) -> int:
+        """Async count_children, see async_io.py."""
+        return await run_datamodel_io(self.count_children, relationship)
+
+    def has_child(self, relationship: str, id: str) -> bool:
+        """
+        Whether a child with this ID exists in a relationship, without loading it.
+
+        Raises:
+            ValueError: If the relationship doesn't exist
+        """
+        return self._child_class(relationship).child_exists(id, self.path)
+
+    async def ahas_child(self, relationship: str, id: str) -> bool:
+        """Async has_child, see async_io.py."""
+        return await run_datamodel_io(self.has_child, relationship, id)
+
+    def child_counts(self) -> Dict[str, int]:
+        """Number of children in each relationship."""
+        return {
+            relationship: self.count_children(relationship)
+            for relationship in self._parent_of
+        }
+
+    async def achild_counts(self) -> Dict[str, int]:
+        """Async child_counts, see async_io.py."""
+        return await run_datamodel_io(self.child_counts)
+
     @classmethod
     def _create_parent_methods(
         cls, targetCls: Type[KilnParentedModel], relationship_name: str
@@ -495,17 +960,23 @@ class KilnParentModel(KilnBaseModel, metaclass=ABCMeta):
         Raises:
             ValidationError: If validation fails for the model or any of its children
         """
-        # Validate first, then save. Don't want error half way through, and partly persisted
-        # We should save to a tmp dir and move atomically, but need to merge directories later.
-        cls._validate_nested(data, save=False, path=path, parent=parent)
-        instance = cls._validate_nested(data, save=True, path=path, parent=parent)
+        # Avoid circular import
+        from kiln_ai.datamodel.bulk_writer import bulk_writer
+
+        # Validate everything in one pass, collecting the models to save. Only save if every model is valid.
+        # The bulk writer publishes the tree atomically, so we never leave a partly persisted tree. No fsync, matching
+        # save_to_file: this is the create/update path for projects and tasks, not a bulk import.
+        to_save: List[KilnBaseModel] = []
+        instance = cls._validate_nested(data, to_save=to_save, path=path, parent=parent)
+        with bulk_writer(fsync=False) as writer:
+            writer.add_all(to_save)
         return instance
 
     @classmethod
     def _validate_nested(
         cls,
         data: Dict[str, Any],
-        save: bool = False,
+        to_save: List[KilnBaseModel] | None = None,
         parent: KilnBaseModel | None = None,
         path: Path | None = None,
     ):
@@ -518,8 +989,8 @@ class KilnParentModel(KilnBaseModel, metaclass=ABCMeta):
                 instance.path = path
             if parent is not None and isinstance(instance, KilnParentedModel):
                 instance.parent = parent
-            if save:
-                instance.save_to_file()
+            if to_save is not None:
+                to_save.append(instance)
         except ValidationError as e:
             instance = None
             for suberror in e.errors():
@@ -535,7 +1006,7 @@ class KilnParentModel(KilnBaseModel, metaclass=ABCMeta):
                 for value_index, value in enumerate(value_list):
                     try:
                         if issubclass(parent_type, KilnParentModel):
-                            kwargs = {"data": value, "save": save}
+                            kwargs = {"data": value, "to_save": to_save}
                             if instance is not None:
                                 kwargs["parent"] = instance
                             parent_type._validate_nested(**kwargs)
@@ -544,8 +1015,8 @@ class KilnParentModel(KilnBaseModel, metaclass=ABCMeta):
                             subinstance = parent_type.model_validate(value)
                             if instance is not None:
                                 subinstance.parent = instance
-                            if save:
-                                subinstance.save_to_file()
+                            if to_save is not None:
+                                to_save.append(subinstance)
                         else:
                             raise ValueError(
                                 f"Invalid type {parent_type}. Should be KilnBaseModel based."
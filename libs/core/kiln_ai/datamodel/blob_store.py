@@ -0,0 +1,233 @@
+"""
+Optional content-addressed storage for large text fields, shared across a project.
+
+Evals copy each dataset item's input (and often the output) into every EvalRun, so running several eval configs over several run configs saves the same large strings many times. With the blob store enabled (the `blob_store` setting, or KILN_BLOB_STORE), large values of blob fields are saved once per project, keyed by their SHA-256 hash, and model files hold a short reference instead:
+
+    project folder/.kiln_blobs/3f/3fa4...e1                 the UTF-8 text
+    "input": "kiln_blob::sha256:3fa4...e1"                  in task_run.kiln / eval_run.kiln
+
+ - Blob fields are declared with a field serializer and validator (see TaskRun.input, TaskOutput.output, EvalRun.input/output). Values under BLOB_MIN_CHARS are always stored inline.
+ - References are resolved when the model is loaded, so models always hold the text. Resolved text is interned by hash: models with the same input share one string in memory.
+ - Saved text which starts with BLOB_MARKER but isn't a reference is escaped with BLOB_ESCAPE_PREFIX (whether or not the store is enabled), and unescaped on load, so user text is never mistaken for a reference.
+ - Files with references are readable whether or not the setting is enabled. Older versions of Kiln can't resolve references, so only enable it if everyone working on the project is on a version with blob support.
+ - Blobs are immutable and written atomically. Blobs no longer referenced (for example after deleting runs) are not removed.
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Set
+
+from kiln_ai.utils.config import Config
+
+BLOBS_DIRNAME = ".kiln_blobs"
+BLOB_MARKER = "kiln_blob::"
+BLOB_REF_PREFIX = BLOB_MARKER + "sha256:"
+BLOB_ESCAPE_PREFIX = BLOB_MARKER + "text:"
+# Smaller values are stored inline: the reference and extra file aren't worth it
+BLOB_MIN_CHARS = 1024
+# Resolved text kept in memory, shared by every model referencing it
+DEFAULT_MAX_CACHED_CHARS = 64 * 1024 * 1024
+
+_PROJECT_FILENAME = "project.kiln"
+_HASH_CHARS = frozenset("0123456789abcdef")
+
+
+def blob_store_enabled() -> bool:
+    return Config.shared().blob_store is True
+
+
+def is_blob_ref(value: Any) -> bool:
+    """A reference written by the store: the prefix and a SHA-256 hex digest."""
+    return (
+        isinstance(value, str)
+        and len(value) == len(BLOB_REF_PREFIX) + 64
+        and value.startswith(BLOB_REF_PREFIX)
+        and all(c in _HASH_CHARS for c in value[len(BLOB_REF_PREFIX) :])
+    )
+
+
+class BlobStore:
+    _instances: ClassVar[Dict[str, "BlobStore"]] = {}
+    # Folder -> project folder containing it, so finding a model's store costs no stats after the first lookup
+    _project_folders: ClassVar[Dict[str, str]] = {}
+    _instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+        self, project_folder: Path, max_cached_chars: int = DEFAULT_MAX_CACHED_CHARS
+    ):
+        self.folder = Path(project_folder) / BLOBS_DIRNAME
+        self.max_cached_chars = max_cached_chars
+        self._lock = threading.Lock()
+        # hash -> text, least recently used first
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cached_chars = 0
+        # Hashes known to be on disk
+        self._written: Set[str] = set()
+
+    @classmethod
+    def for_model_path(cls, path: Path | str) -> "BlobStore | None":
+        """
+        The store of the project containing a model file, or None if the file isn't in a project folder. The file itself doesn't need to exist yet.
+        """
+        project_folder = cls._project_folder(os.path.dirname(os.path.abspath(path)))
+        if project_folder is None:
+            return None
+        with cls._instances_lock:
+            store = cls._instances.get(project_folder)
+            if store is None:
+                store = cls(Path(project_folder))
+                cls._instances[project_folder] = store
+            return store
+
+    @classmethod
+    def _project_folder(cls, folder: str) -> str | None:
+        visited = []
+        current = folder
+        found = None
+        while True:
+            with cls._instances_lock:
+                found = cls._project_folders.get(current)
+            if found is not None:
+                break
+            visited.append(current)
+            if os.path.isfile(os.path.join(current, _PROJECT_FILENAME)):
+                found = current
+                break
+            parent = os.path.dirname(current)
+            if parent == current:
+                # Not in a project. Not remembered: the project file may be saved later.
+                return None
+            current = parent
+        with cls._instances_lock:
+            for path in visited:
+                cls._project_folders[path] = found
+        return found
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, hash: str) -> Path:
+        return self.folder / hash[:2] / hash
+
+    def put(self, text: str) -> str:
+        """
+        Save text (if not already saved) and return its reference.
+        """
+        hash = self.hash_text(text)
+        if hash not in self._written:
+            path = self._blob_path(hash)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = path.with_name(f".{hash}-{uuid.uuid4().hex}.tmp")
+                with open(temp_path, "wb") as file:
+                    file.write(text.encode("utf-8"))
+                # Content addressed: if another writer won the race, it wrote the same bytes
+                os.replace(temp_path, path)
+            with self._lock:
+                self._written.add(hash)
+        self._remember(hash, text)
+        return BLOB_REF_PREFIX + hash
+
+    def get(self, ref: str) -> str:
+        """
+        The text of a reference. The same string object is returned for every model referencing the same text, while cached.
+
+        Raises:
+            ValueError: If the reference is malformed
+            FileNotFoundError: If the blob is missing
+        """
+        if not is_blob_ref(ref):
+            raise ValueError(f"Invalid blob reference: {ref}")
+        hash = ref[len(BLOB_REF_PREFIX) :]
+        with self._lock:
+            text = self._cache.get(hash)
+            if text is not None:
+                self._cache.move_to_end(hash)
+                return text
+        with open(self._blob_path(hash), "rb") as file:
+            text = file.read().decode("utf-8")
+        return self._remember(hash, text)
+
+    def _remember(self, hash: str, text: str) -> str:
+        with self._lock:
+            cached = self._cache.get(hash)
+            if cached is not None:
+                return cached
+            if len(text) > self.max_cached_chars:
+                return text
+            self._cache[hash] = text
+            self._cached_chars += len(text)
+            while self._cached_chars > self.max_cached_chars:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_chars -= len(evicted)
+            return text
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cached_chars = 0
+
+
+def blob_save_context(path: Path) -> Dict[str, Any]:
+    """
+    Serialization context for saving a model to path: marks the dump as a file save (so values are escaped), and includes the project's blob store if blobs are enabled.
+    """
+    context: Dict[str, Any] = {"saving_to_file": True}
+    if blob_store_enabled():
+        store = BlobStore.for_model_path(path)
+        if store is not None:
+            context["blob_store"] = store
+    return context
+
+
+def serialize_blob_field(value: str, context: Dict[str, Any] | None) -> str:
+    """
+    For field serializers of blob fields: the value to save to a file. A reference if saving with a blob store and the value is large, escaped if it could be mistaken for a reference. Other dumps (API responses, etc) are unchanged.
+    """
+    if not context or not context.get("saving_to_file") or not isinstance(value, str):
+        return value
+    if value.startswith(BLOB_MARKER):
+        return BLOB_ESCAPE_PREFIX + value
+    store = context.get("blob_store")
+    if store is None or len(value) < BLOB_MIN_CHARS:
+        return value
+    return store.put(value)
+
+
+def resolve_blob_field(value: Any, context: Dict[str, Any] | None) -> Any:
+    """
+    For before validators of blob fields: the saved text, when loading from file.
+    """
+    if not context:
+        return value
+    path = context.get("file_path")
+    if path is None:
+        return value
+    return load_blob_value(value, path)
+
+
+def load_blob_value(value: Any, model_path: Path | str) -> Any:
+    """
+    The text of a saved blob field value: resolves references and unescapes escaped text. Anything else (including text saved before escaping existed) is returned as is.
+    """
+    if not isinstance(value, str) or not value.startswith(BLOB_MARKER):
+        return value
+    if value.startswith(BLOB_ESCAPE_PREFIX):
+        return value[len(BLOB_ESCAPE_PREFIX) :]
+    if is_blob_ref(value):
+        return resolve_blob_ref(value, model_path)
+    return value
+
+
+def resolve_blob_ref(ref: str, model_path: Path | str) -> str:
+    store = BlobStore.for_model_path(model_path)
+    if store is None:
+        raise FileNotFoundError(
+            f"Blob reference in {model_path}, which isn't in a project folder"
+        )
+    return store.get(ref)
@@ -0,0 +1,321 @@
+"""
+Bulk, transactional saves of many models at once.
+
+Calling save_to_file() in a loop costs a mkdir, an open/write/close and a cache invalidation per model, and a failure part way through leaves a partially written tree. BulkWriter instead:
+
+ 1. Stages every file into a temporary directory next to the destination (same filesystem, so renames are atomic), writing files on a thread pool.
+ 2. Syncs staged files to disk in batches, with an fsync per file on the thread pool, then syncs the staged folders.
+ 3. Publishes with renames. New folders (for example a new run's "{id} - {name}" folder, or a whole new project tree) are moved into place with a single rename, so readers never see a half written folder. Existing files are replaced with an atomic per-file rename. The destination folders of the renames are then synced, so the renames are durable too.
+ 4. Invalidates the model cache for all written paths in one pass, and updates the run indexes of tasks whose runs were written (run_index.py).
+
+Children of packed relationship folders (see packed_storage.py) are appended to their pack with one write per pack instead.
+
+If anything fails before publishing, nothing is written. Usage:
+
+    with bulk_writer() as writer:
+        for run in runs:
+            writer.add(run)
+
+Or simply KilnBaseModel.save_many(runs).
+"""
+
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from kiln_ai.datamodel.basemodel import KilnBaseModel, KilnParentedModel
+from kiln_ai.datamodel.json_codec import compact_json_enabled
+from kiln_ai.datamodel.model_cache import ModelCache
+from kiln_ai.datamodel.packed_storage import PackStore
+
+STAGING_DIR_PREFIX = ".kiln_bulk_"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SYNC_BATCH_SIZE = 1000
+
+
+class BulkWriter:
+    """
+    Collects models to save, and writes them all on commit(). See module docs.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        sync_batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+        fsync: bool = True,
+    ):
+        self.max_workers = max_workers
+        self.sync_batch_size = sync_batch_size
+        self.fsync = fsync
+        # Keyed by destination, so saving a model twice in one batch writes the last version once
+        self._models: Dict[Path, KilnBaseModel] = {}
+        self._committed = False
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def add(self, model: KilnBaseModel) -> Path:
+        """
+        Queue a model to be saved on commit.
+
+        Returns:
+            Path: The path the model will be saved to
+
+        Raises:
+            ValueError: If the model's path can't be determined (same as save_to_file)
+        """
+        if self._committed:
+            raise ValueError("Bulk writer has already been committed")
+        path = model.build_path()
+        if path is None:
+            raise ValueError(
+                f"Cannot save to file because 'path' is not set. Class: {model.__class__.__name__}, "
+                f"id: {getattr(model, 'id', None)}, path: {path}"
+            )
+        path = Path(os.path.abspath(path))
+        self._models.pop(path, None)
+        self._models[path] = model
+        return path
+
+    def add_all(self, models: Iterable[KilnBaseModel]) -> None:
+        for model in models:
+            self.add(model)
+
+    def abort(self) -> None:
+        """Discard all queued models without writing anything."""
+        self._models = {}
+        self._committed = True
+
+    def commit(self) -> None:
+        """Write all queued models. Nothing is published if staging fails."""
+        if self._committed:
+            raise ValueError("Bulk writer has already been committed")
+        self._committed = True
+        if not self._models:
+            return
+
+        loose, packed = self._split_packed()
+        if loose:
+            staging_root, base = self._create_staging_dir(list(loose))
+            try:
+                # Plain string paths below: pathlib overhead is significant at 100k files
+                # base is an ancestor of every path, so a prefix slice is a (much faster) relpath
+                prefix_length = len(os.path.join(base, ""))
+                relative_paths = [str(path)[prefix_length:] for path in loose]
+                self._stage(staging_root, base, list(loose.values()), relative_paths)
+                self._write_packed(packed)
+                published_dirs = self._publish(staging_root, base, relative_paths)
+                if self.fsync:
+                    for published_dir in published_dirs:
+                        _sync_dir(published_dir)
+            finally:
+                shutil.rmtree(staging_root, ignore_errors=True)
+        else:
+            self._write_packed(packed)
+
+        cache = ModelCache.shared()
+        for path, model in self._models.items():
+            # save the path so even if something like name changes, the file doesn't move (same as save_to_file)
+            model.path = path
+            cache.invalidate(path)
+
+        # Avoid circular import
+        from kiln_ai.datamodel.run_index import runs_saved
+        from kiln_ai.datamodel.task_run import TaskRun
+
+        runs_saved(
+            path for path, model in self._models.items() if isinstance(model, TaskRun)
+        )
+
+    def _split_packed(
+        self,
+    ) -> Tuple[
+        Dict[Path, KilnBaseModel], Dict[PackStore, List[Tuple[str, KilnBaseModel]]]
+    ]:
+        # Children of packed relationship folders are appended to the pack instead of written as files. See packed_storage.py.
+        loose: Dict[Path, KilnBaseModel] = {}
+        packed: Dict[PackStore, List[Tuple[str, KilnBaseModel]]] = {}
+        # One stat per relationship folder, not per model
+        stores: Dict[Path, PackStore | None] = {}
+        for path, model in self._models.items():
+            store = None
+            if isinstance(model, KilnParentedModel):
+                relationship_folder = path.parent.parent
+                if relationship_folder not in stores:
+                    stores[relationship_folder] = PackStore.for_folder(
+                        relationship_folder
+                    )
+                store = stores[relationship_folder]
+            # A loose file left in a packed folder takes precedence, keep saving it in place (same as save_to_file)
+            if store is None or path.exists():
+                loose[path] = model
+            else:
+                packed.setdefault(store, []).append((path.parent.name, model))
+        return loose, packed
+
+    def _write_packed(
+        self, packed: Dict[PackStore, List[Tuple[str, KilnBaseModel]]]
+    ) -> None:
+        for store, models in packed.items():
+            # One append (and sync) per pack
+            store.write_many(
+                [
+                    (
+                        dirname,
+                        model.file_json(
+                            store.relationship_folder / dirname / model.base_filename(),
+                            compact=True,
+                        ),
+                    )
+                    for dirname, model in models
+                ],
+                fsync=self.fsync,
+            )
+
+    def _create_staging_dir(self, paths: List[Path]) -> Tuple[str, str]:
+        # Stage under the nearest existing ancestor of all destinations, so renames stay on one filesystem
+        base = os.path.commonpath([os.path.dirname(path) for path in paths])
+        while not os.path.exists(base):
+            base = os.path.dirname(base)
+        staging_root = os.path.join(base, f"{STAGING_DIR_PREFIX}{uuid.uuid4().hex}")
+        os.mkdir(staging_root)
+        return staging_root, base
+
+    def _stage(
+        self,
+        staging_root: str,
+        destination_root: str,
+        models: List[KilnBaseModel],
+        relative_paths: List[str],
+    ) -> None:
+        compact = compact_json_enabled()
+        # Each worker task writes a chunk of files, to keep executor overhead low
+        chunk_size = max(1, min(64, self.sync_batch_size))
+
+        def write_chunk(start: int) -> None:
+            for index in range(start, min(start + chunk_size, len(models))):
+                data = models[index].file_json(
+                    Path(destination_root, relative_paths[index]), compact=compact
+                )
+                staged_path = os.path.join(staging_root, relative_paths[index])
+                os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+                with open(staged_path, "wb") as file:
+                    file.write(data)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch_start in range(0, len(models), self.sync_batch_size):
+                batch_end = min(batch_start + self.sync_batch_size, len(models))
+                list(
+                    executor.map(write_chunk, range(batch_start, batch_end, chunk_size))
+                )
+                if self.fsync:
+                    self._sync_batch(
+                        executor,
+                        [
+                            os.path.join(staging_root, relative_path)
+                            for relative_path in relative_paths[batch_start:batch_end]
+                        ],
+                    )
+            if self.fsync:
+                # Folder entries of staged files. Renames keep the inode, so syncing before publishing is enough.
+                staged_dirs: Set[str] = set()
+                for relative_path in relative_paths:
+                    relative_dir = os.path.dirname(relative_path)
+                    while relative_dir and relative_dir not in staged_dirs:
+                        staged_dirs.add(relative_dir)
+                        relative_dir = os.path.dirname(relative_dir)
+                list(
+                    executor.map(
+                        _sync_dir,
+                        [
+                            os.path.join(staging_root, relative_dir)
+                            for relative_dir in staged_dirs
+                        ],
+                    )
+                )
+
+    def _sync_batch(self, executor: ThreadPoolExecutor, paths: List[str]) -> None:
+        # fsync only what we wrote: a global sync() would flush every dirty page on the machine
+        def sync_file(path: str) -> None:
+            with open(path, "rb+") as file:
+                os.fsync(file.fileno())
+
+        list(executor.map(sync_file, paths))
+
+    def _publish(
+        self, staging_root: str, base: str, relative_paths: List[str]
+    ) -> Set[str]:
+        """Move staged files into place. Returns the destination folders whose entries changed."""
+        changed_dirs: Set[str] = set()
+        # Directories moved wholesale (destination didn't exist), so we can undo on failure
+        moved_dirs: List[Tuple[str, str]] = []
+        # relative dir -> True if it already existed at the destination, False if we moved it into place
+        dir_existed: Dict[str, bool] = {}
+        try:
+            for relative_path in relative_paths:
+                parts = relative_path.split(os.sep)
+                published = False
+                for depth in range(1, len(parts)):
+                    relative_dir = os.sep.join(parts[:depth])
+                    existed = dir_existed.get(relative_dir)
+                    if existed is None:
+                        dest_dir = os.path.join(base, relative_dir)
+                        existed = os.path.exists(dest_dir)
+                        if not existed:
+                            staged_dir = os.path.join(staging_root, relative_dir)
+                            os.rename(staged_dir, dest_dir)
+                            moved_dirs.append((staged_dir, dest_dir))
+                            changed_dirs.add(os.path.dirname(dest_dir))
+                        dir_existed[relative_dir] = existed
+                    if not existed:
+                        # This folder (and everything staged under it) was moved into place
+                        published = True
+                        break
+                if not published:
+                    dest_path = os.path.join(base, relative_path)
+                    os.replace(os.path.join(staging_root, relative_path), dest_path)
+                    changed_dirs.add(os.path.dirname(dest_path))
+        except Exception:
+            # Roll back new folders. Files replaced in existing folders can't be restored, but are each complete.
+            for staged_dir, dest_dir in reversed(moved_dirs):
+                try:
+                    os.rename(dest_dir, staged_dir)
+                except OSError:
+                    pass
+            raise
+        return changed_dirs
+
+
+def _sync_dir(path: str) -> None:
+    # Persists a folder's entries (creates and renames). Windows can't open folders for fsync, and NTFS journals metadata anyway.
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def bulk_writer(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    sync_batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+    fsync: bool = True,
+) -> Iterator[BulkWriter]:
+    """
+    Context manager for a BulkWriter. Commits on exit, or writes nothing if the block raises.
+    """
+    writer = BulkWriter(
+        max_workers=max_workers, sync_batch_size=sync_batch_size, fsync=fsync
+    )
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
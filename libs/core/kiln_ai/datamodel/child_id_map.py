@@ -0,0 +1,68 @@
+"""
+ID to folder lookup for child models.
+
+Child models are saved in folders named "{id} - {name}" (see KilnParentedModel.build_child_dirname), so we can find a child by ID from the folder names alone, without loading every child. We keep one map per relationship folder, rebuilt (one scandir) when the folder's mtime changes, which happens when a child folder is added, removed or renamed.
+
+The map is only a hint: callers must verify the in-file ID of the model found. A change within the filesystem's timestamp granularity can leave the map stale, so callers invalidate and rebuild it once before treating an ID as missing. A child whose folder was renamed by hand so its name no longer starts with its ID can't be found by ID.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Separator between the ID and name in child folder names
+CHILD_DIRNAME_SEPARATOR = " - "
+
+
+def id_from_child_dirname(dirname: str) -> str:
+    return dirname.split(CHILD_DIRNAME_SEPARATOR, 1)[0]
+
+
+class ChildIdMap:
+    _shared_instance = None
+
+    def __init__(self):
+        # relationship folder -> (folder mtime_ns, {id: dirname})
+        self._maps: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "ChildIdMap":
+        if cls._shared_instance is None:
+            cls._shared_instance = cls()
+        return cls._shared_instance
+
+    def dirname_for_id(self, relationship_folder: Path, id: str) -> str | None:
+        """
+        The name of the child folder for this ID, if one exists. Costs one stat when the folder hasn't changed.
+        """
+        folder = os.fspath(relationship_folder)
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._maps.get(folder)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1].get(id)
+
+        id_map: Dict[str, str] = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        id_map.setdefault(id_from_child_dirname(entry.name), entry.name)
+        except OSError:
+            return None
+        with self._lock:
+            self._maps[folder] = (mtime_ns, id_map)
+        return id_map.get(id)
+
+    def invalidate(self, relationship_folder: Path) -> None:
+        with self._lock:
+            self._maps.pop(os.fspath(relationship_folder), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._maps.clear()
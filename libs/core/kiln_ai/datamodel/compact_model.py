@@ -0,0 +1,167 @@
+"""
+Memory savings for models held in the model cache.
+
+A large task keeps hundreds of thousands of runs in the cache, and much of their memory isn't the payload:
+
+ - Interning: the same short strings (tags, created_by, model and provider names, prompt IDs, DataSource property keys) repeat in every run. intern_model_strings replaces them with one shared instance. Always applied to cached models.
+ - Compact form (model_cache_compact setting): a pydantic model costs a __dict__, a fields-set set and a private attributes dict per instance, for the run and each nested model (output, sources, rating, usage). CompactModel keeps only a tuple of field values, sharing the field-set and private attributes between instances with the same values. Models are rehydrated on access without validation: the cost is close to the structural copy non-readonly callers already get, but readonly callers get a new instance each time instead of the cached one.
+"""
+
+import sys
+from typing import Any, Dict, FrozenSet, Tuple, Type
+
+from pydantic import BaseModel
+
+# Longer strings are rarely repeated (inputs, outputs), interning them would only cost time
+INTERN_MAX_CHARS = 64
+
+# Model class -> names of fields excluded from serialization
+_excluded_fields: Dict[type, FrozenSet[str]] = {}
+# Model class -> field names, in __dict__ order. One tuple shared by every compact model of the class.
+_field_names: Dict[type, Tuple[str, ...]] = {}
+# Shared instances of the field-sets and private attributes of compact models
+_shared_values: Dict[Any, Any] = {}
+
+
+def excluded_field_names(model_class: type) -> FrozenSet[str]:
+    """
+    Fields excluded from serialization (like a child's in memory `parent` reference). They reference other models rather than holding owned data.
+    """
+    excluded = _excluded_fields.get(model_class)
+    if excluded is None:
+        excluded = frozenset(
+            name
+            for name, field in model_class.model_fields.items()  # type: ignore
+            if field.exclude is True
+        )
+        _excluded_fields[model_class] = excluded
+    return excluded
+
+
+def _intern_value(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is str:
+        return sys.intern(value) if len(value) <= INTERN_MAX_CHARS else value
+    if isinstance(value, BaseModel):
+        intern_model_strings(value)
+    elif value_type is list:
+        value[:] = [_intern_value(item) for item in value]
+    elif value_type is dict:
+        return {_intern_value(key): _intern_value(item) for key, item in value.items()}
+    return value
+
+
+def intern_model_strings(model: BaseModel) -> None:
+    """
+    Replace short strings in a model (at any depth, including dict keys) with interned instances, in place. Values are equal, so this is invisible to callers.
+    """
+    excluded = excluded_field_names(type(model))
+    values = vars(model)
+    for name, value in values.items():
+        if name not in excluded:
+            values[name] = _intern_value(value)
+
+
+def _shared(value: Any) -> Any:
+    try:
+        return _shared_values.setdefault(value, value)
+    except TypeError:
+        # Unhashable, keep our own
+        return value
+
+
+class CompactModel:
+    """
+    A model stored as a tuple of field values. See module docs.
+    """
+
+    __slots__ = ("model_class", "names", "values", "fields_set", "private")
+
+    def __init__(
+        self,
+        model_class: Type[BaseModel],
+        names: Tuple[str, ...],
+        values: Tuple[Any, ...],
+        fields_set: FrozenSet[str],
+        private: Tuple[Tuple[str, Any], ...] | None,
+    ):
+        self.model_class = model_class
+        # Shared by every compact model of the class
+        self.names = names
+        self.values = values
+        self.fields_set = fields_set
+        self.private = private
+
+    def field(self, name: str) -> Any:
+        """A field's value, without rehydrating. Nested models are still compact."""
+        return self.values[self.names.index(name)]
+
+    def rehydrate(self) -> BaseModel:
+        """A new model instance, safe to mutate."""
+        model_class = self.model_class
+        values = {
+            name: _rehydrate_value(value)
+            for name, value in zip(self.names, self.values)
+        }
+        # Same as pydantic's __copy__, without validation
+        model = model_class.__new__(model_class)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__pydantic_fields_set__", set(self.fields_set))
+        object.__setattr__(model, "__pydantic_extra__", None)
+        object.__setattr__(
+            model,
+            "__pydantic_private__",
+            None if self.private is None else dict(self.private),
+        )
+        return model
+
+
+def _compact_value(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return compact_model(value)
+    value_type = type(value)
+    if value_type is list:
+        return [_compact_value(item) for item in value]
+    if value_type is dict:
+        return {key: _compact_value(item) for key, item in value.items()}
+    return value
+
+
+def _rehydrate_value(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is CompactModel:
+        return value.rehydrate()
+    if value_type is list:
+        return [_rehydrate_value(item) for item in value]
+    if value_type is dict:
+        return {key: _rehydrate_value(item) for key, item in value.items()}
+    if value_type is set:
+        return set(value)
+    # Immutable values, and references to other models (excluded fields) are shared
+    return value
+
+
+def compact_model(model: BaseModel) -> "CompactModel | BaseModel":
+    """
+    The compact form of a model, or the model itself if it can't be compacted (it has extra fields).
+    """
+    model_class = type(model)
+    if model.__pydantic_extra__:
+        return model
+    names = tuple(model.__dict__)
+    known_names = _field_names.setdefault(model_class, names)
+    if names != known_names:
+        return model
+    excluded = excluded_field_names(model_class)
+    values = tuple(
+        value if name in excluded else _compact_value(value)
+        for name, value in model.__dict__.items()
+    )
+    private = model.__pydantic_private__
+    return CompactModel(
+        model_class,
+        known_names,
+        values,
+        _shared(frozenset(model.__pydantic_fields_set__)),
+        None if private is None else _shared(tuple(private.items())),
+    )
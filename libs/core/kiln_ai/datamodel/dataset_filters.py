@@ -1,11 +1,14 @@
 import re
 from enum import Enum
-from typing import Annotated, ClassVar, List, Protocol
+from typing import TYPE_CHECKING, Annotated, Callable, ClassVar, List, Protocol, cast
 
 from pydantic import AfterValidator
 
 from kiln_ai.datamodel.task_run import TaskRun
 
+if TYPE_CHECKING:
+    from kiln_ai.datamodel.run_index import RunIndexEntry
+
 
 class DatasetFilter(Protocol):
     """A protocol defining the interface for dataset filters.
@@ -60,13 +63,17 @@ class TagFilter:
         return self.tag in task_run.tags
 
 
+# & not preceded by a backslash
+_UNESCAPED_AMPERSAND = re.compile(r"(?<!\\)&")
+
+
 class MultiDatasetFilter:
     """
     A filter that combines multiple filters using AND logic.
     The filters are specified in a query string format after 'multi_filter::'
     Example: multi_filter::high_rating&thinking_model&tag::tag_name
 
-    Ampersands in filter IDs can be escaped with a backslash.
+    Ampersands in filter IDs can be escaped with a backslash. A query:: filter (dataset_query.py) has its own & operator, so it takes the rest of the string and must be last: multi_filter::high_rating&query::tag:a & tag:b
     """
 
     PREFIX: ClassVar[str] = "multi_filter::"
@@ -86,15 +93,35 @@ class MultiDatasetFilter:
         if not content:
             raise ValueError("No filters specified after prefix")
 
-        # Split on unescaped ampersands
-        # This regex matches & that are not preceded by a backslash
-        parts = re.split(r"(?<!\\)&", content)
-
-        # Unescape ampersands in each part
-        filter_ids = [
-            part.replace(cls.ESCAPED_AMPERSAND, cls.UNESCAPED_AMPERSAND)
-            for part in parts
-        ]
+        # Split on unescaped ampersands, until a query
+        filter_ids = []
+        position = 0
+        while True:
+            if content.startswith(DATASET_QUERY_PREFIX, position):
+                # Queries use & as an operator: the query is the rest of the string. Escaped ampersands still work (in a quoted query value, \& is & too).
+                query = content[position:]
+                for part in _UNESCAPED_AMPERSAND.split(query)[1:]:
+                    if part.strip().startswith(
+                        ("tag::", DATASET_QUERY_PREFIX, cls.PREFIX)
+                    ):
+                        raise ValueError(
+                            f"A query:: filter must be the last filter of a multi_filter: {filter_string}"
+                        )
+                filter_ids.append(
+                    query.replace(cls.ESCAPED_AMPERSAND, cls.UNESCAPED_AMPERSAND)
+                )
+                break
+            match = _UNESCAPED_AMPERSAND.search(content, position)
+            end = match.start() if match else len(content)
+            # Unescape ampersands in each part
+            filter_ids.append(
+                content[position:end].replace(
+                    cls.ESCAPED_AMPERSAND, cls.UNESCAPED_AMPERSAND
+                )
+            )
+            if match is None:
+                break
+            position = match.end()
 
         # Validate each filter ID using the existing validation
         for fid in filter_ids:
@@ -119,6 +146,10 @@ class MultiDatasetFilter:
         return all(f(task_run) for f in self.filters)
 
 
+# Dataset filter queries, see dataset_query.py
+DATASET_QUERY_PREFIX = "query::"
+
+
 class StaticDatasetFilters(str, Enum):
     """Dataset filter names."""
 
@@ -145,6 +176,8 @@ A pydantic type that validates strings containing a valid dataset filter ID.
 Dataset filter IDs can be one of:
 - A built-in dataset filter name
 - A tag::<tag> filter, where <tag> is a string
+- A multi_filter:: of the above, combined with AND
+- A query:: expression, with AND/OR/NOT and predicates on tags, ratings, sources, models, dates and eval scores. See dataset_query.py.
 """
 
 
@@ -158,6 +191,14 @@ def _check_dataset_filter_id(id: str) -> str:
     if id.startswith("tag::") and len(id) > 5:
         return id
 
+    if id.startswith(DATASET_QUERY_PREFIX):
+        # Avoid circular import
+        from kiln_ai.datamodel.dataset_query import DatasetQuery
+
+        # Raises a ValueError describing the problem if the query is invalid
+        DatasetQuery(id)
+        return id
+
     if id.startswith(MultiDatasetFilter.PREFIX):
         if not MultiDatasetFilter.is_valid_filter_string(id):
             raise ValueError(f"Invalid multi-filter string: {id}")
@@ -173,6 +214,11 @@ def dataset_filter_from_id(id: DatasetFilterId) -> DatasetFilter:
     if id.startswith("tag::") and len(id) > 5:
         return TagFilter(id[5:])
 
+    if id.startswith(DATASET_QUERY_PREFIX):
+        from kiln_ai.datamodel.dataset_query import DatasetQuery
+
+        return DatasetQuery(id)
+
     if id.startswith(MultiDatasetFilter.PREFIX):
         return MultiDatasetFilter(id)
 
@@ -180,3 +226,67 @@ def dataset_filter_from_id(id: DatasetFilterId) -> DatasetFilter:
         return static_dataset_filters[id]
 
     raise ValueError(f"Invalid dataset filter ID: {id}")
+
+
+# Index filters: the same filters, evaluated against RunIndexEntry metadata instead of a fully loaded TaskRun.
+# Must return exactly the same results as their TaskRun counterparts above.
+IndexFilter = Callable[["RunIndexEntry"], bool]
+
+
+def AllIndexFilter(_: "RunIndexEntry") -> bool:
+    return True
+
+
+def HighRatingIndexFilter(entry: "RunIndexEntry") -> bool:
+    if not entry.has_output:
+        return False
+    if entry.has_repaired_output:
+        # Repairs always considered high quality
+        return True
+    if entry.rating is None:
+        return False
+    return entry.rating.is_high_quality()
+
+
+def ThinkingModelIndexFilter(entry: "RunIndexEntry") -> bool:
+    return entry.has_thinking_training_data
+
+
+def ThinkingModelHighRatedIndexFilter(entry: "RunIndexEntry") -> bool:
+    return ThinkingModelIndexFilter(entry) and HighRatingIndexFilter(entry)
+
+
+static_index_filters = {
+    StaticDatasetFilters.ALL: AllIndexFilter,
+    StaticDatasetFilters.HIGH_RATING: HighRatingIndexFilter,
+    StaticDatasetFilters.THINKING_MODEL: ThinkingModelIndexFilter,
+    StaticDatasetFilters.THINKING_MODEL_HIGH_RATED: ThinkingModelHighRatedIndexFilter,
+}
+
+
+def index_filter_from_id(id: DatasetFilterId) -> IndexFilter:
+    """
+    Get an index filter (evaluated on RunIndexEntry) from a dataset filter ID.
+    """
+    if id.startswith("tag::") and len(id) > 5:
+        tag = id[5:]
+        return lambda entry: tag in entry.tags
+
+    if id.startswith(DATASET_QUERY_PREFIX):
+        from kiln_ai.datamodel.dataset_query import DatasetQuery
+
+        # Entries are filtered one at a time, so queries are evaluated on the loaded run. RunIndex.ids_in_filter pushes queries down to the index instead.
+        query = DatasetQuery(id)
+        return lambda entry: query(entry.load(readonly=True))
+
+    if id.startswith(MultiDatasetFilter.PREFIX):
+        filters = [
+            index_filter_from_id(fid)
+            for fid in MultiDatasetFilter.parse_filter_string(id)
+        ]
+        return lambda entry: all(f(entry) for f in filters)
+
+    if id in static_index_filters:
+        return static_index_filters[cast(StaticDatasetFilters, id)]
+
+    raise ValueError(f"Invalid dataset filter ID: {id}")
@@ -0,0 +1,507 @@
+"""
+Dataset filter queries: boolean expressions over run metadata, usable anywhere a dataset filter ID is (DatasetSplit.filter, Eval.eval_set_filter_id, etc).
+
+    query::tag:golden & (model_name:gpt_4o | model_name:claude_3_5_sonnet) & !tag:bad
+    query::high_rating & created_at>=2025-01-01 & input_source:human
+    query::rating>=4 & has_eval_score:123456789 & output_contains:"refund policy"
+
+Operators: & (and), | (or), ! (not) and parentheses. & binds tighter than |. Values with spaces or operator characters are double quoted, with backslash escapes.
+
+Predicates:
+ - Static filter names: all, high_rating, thinking_model, thinking_model_high_rated
+ - tag:<tag>, model_name:<name>, input_source:<type>, output_source:<type>, rating_type:<type>
+ - rating<op><number>, created_at<op><ISO date or datetime>. op is one of = != < <= > >=. Runs without a rating never match a rating comparison. Timezone aware times are compared in UTC.
+ - has_rating, has_repair, has_eval_score (a score from any eval), has_eval_score:<eval ID>
+ - input_contains:<text>, output_contains:<text>: case-insensitive substring of the full input or output
+
+Query planning: every predicate has a TaskRun implementation, and all but the *_contains predicates have a vectorized one over the run frame (run_frame.py). Evaluated on a frame, a query is bounded by the indexed predicates (runs which certainly match, runs which may match), and only the runs in between are loaded to evaluate the residual predicates. A query without residual predicates loads no runs.
+"""
+
+import operator
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+from kiln_ai.datamodel.dataset_filters import (
+    DATASET_QUERY_PREFIX,
+    StaticDatasetFilters,
+    static_dataset_filters,
+)
+from kiln_ai.datamodel.packed_storage import PackStore
+from kiln_ai.datamodel.run_frame import (
+    RunFrame,
+    naive_utc_datetime,
+    static_frame_filters,
+)
+from kiln_ai.datamodel.sharded_layout import (
+    ShardLayout,
+    is_shard_name,
+    relationship_folder_of_child_path,
+)
+from kiln_ai.datamodel.task_run import TaskRun
+
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<predicate>[A-Za-z_][A-Za-z0-9_]*)
+        (?:\s*(?P<comparison>>=|<=|!=|[:=<>])\s*(?P<value>"(?:[^"\\]|\\.)*"|[^\s()&|"]+))?
+      | (?P<operator>[&|!])
+    )\s*
+    """,
+    re.VERBOSE,
+)
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    ":": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Frame mask and TaskRun test of a predicate. A predicate without a frame mask is residual: evaluated on loaded runs.
+FrameMask = Callable[[RunFrame], np.ndarray]
+RunTest = Callable[[TaskRun], bool]
+
+
+class QueryNode:
+    def matches(self, task_run: TaskRun) -> bool:
+        raise NotImplementedError
+
+    def frame_bounds(self, frame: RunFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (runs which certainly match, runs which may match), as masks. They only differ where a residual predicate decides.
+        """
+        raise NotImplementedError
+
+
+@dataclass
+class Predicate(QueryNode):
+    text: str
+    run_test: RunTest
+    frame_mask: FrameMask | None
+
+    def matches(self, task_run: TaskRun) -> bool:
+        return self.run_test(task_run)
+
+    def frame_bounds(self, frame: RunFrame) -> Tuple[np.ndarray, np.ndarray]:
+        if self.frame_mask is None:
+            return np.zeros(len(frame), dtype=bool), np.ones(len(frame), dtype=bool)
+        mask = self.frame_mask(frame)
+        return mask, mask
+
+
+@dataclass
+class AndNode(QueryNode):
+    children: List[QueryNode]
+
+    def matches(self, task_run: TaskRun) -> bool:
+        return all(child.matches(task_run) for child in self.children)
+
+    def frame_bounds(self, frame: RunFrame) -> Tuple[np.ndarray, np.ndarray]:
+        certain, possible = self.children[0].frame_bounds(frame)
+        for child in self.children[1:]:
+            child_certain, child_possible = child.frame_bounds(frame)
+            certain = certain & child_certain
+            possible = possible & child_possible
+        return certain, possible
+
+
+@dataclass
+class OrNode(QueryNode):
+    children: List[QueryNode]
+
+    def matches(self, task_run: TaskRun) -> bool:
+        return any(child.matches(task_run) for child in self.children)
+
+    def frame_bounds(self, frame: RunFrame) -> Tuple[np.ndarray, np.ndarray]:
+        certain, possible = self.children[0].frame_bounds(frame)
+        for child in self.children[1:]:
+            child_certain, child_possible = child.frame_bounds(frame)
+            certain = certain | child_certain
+            possible = possible | child_possible
+        return certain, possible
+
+
+@dataclass
+class NotNode(QueryNode):
+    child: QueryNode
+
+    def matches(self, task_run: TaskRun) -> bool:
+        return not self.child.matches(task_run)
+
+    def frame_bounds(self, frame: RunFrame) -> Tuple[np.ndarray, np.ndarray]:
+        certain, possible = self.child.frame_bounds(frame)
+        return ~possible, ~certain
+
+
+class DatasetQuery:
+    """
+    A parsed dataset filter query. Callable on a TaskRun, so it's a DatasetFilter. See module docs.
+    """
+
+    PREFIX: ClassVar[str] = DATASET_QUERY_PREFIX
+
+    def __init__(self, filter_id: str):
+        if not filter_id.startswith(self.PREFIX):
+            raise ValueError(f"Dataset query must start with {self.PREFIX}")
+        self.filter_id = filter_id
+        self.root = _Parser(filter_id[len(self.PREFIX) :]).parse()
+
+    def __call__(self, task_run: TaskRun) -> bool:
+        return self.root.matches(task_run)
+
+    def frame_mask(self, frame: RunFrame) -> np.ndarray:
+        """
+        Runs matching the query. Indexed predicates are evaluated on the frame, and only runs the residual predicates decide are loaded.
+        """
+        certain, possible = self.root.frame_bounds(frame)
+        undecided = possible & ~certain
+        if not undecided.any():
+            return certain
+        mask = certain.copy()
+        for i, path in zip(np.flatnonzero(undecided), frame.paths_where(undecided)):
+            try:
+                task_run = TaskRun.load_from_file(path, readonly=True)
+            except FileNotFoundError:
+                # Deleted since the frame was built
+                continue
+            mask[i] = self.root.matches(task_run)
+        return mask
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text = text.strip()
+        self.tokens: List[Tuple[str, Any]] = []
+        position = 0
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                raise ValueError(
+                    f"Invalid dataset query, unexpected character at position {position}: {text}"
+                )
+            position = match.end()
+            if match["paren"]:
+                self.tokens.append(("paren", match["paren"]))
+            elif match["operator"]:
+                self.tokens.append(("operator", match["operator"]))
+            elif match["predicate"]:
+                self.tokens.append(
+                    (
+                        "predicate",
+                        (
+                            match.group(0).strip(),
+                            match["predicate"],
+                            match["comparison"],
+                            _unquote(match["value"]),
+                        ),
+                    )
+                )
+        self.position = 0
+
+    def parse(self) -> QueryNode:
+        if not self.tokens:
+            raise ValueError("Invalid dataset query, no predicates specified")
+        node = self._or()
+        if self.position < len(self.tokens):
+            raise ValueError(
+                f"Invalid dataset query, unexpected '{self._describe()}': {self.text}"
+            )
+        return node
+
+    def _peek(self) -> Tuple[str, Any] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _describe(self) -> str:
+        token = self._peek()
+        if token is None:
+            return "end of query"
+        return token[1][0] if token[0] == "predicate" else token[1]
+
+    def _or(self) -> QueryNode:
+        children = [self._and()]
+        while self._peek() == ("operator", "|"):
+            self.position += 1
+            children.append(self._and())
+        return children[0] if len(children) == 1 else OrNode(children)
+
+    def _and(self) -> QueryNode:
+        children = [self._unary()]
+        while self._peek() == ("operator", "&"):
+            self.position += 1
+            children.append(self._unary())
+        return children[0] if len(children) == 1 else AndNode(children)
+
+    def _unary(self) -> QueryNode:
+        token = self._peek()
+        if token == ("operator", "!"):
+            self.position += 1
+            return NotNode(self._unary())
+        if token == ("paren", "("):
+            self.position += 1
+            node = self._or()
+            if self._peek() != ("paren", ")"):
+                raise ValueError(
+                    f"Invalid dataset query, expected ')' but found '{self._describe()}': {self.text}"
+                )
+            self.position += 1
+            return node
+        if token is not None and token[0] == "predicate":
+            self.position += 1
+            return _predicate(*token[1])
+        raise ValueError(
+            f"Invalid dataset query, expected a predicate but found '{self._describe()}': {self.text}"
+        )
+
+
+def _unquote(value: str | None) -> str | None:
+    if value is None or not value.startswith('"'):
+        return value
+    return re.sub(r"\\(.)", r"\1", value[1:-1])
+
+
+def _output_source_type(task_run: TaskRun) -> str | None:
+    if task_run.output is None or task_run.output.source is None:
+        return None
+    return task_run.output.source.type
+
+
+def _model_name(task_run: TaskRun) -> str | None:
+    if task_run.output is None or task_run.output.source is None:
+        return None
+    model_name = task_run.output.source.properties.get("model_name")
+    return model_name if isinstance(model_name, str) else None
+
+
+def _input_source_type(task_run: TaskRun) -> str | None:
+    if task_run.input_source is None:
+        return None
+    return task_run.input_source.type
+
+
+def _rating_type(task_run: TaskRun) -> str | None:
+    if task_run.output is None or task_run.output.rating is None:
+        return None
+    return task_run.output.rating.type
+
+
+def _rating_value(task_run: TaskRun) -> float | None:
+    if task_run.output is None or task_run.output.rating is None:
+        return None
+    return task_run.output.rating.value
+
+
+# Categorical fields: TaskRun getter, and frame column name
+_categorical_fields: Dict[str, Tuple[Callable[[TaskRun], str | None], str]] = {
+    "model_name": (_model_name, "model_name"),
+    "input_source": (_input_source_type, "input_source_type"),
+    "output_source": (_output_source_type, "output_source_type"),
+    "rating_type": (_rating_type, "rating_type"),
+}
+
+
+def _predicate(
+    text: str, name: str, comparison: str | None, value: str | None
+) -> Predicate:
+    if comparison is None:
+        if name in static_dataset_filters:
+            static_name = StaticDatasetFilters(name)
+            return Predicate(
+                text,
+                static_dataset_filters[static_name],
+                static_frame_filters[static_name],
+            )
+        if name == "has_rating":
+            return Predicate(
+                text,
+                lambda run: _rating_type(run) is not None,
+                lambda frame: frame.rating_type.codes >= 0,
+            )
+        if name == "has_repair":
+            return Predicate(
+                text,
+                lambda run: run.repaired_output is not None,
+                lambda frame: frame.has_repaired_output.copy(),
+            )
+        if name == "has_eval_score":
+            return _eval_score_predicate(text, None)
+        raise ValueError(f"Invalid dataset query, unknown predicate '{text}'")
+
+    assert value is not None
+    if name in ("rating", "created_at"):
+        return _comparison_predicate(text, name, comparison, value)
+
+    if comparison not in (":", "="):
+        raise ValueError(
+            f"Invalid dataset query, '{name}' only supports ':' (equals) in '{text}'"
+        )
+    if name == "tag":
+        return Predicate(
+            text,
+            lambda run: value in run.tags,
+            lambda frame: frame.tag_mask(value),
+        )
+    if name in _categorical_fields:
+        getter, column = _categorical_fields[name]
+        return Predicate(
+            text,
+            lambda run: getter(run) == value,
+            lambda frame: getattr(frame, column).mask_equals(value),
+        )
+    if name == "has_eval_score":
+        return _eval_score_predicate(text, value)
+    if name in ("input_contains", "output_contains"):
+        needle = value.casefold()
+
+        def contains(run: TaskRun) -> bool:
+            if name == "input_contains":
+                haystack = run.input
+            else:
+                haystack = run.output.output if run.output is not None else None
+            return haystack is not None and needle in haystack.casefold()
+
+        # Residual: the index only keeps a preview of the input and output
+        return Predicate(text, contains, None)
+    raise ValueError(f"Invalid dataset query, unknown predicate '{text}'")
+
+
+def _comparison_predicate(
+    text: str, name: str, comparison: str, value: str
+) -> Predicate:
+    compare = _COMPARISONS[comparison]
+    if name == "rating":
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(
+                f"Invalid dataset query, rating must be compared to a number in '{text}'"
+            )
+
+        def rating_test(run: TaskRun) -> bool:
+            rating = _rating_value(run)
+            return rating is not None and compare(rating, number)
+
+        def rating_mask(frame: RunFrame) -> np.ndarray:
+            present = ~np.isnan(frame.rating_value)
+            with np.errstate(invalid="ignore"):
+                return present & compare(frame.rating_value, number)
+
+        return Predicate(text, rating_test, rating_mask)
+
+    try:
+        moment = naive_utc_datetime(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(
+            f"Invalid dataset query, created_at must be compared to an ISO date or datetime in '{text}'"
+        )
+    moment64 = np.datetime64(moment, "us")
+    return Predicate(
+        text,
+        lambda run: compare(naive_utc_datetime(run.created_at), moment),
+        lambda frame: compare(frame.created_at, moment64),
+    )
+
+
+def _eval_score_predicate(text: str, eval_id: str | None) -> Predicate:
+    # Task folder -> (stamps of its eval run folders, IDs of the runs with a score). Reloaded when eval runs are added or removed, so a kept filter isn't stale.
+    scored: Dict[Path, Tuple[Tuple[Any, ...], FrozenSet[str]]] = {}
+
+    def scored_ids(task_folder: Path) -> FrozenSet[str]:
+        # Avoid circular import
+        from kiln_ai.datamodel.eval import EvalRun
+
+        config_paths = _eval_config_paths(task_folder, eval_id)
+        stamps = tuple(
+            (
+                path,
+                _relationship_folder_stamp(path.parent / EvalRun.relationship_name()),
+            )
+            for path in config_paths
+        )
+        cached = scored.get(task_folder)
+        if cached is None or cached[0] != stamps:
+            cached = (stamps, _scored_run_ids(config_paths))
+            scored[task_folder] = cached
+        return cached[1]
+
+    def run_test(run: TaskRun) -> bool:
+        if run.path is None or run.id is None:
+            return False
+        runs_folder = relationship_folder_of_child_path(
+            run.path, TaskRun.relationship_name()
+        )
+        return run.id in scored_ids(runs_folder.parent)
+
+    def frame_mask(frame: RunFrame) -> np.ndarray:
+        ids = scored_ids(frame.runs_folder.parent)
+        return np.fromiter(
+            (id in ids for id in frame.ids), dtype=bool, count=len(frame)
+        )
+
+    return Predicate(text, run_test, frame_mask)
+
+
+def _eval_config_paths(task_folder: Path, eval_id: str | None) -> List[Path]:
+    """The eval config files of the task's evals (or one eval). Eval and config loads are served by the model cache."""
+    # Avoid circular import
+    from kiln_ai.datamodel.task import Task
+
+    task_path = task_folder / Task.base_filename()
+    if not task_path.exists():
+        return []
+    task = Task.load_from_file(task_path, readonly=True)
+    paths = []
+    for eval in task.evals(readonly=True):
+        if eval_id is not None and eval.id != eval_id:
+            continue
+        for eval_config in eval.configs(readonly=True):
+            if eval_config.path is not None:
+                paths.append(eval_config.path)
+    return paths
+
+
+def _relationship_folder_stamp(folder: Path) -> Tuple[int, ...]:
+    """
+    Changes when a child is added to or removed from a relationship folder, in any layout: the folder's mtime, its shards' (sharded_layout.py) and the state of its pack (packed_storage.py). Like ChildIdMap, a change within the filesystem's timestamp granularity can be missed.
+    """
+    try:
+        stamp = [os.stat(folder).st_mtime_ns]
+    except FileNotFoundError:
+        return ()
+    if ShardLayout.for_folder(folder) is not None:
+        with os.scandir(folder) as entries:
+            shards = sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in entries
+                if is_shard_name(entry.name) and entry.is_dir()
+            )
+        stamp += [mtime_ns for _, mtime_ns in shards]
+    store = PackStore.for_folder(folder)
+    if store is not None:
+        # Every put and delete appends a record, so the count and the latest stamp change
+        record_stamps = store.stamps().values()
+        stamp += [len(record_stamps), max(record_stamps, default=0)]
+    return tuple(stamp)
+
+
+def _scored_run_ids(eval_config_paths: List[Path]) -> FrozenSet[str]:
+    """IDs of the task runs scored by these eval configs, read without loading the eval runs."""
+    # Avoid circular import
+    from kiln_ai.datamodel.eval import EvalRun
+
+    ids = set()
+    for config_path in eval_config_paths:
+        for path in EvalRun.iterate_children_paths_of_parent_path(config_path):
+            dataset_id = EvalRun.load_fields(path, ["dataset_id"])["dataset_id"]
+            if dataset_id is not None:
+                ids.add(dataset_id)
+    return frozenset(ids)
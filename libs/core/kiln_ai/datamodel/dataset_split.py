@@ -12,7 +12,6 @@ from kiln_ai.datamodel.basemodel import FilenameString, KilnParentedModel
 from kiln_ai.datamodel.dataset_filters import (
     DatasetFilter,
     DatasetFilterId,
-    dataset_filter_from_id,
 )
 
 if TYPE_CHECKING:
@@ -108,8 +107,9 @@ class DatasetSplit(KilnParentedModel):
         """
         Build a dataset split from a task.
         """
-        filter = dataset_filter_from_id(filter_id)
-        split_contents = cls.build_split_contents(task, splits, filter)
+        # Filter on the run index, so we don't have to load every run to build the split
+        valid_ids = task.run_index().ids_in_filter(filter_id) if task.path else []
+        split_contents = cls.split_ids(valid_ids, splits)
         return cls(
             parent=task,
             name=name,
@@ -127,10 +127,22 @@ class DatasetSplit(KilnParentedModel):
         filter: DatasetFilter,
     ) -> dict[str, list[str]]:
         valid_ids = []
-        for task_run in task.runs():
+        # Readonly: filters only read the runs, no need to copy each one
+        for task_run in task.runs(readonly=True):
             if filter(task_run):
                 valid_ids.append(task_run.id)
+        return cls.split_ids(valid_ids, splits)
 
+    @classmethod
+    def split_ids(
+        cls,
+        valid_ids: list[str],
+        splits: list[DatasetSplitDefinition],
+    ) -> dict[str, list[str]]:
+        """
+        Randomly assign the given task run IDs to the splits, by split percentage.
+        """
+        valid_ids = list(valid_ids)
         # Shuffle and split by split percentage
         random.shuffle(valid_ids)
         split_contents = {}
@@ -1,8 +1,16 @@
 import json
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, List, Union
-
-from pydantic import BaseModel, Field, model_validator
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, FrozenSet, List, Union
+
+from pydantic import (
+    BaseModel,
+    Field,
+    FieldSerializationInfo,
+    ValidationInfo,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
 from typing_extensions import Self
 
 from kiln_ai.datamodel.basemodel import (
@@ -11,6 +19,7 @@ from kiln_ai.datamodel.basemodel import (
     KilnParentedModel,
     KilnParentModel,
 )
+from kiln_ai.datamodel.blob_store import resolve_blob_field, serialize_blob_field
 from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
 from kiln_ai.datamodel.dataset_filters import DatasetFilterId
 from kiln_ai.datamodel.json_schema import string_to_json_key
@@ -105,6 +114,7 @@ class EvalRun(KilnParentedModel):
     output: str = Field(
         description="The output of the task. JSON formatted for structured output, plaintext for unstructured output."
     )
+
     intermediate_outputs: Dict[str, str] | None = Field(
         default=None,
         description="The intermediate outputs of the task (example, eval thinking).",
@@ -117,6 +127,18 @@ class EvalRun(KilnParentedModel):
         description="The usage of the task run that produced this eval run output (not the usage by the evaluation model).",
     )
 
+    # Large values may be saved in the project's blob store. See blob_store.py.
+    blob_fields: ClassVar[FrozenSet[str]] = frozenset({"input", "output"})
+
+    @field_validator("input", "output", mode="before")
+    @classmethod
+    def resolve_blob_fields(cls, value: Any, info: ValidationInfo) -> Any:
+        return resolve_blob_field(value, info.context)
+
+    @field_serializer("input", "output")
+    def serialize_blob_fields(self, value: str, info: FieldSerializationInfo) -> str:
+        return serialize_blob_field(value, info.context)
+
     def parent_eval_config(self) -> Union["EvalConfig", None]:
         if self.parent is not None and self.parent.__class__.__name__ != "EvalConfig":
             raise ValueError("parent must be an EvalConfig")
@@ -223,8 +245,13 @@ class EvalConfig(KilnParentedModel, KilnParentModel, parent_of={"runs": EvalRun}
             raise ValueError("parent must be an Eval")
         return self.parent  # type: ignore
 
-    def runs(self, readonly: bool = False) -> list[EvalRun]:
-        return super().runs(readonly=readonly)  # type: ignore
+    def runs(self, readonly: bool = False, max_workers: int = 1) -> list[EvalRun]:
+        return super().runs(readonly=readonly, max_workers=max_workers)  # type: ignore
+
+    async def aruns(
+        self, readonly: bool = False, max_workers: int = 1
+    ) -> list[EvalRun]:
+        return await super().aruns(readonly=readonly, max_workers=max_workers)  # type: ignore
 
     @model_validator(mode="after")
     def validate_properties(self) -> Self:
@@ -300,6 +327,9 @@ class Eval(KilnParentedModel, KilnParentModel, parent_of={"configs": EvalConfig}
     def configs(self, readonly: bool = False) -> list[EvalConfig]:
         return super().configs(readonly=readonly)  # type: ignore
 
+    async def aconfigs(self, readonly: bool = False) -> list[EvalConfig]:
+        return await super().aconfigs(readonly=readonly)  # type: ignore
+
     @model_validator(mode="after")
     def validate_scores(self) -> Self:
         if self.output_scores is None or len(self.output_scores) == 0:
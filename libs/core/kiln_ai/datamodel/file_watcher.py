@@ -0,0 +1,377 @@
+"""
+File watchers for the model cache.
+
+By default the model cache validates each hit with a stat() call, comparing the file's mtime to the cached one. That's a syscall per hit: listing 50k runs costs 50k stats even when nothing changed, which is slow on network filesystems.
+
+In watcher mode the cache instead registers cached files with a watcher, which reports changes (including external edits like a `git pull` into a project) in the background. Warm hits on watched files cost no syscalls.
+
+ - InotifyWatcher (Linux): kernel change notifications via inotify, one watch per folder containing cached files. No extra dependencies (ctypes). Changes are typically reported within milliseconds. Each run is its own folder, so large projects can exhaust the per-user watch limit (fs.inotify.max_user_watches, often 8192 to 65536): files beyond the limit are watched by polling instead, and a warning is logged.
+ - PollingWatcher (any platform): a background thread re-stats watched files every few seconds. Stats are moved off the hot path, at the cost of a staleness window for external edits of up to the poll interval.
+
+Changes made through the datamodel (save_to_file, delete) invalidate the cache directly, so they are never stale in either mode. Files the watcher can't track (for example records in a packed folder) fall back to per-hit stat validation.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Literal, Set
+
+logger = logging.getLogger(__name__)
+
+WatchMode = Literal["off", "auto", "inotify", "polling"]
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+
+# Called with a path which may have changed
+ChangeCallback = Callable[[Path], None]
+
+
+class FileWatcher(ABC):
+    """
+    Watches a set of files, calling on_change (from a background thread) when one may have changed.
+    """
+
+    def __init__(self, on_change: ChangeCallback):
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @abstractmethod
+    def watch(self, path: Path, mtime_ns: int) -> bool:
+        """
+        Start watching a file, last known to have the given mtime. Returns False if the file can't be watched (caller must validate it another way).
+        """
+        pass
+
+    @abstractmethod
+    def unwatch(self, path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def _run(self) -> None:
+        pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"kiln-{self.__class__.__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop the watcher and release its resources. It can't be restarted."""
+        self.stop()
+
+
+class PollingWatcher(FileWatcher):
+    """
+    Portable fallback: stat every watched file each poll interval, and report files whose mtime changed.
+    """
+
+    def __init__(
+        self,
+        on_change: ChangeCallback,
+        interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    ):
+        super().__init__(on_change)
+        self.interval_seconds = interval_seconds
+        self._mtimes: Dict[Path, int | None] = {}
+
+    def watch(self, path: Path, mtime_ns: int) -> bool:
+        # Not a file we can poll (for example a record in a packed folder), or already changed
+        if self._stat_mtime(path) != mtime_ns:
+            return False
+        with self._lock:
+            self._mtimes[path] = mtime_ns
+        return True
+
+    def unwatch(self, path: Path) -> None:
+        with self._lock:
+            self._mtimes.pop(path, None)
+
+    def _stat_mtime(self, path: Path) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self) -> None:
+        """Check all watched files once."""
+        with self._lock:
+            watched = list(self._mtimes.items())
+        for path, mtime_ns in watched:
+            if self._stat_mtime(path) != mtime_ns:
+                self.unwatch(path)
+                self.on_change(path)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Error polling model files for changes")
+
+
+# inotify constants, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+# Events meaning the watched folder itself is gone (everything in it is stale)
+_FOLDER_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    Linux kernel change notifications. We watch the folder containing each file (which also catches files replaced by rename, as git does), and report changes to the watched files in it.
+
+    Once the inotify watch limit is reached, further folders are watched by a PollingWatcher.
+    """
+
+    def __init__(
+        self,
+        on_change: ChangeCallback,
+        poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    ):
+        super().__init__(on_change)
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._libc = libc
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._fd = fd
+        # Pipe to wake the reader thread on stop
+        self._wake_read, self._wake_write = os.pipe()
+        # folder -> watch descriptor, and reverse
+        self._folder_wds: Dict[str, int] = {}
+        self._wd_folders: Dict[int, str] = {}
+        # folder -> names of watched files in it
+        self._folder_files: Dict[str, Set[str]] = {}
+        # Watches files in folders past the inotify watch limit, created when the limit is first hit
+        self._poll_interval_seconds = poll_interval_seconds
+        self._fallback: PollingWatcher | None = None
+        self._closed = False
+
+    @classmethod
+    def available(cls) -> bool:
+        return _load_libc() is not None
+
+    def watch(self, path: Path, mtime_ns: int) -> bool:
+        folder, name = os.path.split(os.fspath(path))
+        fallback: PollingWatcher | None = None
+        with self._lock:
+            if folder not in self._folder_wds:
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(folder), _WATCH_MASK
+                )
+                if wd < 0:
+                    if ctypes.get_errno() != errno.ENOSPC:
+                        return False
+                    fallback = self._polling_fallback_locked()
+                else:
+                    self._folder_wds[folder] = wd
+                    self._wd_folders[wd] = folder
+                    self._folder_files[folder] = set()
+            if fallback is None:
+                self._folder_files[folder].add(name)
+        if fallback is not None:
+            return fallback.watch(path, mtime_ns)
+        # The file may have changed between the caller reading it and the watch starting. Check once now.
+        try:
+            unchanged = os.stat(path).st_mtime_ns == mtime_ns
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            self.unwatch(path)
+        return unchanged
+
+    def unwatch(self, path: Path) -> None:
+        if self._fallback is not None:
+            self._fallback.unwatch(path)
+        folder, name = os.path.split(os.fspath(path))
+        with self._lock:
+            names = self._folder_files.get(folder)
+            if names is None:
+                return
+            names.discard(name)
+            if not names:
+                self._remove_folder_locked(folder, rm_watch=True)
+
+    def _remove_folder_locked(self, folder: str, rm_watch: bool) -> Set[str]:
+        wd = self._folder_wds.pop(folder, None)
+        names = self._folder_files.pop(folder, set())
+        if wd is not None:
+            self._wd_folders.pop(wd, None)
+            if rm_watch:
+                self._libc.inotify_rm_watch(self._fd, wd)
+        return names
+
+    def _polling_fallback_locked(self) -> PollingWatcher:
+        if self._fallback is None:
+            logger.warning(
+                f"inotify watch limit reached (fs.inotify.max_user_watches). Model cache will watch the remaining files by polling every {self._poll_interval_seconds}s."
+            )
+            self._fallback = PollingWatcher(
+                self.on_change, interval_seconds=self._poll_interval_seconds
+            )
+            if self._thread is not None:
+                self._fallback.start()
+        return self._fallback
+
+    def start(self) -> None:
+        if self._closed:
+            raise ValueError("Watcher has been closed")
+        super().start()
+        with self._lock:
+            if self._fallback is not None:
+                self._fallback.start()
+
+    def stop(self) -> None:
+        if self._closed:
+            return
+        # Set the stop flag before waking the reader, so it exits rather than waiting again
+        self._stop_event.set()
+        os.write(self._wake_write, b"x")
+        super().stop()
+        if self._fallback is not None:
+            self._fallback.stop()
+
+    def close(self) -> None:
+        self.stop()
+        if self._closed:
+            return
+        self._closed = True
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self._fd, self._wake_read], [], [])
+            if self._wake_read in readable:
+                os.read(self._wake_read, 1024)
+            if self._fd not in readable:
+                continue
+            try:
+                data = os.read(self._fd, 256 * 1024)
+            except BlockingIOError:
+                continue
+            try:
+                self._handle_events(data)
+            except Exception:
+                logger.exception("Error handling inotify events")
+
+    def _handle_events(self, data: bytes) -> None:
+        changed: list[Path] = []
+        offset = 0
+        with self._lock:
+            while offset < len(data):
+                wd, mask, _cookie, name_length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + name_length].rstrip(b"\0"))
+                offset += name_length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: anything could have changed
+                    for folder in list(self._folder_files.keys()):
+                        names = self._remove_folder_locked(folder, rm_watch=True)
+                        changed.extend(Path(folder, n) for n in names)
+                    continue
+                folder = self._wd_folders.get(wd)
+                if folder is None:
+                    continue
+                if mask & _FOLDER_GONE:
+                    # Kernel drops the watch itself on delete/IN_IGNORED. Removing twice is harmless.
+                    names = self._remove_folder_locked(
+                        folder, rm_watch=not (mask & IN_IGNORED)
+                    )
+                    changed.extend(Path(folder, n) for n in names)
+                    continue
+                names = self._folder_files.get(folder)
+                if names is not None and name in names:
+                    names.discard(name)
+                    changed.append(Path(folder, name))
+                    if not names:
+                        self._remove_folder_locked(folder, rm_watch=True)
+        # Outside the lock: the callback calls back into unwatch
+        for path in changed:
+            self.on_change(path)
+
+
+def create_watcher(
+    mode: WatchMode,
+    on_change: ChangeCallback,
+    poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+) -> FileWatcher | None:
+    """
+    Create (but don't start) a watcher for the mode. "auto" uses inotify if available, falling back to polling.
+    """
+    if mode == "off":
+        return None
+    if mode in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(on_change, poll_interval_seconds)
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            logger.info(f"inotify unavailable ({e}), using polling file watcher")
+    elif mode != "polling":
+        raise ValueError(
+            f"Invalid model cache watch mode '{mode}'. Valid modes: off, auto, inotify, polling"
+        )
+    return PollingWatcher(on_change, interval_seconds=poll_interval_seconds)
@@ -0,0 +1,189 @@
+"""
+JSON codecs used to read and write .kiln files.
+
+Parsing is a large share of the cost of loading a model, so the backend is pluggable:
+
+ - "pydantic" (default): pydantic-core's Rust JSON parser. Always available.
+ - "json": the Python standard library.
+ - "orjson" / "msgspec": optional fast backends, used if the package is installed.
+
+All codecs write the same JSON content. By default files are written indented for readability (and diffs); the `compact_json` setting writes single line files, which are smaller and faster to write, for projects only consumed by machines.
+
+Select the codec with the `json_codec` setting (or KILN_JSON_CODEC env var).
+"""
+
+import importlib
+import importlib.util
+import json
+from abc import ABC, abstractmethod
+from typing import Any, ClassVar, Dict, List, Set, Type
+
+import pydantic_core
+from pydantic import BaseModel
+
+from kiln_ai.utils.config import Config
+
+DEFAULT_JSON_CODEC = "pydantic"
+
+
+class JsonCodec(ABC):
+    """
+    Converts between .kiln file bytes and python objects.
+    """
+
+    name: ClassVar[str]
+    # Optional package required by this codec, if any
+    requires: ClassVar[str | None] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return (
+            cls.requires is None or importlib.util.find_spec(cls.requires) is not None
+        )
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Parse file contents into python objects (dicts, lists, etc)."""
+        pass
+
+    @abstractmethod
+    def dumps(
+        self,
+        model: BaseModel,
+        compact: bool = False,
+        exclude: Set[str] | None = None,
+        context: Dict[str, Any] | None = None,
+    ) -> bytes:
+        """Serialize a model to file contents (UTF-8 JSON). The context is passed to the model's serializers."""
+        pass
+
+
+class StdlibJsonCodec(JsonCodec):
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(
+        self,
+        model: BaseModel,
+        compact: bool = False,
+        exclude: Set[str] | None = None,
+        context: Dict[str, Any] | None = None,
+    ) -> bytes:
+        return model.model_dump_json(
+            indent=None if compact else 2, exclude=exclude, context=context
+        ).encode("utf-8")
+
+
+class PydanticJsonCodec(JsonCodec):
+    name = "pydantic"
+
+    def loads(self, data: bytes) -> Any:
+        return pydantic_core.from_json(data)
+
+    def dumps(
+        self,
+        model: BaseModel,
+        compact: bool = False,
+        exclude: Set[str] | None = None,
+        context: Dict[str, Any] | None = None,
+    ) -> bytes:
+        # model_dump_json is implemented in pydantic-core, no intermediate python objects
+        return model.model_dump_json(
+            indent=None if compact else 2, exclude=exclude, context=context
+        ).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+    requires = "orjson"
+
+    def __init__(self):
+        self._orjson = importlib.import_module("orjson")
+
+    def loads(self, data: bytes) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(
+        self,
+        model: BaseModel,
+        compact: bool = False,
+        exclude: Set[str] | None = None,
+        context: Dict[str, Any] | None = None,
+    ) -> bytes:
+        option = 0 if compact else self._orjson.OPT_INDENT_2
+        return self._orjson.dumps(
+            model.model_dump(mode="json", exclude=exclude, context=context),
+            option=option,
+        )
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+    requires = "msgspec"
+
+    def __init__(self):
+        self._msgspec_json = importlib.import_module("msgspec.json")
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgspec_json.decode(data)
+
+    def dumps(
+        self,
+        model: BaseModel,
+        compact: bool = False,
+        exclude: Set[str] | None = None,
+        context: Dict[str, Any] | None = None,
+    ) -> bytes:
+        data = self._msgspec_json.encode(
+            model.model_dump(mode="json", exclude=exclude, context=context)
+        )
+        if compact:
+            return data
+        return self._msgspec_json.format(data, indent=2)
+
+
+JSON_CODECS: Dict[str, Type[JsonCodec]] = {
+    codec.name: codec
+    for codec in [PydanticJsonCodec, StdlibJsonCodec, OrjsonCodec, MsgspecCodec]
+}
+
+_codec_instances: Dict[str, JsonCodec] = {}
+
+
+def available_json_codecs() -> List[str]:
+    return [name for name, codec in JSON_CODECS.items() if codec.available()]
+
+
+def json_codec(name: str | None = None) -> JsonCodec:
+    """
+    Get a codec by name, or the codec selected in settings if no name is given.
+
+    Raises:
+        ValueError: If the codec is unknown, or its package is not installed
+    """
+    if name is None:
+        name = Config.shared().json_codec
+        if not isinstance(name, str) or not name:
+            name = DEFAULT_JSON_CODEC
+    codec = _codec_instances.get(name)
+    if codec is not None:
+        return codec
+
+    codec_class = JSON_CODECS.get(name)
+    if codec_class is None:
+        raise ValueError(
+            f"Unknown JSON codec '{name}'. Valid codecs: {', '.join(JSON_CODECS.keys())}"
+        )
+    if not codec_class.available():
+        raise ValueError(
+            f"JSON codec '{name}' requires the '{codec_class.requires}' package, which is not installed."
+        )
+    codec = codec_class()
+    _codec_instances[name] = codec
+    return codec
+
+
+def compact_json_enabled() -> bool:
+    return Config.shared().compact_json is True
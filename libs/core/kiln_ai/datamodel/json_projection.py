@@ -0,0 +1,44 @@
+"""
+Projection loading: read a few fields from a JSON file, without building a model.
+
+Used for listing code paths which need a handful of fields from many files (for example the run index). The file is parsed with the configured JSON codec (json_codec.py, pydantic-core's native parser by default), then the requested fields are picked out. Parsing natively is far cheaper than model validation, and than any attempt to skip unrequested values in Python.
+
+Values are the raw JSON values: no pydantic validation, no defaults, and no legacy format upgrades. Callers are responsible for interpreting them.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+from kiln_ai.datamodel.json_codec import json_codec
+
+
+def load_json_fields(path: Path | str, fields: List[str]) -> Dict[str, Any]:
+    """
+    Read the requested fields from a JSON object file.
+
+    Args:
+        path: path to a file containing a JSON object
+        fields: field names to read. Nested fields use dot notation, for example "output.rating.value".
+
+    Returns:
+        A dict of field name to raw JSON value. Missing fields (or fields nested under a non-object value) are None.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    return project_json_fields(data, fields)
+
+
+def project_json_fields(data: bytes, fields: List[str]) -> Dict[str, Any]:
+    document = json_codec().loads(data)
+    if not isinstance(document, dict):
+        raise ValueError("Projection loading requires a JSON object")
+    return {field: _lookup(document, field.split(".")) for field in fields}
+
+
+def _lookup(document: Dict[str, Any], parts: List[str]) -> Any:
+    value: Any = document
+    for part in parts:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
@@ -10,91 +10,627 @@ Keeping this really simple. Our goal is to really be "disk-backed" data model, s
  - Use path as the cache key
  - Cache always populated from a disk read, so we know it refects what's on disk. Even if we had a memory-constructed version, we don't cache that.
  - Cache the parsed model, not the raw file contents. Parsing and validating is what's expensive. >99% speedup when measured.
+ - Bounded: least recently used entries are evicted when over the entry count or (approximate) byte budget. Size is approximated by the size of the file on disk.
+ - Pinned entries (parent models like projects and tasks, which thousands of children reference) are never evicted.
+ - Optional watcher mode (model_cache_watch_mode setting): a file watcher reports changes in the background, so warm hits on watched files skip the stat call. See file_watcher.py.
+ - Children in packed relationship folders (see packed_storage.py) are records rather than files. They're cached by their usual path, with the record's stamp in place of the mtime.
+ - Optional warm start (model_cache_snapshot setting): the cached models are pickled to a snapshot file periodically and on shutdown. After a restart, snapshot entries are revalidated lazily against the file mtime on first use, so a restart doesn't re-parse every file.
+ - Copies handed out are structural (see copy_model_structure): private models and containers, but sharing immutable values like strings with the cached model. Readonly callers get the cached instance itself.
+ - Repeated short strings (tags, model names, etc) are interned, and with the model_cache_compact setting unpinned models are stored in a compact form, rehydrated on access. See compact_model.py.
 """
 
+import atexit
+import copy
+import hashlib
+import importlib
+import logging
 import os
+import pickle
 import sys
+import threading
+import typing
 import warnings
-from pathlib import Path
-from typing import Dict, Optional, Tuple, Type, TypeVar
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path, PurePath
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+from uuid import UUID
 
+import pydantic
 from pydantic import BaseModel
 
+from kiln_ai.datamodel.compact_model import (
+    CompactModel,
+    compact_model,
+    excluded_field_names,
+    intern_model_strings,
+)
+from kiln_ai.datamodel.file_watcher import (
+    DEFAULT_POLL_INTERVAL_SECONDS,
+    FileWatcher,
+    WatchMode,
+    create_watcher,
+)
+from kiln_ai.datamodel.packed_storage import packed_record_stamp
+from kiln_ai.datamodel.process_lock import register_process
+from kiln_ai.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T", bound=BaseModel)
 
+# Default budget of serialized (on disk) bytes. In-memory size of parsed models is a small multiple of this.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Increment when changing the snapshot file layout. Older snapshots are ignored.
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILENAME = "model_cache.snapshot"
+DEFAULT_SNAPSHOT_INTERVAL_SECONDS = 300
+
+# Values of these types can't be mutated in place, so copies can share them
+_IMMUTABLE_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    bool,
+    type(None),
+    Enum,
+    datetime,
+    date,
+    time,
+    timedelta,
+    Decimal,
+    UUID,
+    PurePath,
+    type,
+)
+# Fast path for the common exact types, before the isinstance check
+_IMMUTABLE_EXACT_TYPES = frozenset([str, int, float, bool, type(None), datetime])
+
+
+def copy_model_structure(value: Any) -> Any:
+    """
+    Copy a model so the copy is safe to mutate, without duplicating immutable data.
+
+    Models, lists, dicts and sets are copied (so assignments and in-place edits at any depth only affect the copy), while immutable values like strings are shared with the original. The payload of a run (inputs, outputs, reasoning) is almost all strings, so this is much faster than deepcopy, and the copy adds little memory.
+
+    Fields excluded from serialization (like a child's in memory `parent` reference) are references to other models, not owned data. They are reset to their defaults rather than shared: a cached child's parent is a shared, read-only instance, which a mutable copy must not alias. A copied child lazy loads its own parent from its path. Private attributes are copied shallowly, as model_copy() does.
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_EXACT_TYPES or isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    if isinstance(value, BaseModel):
+        return _copy_model(value)
+    if value_type is CompactModel:
+        return value.rehydrate()
+    if value_type is list:
+        return [copy_model_structure(item) for item in value]
+    if value_type is dict:
+        return {key: copy_model_structure(item) for key, item in value.items()}
+    if value_type is tuple:
+        return tuple(copy_model_structure(item) for item in value)
+    if value_type is set:
+        # Set members are hashable, and in practice immutable
+        return set(value)
+    return copy.deepcopy(value)
+
+
+def _copy_model(model: BaseModel) -> BaseModel:
+    model_class = type(model)
+    excluded = excluded_field_names(model_class)
+    values = {}
+    for name, value in model.__dict__.items():
+        if name in excluded:
+            values[name] = model_class.model_fields[name].get_default(
+                call_default_factory=True
+            )
+        else:
+            values[name] = copy_model_structure(value)
+
+    # Same as pydantic's __copy__, but with our copies of the field values
+    copied = model_class.__new__(model_class)
+    object.__setattr__(copied, "__dict__", values)
+    object.__setattr__(
+        copied, "__pydantic_fields_set__", set(model.__pydantic_fields_set__)
+    )
+    object.__setattr__(
+        copied,
+        "__pydantic_extra__",
+        None
+        if model.__pydantic_extra__ is None
+        else copy_model_structure(model.__pydantic_extra__),
+    )
+    object.__setattr__(
+        copied,
+        "__pydantic_private__",
+        None
+        if model.__pydantic_private__ is None
+        else dict(model.__pydantic_private__),
+    )
+    return copied
+
+
+@dataclass
+class ModelCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    pinned: int
+    max_entries: int | None
+    max_bytes: int | None
+    # Entries validated by the file watcher (no stat on hit)
+    watched: int = 0
+    # Entries loaded from a snapshot, not yet used (or revalidated) since startup
+    snapshot_pending: int = 0
+
 
 class ModelCache:
     _shared_instance = None
 
-    def __init__(self):
-        # Store both the model and the modified time of the cached file contents
-        self.model_cache: Dict[Path, Tuple[BaseModel, int]] = {}
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        watch_mode: WatchMode = "off",
+        poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        compact: bool = False,
+    ):
+        # Store both the model and the modified time of the cached file contents. Ordered by recency of use (LRU first).
+        self.model_cache: OrderedDict[Path, Tuple[BaseModel | CompactModel, int]] = (
+            OrderedDict()
+        )
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Store unpinned models in compact form, see compact_model.py
+        self.compact = compact
+        self._sizes: Dict[Path, int] = {}
+        self._pinned: Set[Path] = set()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # Reentrant: invalidate is called from inside other locked methods
+        self._lock = threading.RLock()
         self._enabled = self._check_timestamp_granularity()
         if not self._enabled:
             warnings.warn(
                 "File system does not support fine-grained timestamps. "
                 "Model caching has been disabled to ensure consistency."
             )
+        self._watched: Set[Path] = set()
+        self._watcher: FileWatcher | None = None
+        # Entries from a snapshot, moved into the cache on first use if the file is unchanged: path -> (model, mtime_ns, size_bytes, pinned)
+        self._snapshot: Dict[Path, Tuple[BaseModel | CompactModel, int, int, bool]] = {}
+        self._snapshot_path: Path | None = None
+        # Incremented on every change, so periodic snapshots are only written when something changed
+        self._changes = 0
+        self._snapshot_saved_changes = 0
+        self._snapshot_stop = threading.Event()
+        self._snapshot_thread: threading.Thread | None = None
+        self._snapshot_save_lock = threading.Lock()
+        if self._enabled:
+            try:
+                self._watcher = create_watcher(
+                    watch_mode, self._on_file_changed, poll_interval_seconds
+                )
+            except (ValueError, OSError) as e:
+                warnings.warn(
+                    f"Model cache file watcher disabled, validating with stat: {e}"
+                )
+            if self._watcher is not None:
+                self._watcher.start()
 
     @classmethod
     def shared(cls):
         if cls._shared_instance is None:
-            cls._shared_instance = cls()
+            # Lets offline tools rewriting project files see this process is running. See process_lock.py.
+            register_process()
+            config = Config.shared()
+            max_bytes = config.model_cache_max_bytes
+            if max_bytes is None:
+                max_bytes = DEFAULT_MAX_BYTES
+            cls._shared_instance = cls(
+                max_entries=config.model_cache_max_entries,
+                # 0 disables the byte budget
+                max_bytes=max_bytes or None,
+                watch_mode=config.model_cache_watch_mode or "off",
+                compact=config.model_cache_compact is True,
+            )
+            if config.model_cache_snapshot:
+                cls._shared_instance.enable_snapshots(
+                    default_snapshot_path(),
+                    config.model_cache_snapshot_interval_seconds
+                    or DEFAULT_SNAPSHOT_INTERVAL_SECONDS,
+                )
         return cls._shared_instance
 
     def _is_cache_valid(self, path: Path, cached_mtime_ns: int) -> bool:
+        if path in self._watched:
+            # The watcher invalidates the entry if the file changes, no need to stat
+            return True
         try:
             current_mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            # Children in a packed folder have no file of their own, the record stamp stands in for the mtime
+            current_mtime_ns = packed_record_stamp(path)
         except Exception:
             return False
         return cached_mtime_ns == current_mtime_ns
 
-    def _get_model(self, path: Path, model_type: Type[T]) -> Optional[T]:
-        if path not in self.model_cache:
-            return None
-        model, cached_mtime_ns = self.model_cache[path]
-        if not self._is_cache_valid(path, cached_mtime_ns):
-            self.invalidate(path)
-            return None
+    def _get_model(self, path: Path, model_type: Type[T]) -> Optional[T | CompactModel]:
+        # The lock is only held for the lookups, not the stat validating the entry, so readers aren't serialized on filesystem latency
+        with self._lock:
+            entry = self.model_cache.get(path)
+            snapshot_entry = None
+            if entry is not None:
+                mtime_ns = entry[1]
+            else:
+                snapshot_entry = self._snapshot.pop(path, None)
+                if snapshot_entry is None:
+                    self._misses += 1
+                    return None
+                mtime_ns = snapshot_entry[1]
 
-        if not isinstance(model, model_type):
-            self.invalidate(path)
-            raise ValueError(f"Model at {path} is not of type {model_type.__name__}")
-        return model
+        # Snapshot entries are revalidated lazily, when first used
+        valid = self._is_cache_valid(path, mtime_ns)
+        if valid and snapshot_entry is not None:
+            model, _, size_bytes, pinned = snapshot_entry
+            self.set_model(path, model, mtime_ns, size_bytes, pinned)
+
+        with self._lock:
+            current = self.model_cache.get(path)
+            if not valid:
+                self._misses += 1
+                # Unless it was replaced while we checked
+                if current is not None and current is entry:
+                    self.invalidate(path)
+                return None
+            if current is None or current[1] != mtime_ns:
+                # Invalidated or replaced while we checked, the caller loads from disk
+                self._misses += 1
+                return None
+            entry = current
+            model = entry[0]
+            if not issubclass(_model_class(model), model_type):
+                self.invalidate(path)
+                raise ValueError(
+                    f"Model at {path} is not of type {model_type.__name__}"
+                )
+            self._hits += 1
+            self.model_cache.move_to_end(path)
+            # Checked above: an instance of model_type, or its compact form
+            return cast(T | CompactModel, model)
+
+    @property
+    def enabled(self) -> bool:
+        """False if the filesystem's timestamps are too coarse to validate entries, and nothing is cached."""
+        return self._enabled
 
     def get_model(
         self, path: Path, model_type: Type[T], readonly: bool = False
     ) -> Optional[T]:
         # We return a copy by default, so in-memory edits don't impact the cache until they are saved
-        # Benchmark shows about 2x slower, but much more foolproof
+        # Structural copy: strings are shared with the cached model, so it's far cheaper than a deep copy
         model = self._get_model(path, model_type)
-        if model:
-            if readonly:
-                return model
-            else:
-                return model.model_copy(deep=True)
-        return None
+        if model is None:
+            return None
+        if isinstance(model, CompactModel):
+            # Rehydrated models are new instances, safe to return to any caller
+            return model.rehydrate()  # type: ignore
+        if readonly:
+            return model
+        return copy_model_structure(model)
+
+    def holds_instance(self, path: Path, model: Any) -> bool:
+        """True if model is the cache's own instance for path, as handed to readonly callers. It must not be mutated."""
+        with self._lock:
+            entry = self.model_cache.get(path)
+        return entry is not None and entry[0] is model
 
     def get_model_id(self, path: Path, model_type: Type[T]) -> Optional[str]:
         model = self._get_model(path, model_type)
-        if model and hasattr(model, "id"):
+        if isinstance(model, CompactModel):
+            id = model.field("id") if "id" in model.names else None
+            if isinstance(id, str):
+                return id
+        elif model and hasattr(model, "id"):
             id = model.id  # type: ignore
             if isinstance(id, str):
                 return id
         return None
 
-    def set_model(self, path: Path, model: BaseModel, mtime_ns: int):
+    def set_model(
+        self,
+        path: Path,
+        model: BaseModel | CompactModel,
+        mtime_ns: int,
+        size_bytes: int = 0,
+        pinned: bool = False,
+    ):
+        """
+        Cache a model loaded from disk.
+
+        Args:
+            size_bytes: approximate size of the model, used for the byte budget. We use the size of the file on disk.
+            pinned: if True, the model will not be evicted to make room for others (still invalidated if the file changes).
+        """
         # disable caching if the filesystem doesn't support fine-grained timestamps
         if not self._enabled:
             return
-        self.model_cache[path] = (model, mtime_ns)
+        if isinstance(model, BaseModel):
+            intern_model_strings(model)
+            # Pinned models (parents) stay instances: children reference them, and readonly callers share them
+            if self.compact and not pinned:
+                model = compact_model(model)
+        with self._lock:
+            self.invalidate(path)
+            self.model_cache[path] = (model, mtime_ns)
+            self._sizes[path] = size_bytes
+            self._total_bytes += size_bytes
+            if pinned:
+                self._pinned.add(path)
+            if self._watcher is not None and self._watcher.watch(path, mtime_ns):
+                self._watched.add(path)
+            self._changes += 1
+            self._evict()
+
+    def set_models(self, models: List[Tuple[Path, BaseModel, int, int, bool]]):
+        """
+        Cache many models at once (one lock acquisition). Each item is (path, model, mtime_ns, size_bytes, pinned), see set_model.
+        """
+        with self._lock:
+            for path, model, mtime_ns, size_bytes, pinned in models:
+                self.set_model(path, model, mtime_ns, size_bytes, pinned)
+
+    def pin(self, path: Path):
+        """Prevent a cached model from being evicted. Pins are dropped if the entry is invalidated."""
+        with self._lock:
+            if path in self.model_cache:
+                self._pinned.add(path)
+                model, mtime_ns = self.model_cache[path]
+                if isinstance(model, CompactModel):
+                    self.model_cache[path] = (model.rehydrate(), mtime_ns)
+
+    def unpin(self, path: Path):
+        with self._lock:
+            self._pinned.discard(path)
+            self._evict()
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self.model_cache) > self.max_entries:
+            return True
+        if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+            return True
+        return False
+
+    def _evict(self):
+        # Least recently used first, from the front of the OrderedDict. Pinned entries are moved to the back, so each is skipped at most once.
+        skipped = 0
+        while self._over_budget():
+            path = next(iter(self.model_cache), None)
+            if path is None:
+                return
+            if path in self._pinned:
+                if skipped >= len(self._pinned):
+                    # Only pinned entries left
+                    return
+                self.model_cache.move_to_end(path)
+                skipped += 1
+                continue
+            self.invalidate(path)
+            self._evictions += 1
 
     def invalidate(self, path: Path):
-        if path in self.model_cache:
-            del self.model_cache[path]
+        with self._lock:
+            self._snapshot.pop(path, None)
+            if path in self.model_cache:
+                del self.model_cache[path]
+                self._total_bytes -= self._sizes.pop(path, 0)
+                self._pinned.discard(path)
+                self._changes += 1
+            if path in self._watched:
+                self._watched.discard(path)
+                if self._watcher is not None:
+                    self._watcher.unwatch(path)
+
+    def invalidate_many(self, paths: Iterable[Path]):
+        """Invalidate many paths, taking the lock once."""
+        with self._lock:
+            for path in paths:
+                self.invalidate(path)
+
+    def _on_file_changed(self, path: Path):
+        # Called from the watcher thread
+        self.invalidate(path)
 
     def clear(self):
-        self.model_cache.clear()
+        with self._lock:
+            self.model_cache.clear()
+            self._sizes.clear()
+            self._pinned.clear()
+            self._total_bytes = 0
+            if self._watcher is not None:
+                for path in self._watched:
+                    self._watcher.unwatch(path)
+            self._watched.clear()
+            self._snapshot.clear()
+            self._changes += 1
+
+    def close(self):
+        """Close the file watcher (if any) and clear the cache. Writes a final snapshot if snapshots are enabled."""
+        self.disable_snapshots()
+        self.clear()
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def stats(self) -> ModelCacheStats:
+        with self._lock:
+            return ModelCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self.model_cache),
+                bytes=self._total_bytes,
+                pinned=len(self._pinned),
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                watched=len(self._watched),
+                snapshot_pending=len(self._snapshot),
+            )
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def save_snapshot(self, path: Path) -> int:
+        """
+        Write the cached models (and snapshot entries not yet used) to a snapshot file, for a warm start after a restart.
+
+        Returns:
+            int: The number of entries written
+        """
+        with self._lock:
+            entries = [
+                (
+                    entry_path,
+                    model,
+                    mtime_ns,
+                    self._sizes.get(entry_path, 0),
+                    entry_path in self._pinned,
+                )
+                for entry_path, (model, mtime_ns) in self.model_cache.items()
+            ]
+            entries.extend(
+                (entry_path, *entry)
+                for entry_path, entry in self._snapshot.items()
+                if entry_path not in self.model_cache
+            )
+            changes = self._changes
+        # Pickle outside the lock. Cached models are never mutated (readonly callers must not mutate them, others get copies).
+        header = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "pydantic": pydantic.VERSION,
+            "classes": _class_fingerprints(
+                {_model_class(entry[1]) for entry in entries}
+            ),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as file:
+                pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(entries, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        self._snapshot_saved_changes = changes
+        return len(entries)
+
+    def load_snapshot(self, path: Path) -> int:
+        """
+        Load a snapshot written by save_snapshot. Entries aren't checked against disk here: each is revalidated against its file's mtime when first used.
+
+        A missing, corrupt or incompatible snapshot (written by a different version of the datamodel) is ignored.
+
+        Returns:
+            int: The number of entries loaded
+        """
+        if not self._enabled:
+            return 0
+        try:
+            with open(path, "rb") as file:
+                header = pickle.load(file)
+                if not _snapshot_header_compatible(header):
+                    logger.info(f"Ignoring incompatible model cache snapshot {path}")
+                    return 0
+                entries = pickle.load(file)
+        except FileNotFoundError:
+            return 0
+        except Exception:
+            logger.warning(
+                f"Ignoring unreadable model cache snapshot {path}", exc_info=True
+            )
+            return 0
+        with self._lock:
+            for entry_path, model, mtime_ns, size_bytes, pinned in entries:
+                if entry_path not in self.model_cache:
+                    self._snapshot[entry_path] = (model, mtime_ns, size_bytes, pinned)
+        return len(entries)
+
+    def enable_snapshots(
+        self,
+        path: Path,
+        interval_seconds: float = DEFAULT_SNAPSHOT_INTERVAL_SECONDS,
+    ):
+        """
+        Warm start: load the snapshot at path in the background, then save it every interval (if anything changed) and on exit.
+        """
+        if not self._enabled or self._snapshot_thread is not None:
+            return
+        self._snapshot_path = path
+        self._snapshot_stop.clear()
+        self._snapshot_thread = threading.Thread(
+            target=self._run_snapshots,
+            args=(path, interval_seconds),
+            name="kiln-model-cache-snapshot",
+            daemon=True,
+        )
+        self._snapshot_thread.start()
+        atexit.register(self.flush_snapshot)
+
+    def _run_snapshots(self, path: Path, interval_seconds: float):
+        # Loading happens here, so startup doesn't wait on it. Until it's loaded, gets are plain misses.
+        self.load_snapshot(path)
+        with self._lock:
+            self._snapshot_saved_changes = self._changes
+        while not self._snapshot_stop.wait(interval_seconds):
+            self.flush_snapshot()
+
+    def flush_snapshot(self):
+        """Save the snapshot now if snapshots are enabled and the cache changed since the last save."""
+        path = self._snapshot_path
+        if path is None:
+            return
+        with self._snapshot_save_lock:
+            if self._changes == self._snapshot_saved_changes:
+                return
+            try:
+                self.save_snapshot(path)
+            except Exception:
+                logger.warning(
+                    f"Error saving model cache snapshot {path}", exc_info=True
+                )
+
+    def disable_snapshots(self):
+        """Stop periodic snapshots, after writing a final one."""
+        if self._snapshot_thread is None:
+            return
+        self._snapshot_stop.set()
+        self._snapshot_thread.join(timeout=5)
+        self._snapshot_thread = None
+        self.flush_snapshot()
+        atexit.unregister(self.flush_snapshot)
+        self._snapshot_path = None
 
     def _check_timestamp_granularity(self) -> bool:
         """Check if filesystem supports fine-grained timestamps (microseconds or better)."""
@@ -119,3 +655,70 @@ class ModelCache:
             # If f_timespec isn't available or other errors occur,
             # assume poor granularity to be safe
             return False
+
+
+def _model_class(model: BaseModel | CompactModel) -> type:
+    if isinstance(model, CompactModel):
+        return model.model_class
+    return type(model)
+
+
+def default_snapshot_path() -> Path:
+    return Path(Config.settings_dir()) / SNAPSHOT_FILENAME
+
+
+def _model_classes(model_class: type, found: Set[type]) -> None:
+    # The model class, and every model class nested in its fields
+    if model_class in found:
+        return
+    found.add(model_class)
+    for field in model_class.model_fields.values():  # type: ignore
+        stack = [field.annotation]
+        while stack:
+            annotation = stack.pop()
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                _model_classes(annotation, found)
+            stack.extend(typing.get_args(annotation))
+
+
+def _class_fingerprints(model_classes: Set[type]) -> Dict[str, str]:
+    """
+    A fingerprint of the fields of each class (and the model classes nested in them). Pickled models are only compatible with classes with the same fields.
+    """
+    fingerprints = {}
+    for model_class in model_classes:
+        nested: Set[type] = set()
+        _model_classes(model_class, nested)
+        fields = sorted(
+            (
+                f"{nested_class.__module__}.{nested_class.__qualname__}",
+                name,
+                repr(field.annotation),
+            )
+            for nested_class in nested
+            for name, field in nested_class.model_fields.items()  # type: ignore
+        )
+        fingerprints[f"{model_class.__module__}:{model_class.__qualname__}"] = (
+            hashlib.sha256(repr(fields).encode("utf-8")).hexdigest()
+        )
+    return fingerprints
+
+
+def _snapshot_header_compatible(header: Any) -> bool:
+    if (
+        not isinstance(header, dict)
+        or header.get("format") != SNAPSHOT_FORMAT_VERSION
+        or header.get("pydantic") != pydantic.VERSION
+    ):
+        return False
+    classes = []
+    for class_path in header.get("classes", {}):
+        module_name, qualname = class_path.split(":", 1)
+        try:
+            model_class: Any = importlib.import_module(module_name)
+            for part in qualname.split("."):
+                model_class = getattr(model_class, part)
+        except (ImportError, AttributeError):
+            return False
+        classes.append(model_class)
+    return _class_fingerprints(set(classes)) == header.get("classes")
@@ -0,0 +1,740 @@
+"""
+Packed storage for relationship folders with very many children (task runs, eval runs).
+
+The default layout is one folder and one file per child ("runs/{id} - {name}/task_run.kiln"). That's easy to use with git, but projects with hundreds of thousands of runs are slow to scan, copy and back up, and can run out of inodes. A packed relationship folder instead stores its children as records appended to a few segment files:
+
+    runs/.kiln_pack/pack.json               format version and the children's base filename
+    runs/.kiln_pack/segment-000001.jsonl    one record per line: {"op":"put","dirname":...}<TAB>{model JSON}
+
+ - Append only: saving a child appends a new version of its record, deleting appends a tombstone ("op":"del"). The last record for a dirname wins.
+ - An in-memory offset index (dirname -> segment, offset, length) is built from the record headers, without parsing the model JSON. It's refreshed incrementally: only bytes appended since the last scan are read, and checking for changes costs two stats.
+ - Compaction rewrites the live records into a new segment and removes the old segments. It runs on a background thread once most of the pack is dead (replaced records and tombstones), or explicitly with PackStore.compact().
+ - Transparent to the datamodel: children keep their usual path ("runs/{dirname}/task_run.kiln"), even though no file exists there. Loading, the model cache, parent lookup, save_to_file() and delete() all work with that path. A loose child folder left in a packed folder takes precedence over a record with the same name.
+ - Opt in per relationship folder, and convert back to one file per child (for git) at any time:
+
+    python -m kiln_ai.datamodel.packed_storage pack path/to/task/runs
+    python -m kiln_ai.datamodel.packed_storage unpack path/to/task/runs
+    python -m kiln_ai.datamodel.packed_storage compact path/to/task/runs
+
+Only leaf models (models without children of their own, like TaskRun and EvalRun) can be packed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Tuple,
+    Type,
+)
+
+from kiln_ai.datamodel.child_id_map import id_from_child_dirname
+from kiln_ai.datamodel.json_codec import compact_json_enabled, json_codec
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock_file(file: BinaryIO) -> None:
+        # Lock the first byte. LK_LOCK gives up after about 10 seconds, keep waiting as flock does.
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(file: BinaryIO) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(file: BinaryIO) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(file: BinaryIO) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+if TYPE_CHECKING:
+    from kiln_ai.datamodel.basemodel import KilnParentedModel
+
+logger = logging.getLogger(__name__)
+
+PACK_DIRNAME = ".kiln_pack"
+PACK_METADATA_FILENAME = "pack.json"
+PACK_FORMAT_VERSION = 1
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+_LOCK_FILENAME = ".lock"
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+# Scans without the writer lock before scanning under it, when compactions (maybe in another process) keep removing segments under us
+UNLOCKED_REFRESH_ATTEMPTS = 3
+# Compact in the background once this many bytes, and at least this fraction of the pack, are dead
+COMPACTION_MIN_DEAD_BYTES = 8 * 1024 * 1024
+COMPACTION_MIN_DEAD_RATIO = 0.5
+# Record stamps: segment number in the high bits, record offset in the low bits. Unique per version of a record.
+_STAMP_OFFSET_BITS = 40
+
+
+@dataclass(frozen=True)
+class RecordLocation:
+    segment: int
+    # Offset and length of the record body (the model JSON) in the segment file
+    offset: int
+    length: int
+    # Length of the whole record line (header and body)
+    record_length: int
+
+    @property
+    def stamp(self) -> int:
+        """
+        Identifies this version of the record. Used in place of a file's mtime by the model cache.
+        """
+        return (self.segment << _STAMP_OFFSET_BITS) | self.offset
+
+
+class _PackRewritten(Exception):
+    """A segment was truncated or rewritten under us, the index must be rebuilt."""
+
+
+def segment_filename(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def _segment_number(filename: str) -> int | None:
+    if not filename.startswith(SEGMENT_PREFIX) or not filename.endswith(SEGMENT_SUFFIX):
+        return None
+    try:
+        return int(filename[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+def encode_record(dirname: str, body: bytes | None) -> bytes:
+    """
+    Encode one record line. A body of None is a tombstone (the child was deleted).
+    """
+    if body is None:
+        header = {"op": "del", "dirname": dirname}
+        body = b""
+    else:
+        if b"\n" in body:
+            raise ValueError("Packed records must be single line (compact) JSON")
+        header = {"op": "put", "dirname": dirname}
+    return (
+        json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\t" + body + b"\n"
+    )
+
+
+def _compact_json(data: bytes) -> bytes:
+    # Files on disk are usually indented, records are one line each
+    return json.dumps(
+        json_codec().loads(data), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class PackStore:
+    """
+    The records of one packed relationship folder. Use PackStore.for_folder to get the shared instance for a folder.
+    """
+
+    _instances: ClassVar[Dict[str, "PackStore"]] = {}
+    _instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+        self,
+        relationship_folder: Path,
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+    ):
+        self.relationship_folder = relationship_folder
+        self.pack_folder = relationship_folder / PACK_DIRNAME
+        self.segment_max_bytes = segment_max_bytes
+        # Reentrant: compaction and writes refresh while holding it
+        self._lock = threading.RLock()
+        self._index: Dict[str, RecordLocation] = {}
+        self._ids: Dict[str, str] = {}
+        # segment number -> bytes scanned (up to the end of the last complete record)
+        self._scanned: Dict[int, int] = {}
+        self._folder_mtime_ns: int | None = None
+        self._live_bytes = 0
+        self._total_bytes = 0
+        self._compacting = False
+        # True while this instance holds the cross-process writer lock (with self._lock held)
+        self._file_locked = False
+
+    @classmethod
+    def for_folder(cls, relationship_folder: Path) -> "PackStore | None":
+        """
+        The store for a relationship folder, or None if the folder isn't packed. Costs one stat.
+        """
+        folder = os.path.abspath(relationship_folder)
+        if not os.path.isdir(os.path.join(folder, PACK_DIRNAME)):
+            return None
+        with cls._instances_lock:
+            store = cls._instances.get(folder)
+            if store is None:
+                store = cls(Path(folder))
+                cls._instances[folder] = store
+            return store
+
+    @classmethod
+    def for_child_path(cls, path: Path) -> "PackStore | None":
+        """
+        The store for a child's path ({relationship folder}/{dirname}/{base filename}), or None if the folder isn't packed.
+        """
+        return cls.for_folder(path.parent.parent)
+
+    @property
+    def base_filename(self) -> str:
+        with open(self.pack_folder / PACK_METADATA_FILENAME, "rb") as file:
+            return json.loads(file.read())["base_filename"]
+
+    def _segment_path(self, number: int) -> Path:
+        return self.pack_folder / segment_filename(number)
+
+    def _reset_locked(self) -> None:
+        self._index.clear()
+        self._ids.clear()
+        self._scanned.clear()
+        self._folder_mtime_ns = None
+        self._live_bytes = 0
+        self._total_bytes = 0
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the segment files. Only bytes appended since the last refresh are read."""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        for _ in range(UNLOCKED_REFRESH_ATTEMPTS):
+            try:
+                self._refresh_once_locked()
+                return
+            except _PackRewritten:
+                self._reset_locked()
+        if self._file_locked:
+            self._refresh_once_locked()
+            return
+        # Compaction removes segments while holding the writer lock, so a scan under it is consistent
+        with self._file_lock():
+            self._refresh_once_locked()
+
+    def _refresh_once_locked(self) -> None:
+        try:
+            folder_mtime_ns = os.stat(self.pack_folder).st_mtime_ns
+        except FileNotFoundError:
+            # Unpacked
+            self._reset_locked()
+            return
+        if folder_mtime_ns == self._folder_mtime_ns:
+            # No segment added or removed. Appends only go to the last segment.
+            numbers = [max(self._scanned)] if self._scanned else []
+        else:
+            numbers = []
+            with os.scandir(self.pack_folder) as entries:
+                for entry in entries:
+                    number = _segment_number(entry.name)
+                    if number is not None:
+                        numbers.append(number)
+            numbers.sort()
+            latest_scanned = max(self._scanned, default=0)
+            if any(number not in numbers for number in self._scanned) or any(
+                number < latest_scanned and number not in self._scanned
+                for number in numbers
+            ):
+                # Compacted (maybe by another process). Records must be applied in segment order, so start over.
+                self._reset_locked()
+            self._folder_mtime_ns = folder_mtime_ns
+        for number in numbers:
+            self._scan_segment_locked(number)
+
+    def _scan_segment_locked(self, number: int) -> None:
+        path = self._segment_path(number)
+        start = self._scanned.get(number, 0)
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            raise _PackRewritten()
+        if size < start:
+            raise _PackRewritten()
+        if size == start and number in self._scanned:
+            return
+        with open(path, "rb") as file:
+            file.seek(start)
+            data = file.read(size - start)
+        pos = 0
+        while True:
+            end = data.find(b"\n", pos)
+            if end < 0:
+                # No trailing newline: a write in progress (or torn by a crash). Read it next time.
+                break
+            self._apply_record_locked(number, start, data, pos, end)
+            pos = end + 1
+        self._scanned[number] = start + pos
+
+    def _apply_record_locked(
+        self, segment: int, base_offset: int, data: bytes, pos: int, end: int
+    ) -> None:
+        record_length = end + 1 - pos
+        self._total_bytes += record_length
+        tab = data.find(b"\t", pos, end)
+        if tab < 0:
+            # Corrupt line (for example a write torn by a crash), skip it
+            return
+        try:
+            header = json.loads(data[pos:tab])
+            op = header["op"]
+            dirname = header["dirname"]
+        except (ValueError, KeyError, TypeError):
+            return
+        previous = self._index.pop(dirname, None)
+        if previous is not None:
+            self._live_bytes -= previous.record_length
+        id = id_from_child_dirname(dirname)
+        if op == "put":
+            location = RecordLocation(
+                segment, base_offset + tab + 1, end - tab - 1, record_length
+            )
+            self._index[dirname] = location
+            self._live_bytes += record_length
+            self._ids[id] = dirname
+        elif self._ids.get(id) == dirname:
+            del self._ids[id]
+
+    def _read_location(self, location: RecordLocation) -> bytes:
+        with open(self._segment_path(location.segment), "rb") as file:
+            file.seek(location.offset)
+            return file.read(location.length)
+
+    def dirnames(self) -> List[str]:
+        """The child folder names of all live records."""
+        with self._lock:
+            self._refresh_locked()
+            return list(self._index)
+
+    def stamps(self) -> Dict[str, int]:
+        """Child folder name -> stamp of the current version of its record."""
+        with self._lock:
+            self._refresh_locked()
+            return {
+                dirname: location.stamp for dirname, location in self._index.items()
+            }
+
+    def contains(self, dirname: str) -> bool:
+        with self._lock:
+            self._refresh_locked()
+            return dirname in self._index
+
+    def stamp(self, dirname: str) -> int | None:
+        with self._lock:
+            self._refresh_locked()
+            location = self._index.get(dirname)
+            return location.stamp if location is not None else None
+
+    def dirname_for_id(self, id: str) -> str | None:
+        with self._lock:
+            self._refresh_locked()
+            return self._ids.get(id)
+
+    def read(self, dirname: str) -> Tuple[bytes, int] | None:
+        """
+        The model JSON of a record and its stamp, or None if there's no live record for the dirname.
+        """
+        with self._lock:
+            self._refresh_locked()
+            location = self._index.get(dirname)
+            if location is None:
+                return None
+            return self._read_location(location), location.stamp
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # Serializes writers across processes. Readers don't lock: they only consume complete lines.
+        with open(self.pack_folder / _LOCK_FILENAME, "ab") as lock_file:
+            _lock_file(lock_file)
+            self._file_locked = True
+            try:
+                yield
+            finally:
+                self._file_locked = False
+                _unlock_file(lock_file)
+
+    def put(self, dirname: str, body: bytes) -> None:
+        """Save a record (the compact JSON of a child model)."""
+        self.write_many([(dirname, body)])
+
+    def delete(self, dirname: str) -> bool:
+        """
+        Delete a record by appending a tombstone.
+
+        Returns:
+            bool: False if there was no live record for the dirname
+        """
+        with self._lock:
+            if not self.contains(dirname):
+                return False
+            self.write_many([(dirname, None)])
+            return True
+
+    def write_many(
+        self, records: List[Tuple[str, bytes | None]], fsync: bool = False
+    ) -> None:
+        """
+        Append many records in a single write. A body of None deletes the record.
+        """
+        if not records:
+            return
+        data = b"".join(encode_record(dirname, body) for dirname, body in records)
+        with self._lock:
+            with self._file_lock():
+                self._refresh_locked()
+                number = max(self._scanned, default=0)
+                if number == 0 or self._scanned[number] >= self.segment_max_bytes:
+                    number += 1
+                with open(self._segment_path(number), "ab") as file:
+                    scanned = self._scanned.get(number, 0)
+                    if os.fstat(file.fileno()).st_size != scanned:
+                        # Torn last record from a crashed writer (we hold the writer lock, so it's not in progress). Drop it.
+                        os.ftruncate(file.fileno(), scanned)
+                    file.write(data)
+                    file.flush()
+                    if fsync:
+                        os.fsync(file.fileno())
+                self._refresh_locked()
+        self._maybe_compact_in_background()
+
+    def dead_bytes(self) -> int:
+        """Bytes used by replaced records and tombstones, reclaimed by compaction."""
+        with self._lock:
+            self._refresh_locked()
+            return self._total_bytes - self._live_bytes
+
+    def _maybe_compact_in_background(self) -> None:
+        with self._lock:
+            dead_bytes = self._total_bytes - self._live_bytes
+            if (
+                self._compacting
+                or dead_bytes < COMPACTION_MIN_DEAD_BYTES
+                or dead_bytes < self._total_bytes * COMPACTION_MIN_DEAD_RATIO
+            ):
+                return
+        threading.Thread(
+            target=self._compact_in_background,
+            name="kiln-pack-compaction",
+            daemon=True,
+        ).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:
+            logger.exception(f"Error compacting packed folder {self.pack_folder}")
+
+    def compact(self) -> None:
+        """
+        Rewrite the live records into one new segment and remove the old segments.
+
+        Reads and writes continue while compacting: new writes go to a segment after the compacted one, so they take precedence over the compacted copies. Record stamps change, so cached models are reloaded once.
+        """
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        try:
+            self._compact()
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _compact(self) -> None:
+        with self._lock:
+            with self._file_lock():
+                self._refresh_locked()
+                old_segments = sorted(self._scanned)
+                if not old_segments:
+                    return
+                target = old_segments[-1] + 1
+                # Redirect new writes past the compacted segment
+                with open(self._segment_path(target + 1), "ab"):
+                    pass
+                self._refresh_locked()
+                snapshot = list(self._index.items())
+
+        # Copy without holding the lock. Only compaction removes segments, so the old segments stay readable.
+        temp_path = self.pack_folder / f".compact-{uuid.uuid4().hex}.tmp"
+        moved: List[Tuple[str, RecordLocation, RecordLocation]] = []
+        offset = 0
+        try:
+            with open(temp_path, "wb") as file:
+                for dirname, location in snapshot:
+                    body = self._read_location(location)
+                    record = encode_record(dirname, body)
+                    file.write(record)
+                    body_offset = offset + len(record) - len(body) - 1
+                    moved.append(
+                        (
+                            dirname,
+                            location,
+                            RecordLocation(target, body_offset, len(body), len(record)),
+                        )
+                    )
+                    offset += len(record)
+                file.flush()
+                os.fsync(file.fileno())
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            with self._file_lock():
+                os.replace(temp_path, self._segment_path(target))
+                for number in old_segments:
+                    self._segment_path(number).unlink(missing_ok=True)
+                    self._scanned.pop(number, None)
+                self._scanned[target] = offset
+                for dirname, old_location, new_location in moved:
+                    # Records written while we were copying are already newer than the copy
+                    if self._index.get(dirname) == old_location:
+                        self._index[dirname] = new_location
+                self._total_bytes = sum(self._scanned.values())
+                self._live_bytes = sum(
+                    location.record_length for location in self._index.values()
+                )
+                self._folder_mtime_ns = None
+                self._refresh_locked()
+
+
+def packed_record_stamp(path: Path) -> int | None:
+    """
+    The stamp of the packed record for a child path, or None if there is none.
+    """
+    store = PackStore.for_child_path(path)
+    if store is None:
+        return None
+    return store.stamp(path.parent.name)
+
+
+def read_packed_model_file(path: Path) -> Tuple[bytes, int] | None:
+    """
+    The model JSON and stamp of the packed record for a child path, or None if there is none.
+    """
+    store = PackStore.for_child_path(path)
+    if store is None:
+        return None
+    return store.read(path.parent.name)
+
+
+def _loose_child_dirnames(relationship_folder: Path, base_filename: str) -> List[str]:
+    dirnames = []
+    with os.scandir(relationship_folder) as entries:
+        for entry in entries:
+            # Skip the pack and other hidden folders (like bulk writer staging folders)
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            names = os.listdir(entry.path)
+            if base_filename not in names:
+                continue
+            if names != [base_filename]:
+                raise ValueError(
+                    f"Cannot pack {entry.path}: it contains files other than {base_filename}. Only leaf models can be packed."
+                )
+            dirnames.append(entry.name)
+    return dirnames
+
+
+def _infer_base_filename(relationship_folder: Path) -> str:
+    with os.scandir(relationship_folder) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            kiln_files = [
+                name for name in os.listdir(entry.path) if name.endswith(".kiln")
+            ]
+            if len(kiln_files) == 1:
+                return kiln_files[0]
+    raise ValueError(
+        f"Cannot determine the model file name in {relationship_folder}, pass it explicitly"
+    )
+
+
+def pack_folder(relationship_folder: Path, base_filename: str | None = None) -> int:
+    """
+    Convert a relationship folder to packed storage. Each "{dirname}/{base_filename}" child folder becomes a record, and is removed once packed.
+
+    Safe to re-run: if the folder is already packed, remaining loose children are added to the pack.
+
+    Returns:
+        int: The number of children packed
+    """
+    # Avoid circular import
+    from kiln_ai.datamodel.sharded_layout import SHARDS_FILENAME
+
+    relationship_folder = Path(relationship_folder)
+    if (relationship_folder / SHARDS_FILENAME).exists():
+        raise ValueError(f"{relationship_folder} is sharded, unshard it before packing")
+    pack_path = relationship_folder / PACK_DIRNAME
+    if base_filename is None:
+        if pack_path.is_dir():
+            store = PackStore.for_folder(relationship_folder)
+            assert store is not None
+            base_filename = store.base_filename
+        else:
+            base_filename = _infer_base_filename(relationship_folder)
+    dirnames = _loose_child_dirnames(relationship_folder, base_filename)
+
+    def read_child(dirname: str) -> bytes:
+        with open(relationship_folder / dirname / base_filename, "rb") as file:
+            return _compact_json(file.read())
+
+    if pack_path.is_dir():
+        store = PackStore.for_folder(relationship_folder)
+        assert store is not None
+        if store.base_filename != base_filename:
+            raise ValueError(
+                f"{relationship_folder} is already packed with {store.base_filename} files"
+            )
+        store.write_many(
+            [(dirname, read_child(dirname)) for dirname in dirnames], fsync=True
+        )
+    else:
+        # Build the pack in a temporary folder and rename it into place, so the folder switches to packed atomically
+        temp_path = relationship_folder / f"{PACK_DIRNAME}-{uuid.uuid4().hex}.tmp"
+        temp_path.mkdir()
+        try:
+            with open(temp_path / PACK_METADATA_FILENAME, "wb") as file:
+                file.write(
+                    json.dumps(
+                        {"v": PACK_FORMAT_VERSION, "base_filename": base_filename}
+                    ).encode("utf-8")
+                )
+            with open(temp_path / segment_filename(1), "wb") as file:
+                for dirname in dirnames:
+                    file.write(encode_record(dirname, read_child(dirname)))
+                file.flush()
+                os.fsync(file.fileno())
+            os.rename(temp_path, pack_path)
+        except BaseException:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+    # The records are durable, remove the loose copies (until removed, they take precedence, with the same content)
+    for dirname in dirnames:
+        shutil.rmtree(relationship_folder / dirname)
+    return len(dirnames)
+
+
+def unpack_folder(relationship_folder: Path) -> int:
+    """
+    Convert a packed relationship folder back to one folder and file per child, and remove the pack.
+
+    Returns:
+        int: The number of children unpacked
+    """
+    relationship_folder = Path(relationship_folder)
+    store = PackStore.for_folder(relationship_folder)
+    if store is None:
+        raise ValueError(f"{relationship_folder} is not packed")
+    base_filename = store.base_filename
+    compact = compact_json_enabled()
+    count = 0
+    for dirname in store.dirnames():
+        child_path = relationship_folder / dirname / base_filename
+        if child_path.exists():
+            # A loose copy already takes precedence over the record
+            continue
+        record = store.read(dirname)
+        if record is None:
+            continue
+        body = record[0]
+        if not compact:
+            # Match the indented layout of files saved by the datamodel
+            body = json.dumps(json.loads(body), indent=2, ensure_ascii=False).encode(
+                "utf-8"
+            )
+        child_path.parent.mkdir(exist_ok=True)
+        temp_path = child_path.parent / f".{base_filename}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(body)
+        os.replace(temp_path, child_path)
+        count += 1
+    shutil.rmtree(store.pack_folder)
+    store.refresh()
+    return count
+
+
+def pack_children(parent_path: Path, child_type: Type["KilnParentedModel"]) -> int:
+    """
+    Switch one relationship of a saved parent to packed storage, for example pack_children(task.path, TaskRun).
+    """
+    # Avoid circular import
+    from kiln_ai.datamodel.basemodel import KilnParentModel
+
+    if issubclass(child_type, KilnParentModel):
+        raise ValueError(
+            f"{child_type.__name__} has children of its own. Only leaf models can be packed."
+        )
+    return pack_folder(
+        _relationship_folder(parent_path, child_type), child_type.base_filename()
+    )
+
+
+def unpack_children(parent_path: Path, child_type: Type["KilnParentedModel"]) -> int:
+    """
+    Switch one relationship of a saved parent back to one folder and file per child.
+    """
+    return unpack_folder(_relationship_folder(parent_path, child_type))
+
+
+def _relationship_folder(
+    parent_path: Path, child_type: Type["KilnParentedModel"]
+) -> Path:
+    parent_folder = parent_path.parent if parent_path.is_file() else parent_path
+    return parent_folder / child_type.relationship_name()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m kiln_ai.datamodel.packed_storage",
+        description="Convert Kiln relationship folders (like a task's runs folder) between one file per child and packed storage.",
+    )
+    parser.add_argument("command", choices=["pack", "unpack", "compact"])
+    parser.add_argument("folder", type=Path, help="The relationship folder")
+    parser.add_argument(
+        "--base-filename",
+        help="The children's model file name, like task_run.kiln. Detected if not set.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = pack_folder(args.folder, args.base_filename)
+        sys.stdout.write(f"Packed {count} children\n")
+    elif args.command == "unpack":
+        count = unpack_folder(args.folder)
+        sys.stdout.write(f"Unpacked {count} children\n")
+    else:
+        store = PackStore.for_folder(args.folder)
+        if store is None:
+            raise SystemExit(f"{args.folder} is not packed")
+        reclaimed = store.dead_bytes()
+        store.compact()
+        sys.stdout.write(f"Compacted, reclaimed {reclaimed} bytes\n")
+
+
+if __name__ == "__main__":
+    main()
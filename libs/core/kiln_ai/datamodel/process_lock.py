@@ -0,0 +1,95 @@
+"""
+Detect other running processes using the Kiln datamodel, like the desktop app or a server.
+
+A long running process keeps models in memory: the shared model cache, its file watcher, and the run indexes. Offline tools which rewrite project files (like schema_upgrade.py) must not run alongside one, or it may serve stale models and save them over the rewritten files.
+
+Each process using the shared model cache registers by holding an exclusive lock on its own file, "{settings dir}/process_locks/{pid}.lock", for as long as it runs. The OS releases the lock when the process exits, even if it crashes, so a lock file nobody holds is stale and is removed. Offline tools call running_processes() and refuse to run if it isn't empty.
+"""
+
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import BinaryIO, List
+
+from kiln_ai.utils.config import Config
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(file: BinaryIO) -> bool:
+        file.seek(0)
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+else:
+    import fcntl
+
+    def _try_lock(file: BinaryIO) -> bool:
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+
+logger = logging.getLogger(__name__)
+
+PROCESS_LOCK_DIRNAME = "process_locks"
+
+# This process's lock file, held open (and locked) until exit
+_registered: BinaryIO | None = None
+
+
+def process_lock_dir() -> Path:
+    return Path(Config.settings_dir()) / PROCESS_LOCK_DIRNAME
+
+
+def register_process() -> None:
+    """Mark this process as running until it exits. Safe to call more than once."""
+    global _registered
+    if _registered is not None:
+        return
+    try:
+        lock_dir = process_lock_dir()
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        file = open(lock_dir / f"{os.getpid()}.lock", "ab")
+    except OSError as e:
+        logger.warning(f"Could not register process lock: {e}")
+        return
+    if not _try_lock(file):
+        file.close()
+        logger.warning("Could not lock this process's lock file")
+        return
+    _registered = file
+
+
+def running_processes() -> List[int]:
+    """
+    Process IDs of other running processes using the datamodel. Removes stale lock files left by processes which exited.
+    """
+    lock_dir = process_lock_dir()
+    if not lock_dir.is_dir():
+        return []
+    running: List[int] = []
+    for lock_path in lock_dir.glob("*.lock"):
+        try:
+            pid = int(lock_path.stem)
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        try:
+            file = open(lock_path, "ab")
+        except OSError:
+            continue
+        with file:
+            if not _try_lock(file):
+                running.append(pid)
+                continue
+        # Closing the file released our lock. Nobody held it, so the process is gone.
+        lock_path.unlink(missing_ok=True)
+    return sorted(running)
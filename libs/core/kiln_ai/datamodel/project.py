@@ -21,3 +21,6 @@ class Project(KilnParentModel, parent_of={"tasks": Task}):
     # Needed for typechecking. We should fix this in KilnParentModel
     def tasks(self) -> list[Task]:
         return super().tasks()  # type: ignore
+
+    async def atasks(self) -> list[Task]:
+        return await super().atasks()  # type: ignore
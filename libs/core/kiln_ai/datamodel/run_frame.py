@@ -0,0 +1,323 @@
+"""
+A columnar (NumPy) view of a task's run metadata, for vectorized filtering and stats.
+
+Dataset filters (dataset_filters.py) are per-run predicates. Even evaluated on RunIndexEntry rather than loaded TaskRuns, filtering a large task is a Python loop over every run. RunFrame holds the same metadata as NumPy columns, so filters compile to boolean masks:
+
+    frame = task.run_frame()
+    mask = frame.mask_for_filter("multi_filter::high_rating&tag::golden")
+    frame.ids[mask], mask.sum(), frame.usage_totals(mask)
+
+ - Built from the run index (run_index.py), and cached there: rebuilt only when the index changed. A frame is an immutable snapshot, it doesn't update when runs change.
+ - Categorical columns (rating type, source type, model) are integer codes into a tuple of categories, -1 for missing.
+ - Tags are a CSR layout (tag codes per run), with a packed bitset per tag built on first use.
+ - Missing numbers (rating value, token counts, cost) are NaN.
+ - Frame filters must return exactly the same results as their TaskRun counterparts in dataset_filters.py.
+ - Dataset queries (dataset_query.py) are evaluated on the frame too, loading only the runs their residual predicates decide.
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.dataset_filters import (
+    DATASET_QUERY_PREFIX,
+    DatasetFilterId,
+    MultiDatasetFilter,
+    StaticDatasetFilters,
+)
+from kiln_ai.datamodel.task_run import TaskRun
+
+# The run index columns a frame is built from, in order
+INDEX_COLUMNS = [
+    "dirname",
+    "id",
+    "created_at",
+    "tags",
+    "rating_type",
+    "rating_value",
+    "output_source_type",
+    "model_name",
+    "has_output",
+    "has_repair_instructions",
+    "has_repaired_output",
+    "has_thinking_training_data",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "cost",
+    "input_source_type",
+]
+
+
+@dataclass(frozen=True)
+class Categorical:
+    """A column of repeated strings: an int32 code per run, -1 for missing."""
+
+    codes: np.ndarray
+    categories: Tuple[str, ...]
+
+    @classmethod
+    def from_values(cls, values: Sequence[str | None]) -> "Categorical":
+        lookup: Dict[str, int] = {}
+        codes = np.fromiter(
+            (
+                -1 if value is None else lookup.setdefault(value, len(lookup))
+                for value in values
+            ),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return cls(codes, tuple(lookup))
+
+    def mask_equals(self, value: str) -> np.ndarray:
+        try:
+            code = self.categories.index(value)
+        except ValueError:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    def value_counts(self, mask: np.ndarray | None = None) -> Dict[str, int]:
+        """Runs per category (missing values aren't counted)."""
+        codes = self.codes if mask is None else self.codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories))
+        return {
+            category: int(count)
+            for category, count in zip(self.categories, counts)
+            if count
+        }
+
+
+@dataclass(frozen=True)
+class RunFrame:
+    runs_folder: Path
+    # Run folder names (relative to runs_folder), the IDs of the runs, and creation times
+    dirnames: np.ndarray
+    ids: np.ndarray
+    created_at: np.ndarray
+    rating_type: Categorical
+    rating_value: np.ndarray
+    output_source_type: Categorical
+    model_name: Categorical
+    input_source_type: Categorical
+    has_output: np.ndarray
+    has_repair_instructions: np.ndarray
+    has_repaired_output: np.ndarray
+    has_thinking_training_data: np.ndarray
+    input_tokens: np.ndarray
+    output_tokens: np.ndarray
+    total_tokens: np.ndarray
+    cost: np.ndarray
+    # Tags, CSR layout: the tag codes of run i are tag_codes[tag_offsets[i]:tag_offsets[i + 1]]
+    tag_names: Tuple[str, ...]
+    tag_offsets: np.ndarray
+    tag_codes: np.ndarray
+    _tag_bitsets: Dict[int, np.ndarray] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    _tag_bitsets_lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_index_rows(cls, rows: List[tuple], runs_folder: Path) -> "RunFrame":
+        """Build from run index rows, with the INDEX_COLUMNS columns."""
+        columns: List[Sequence[Any]] = (
+            list(zip(*rows)) if rows else [()] * len(INDEX_COLUMNS)
+        )
+        by_name = dict(zip(INDEX_COLUMNS, columns))
+
+        tag_lookup: Dict[str, int] = {}
+        # Runs mostly share a few tag combinations, parse each once
+        codes_by_json: Dict[str, List[int]] = {}
+        tag_codes: List[int] = []
+        tag_offsets = [0]
+        for tags_json in by_name["tags"]:
+            codes = codes_by_json.get(tags_json)
+            if codes is None:
+                codes = [
+                    tag_lookup.setdefault(tag, len(tag_lookup))
+                    for tag in json.loads(tags_json)
+                ]
+                codes_by_json[tags_json] = codes
+            tag_codes.extend(codes)
+            tag_offsets.append(len(tag_codes))
+
+        return cls(
+            runs_folder=runs_folder,
+            dirnames=np.array(by_name["dirname"], dtype=object),
+            ids=np.array(by_name["id"], dtype=object),
+            created_at=_datetime_column(by_name["created_at"]),
+            rating_type=Categorical.from_values(by_name["rating_type"]),
+            rating_value=_float_column(by_name["rating_value"]),
+            output_source_type=Categorical.from_values(by_name["output_source_type"]),
+            model_name=Categorical.from_values(by_name["model_name"]),
+            input_source_type=Categorical.from_values(by_name["input_source_type"]),
+            has_output=np.array(by_name["has_output"], dtype=bool),
+            has_repair_instructions=np.array(
+                by_name["has_repair_instructions"], dtype=bool
+            ),
+            has_repaired_output=np.array(by_name["has_repaired_output"], dtype=bool),
+            has_thinking_training_data=np.array(
+                by_name["has_thinking_training_data"], dtype=bool
+            ),
+            input_tokens=_float_column(by_name["input_tokens"]),
+            output_tokens=_float_column(by_name["output_tokens"]),
+            total_tokens=_float_column(by_name["total_tokens"]),
+            cost=_float_column(by_name["cost"]),
+            tag_names=tuple(tag_lookup),
+            tag_offsets=np.array(tag_offsets, dtype=np.int64),
+            tag_codes=np.array(tag_codes, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self), dtype=bool)
+
+    def tag_mask(self, tag: str) -> np.ndarray:
+        """Runs with the tag. The tag's bitset is built on first use, then cached."""
+        try:
+            code = self.tag_names.index(tag)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        with self._tag_bitsets_lock:
+            bitset = self._tag_bitsets.get(code)
+            if bitset is None:
+                run_of_tag = np.repeat(np.arange(len(self)), np.diff(self.tag_offsets))
+                mask = np.zeros(len(self), dtype=bool)
+                mask[run_of_tag[self.tag_codes == code]] = True
+                bitset = np.packbits(mask)
+                self._tag_bitsets[code] = bitset
+        return np.unpackbits(bitset, count=len(self)).view(bool)
+
+    def tags_of(self, i: int) -> List[str]:
+        codes = self.tag_codes[self.tag_offsets[i] : self.tag_offsets[i + 1]]
+        return [self.tag_names[code] for code in codes]
+
+    def high_quality(self) -> np.ndarray:
+        """Same as TaskOutputRating.is_high_quality, for each run's rating."""
+        value = self.rating_value
+        # NaN (no rating value) compares False
+        with np.errstate(invalid="ignore"):
+            five_star = self.rating_type.mask_equals(
+                TaskOutputRatingType.five_star.value
+            ) & (value >= 4)
+            pass_fail = (
+                self.rating_type.mask_equals(TaskOutputRatingType.pass_fail.value)
+                | self.rating_type.mask_equals(
+                    TaskOutputRatingType.pass_fail_critical.value
+                )
+            ) & (value == 1.0)
+        return five_star | pass_fail
+
+    def mask_for_filter(self, filter_id: DatasetFilterId) -> np.ndarray:
+        """Runs matching a dataset filter, as a boolean mask."""
+        return frame_filter_from_id(filter_id)(self)
+
+    def ids_where(self, mask: np.ndarray) -> List[str]:
+        return [id for id in self.ids[mask] if id is not None]
+
+    def paths_where(self, mask: np.ndarray) -> List[Path]:
+        """Run file paths, to load the matching runs (TaskRun.load_from_file)."""
+        base_filename = TaskRun.base_filename()
+        return [
+            self.runs_folder / dirname / base_filename
+            for dirname in self.dirnames[mask]
+        ]
+
+    def usage_totals(self, mask: np.ndarray | None = None) -> Dict[str, float]:
+        """Sums of token counts and cost, over the runs which recorded them."""
+        totals = {}
+        for name in ["input_tokens", "output_tokens", "total_tokens", "cost"]:
+            column = getattr(self, name)
+            if mask is not None:
+                column = column[mask]
+            totals[name] = float(np.nansum(column))
+        return totals
+
+
+def _float_column(values: Sequence[Any]) -> np.ndarray:
+    return np.array(
+        [np.nan if value is None else value for value in values], dtype=np.float64
+    )
+
+
+def _datetime_column(values: Sequence[str]) -> np.ndarray:
+    # Fast path for naive datetimes (the Kiln default): isoformat() has nothing but fractional seconds after the time
+    if not any(value[19:].strip(".0123456789") for value in values):
+        return np.array(values, dtype="datetime64[us]")
+    return np.array(
+        [naive_utc_datetime(datetime.fromisoformat(value)) for value in values],
+        dtype="datetime64[us]",
+    )
+
+
+def naive_utc_datetime(value: datetime) -> datetime:
+    # Timezone aware values are converted to UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Frame filters: the dataset filters of dataset_filters.py, compiled to vectorized masks
+FrameFilter = Callable[[RunFrame], np.ndarray]
+
+
+def HighRatingFrameFilter(frame: RunFrame) -> np.ndarray:
+    # Repairs always considered high quality
+    return frame.has_output & (frame.has_repaired_output | frame.high_quality())
+
+
+def ThinkingModelFrameFilter(frame: RunFrame) -> np.ndarray:
+    return frame.has_thinking_training_data.copy()
+
+
+static_frame_filters: Dict[StaticDatasetFilters, FrameFilter] = {
+    StaticDatasetFilters.ALL: RunFrame.all,
+    StaticDatasetFilters.HIGH_RATING: HighRatingFrameFilter,
+    StaticDatasetFilters.THINKING_MODEL: ThinkingModelFrameFilter,
+    StaticDatasetFilters.THINKING_MODEL_HIGH_RATED: lambda frame: (
+        ThinkingModelFrameFilter(frame) & HighRatingFrameFilter(frame)
+    ),
+}
+
+
+def frame_filter_from_id(id: DatasetFilterId) -> FrameFilter:
+    """
+    Get a frame filter (evaluated on a RunFrame) from a dataset filter ID.
+    """
+    if id.startswith("tag::") and len(id) > 5:
+        tag = id[5:]
+        return lambda frame: frame.tag_mask(tag)
+
+    if id.startswith(DATASET_QUERY_PREFIX):
+        # Avoid circular import
+        from kiln_ai.datamodel.dataset_query import DatasetQuery
+
+        return DatasetQuery(id).frame_mask
+
+    if id.startswith(MultiDatasetFilter.PREFIX):
+        filters = [
+            frame_filter_from_id(fid)
+            for fid in MultiDatasetFilter.parse_filter_string(id)
+        ]
+
+        def multi_filter(frame: RunFrame) -> np.ndarray:
+            mask = frame.all()
+            for filter in filters:
+                mask &= filter(frame)
+            return mask
+
+        return multi_filter
+
+    if id in static_frame_filters:
+        return static_frame_filters[id]  # type: ignore
+
+    raise ValueError(f"Invalid dataset filter ID: {id}")
@@ -0,0 +1,848 @@
+"""
+A persistent, per-task index of task run metadata.
+
+Loading every task_run.kiln file (parse + validate) is the expensive part of listing a large task. Most listing code paths (run summaries, dataset filters, lookups by ID) only need a handful of small fields, so we keep those fields in a SQLite database.
+
+ - Stored per user (run_index_dir), not in the project: the index holds machine-local state (mtimes, absolute paths) and would conflict when a project is synced or shared with git.
+ - The .kiln files remain the source of truth. The index is a disposable cache and can be deleted at any time; it is rebuilt on next use.
+ - Refreshed incrementally: we scandir the runs folder, compare each file's mtime to the stored row, and only parse files which are new or changed. Packed runs (packed_storage.py) are compared by record stamp instead.
+ - Full TaskRun models are only hydrated on demand (RunIndexEntry.load).
+ - For vectorized filtering and stats over many runs, frame() returns the index as NumPy columns. See run_frame.py.
+ - Tags have an inverted index (tag -> runs, and a count per tag), so tag lookups and tag counts don't touch every run.
+ - search() is ranked full-text search (SQLite FTS5) over the input, output, repaired output and intermediate outputs of every run. The index keeps its own copy of that text, so it grows with the task's text.
+ - page() serves sorted, filtered and searched (same full-text index as search()) pages with keyset (cursor) pagination over indexed sort keys, so the cost of a page doesn't grow with its position.
+ - Runs saved or deleted through the datamodel update the index before the save returns (see runs_saved), so tag, search and page queries can skip the scan of the runs folder if the last one was recent (QUERY_MAX_STALENESS_SECONDS). Only changes made outside the datamodel (hand edits, syncing, other processes) can be missed in that window.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+from typing import (
+    OrderedDict as OrderedDictType,
+)
+
+from pydantic import TypeAdapter
+
+from kiln_ai.datamodel.basemodel import ID_TYPE
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.dataset_filters import DatasetFilterId, StaticDatasetFilters
+from kiln_ai.datamodel.packed_storage import PackStore, packed_record_stamp
+from kiln_ai.datamodel.sharded_layout import (
+    iterate_child_dirs,
+    relationship_folder_of_child_path,
+)
+from kiln_ai.datamodel.task_output import TaskOutputRating
+from kiln_ai.datamodel.task_run import TaskRun
+from kiln_ai.utils.config import Config
+
+if TYPE_CHECKING:
+    from kiln_ai.datamodel.run_frame import RunFrame
+
+# Folder of the settings dir holding the run indexes, one database per task
+RUN_INDEX_DIRNAME = "run_indexes"
+# Older versions kept the index in the task folder. Removed when found, it's only a cache.
+LEGACY_RUN_INDEX_FILENAME = ".run_index.sqlite"
+# Indexes kept open (one SQLite connection each) by RunIndex.for_task_path. The least recently used is closed past this, and reopened on next use.
+MAX_OPEN_RUN_INDEXES = 32
+# Increment when changing the table layout or the meaning of a column. Index will be rebuilt from the .kiln files.
+RUN_INDEX_SCHEMA_VERSION = 5
+# Keep one char past the preview length so consumers can tell if the text was truncated
+PREVIEW_LENGTH = 101
+# Tag and page queries reuse a scan of the runs folder this recent. Changes made through the datamodel are indexed as they're written, so this only delays changes made outside of it (hand edits, syncing).
+QUERY_MAX_STALENESS_SECONDS = 5.0
+
+# The TaskRun fields read (projection load) to build an index row
+INDEXED_FIELDS = [
+    "id",
+    "created_at",
+    "tags",
+    "input",
+    "input_source.type",
+    "output.output",
+    "output.rating",
+    "output.source.type",
+    "output.source.properties.model_name",
+    "repair_instructions",
+    "repaired_output",
+    # Separately, so blob store references are resolved
+    "repaired_output.output",
+    "intermediate_outputs",
+    "usage",
+]
+
+_datetime_adapter = TypeAdapter(datetime)
+
+
+class RunSortKey(str, Enum):
+    """Sort keys for RunIndex.page."""
+
+    created_at = "created_at"
+    rating = "rating"
+    model_name = "model_name"
+
+
+class RunSearchField(str, Enum):
+    """The text of a run covered by RunIndex.search (the columns of the full-text index)."""
+
+    input = "input"
+    output = "output"
+    repaired_output = "repaired_output"
+    intermediate_outputs = "intermediate_outputs"
+
+
+# Words or "quoted phrases" of a search. A word ending in * matches as a prefix.
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+# SQL sort expression of each key, each with a matching index. Missing values sort first (ascending), as a real value so cursors can compare against them.
+_SORT_EXPRESSIONS: Dict[RunSortKey, str] = {
+    RunSortKey.created_at: "created_at",
+    RunSortKey.rating: "IFNULL(rating_value, -1e300)",
+    RunSortKey.model_name: "IFNULL(model_name, '')",
+}
+
+
+@dataclass
+class RunIndexEntry:
+    """
+    The indexed metadata for a single TaskRun. Cheap to load, and can hydrate the full TaskRun on demand.
+    """
+
+    id: ID_TYPE
+    path: Path
+    mtime_ns: int
+    created_at: datetime
+    tags: List[str]
+    rating: TaskOutputRating | None
+    output_source_type: str | None
+    input_source_type: str | None
+    model_name: str | None
+    input_preview: str | None
+    output_preview: str | None
+    has_output: bool
+    has_repair_instructions: bool
+    has_repaired_output: bool
+    has_thinking_training_data: bool
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    total_tokens: int | None = None
+    cost: float | None = None
+
+    def load(self, readonly: bool = False) -> TaskRun:
+        """Hydrate the full TaskRun for this entry."""
+        return TaskRun.load_from_file(self.path, readonly=readonly)
+
+
+@dataclass
+class RunSearchResult:
+    id: ID_TYPE
+    # Relevance (BM25), higher is better. Only comparable within one search.
+    score: float
+    # A fragment of the best matching text
+    snippet: str
+
+
+@dataclass
+class RunIndexPage:
+    """One page of RunIndex.page. next_cursor fetches the following page, None on the last page."""
+
+    entries: List[RunIndexEntry]
+    next_cursor: str | None
+    # Runs matching the filter and search, over all pages
+    total: int
+
+
+class RunIndex:
+    """
+    SQLite backed index of the runs of one task. Use RunIndex.for_task_path to get the shared instance for a task.
+    """
+
+    _instances: ClassVar[OrderedDictType[Path, "RunIndex"]] = OrderedDict()
+    _instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, task_path: Path):
+        task_folder = task_path.parent if task_path.suffix == ".kiln" else task_path
+        self.task_folder = task_folder.resolve()
+        self.runs_folder = self.task_folder / TaskRun.relationship_name()
+        self.db_path = run_index_path(self.task_folder)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        # Incremented when this instance changes the index, so the cached frame is rebuilt
+        self._generation = 0
+        self._frame: "RunFrame | None" = None
+        self._frame_version: Tuple[int, int] | None = None
+        # time.monotonic() of the start of the last scan of the runs folder, None if there hasn't been one on this connection
+        self._scanned_at: float | None = None
+
+    @classmethod
+    def for_task_path(cls, task_path: Path) -> "RunIndex":
+        """The shared index of a task, from the path of its task.kiln file or folder."""
+        key = (task_path.parent if task_path.suffix == ".kiln" else task_path).resolve()
+        evicted = []
+        with cls._instances_lock:
+            index = cls._instances.get(key)
+            if index is None:
+                index = cls(key)
+                cls._instances[key] = index
+            cls._instances.move_to_end(key)
+            while len(cls._instances) > MAX_OPEN_RUN_INDEXES:
+                evicted.append(cls._instances.popitem(last=False)[1])
+        # Outside the class lock: waits for any query in progress on the evicted index. Callers still holding it reconnect on next use.
+        for evicted_index in evicted:
+            evicted_index.close()
+        return index
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect if the index file was deleted under us (task deleted, user cleared the cache, etc)
+        if self._conn is not None and not self.db_path.exists():
+            self._conn.close()
+            self._conn = None
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            (self.task_folder / LEGACY_RUN_INDEX_FILENAME).unlink(missing_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._ensure_schema(conn)
+            self._conn = conn
+            self._generation += 1
+            self._scanned_at = None
+        return self._conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == RUN_INDEX_SCHEMA_VERSION:
+            return
+        # Older (or newer) layout: it's only a cache, drop and rebuild from the .kiln files
+        conn.execute("DROP TABLE IF EXISTS runs")
+        conn.execute("DROP TABLE IF EXISTS run_tags")
+        conn.execute("DROP TABLE IF EXISTS tag_counts")
+        conn.execute("DROP TABLE IF EXISTS run_text")
+        conn.execute(
+            """
+            CREATE TABLE runs (
+                dirname TEXT PRIMARY KEY,
+                id TEXT,
+                mtime_ns INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                rating TEXT,
+                output_source_type TEXT,
+                input_source_type TEXT,
+                model_name TEXT,
+                input_preview TEXT,
+                output_preview TEXT,
+                has_output INTEGER NOT NULL,
+                has_repair_instructions INTEGER NOT NULL,
+                has_repaired_output INTEGER NOT NULL,
+                has_thinking_training_data INTEGER NOT NULL,
+                rating_type TEXT,
+                rating_value REAL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                total_tokens INTEGER,
+                cost REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS runs_id ON runs (id)")
+        # Sort indexes for page(), keyed like the queries: sort expression, then dirname as tie breaker
+        for key, expression in _SORT_EXPRESSIONS.items():
+            conn.execute(
+                f"CREATE INDEX runs_sort_{key.value} ON runs ({expression}, dirname)"
+            )
+        # Inverted tag index, with per-tag counts kept up to date by triggers
+        conn.execute(
+            """
+            CREATE TABLE run_tags (
+                tag TEXT NOT NULL,
+                dirname TEXT NOT NULL,
+                PRIMARY KEY (tag, dirname)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX run_tags_dirname ON run_tags (dirname)")
+        conn.execute(
+            "CREATE TABLE tag_counts (tag TEXT PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER run_tags_insert AFTER INSERT ON run_tags BEGIN
+                INSERT INTO tag_counts VALUES (NEW.tag, 1)
+                    ON CONFLICT (tag) DO UPDATE SET count = count + 1;
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER run_tags_delete AFTER DELETE ON run_tags BEGIN
+                UPDATE tag_counts SET count = count - 1 WHERE tag = OLD.tag;
+                DELETE FROM tag_counts WHERE tag = OLD.tag AND count <= 0;
+            END
+            """
+        )
+        # Full-text index, rowid is the rowid of the run's row in runs
+        columns = ", ".join(field.value for field in RunSearchField)
+        conn.execute(
+            f"CREATE VIRTUAL TABLE run_text USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        conn.execute(f"PRAGMA user_version = {RUN_INDEX_SCHEMA_VERSION}")
+        conn.commit()
+
+    def refresh(self) -> None:
+        """
+        Bring the index up to date with the runs on disk. Only new or modified run files are parsed.
+        """
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        conn = self._connection()
+        self._scanned_at = time.monotonic()
+        indexed: Dict[str, int] = dict(
+            conn.execute("SELECT dirname, mtime_ns FROM runs").fetchall()
+        )
+
+        on_disk: Dict[str, int] = {}
+        if self.runs_folder.is_dir():
+            base_filename = TaskRun.base_filename()
+            # Sharded runs (sharded_layout.py) are keyed by "{shard}/{dirname}", so the key always locates the run
+            for dirname, run_folder in iterate_child_dirs(
+                self.runs_folder, base_filename
+            ):
+                try:
+                    # stat before reading, so a write racing with us leaves a stale mtime (re-indexed next refresh), never stale data
+                    mtime_ns = os.stat(
+                        os.path.join(run_folder, base_filename)
+                    ).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                on_disk[dirname] = mtime_ns
+            # Packed runs: the record stamp stands in for the mtime. Loose folders take precedence.
+            store = PackStore.for_folder(self.runs_folder)
+            if store is not None:
+                for dirname, stamp in store.stamps().items():
+                    on_disk.setdefault(dirname, stamp)
+
+        removed = [dirname for dirname in indexed if dirname not in on_disk]
+        changed = [
+            (dirname, mtime_ns)
+            for dirname, mtime_ns in on_disk.items()
+            if indexed.get(dirname) != mtime_ns
+        ]
+        if not removed and not changed:
+            return
+
+        rows = []
+        texts = []
+        for dirname, mtime_ns in changed:
+            run_path = self.runs_folder / dirname / TaskRun.base_filename()
+            # Projection load: only the indexed fields, no validation, and no model cache churn
+            try:
+                fields = TaskRun.load_fields(run_path, INDEXED_FIELDS)
+            except FileNotFoundError:
+                # Deleted since the scan, dropped on the next refresh
+                continue
+            rows.append(self._row_from_fields(dirname, mtime_ns, fields))
+            texts.append(_text_from_fields(fields))
+
+        self._write_rows_locked(conn, removed, rows, texts)
+
+    def _refresh_if_stale_locked(self) -> None:
+        # Checks the connection first: a new one (index deleted) always needs a scan
+        self._connection()
+        if (
+            self._scanned_at is not None
+            and time.monotonic() - self._scanned_at < QUERY_MAX_STALENESS_SECONDS
+        ):
+            return
+        self._refresh_locked()
+
+    def _write_rows_locked(
+        self,
+        conn: sqlite3.Connection,
+        removed: List[str],
+        rows: List[tuple],
+        texts: List[tuple],
+    ) -> None:
+        with conn:
+            # Text rows are keyed by the run row's rowid, which changes on replace: drop them first
+            conn.executemany(
+                "DELETE FROM run_text WHERE rowid IN (SELECT rowid FROM runs WHERE dirname = ?)",
+                [(d,) for d in removed] + [(row[0],) for row in rows],
+            )
+            conn.executemany(
+                "DELETE FROM runs WHERE dirname = ?", [(d,) for d in removed]
+            )
+            conn.executemany(
+                "DELETE FROM run_tags WHERE dirname = ?",
+                [(d,) for d in removed] + [(row[0],) for row in rows],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO run_tags VALUES (?, ?)",
+                [(tag, row[0]) for row in rows for tag in json.loads(row[4])],
+            )
+            conn.executemany(
+                f"INSERT INTO run_text (rowid, {', '.join(field.value for field in RunSearchField)}) SELECT rowid, ?, ?, ?, ? FROM runs WHERE dirname = ?",
+                [text + (row[0],) for row, text in zip(rows, texts)],
+            )
+        self._generation += 1
+
+    def update_runs(self, run_paths: Iterable[Path]) -> None:
+        """
+        Re-index runs which were just written, so the index (and its tag and text indexes) is current before the save returns, without a scan of the runs folder. A no-op if the index hasn't been built.
+        """
+        if not self.db_path.exists():
+            return
+        # Read under the lock, so concurrent saves of a run are indexed in the order they were written
+        with self._lock:
+            rows = []
+            texts = []
+            for run_path in run_paths:
+                run_path = run_path.resolve()
+                try:
+                    dirname = run_path.parent.relative_to(self.runs_folder).as_posix()
+                except ValueError:
+                    continue
+                # Same precedence as the scan: a loose file, then a packed record
+                try:
+                    mtime_ns: int | None = os.stat(run_path).st_mtime_ns
+                except FileNotFoundError:
+                    mtime_ns = packed_record_stamp(run_path)
+                if mtime_ns is None:
+                    continue
+                try:
+                    fields = TaskRun.load_fields(run_path, INDEXED_FIELDS)
+                except FileNotFoundError:
+                    # Deleted since, dropped on the next refresh
+                    continue
+                rows.append(self._row_from_fields(dirname, mtime_ns, fields))
+                texts.append(_text_from_fields(fields))
+            if rows:
+                self._write_rows_locked(self._connection(), [], rows, texts)
+
+    def _row_from_fields(
+        self, dirname: str, mtime_ns: int, fields: Dict[str, Any]
+    ) -> tuple:
+        created_at = fields["created_at"]
+        if created_at is None:
+            created_at = datetime.fromtimestamp(mtime_ns / 1e9)
+        else:
+            # Normalize whatever format is on disk
+            created_at = _datetime_adapter.validate_python(created_at)
+        rating = fields["output.rating"]
+        model_name = fields["output.source.properties.model_name"]
+        input = fields["input"]
+        output = fields["output.output"]
+        intermediate_outputs = fields["intermediate_outputs"]
+        if not isinstance(intermediate_outputs, dict):
+            intermediate_outputs = {}
+        thinking = intermediate_outputs.get("reasoning") or intermediate_outputs.get(
+            "chain_of_thought"
+        )
+        usage = fields["usage"] if isinstance(fields["usage"], dict) else {}
+        return (
+            dirname,
+            fields["id"],
+            mtime_ns,
+            created_at.isoformat(),
+            json.dumps(fields["tags"] or []),
+            json.dumps(rating) if rating is not None else None,
+            fields["output.source.type"],
+            fields["input_source.type"],
+            model_name if isinstance(model_name, str) else None,
+            input[:PREVIEW_LENGTH] if isinstance(input, str) else None,
+            output[:PREVIEW_LENGTH] if isinstance(output, str) and output else None,
+            output is not None,
+            bool(fields["repair_instructions"]),
+            fields["repaired_output"] is not None,
+            thinking is not None,
+            # Same default as TaskOutputRating.type, for files saved without it
+            rating.get("type", TaskOutputRatingType.five_star.value)
+            if isinstance(rating, dict)
+            else None,
+            rating.get("value") if isinstance(rating, dict) else None,
+            usage.get("input_tokens"),
+            usage.get("output_tokens"),
+            usage.get("total_tokens"),
+            usage.get("cost"),
+        )
+
+    def _entry_from_row(self, row: tuple) -> RunIndexEntry:
+        rating = None
+        if row[5] is not None:
+            rating = TaskOutputRating.model_validate_json(
+                row[5], context={"loading_from_file": True}
+            )
+        return RunIndexEntry(
+            id=row[1],
+            path=self.runs_folder / row[0] / TaskRun.base_filename(),
+            mtime_ns=row[2],
+            created_at=datetime.fromisoformat(row[3]),
+            tags=json.loads(row[4]),
+            rating=rating,
+            output_source_type=row[6],
+            input_source_type=row[7],
+            model_name=row[8],
+            input_preview=row[9],
+            output_preview=row[10],
+            has_output=bool(row[11]),
+            has_repair_instructions=bool(row[12]),
+            has_repaired_output=bool(row[13]),
+            has_thinking_training_data=bool(row[14]),
+            input_tokens=row[17],
+            output_tokens=row[18],
+            total_tokens=row[19],
+            cost=row[20],
+        )
+
+    def entries(self) -> List[RunIndexEntry]:
+        """All runs in the task, refreshed against disk."""
+        with self._lock:
+            self._refresh_locked()
+            rows = (
+                self._connection()
+                .execute("SELECT * FROM runs ORDER BY dirname")
+                .fetchall()
+            )
+        return [self._entry_from_row(row) for row in rows]
+
+    def entry_for_id(self, id: str) -> RunIndexEntry | None:
+        with self._lock:
+            self._refresh_locked()
+            row = (
+                self._connection()
+                .execute("SELECT * FROM runs WHERE id = ?", (id,))
+                .fetchone()
+            )
+        return self._entry_from_row(row) if row else None
+
+    def filtered_entries(
+        self, filter: Callable[[RunIndexEntry], bool]
+    ) -> List[RunIndexEntry]:
+        return [entry for entry in self.entries() if filter(entry)]
+
+    def ids_in_filter(self, filter_id: DatasetFilterId) -> List[str]:
+        """The IDs of the runs matching a dataset filter, without loading the runs. Tag filters use the tag index, others are evaluated as a vectorized mask over the frame."""
+        if filter_id.startswith("tag::") and len(filter_id) > 5:
+            return self.ids_with_tag(filter_id[5:])
+        frame = self.frame()
+        return frame.ids_where(frame.mask_for_filter(filter_id))
+
+    def frame(self) -> "RunFrame":
+        """
+        The indexed metadata as NumPy columns, for vectorized filtering and stats. Refreshed against disk, but only rebuilt if the index changed. See run_frame.py.
+        """
+        from kiln_ai.datamodel.run_frame import INDEX_COLUMNS, RunFrame
+
+        with self._lock:
+            self._refresh_locked()
+            conn = self._connection()
+            # data_version changes when another connection (process) commits changes
+            version = (
+                self._generation,
+                conn.execute("PRAGMA data_version").fetchone()[0],
+            )
+            if self._frame is not None and self._frame_version == version:
+                return self._frame
+            rows = conn.execute(
+                f"SELECT {', '.join(INDEX_COLUMNS)} FROM runs ORDER BY dirname"
+            ).fetchall()
+            self._frame = RunFrame.from_index_rows(rows, self.runs_folder)
+            self._frame_version = version
+            return self._frame
+
+    def tag_counts(self) -> Dict[str, int]:
+        """The number of runs with each tag, read from the tag index."""
+        with self._lock:
+            self._refresh_if_stale_locked()
+            rows = (
+                self._connection()
+                .execute("SELECT tag, count FROM tag_counts ORDER BY tag")
+                .fetchall()
+            )
+        return dict(rows)
+
+    def ids_with_tag(self, tag: str) -> List[str]:
+        """The IDs of the runs with a tag, read from the tag index."""
+        with self._lock:
+            self._refresh_if_stale_locked()
+            rows = (
+                self._connection()
+                .execute(
+                    """
+                    SELECT runs.id FROM run_tags JOIN runs ON runs.dirname = run_tags.dirname
+                    WHERE run_tags.tag = ? AND runs.id IS NOT NULL
+                    ORDER BY run_tags.dirname
+                    """,
+                    (tag,),
+                )
+                .fetchall()
+            )
+        return [row[0] for row in rows]
+
+    def search(
+        self,
+        text: str,
+        limit: int = 50,
+        fields: List[RunSearchField] | None = None,
+    ) -> List[RunSearchResult]:
+        """
+        Runs whose text matches a search, best match first. Every word must match (case and accent insensitive), "quoted phrases" match as phrases, and a word ending in * matches as a prefix. Every matching run is ranked, so searches matching most of a large task are much slower than selective ones.
+
+        Args:
+            fields: Only search this text of each run. Defaults to all of RunSearchField.
+
+        Raises:
+            ValueError: If the search has no words.
+        """
+        query = _search_query(text, fields)
+        with self._lock:
+            self._refresh_if_stale_locked()
+            rows = (
+                self._connection()
+                .execute(
+                    """
+                    SELECT runs.id, -run_text.rank, snippet(run_text, -1, '', '', '…', 16)
+                    FROM run_text JOIN runs ON runs.rowid = run_text.rowid
+                    WHERE run_text MATCH ?
+                    ORDER BY run_text.rank
+                    LIMIT ?
+                    """,
+                    (query, limit),
+                )
+                .fetchall()
+            )
+        return [
+            RunSearchResult(id=id, score=score, snippet=snippet)
+            for id, score, snippet in rows
+            if id is not None
+        ]
+
+    def page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        sort: RunSortKey = RunSortKey.created_at,
+        descending: bool = True,
+        filter_id: DatasetFilterId | None = None,
+        search: str | None = None,
+    ) -> RunIndexPage:
+        """
+        One page of runs, sorted, filtered and searched in the index. Pass the previous page's next_cursor to continue. The cost of a page doesn't depend on its position.
+
+        Args:
+            filter_id: A dataset filter. Tag filters are evaluated in SQL, others on the run frame.
+            search: Only runs matching this full-text search, same syntax and text as search(). Results keep the page's sort.
+
+        Raises:
+            ValueError: If the cursor is invalid, or from a query with a different sort, or the search has no words.
+        """
+        sort = RunSortKey(sort)
+        expression = _SORT_EXPRESSIONS[sort]
+        conditions: List[str] = []
+        params: List[Any] = []
+        filter_dirnames = None
+        if filter_id is not None and filter_id != StaticDatasetFilters.ALL:
+            if filter_id.startswith("tag::") and len(filter_id) > 5:
+                conditions.append(
+                    "dirname IN (SELECT dirname FROM run_tags WHERE tag = ?)"
+                )
+                params.append(filter_id[5:])
+            else:
+                frame = self.frame()
+                filter_dirnames = frame.dirnames[frame.mask_for_filter(filter_id)]
+                conditions.append("dirname IN (SELECT dirname FROM page_filter)")
+        if search:
+            # The full text index, not the previews: matches anywhere in the run's text
+            conditions.append(
+                "rowid IN (SELECT rowid FROM run_text WHERE run_text MATCH ?)"
+            )
+            params.append(_search_query(search))
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if cursor is not None:
+            comparison = "<" if descending else ">"
+            sort_value, dirname = _decode_cursor(cursor, sort, descending)
+            # The redundant bound on the sort expression alone lets SQLite seek the sort index rather than scan it
+            page_conditions.append(
+                f"{expression} {comparison}= ? AND ({expression}, dirname) {comparison} (?, ?)"
+            )
+            page_params += [sort_value, sort_value, dirname]
+        direction = "DESC" if descending else "ASC"
+
+        with self._lock:
+            self._refresh_if_stale_locked()
+            conn = self._connection()
+            if filter_dirnames is not None:
+                # Per connection, and we hold the connection's lock
+                conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS page_filter (dirname TEXT PRIMARY KEY)"
+                )
+                with conn:
+                    conn.execute("DELETE FROM page_filter")
+                    conn.executemany(
+                        "INSERT INTO page_filter VALUES (?)",
+                        ((dirname,) for dirname in filter_dirnames),
+                    )
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM runs WHERE {' AND '.join(conditions) or 1}",
+                params,
+            ).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT *, {expression} FROM runs
+                WHERE {" AND ".join(page_conditions) or 1}
+                ORDER BY {expression} {direction}, dirname {direction}
+                LIMIT ?
+                """,
+                page_params + [limit + 1],
+            ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(sort, descending, rows[-1][-1], rows[-1][0])
+        return RunIndexPage(
+            entries=[self._entry_from_row(row) for row in rows],
+            next_cursor=next_cursor,
+            total=total,
+        )
+
+    def remove_ids(self, ids: List[str]) -> None:
+        """
+        Drop rows for runs known to be deleted, so the next refresh has nothing to reconcile. A no-op if the index hasn't been built.
+        """
+        if not ids or not self.db_path.exists():
+            return
+        with self._lock:
+            with self._connection() as conn:
+                params = [(id,) for id in ids]
+                conn.executemany(
+                    "DELETE FROM run_text WHERE rowid IN (SELECT rowid FROM runs WHERE id = ?)",
+                    params,
+                )
+                conn.executemany(
+                    "DELETE FROM run_tags WHERE dirname IN (SELECT dirname FROM runs WHERE id = ?)",
+                    params,
+                )
+                conn.executemany("DELETE FROM runs WHERE id = ?", params)
+            self._generation += 1
+
+
+def run_index_dir() -> Path:
+    """The folder holding the run index of every task, in the user's settings dir."""
+    return Path(Config.settings_dir()) / RUN_INDEX_DIRNAME
+
+
+def run_index_path(task_folder: Path) -> Path:
+    """The index database of a task, keyed by the task folder's absolute path."""
+    digest = hashlib.sha256(str(task_folder.resolve()).encode("utf-8")).hexdigest()
+    return run_index_dir() / f"{digest[:32]}.sqlite"
+
+
+def _text_from_fields(fields: Dict[str, Any]) -> Tuple[str | None, ...]:
+    """The full-text index columns of a run, in RunSearchField order."""
+    intermediate_outputs = fields["intermediate_outputs"]
+    if isinstance(intermediate_outputs, dict):
+        intermediate_text = "\n\n".join(
+            value for value in intermediate_outputs.values() if isinstance(value, str)
+        )
+    else:
+        intermediate_text = None
+    texts = [
+        fields["input"],
+        fields["output.output"],
+        fields["repaired_output.output"],
+        intermediate_text,
+    ]
+    return tuple(text if isinstance(text, str) else None for text in texts)
+
+
+def _search_query(text: str, fields: List[RunSearchField] | None = None) -> str:
+    # An FTS5 query from user search text, see RunIndex.search
+    terms = []
+    for phrase, word in _SEARCH_TERM.findall(text):
+        prefix = word.endswith("*")
+        term = phrase or word.rstrip("*")
+        if term:
+            # Quoted, so FTS5 query syntax in the search is matched as text
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("Search text is empty")
+    query = " ".join(terms)
+    if fields:
+        columns = " ".join(RunSearchField(field).value for field in fields)
+        query = f"{{{columns}}} : ({query})"
+    return query
+
+
+def _encode_cursor(
+    sort: RunSortKey, descending: bool, sort_value: Any, dirname: str
+) -> str:
+    # Opaque to callers: the position of the last run of a page
+    data = json.dumps([sort.value, descending, sort_value, dirname])
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort: RunSortKey, descending: bool) -> Tuple[Any, str]:
+    try:
+        cursor_sort, cursor_descending, sort_value, dirname = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+    except (ValueError, TypeError):
+        raise ValueError("Invalid page cursor")
+    if not isinstance(dirname, str) or not isinstance(sort_value, (str, int, float)):
+        raise ValueError("Invalid page cursor")
+    if cursor_sort != sort.value or cursor_descending != descending:
+        raise ValueError("Page cursor is from a query with a different sort")
+    return sort_value, dirname
+
+
+def runs_saved(run_paths: Iterable[Path]) -> None:
+    """
+    Update the indexes of the tasks owning these just-written run files. Called by the datamodel on save, a no-op for tasks without an index.
+    """
+    by_task: Dict[Path, List[Path]] = {}
+    for run_path in run_paths:
+        runs_folder = relationship_folder_of_child_path(
+            run_path, TaskRun.relationship_name()
+        )
+        by_task.setdefault(runs_folder.parent, []).append(run_path)
+    for task_folder, paths in by_task.items():
+        RunIndex.for_task_path(task_folder).update_runs(paths)
+
+
+def run_deleted(run_path: Path, id: str) -> None:
+    """Drop a deleted run from its task's index. A no-op for tasks without an index."""
+    runs_folder = relationship_folder_of_child_path(
+        run_path, TaskRun.relationship_name()
+    )
+    RunIndex.for_task_path(runs_folder.parent).remove_ids([id])
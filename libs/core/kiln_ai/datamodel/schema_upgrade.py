@@ -0,0 +1,271 @@
+"""
+Offline upgrade of a project's .kiln files to the current data format.
+
+Some models upgrade legacy data shapes as they load (for example TaskOutputRating.upgrade_old_format, TaskRunConfig.upgrade_old_entries). The upgraded form is only written back if the model is saved, so old projects pay the conversion on every load. This tool loads every model file in a project, and rewrites the files whose saved form differs from what the current version of Kiln would save:
+
+ - Loose files are replaced atomically (write to a temp file, then rename), so readers never see a partial file.
+ - Packed children (packed_storage.py) are rewritten with one append per pack.
+ - Files are parsed and validated in parallel. Unchanged files aren't written, so running it again is cheap.
+ - Files which fail to load are reported and left untouched.
+
+Close the app first, or it may overwrite upgraded files with models it already loaded. The upgrade refuses to run while another process using the datamodel is running (see process_lock.py). Dry runs don't write, so they always run.
+
+    python -m kiln_ai.datamodel.schema_upgrade path/to/project.kiln
+    python -m kiln_ai.datamodel.schema_upgrade path/to/project.kiln --dry-run
+"""
+
+import argparse
+import os
+import sys
+import uuid
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Literal, Tuple, Type
+
+from kiln_ai.datamodel.basemodel import KilnBaseModel
+from kiln_ai.datamodel.dataset_split import DatasetSplit
+from kiln_ai.datamodel.eval import Eval, EvalConfig, EvalRun
+from kiln_ai.datamodel.finetune import Finetune
+from kiln_ai.datamodel.json_codec import compact_json_enabled, json_codec
+from kiln_ai.datamodel.model_cache import ModelCache
+from kiln_ai.datamodel.packed_storage import PACK_DIRNAME, PackStore
+from kiln_ai.datamodel.process_lock import running_processes
+from kiln_ai.datamodel.project import Project
+from kiln_ai.datamodel.prompt import Prompt
+from kiln_ai.datamodel.task import Task, TaskRunConfig
+from kiln_ai.datamodel.task_run import TaskRun
+
+# Every model saved as its own file, keyed by file name
+MODEL_FILE_TYPES: Dict[str, Type[KilnBaseModel]] = {
+    model_type.base_filename(): model_type
+    for model_type in [
+        Project,
+        Task,
+        TaskRun,
+        TaskRunConfig,
+        Prompt,
+        DatasetSplit,
+        Finetune,
+        Eval,
+        EvalConfig,
+        EvalRun,
+    ]
+}
+
+# Validation is CPU bound, so processes scale with cores for a one-off pass over a whole project
+UpgradePool = Literal["thread", "process"]
+
+
+@dataclass
+class SchemaUpgradeReport:
+    """What an upgrade changed, or would change for a dry run."""
+
+    checked: int = 0
+    # Paths of upgraded files. Packed children use their path as if loose.
+    upgraded: List[Path] = field(default_factory=list)
+    # Upgraded files by model type name
+    upgraded_by_type: Counter = field(default_factory=Counter)
+    # Files which couldn't be loaded, and the error. Left untouched.
+    errors: Dict[Path, str] = field(default_factory=dict)
+    dry_run: bool = False
+
+
+def upgraded_model_json(
+    data: bytes,
+    model_type: Type[KilnBaseModel],
+    path: Path | None = None,
+    compact: bool = False,
+) -> bytes | None:
+    """
+    The JSON the current version of Kiln would save for this model file, or None if it would save the same content (formatting is ignored).
+
+    Pass the model's path for projects using the blob store (blob_store.py), to resolve and save blob references.
+
+    Raises:
+        ValueError / ValidationError: If the file can't be loaded, same as load_from_file
+    """
+    codec = json_codec()
+    parsed = codec.loads(data)
+    if parsed.get("model_type") != model_type.type_name():
+        raise ValueError(
+            f"Expected model type {model_type.type_name()}, got {parsed.get('model_type')}"
+        )
+    # Parse again to validate: upgrade validators modify the data they're given in place
+    model = model_type.model_validate(
+        codec.loads(data), context={"loading_from_file": True, "file_path": path}
+    )
+    if model.v > model.max_schema_version():
+        raise ValueError(
+            f"Schema version {model.v} is newer than this version of Kiln supports ({model.max_schema_version()})"
+        )
+    if path is not None:
+        upgraded = model.file_json(path, compact=compact)
+    else:
+        upgraded = codec.dumps(model, compact=compact, exclude={"path"})
+    if codec.loads(upgraded) == parsed:
+        return None
+    return upgraded
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp_path = path.with_name(f".{path.name}-{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _upgrade_file(path: Path, dry_run: bool) -> Tuple[Path, bool, str | None]:
+    # Module level, so it can run in a process pool. Returns (path, upgraded, error).
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        upgraded = upgraded_model_json(
+            data, MODEL_FILE_TYPES[path.name], path, compact=compact_json_enabled()
+        )
+        if upgraded is None:
+            return path, False, None
+        if not dry_run:
+            _write_atomic(path, upgraded)
+        return path, True, None
+    except Exception as e:
+        return path, False, f"{type(e).__name__}: {e}"
+
+
+def _find_model_files(root: Path) -> Tuple[List[Path], List[Path]]:
+    """(loose model files, packed relationship folders) under root."""
+    files: List[Path] = []
+    packed_folders: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if PACK_DIRNAME in dirnames:
+            packed_folders.append(Path(dirpath))
+        # Skip hidden folders: packs (handled separately), bulk writer staging, etc
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        for filename in filenames:
+            if filename in MODEL_FILE_TYPES:
+                files.append(Path(dirpath) / filename)
+    return files, packed_folders
+
+
+def _upgrade_pack(
+    relationship_folder: Path, report: SchemaUpgradeReport, dry_run: bool
+) -> None:
+    store = PackStore.for_folder(relationship_folder)
+    if store is None:
+        return
+    base_filename = store.base_filename
+    model_type = MODEL_FILE_TYPES.get(base_filename)
+    if model_type is None:
+        return
+    records: List[Tuple[str, bytes | None]] = []
+    for dirname in store.dirnames():
+        record = store.read(dirname)
+        if record is None:
+            continue
+        path = relationship_folder / dirname / base_filename
+        report.checked += 1
+        try:
+            # Packs always hold compact JSON
+            upgraded = upgraded_model_json(record[0], model_type, path, compact=True)
+        except Exception as e:
+            report.errors[path] = f"{type(e).__name__}: {e}"
+            continue
+        if upgraded is None:
+            continue
+        report.upgraded.append(path)
+        report.upgraded_by_type[model_type.type_name()] += 1
+        records.append((dirname, upgraded))
+    if records and not dry_run:
+        store.write_many(records)
+
+
+def upgrade_project(
+    project_path: Path,
+    dry_run: bool = False,
+    max_workers: int = 8,
+    pool: UpgradePool = "thread",
+) -> SchemaUpgradeReport:
+    """
+    Upgrade every model file in a project (or any folder of Kiln models) to the current data format.
+
+    Args:
+        project_path: A project.kiln file, or a folder
+        dry_run: Report what would change without writing anything
+        max_workers: Files parsed and validated in parallel
+        pool: "thread" or "process". Processes scale validation with cores.
+
+    Raises:
+        ValueError: If another process using the datamodel (like the Kiln app) is running, and this isn't a dry run
+    """
+    if not dry_run:
+        running = running_processes()
+        if running:
+            raise ValueError(
+                f"Kiln is running (process IDs: {', '.join(str(pid) for pid in running)}). "
+                "Close the app before upgrading, or it may overwrite upgraded files."
+            )
+    root = project_path.parent if project_path.is_file() else project_path
+    report = SchemaUpgradeReport(dry_run=dry_run)
+    files, packed_folders = _find_model_files(root)
+
+    executor: Executor
+    if pool == "process":
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    with executor:
+        results = executor.map(
+            _upgrade_file, files, [dry_run] * len(files), chunksize=64
+        )
+        for path, upgraded, error in results:
+            report.checked += 1
+            if error is not None:
+                report.errors[path] = error
+            elif upgraded:
+                report.upgraded.append(path)
+                report.upgraded_by_type[MODEL_FILE_TYPES[path.name].type_name()] += 1
+
+    for relationship_folder in packed_folders:
+        _upgrade_pack(relationship_folder, report, dry_run)
+
+    if not dry_run:
+        ModelCache.shared().invalidate_many(report.upgraded)
+    return report
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m kiln_ai.datamodel.schema_upgrade",
+        description="Rewrite a Kiln project's files in the current data format, so legacy data isn't converted on every load.",
+    )
+    parser.add_argument("project", type=Path, help="project.kiln file or folder")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report changes without writing"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+    args = parser.parse_args(argv)
+
+    try:
+        report = upgrade_project(
+            args.project, dry_run=args.dry_run, max_workers=args.workers, pool=args.pool
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    verb = "Would upgrade" if report.dry_run else "Upgraded"
+    sys.stdout.write(
+        f"Checked {report.checked} files. {verb} {len(report.upgraded)}.\n"
+    )
+    for type_name, count in sorted(report.upgraded_by_type.items()):
+        sys.stdout.write(f"  {type_name}: {count}\n")
+    for path, error in report.errors.items():
+        sys.stdout.write(f"Error: {path}: {error}\n")
+
+
+if __name__ == "__main__":
+    main()
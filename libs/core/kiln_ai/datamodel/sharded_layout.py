@@ -0,0 +1,273 @@
+"""
+Sharded layout for relationship folders with very many children (task runs, eval runs).
+
+The default layout puts every child folder directly in the relationship folder ("runs/{id} - {name}/task_run.kiln"). Listing a single folder with hundreds of thousands of entries is slow on most filesystems, and worse on synced or network drives. A sharded relationship folder adds one level, keyed by a hash of the child's ID:
+
+    runs/.kiln_shards                           format version and shard name length
+    runs/3f/{id} - {name}/task_run.kiln
+
+ - The shard is the first characters of the MD5 hex digest of the ID. IDs are mostly random digits, so hashing spreads children evenly: 2 characters gives 256 shards.
+ - New children are saved into their shard (KilnParentedModel.build_path), and existing children keep their path.
+ - Reading understands both layouts, including a folder with children in both (for example an interrupted migration): children directly in the relationship folder are still found.
+ - Opt in per relationship folder, and convert back at any time. Close the app first, models already loaded keep their old path.
+
+    python -m kiln_ai.datamodel.sharded_layout shard path/to/task/runs
+    python -m kiln_ai.datamodel.sharded_layout unshard path/to/task/runs
+
+Can't be combined with packed storage (see packed_storage.py), which already avoids one folder per child.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, Dict, Iterator, List, Tuple, Type
+
+from kiln_ai.datamodel.child_id_map import id_from_child_dirname
+from kiln_ai.datamodel.packed_storage import PACK_DIRNAME
+
+if TYPE_CHECKING:
+    from kiln_ai.datamodel.basemodel import KilnParentedModel
+
+SHARDS_FILENAME = ".kiln_shards"
+SHARDS_FORMAT_VERSION = 1
+DEFAULT_SHARD_CHARS = 2
+MAX_SHARD_CHARS = 4
+
+_HEX_CHARS = frozenset("0123456789abcdef")
+
+
+def is_shard_name(name: str) -> bool:
+    return 0 < len(name) <= MAX_SHARD_CHARS and all(c in _HEX_CHARS for c in name)
+
+
+@dataclass(frozen=True)
+class ShardLayout:
+    chars: int
+
+    _cache: ClassVar[Dict[str, Tuple[int, "ShardLayout"]]] = {}
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def for_folder(cls, relationship_folder: Path) -> "ShardLayout | None":
+        """
+        The layout of a relationship folder, or None if it isn't sharded. Costs one stat when the folder hasn't changed.
+        """
+        path = os.path.join(os.fspath(relationship_folder), SHARDS_FILENAME)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with cls._cache_lock:
+            cached = cls._cache.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+        try:
+            with open(path, "rb") as file:
+                metadata = json.loads(file.read())
+        except FileNotFoundError:
+            return None
+        if metadata.get("v", 0) > SHARDS_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} is from a newer version of Kiln. Upgrade Kiln to read it."
+            )
+        layout = cls(chars=metadata["chars"])
+        with cls._cache_lock:
+            cls._cache[path] = (mtime_ns, layout)
+        return layout
+
+    def shard_for_id(self, id: str) -> str:
+        return hashlib.md5(id.encode("utf-8")).hexdigest()[: self.chars]
+
+
+def shard_for_dirname(layout: ShardLayout, dirname: str) -> str:
+    return layout.shard_for_id(id_from_child_dirname(dirname))
+
+
+def relationship_folder_of_child_path(path: Path, relationship_name: str) -> Path:
+    """
+    The relationship folder of a child's path, in either layout. No disk access.
+
+    Unsharded: {relationship folder}/{dirname}/{base filename}
+    Sharded: {relationship folder}/{shard}/{dirname}/{base filename}
+    """
+    folder = path.parent.parent
+    if folder.name != relationship_name and is_shard_name(folder.name):
+        if folder.parent.name == relationship_name:
+            return folder.parent
+    return folder
+
+
+def iterate_child_dirs(
+    relationship_folder: Path, base_filename: str
+) -> Iterator[Tuple[str, str]]:
+    """
+    Every folder which may hold a child, in either layout: (dirname relative to the relationship folder, full path). Callers check the child file exists.
+
+    Sharded dirnames include the shard ("3f/{id} - {name}"), so the relative dirname always locates the child.
+    """
+    sharded = ShardLayout.for_folder(relationship_folder) is not None
+    with os.scandir(relationship_folder) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            if (
+                sharded
+                and is_shard_name(entry.name)
+                and not os.path.exists(os.path.join(entry.path, base_filename))
+            ):
+                with os.scandir(entry.path) as shard_entries:
+                    for shard_entry in shard_entries:
+                        if shard_entry.is_dir():
+                            yield f"{entry.name}/{shard_entry.name}", shard_entry.path
+            else:
+                yield entry.name, entry.path
+
+
+def _write_metadata(relationship_folder: Path, chars: int) -> None:
+    path = relationship_folder / SHARDS_FILENAME
+    temp_path = relationship_folder / f"{SHARDS_FILENAME}-{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(
+            json.dumps({"v": SHARDS_FORMAT_VERSION, "chars": chars}).encode("utf-8")
+        )
+    os.replace(temp_path, path)
+
+
+def _unsharded_child_dirnames(relationship_folder: Path) -> List[str]:
+    dirnames = []
+    with os.scandir(relationship_folder) as entries:
+        for entry in entries:
+            # Skip hidden folders (like bulk writer staging folders)
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            kiln_files = [
+                name for name in os.listdir(entry.path) if name.endswith(".kiln")
+            ]
+            if kiln_files:
+                dirnames.append(entry.name)
+    return dirnames
+
+
+def shard_folder(relationship_folder: Path, chars: int = DEFAULT_SHARD_CHARS) -> int:
+    """
+    Convert a relationship folder to the sharded layout, moving each child folder into its shard.
+
+    Safe to re-run: if the folder is already sharded, remaining unsharded children are moved.
+
+    Returns:
+        int: The number of children moved
+    """
+    relationship_folder = Path(relationship_folder)
+    if not 1 <= chars <= MAX_SHARD_CHARS:
+        raise ValueError(f"Shard length must be 1 to {MAX_SHARD_CHARS} characters")
+    if (relationship_folder / PACK_DIRNAME).is_dir():
+        raise ValueError(f"{relationship_folder} is packed, it can't also be sharded")
+    layout = ShardLayout.for_folder(relationship_folder)
+    if layout is not None and layout.chars != chars:
+        raise ValueError(
+            f"{relationship_folder} is already sharded with {layout.chars} character shards. Unshard it first."
+        )
+
+    dirnames = _unsharded_child_dirnames(relationship_folder)
+    # Metadata first: from here, readers scan the shards as well as the top level
+    _write_metadata(relationship_folder, chars)
+    layout = ShardLayout(chars=chars)
+    for dirname in dirnames:
+        shard = relationship_folder / shard_for_dirname(layout, dirname)
+        shard.mkdir(exist_ok=True)
+        os.rename(relationship_folder / dirname, shard / dirname)
+    return len(dirnames)
+
+
+def unshard_folder(relationship_folder: Path) -> int:
+    """
+    Convert a sharded relationship folder back to one level, with every child folder directly in the relationship folder.
+
+    Returns:
+        int: The number of children moved
+    """
+    relationship_folder = Path(relationship_folder)
+    if ShardLayout.for_folder(relationship_folder) is None:
+        raise ValueError(f"{relationship_folder} is not sharded")
+
+    count = 0
+    with os.scandir(relationship_folder) as entries:
+        shards = [
+            entry.path
+            for entry in entries
+            if entry.is_dir() and is_shard_name(entry.name)
+        ]
+    for shard in shards:
+        names = os.listdir(shard)
+        if any(name.endswith(".kiln") for name in names):
+            # Not a shard: an unsharded child with a shard-like name
+            continue
+        dirnames = [name for name in names if os.path.isdir(os.path.join(shard, name))]
+        for dirname in dirnames:
+            target = relationship_folder / dirname
+            if target.exists():
+                raise ValueError(f"Cannot unshard {shard}/{dirname}: {target} exists")
+            os.rename(os.path.join(shard, dirname), target)
+            count += 1
+        os.rmdir(shard)
+    # Metadata last: until removed, readers still scan any shards left by an interruption
+    os.remove(relationship_folder / SHARDS_FILENAME)
+    return count
+
+
+def shard_children(
+    parent_path: Path,
+    child_type: Type["KilnParentedModel"],
+    chars: int = DEFAULT_SHARD_CHARS,
+) -> int:
+    """
+    Switch one relationship of a saved parent to the sharded layout, for example shard_children(task.path, TaskRun).
+    """
+    return shard_folder(_relationship_folder(parent_path, child_type), chars)
+
+
+def unshard_children(parent_path: Path, child_type: Type["KilnParentedModel"]) -> int:
+    """
+    Switch one relationship of a saved parent back to one level of child folders.
+    """
+    return unshard_folder(_relationship_folder(parent_path, child_type))
+
+
+def _relationship_folder(
+    parent_path: Path, child_type: Type["KilnParentedModel"]
+) -> Path:
+    parent_folder = parent_path.parent if parent_path.is_file() else parent_path
+    return parent_folder / child_type.relationship_name()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m kiln_ai.datamodel.sharded_layout",
+        description="Convert Kiln relationship folders (like a task's runs folder) between one level of child folders and a sharded layout.",
+    )
+    parser.add_argument("command", choices=["shard", "unshard"])
+    parser.add_argument("folder", type=Path, help="The relationship folder")
+    parser.add_argument(
+        "--chars",
+        type=int,
+        default=DEFAULT_SHARD_CHARS,
+        help=f"Shard name length in hex characters: 16^chars shards. Default {DEFAULT_SHARD_CHARS}.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "shard":
+        count = shard_folder(args.folder, args.chars)
+        sys.stdout.write(f"Moved {count} children into shards\n")
+    else:
+        count = unshard_folder(args.folder)
+        sys.stdout.write(f"Moved {count} children out of shards\n")
+
+
+if __name__ == "__main__":
+    main()
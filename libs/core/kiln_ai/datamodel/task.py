@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field, ValidationInfo, model_validator
 from typing_extensions import Self
 
 from kiln_ai.datamodel import Finetune
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from kiln_ai.datamodel.basemodel import (
     ID_FIELD,
     ID_TYPE,
@@ -23,10 +24,12 @@ from kiln_ai.datamodel.eval import Eval
 from kiln_ai.datamodel.json_schema import JsonObjectSchema, schema_from_json_str
 from kiln_ai.datamodel.prompt import BasePrompt, Prompt
 from kiln_ai.datamodel.prompt_id import PromptId
+from kiln_ai.datamodel.run_index import RunIndex
 from kiln_ai.datamodel.task_run import TaskRun
 
 if TYPE_CHECKING:
     from kiln_ai.datamodel.project import Project
+    from kiln_ai.datamodel.run_frame import RunFrame
 
 
 class TaskRequirement(BaseModel):
@@ -217,8 +220,13 @@ class Task(
         return schema_from_json_str(self.input_json_schema)
 
     # These wrappers help for typechecking. We should fix this in KilnParentModel
-    def runs(self, readonly: bool = False) -> list[TaskRun]:
-        return super().runs(readonly=readonly)  # type: ignore
+    def runs(self, readonly: bool = False, max_workers: int = 1) -> list[TaskRun]:
+        return super().runs(readonly=readonly, max_workers=max_workers)  # type: ignore
+
+    async def aruns(
+        self, readonly: bool = False, max_workers: int = 1
+    ) -> list[TaskRun]:
+        return await super().aruns(readonly=readonly, max_workers=max_workers)  # type: ignore
 
     def dataset_splits(self, readonly: bool = False) -> list[DatasetSplit]:
         return super().dataset_splits(readonly=readonly)  # type: ignore
@@ -235,6 +243,51 @@ class Task(
     def run_configs(self, readonly: bool = False) -> list[TaskRunConfig]:
         return super().run_configs(readonly=readonly)  # type: ignore
 
+    async def adataset_splits(self, readonly: bool = False) -> list[DatasetSplit]:
+        return await super().adataset_splits(readonly=readonly)  # type: ignore
+
+    async def afinetunes(self, readonly: bool = False) -> list[Finetune]:
+        return await super().afinetunes(readonly=readonly)  # type: ignore
+
+    async def aprompts(self, readonly: bool = False) -> list[Prompt]:
+        return await super().aprompts(readonly=readonly)  # type: ignore
+
+    async def aevals(self, readonly: bool = False) -> list[Eval]:
+        return await super().aevals(readonly=readonly)  # type: ignore
+
+    async def arun_configs(self, readonly: bool = False) -> list[TaskRunConfig]:
+        return await super().arun_configs(readonly=readonly)  # type: ignore
+
+    def delete_runs(self, run_ids: List[str]) -> Dict[str, Exception]:
+        """
+        Delete many runs by ID in one batch, and update the run index once. See KilnParentedModel.delete_many_by_id.
+
+        Returns:
+            Dict[str, Exception]: Run ID to error, for each run which wasn't found or couldn't be deleted. Empty on success.
+        """
+        if self.path is None:
+            raise ValueError("Task must be saved before its runs can be deleted")
+        failures = TaskRun.delete_many_by_id(run_ids, self.path)
+        self.run_index().remove_ids([id for id in run_ids if id not in failures])
+        return failures
+
+    async def adelete_runs(self, run_ids: List[str]) -> Dict[str, Exception]:
+        return await run_datamodel_io(self.delete_runs, run_ids)
+
+    def run_index(self) -> RunIndex:
+        """
+        The persistent index of this task's runs. Use for listing/filtering runs without loading each run file.
+        """
+        if self.path is None:
+            raise ValueError("Task must be saved before its runs can be indexed")
+        return RunIndex.for_task_path(self.path)
+
+    def run_frame(self) -> "RunFrame":
+        """
+        This task's run metadata as NumPy columns, for vectorized filtering and stats over many runs. See run_frame.py.
+        """
+        return self.run_index().frame()
+
     # Workaround to return typed parent without importing Task
     def parent_project(self) -> Union["Project", None]:
         if self.parent is None or self.parent.__class__.__name__ != "Project":
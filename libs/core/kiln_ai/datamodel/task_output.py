@@ -1,11 +1,20 @@
 import json
 from enum import Enum
-from typing import TYPE_CHECKING, Dict, List, Type, Union
-
-from pydantic import BaseModel, Field, ValidationInfo, model_validator
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Type, Union
+
+from pydantic import (
+    BaseModel,
+    Field,
+    FieldSerializationInfo,
+    ValidationInfo,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
 from typing_extensions import Self
 
 from kiln_ai.datamodel.basemodel import ID_TYPE, KilnBaseModel
+from kiln_ai.datamodel.blob_store import resolve_blob_field, serialize_blob_field
 from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
 from kiln_ai.datamodel.json_schema import validate_schema_with_value_error
 from kiln_ai.datamodel.strict_mode import strict_mode
@@ -200,7 +209,8 @@ class DataSource(BaseModel):
         description="Properties describing the data source. For synthetic things like model. For human, the human's name.",
     )
 
-    _data_source_properties = [
+    # Shared by every instance. As a private attribute it was deep copied into each one (every run has two).
+    _data_source_properties: ClassVar[List[DataSourceProperty]] = [
         DataSourceProperty(
             name="created_by",
             type=str,
@@ -298,10 +308,21 @@ class TaskOutput(KilnBaseModel):
         description="The source of the output: human or synthetic.",
         default=None,
     )
+
     rating: TaskOutputRating | None = Field(
         default=None, description="The rating of the output"
     )
 
+    # Large values may be saved in the project's blob store. See blob_store.py.
+    @field_validator("output", mode="before")
+    @classmethod
+    def resolve_blob_fields(cls, value: Any, info: ValidationInfo) -> Any:
+        return resolve_blob_field(value, info.context)
+
+    @field_serializer("output")
+    def serialize_blob_fields(self, value: str, info: FieldSerializationInfo) -> str:
+        return serialize_blob_field(value, info.context)
+
     def validate_output_format(self, task: "Task") -> Self:
         # validate output
         if task.output_json_schema is not None:
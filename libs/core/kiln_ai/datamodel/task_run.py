@@ -1,10 +1,19 @@
 import json
-from typing import TYPE_CHECKING, Dict, List, Union
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, FrozenSet, List, Union
 
-from pydantic import BaseModel, Field, ValidationInfo, model_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    FieldSerializationInfo,
+    ValidationInfo,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
 from typing_extensions import Self
 
 from kiln_ai.datamodel.basemodel import KilnParentedModel
+from kiln_ai.datamodel.blob_store import resolve_blob_field, serialize_blob_field
 from kiln_ai.datamodel.json_schema import validate_schema_with_value_error
 from kiln_ai.datamodel.strict_mode import strict_mode
 from kiln_ai.datamodel.task_output import DataSource, TaskOutput
@@ -73,6 +82,20 @@ class TaskRun(KilnParentedModel):
         description="Usage information for the task run. This includes the number of input tokens, output tokens, and total tokens used.",
     )
 
+    # Large values may be saved in the project's blob store. See blob_store.py.
+    blob_fields: ClassVar[FrozenSet[str]] = frozenset(
+        {"input", "output.output", "repaired_output.output"}
+    )
+
+    @field_validator("input", mode="before")
+    @classmethod
+    def resolve_blob_fields(cls, value: Any, info: ValidationInfo) -> Any:
+        return resolve_blob_field(value, info.context)
+
+    @field_serializer("input")
+    def serialize_blob_fields(self, value: str, info: FieldSerializationInfo) -> str:
+        return serialize_blob_field(value, info.context)
+
     def thinking_training_data(self) -> str | None:
         """
         Get the thinking training data from the task run.
@@ -95,6 +118,22 @@ class TaskRun(KilnParentedModel):
             return None
         return self.parent  # type: ignore
 
+    def save_to_file(self) -> None:
+        super().save_to_file()
+        # Keep the task's run index (and tag index) current. Avoid circular import.
+        from kiln_ai.datamodel.run_index import runs_saved
+
+        if self.path is not None:
+            runs_saved([self.path])
+
+    def delete(self) -> None:
+        path, id = self.path, self.id
+        super().delete()
+        from kiln_ai.datamodel.run_index import run_deleted
+
+        if path is not None and id is not None:
+            run_deleted(path, id)
+
     @model_validator(mode="after")
     def validate_input_format(self, info: ValidationInfo) -> Self:
         # Don't validate if loading from file (not new). Too slow.
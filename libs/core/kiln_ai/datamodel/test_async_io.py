@@ -0,0 +1,114 @@
+import asyncio
+import contextvars
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.async_io import (
+    DEFAULT_IO_WORKERS,
+    datamodel_executor,
+    run_datamodel_io,
+    shutdown_datamodel_executor,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    shutdown_datamodel_executor()
+    yield
+    shutdown_datamodel_executor()
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+async def test_run_datamodel_io():
+    def work(a, b=0):
+        return a + b, threading.current_thread().name
+
+    result, thread_name = await run_datamodel_io(work, 1, b=2)
+    assert result == 3
+    assert thread_name.startswith("kiln_datamodel_io")
+    assert thread_name != threading.current_thread().name
+
+
+async def test_run_datamodel_io_raises():
+    def fail():
+        raise FileNotFoundError("missing")
+
+    with pytest.raises(FileNotFoundError, match="missing"):
+        await run_datamodel_io(fail)
+
+
+async def test_run_datamodel_io_carries_context():
+    var: contextvars.ContextVar[str] = contextvars.ContextVar("test_var")
+    token = var.set("value")
+    try:
+        assert await run_datamodel_io(var.get) == "value"
+    finally:
+        var.reset(token)
+
+
+async def test_event_loop_not_blocked():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    await run_datamodel_io(time.sleep, 0.3)
+    ticker_task.cancel()
+    # Blocking the loop would allow at most one tick
+    assert ticks > 5
+
+
+@pytest.mark.parametrize(
+    "configured,expected", [(3, 3), (None, DEFAULT_IO_WORKERS), (0, DEFAULT_IO_WORKERS)]
+)
+def test_executor_bounded_by_config(configured, expected):
+    with patch("kiln_ai.datamodel.async_io.Config.shared") as shared:
+        shared.return_value.datamodel_io_workers = configured
+        executor = datamodel_executor()
+    assert executor._max_workers == expected
+    assert datamodel_executor() is executor
+
+    shutdown_datamodel_executor()
+    assert datamodel_executor() is not executor
+
+
+async def test_async_model_methods(task):
+    run = TaskRun(
+        parent=task, input="Test input", output=TaskOutput(output="Test output")
+    )
+    await run.asave()
+    assert run.path is not None and run.path.is_file()
+
+    loaded = await TaskRun.aload_from_file(run.path)
+    assert loaded.input == "Test input"
+
+    found = await TaskRun.afrom_id_and_parent_path(run.id, task.path)
+    assert found is not None
+    assert found.id == run.id
+    assert await TaskRun.afrom_id_and_parent_path("missing", task.path) is None
+
+    runs = await task.aruns()
+    assert [r.id for r in runs] == [run.id]
+    assert [t.id for t in await task.parent_project().atasks()] == [task.id]
+    assert await task.aevals(readonly=True) == []
+
+    path = run.path
+    await run.adelete()
+    assert not path.exists()
+    assert await task.aruns() == []
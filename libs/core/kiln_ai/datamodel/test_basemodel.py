@@ -1,6 +1,7 @@
 import datetime
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from unittest.mock import MagicMock, patch
@@ -9,7 +10,7 @@ import pytest
 
 from kiln_ai.adapters.model_adapters.base_adapter import BaseAdapter
 from kiln_ai.adapters.run_output import RunOutput
-from kiln_ai.datamodel import Task, TaskRun
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
 from kiln_ai.datamodel.basemodel import (
     KilnBaseModel,
     KilnParentedModel,
@@ -515,17 +516,16 @@ def test_from_id_and_parent_path_with_cache(test_base_parented_file, tmp_model_c
     # First load to populate cache
     _ = DefaultParentedModel.from_id_and_parent_path(child.id, test_base_parented_file)
 
-    # Mock cache to verify it's used
-    tmp_model_cache.get_model_id = MagicMock(return_value=child.id)
-
     # Load again - should use cache
+    tmp_model_cache.reset_stats()
     found_child = DefaultParentedModel.from_id_and_parent_path(
         child.id, test_base_parented_file
     )
 
     assert found_child is not None
     assert found_child.id == child.id
-    tmp_model_cache.get_model_id.assert_called()
+    assert tmp_model_cache.stats().hits == 1
+    assert tmp_model_cache.stats().misses == 0
 
 
 def test_from_id_and_parent_path_without_parent():
@@ -608,3 +608,105 @@ async def test_invoke_parsing_flow(adapter):
             match="Reasoning is required for this model, but no reasoning was returned.",
         ):
             await adapter.invoke("test input")
+
+
+def test_load_from_file_pins_parent_models(tmp_model_cache, tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    run = TaskRun(
+        parent=task,
+        input="Test input",
+        output=TaskOutput(output="Test output"),
+    )
+    run.save_to_file()
+
+    Task.load_from_file(task.path)
+    TaskRun.load_from_file(run.path)
+
+    assert task.path in tmp_model_cache._pinned
+    assert run.path not in tmp_model_cache._pinned
+    assert tmp_model_cache._sizes[run.path] == run.path.stat().st_size
+
+
+@pytest.fixture
+def task_with_runs(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    for i in range(6):
+        TaskRun(
+            parent=task,
+            input=f"Test input {i}",
+            output=TaskOutput(output=f"Test output {i}"),
+        ).save_to_file()
+    return task
+
+
+@pytest.fixture
+def parallel_load_any_size():
+    # The test tasks are far below the size where parallel loading kicks in
+    with patch("kiln_ai.datamodel.basemodel.PARALLEL_LOAD_MIN_CHILDREN", 0):
+        yield
+
+
+def test_all_children_parallel_matches_sequential(
+    task_with_runs, tmp_model_cache, parallel_load_any_size
+):
+    sequential = TaskRun.all_children_of_parent_path(task_with_runs.path)
+    tmp_model_cache.clear()
+
+    with patch(
+        "kiln_ai.datamodel.basemodel.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+    ) as mock_executor:
+        parallel = task_with_runs.runs(max_workers=3)
+        mock_executor.assert_called_once_with(max_workers=3)
+    assert [run.path for run in parallel] == [run.path for run in sequential]
+    assert [run.input for run in parallel] == [run.input for run in sequential]
+    assert all(run._loaded_from_file for run in parallel)
+
+    # Parallel loads populate the cache in bulk. Mutable callers get copies, not the cache's instances.
+    for run in parallel:
+        cached = tmp_model_cache.get_model(run.path, TaskRun, readonly=True)
+        assert cached is not None
+        assert cached is not run
+
+
+def test_all_children_parallel_sequential_below_threshold(
+    task_with_runs, tmp_model_cache
+):
+    with patch("kiln_ai.datamodel.basemodel.ThreadPoolExecutor") as mock_executor:
+        runs = TaskRun.all_children_of_parent_path(task_with_runs.path, max_workers=3)
+        mock_executor.assert_not_called()
+    assert len(runs) == 6
+
+
+async def test_aruns_parallel(task_with_runs, tmp_model_cache, parallel_load_any_size):
+    runs = await task_with_runs.aruns(readonly=True, max_workers=3)
+    assert sorted(run.input for run in runs) == [f"Test input {i}" for i in range(6)]
+
+
+def test_all_children_parallel_uses_cache(
+    task_with_runs, tmp_model_cache, parallel_load_any_size
+):
+    warm = TaskRun.all_children_of_parent_path(task_with_runs.path, readonly=True)
+
+    with patch.object(TaskRun, "_read_model_file") as mock_read:
+        parallel = TaskRun.all_children_of_parent_path(
+            task_with_runs.path, readonly=True, max_workers=3
+        )
+        mock_read.assert_not_called()
+    assert [a is b for a, b in zip(warm, parallel)] == [True] * 6
+
+
+def test_all_children_parallel_raises_first_error(
+    task_with_runs, tmp_model_cache, parallel_load_any_size
+):
+    paths = list(TaskRun.iterate_children_paths_of_parent_path(task_with_runs.path))
+    paths[1].write_text("not json")
+    paths[4].write_text("{}")
+
+    with pytest.raises(ValueError, match="at line 1 column"):
+        TaskRun.all_children_of_parent_path(task_with_runs.path, max_workers=3)
@@ -0,0 +1,249 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.basemodel import KilnBaseModel
+from kiln_ai.datamodel.blob_store import (
+    BLOB_ESCAPE_PREFIX,
+    BLOB_MARKER,
+    BLOB_MIN_CHARS,
+    BLOB_REF_PREFIX,
+    BLOBS_DIRNAME,
+    BlobStore,
+    is_blob_ref,
+)
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.eval import (
+    Eval,
+    EvalConfig,
+    EvalConfigType,
+    EvalOutputScore,
+    EvalRun,
+)
+from kiln_ai.datamodel.packed_storage import pack_children
+
+LARGE_INPUT = "A large input. " * 200
+LARGE_OUTPUT = "A large output. " * 200
+
+
+@pytest.fixture
+def blobs_enabled():
+    with patch("kiln_ai.datamodel.blob_store.blob_store_enabled", return_value=True):
+        yield
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+@pytest.fixture
+def eval_config(task):
+    eval = Eval(
+        name="Test Eval",
+        parent=task,
+        eval_set_filter_id="tag::eval",
+        eval_configs_filter_id="tag::golden",
+        output_scores=[
+            EvalOutputScore(name="Accuracy", type=TaskOutputRatingType.pass_fail)
+        ],
+    )
+    eval.save_to_file()
+    config = EvalConfig(
+        name="Test Config",
+        parent=eval,
+        model_name="gpt_4o",
+        model_provider="openai",
+        config_type=EvalConfigType.g_eval,
+        properties={"eval_steps": ["step 1"], "task_description": "Test"},
+    )
+    config.save_to_file()
+    return config
+
+
+def make_run(task, input=LARGE_INPUT, output=LARGE_OUTPUT):
+    return TaskRun(parent=task, input=input, output=TaskOutput(output=output))
+
+
+def blob_files(task):
+    folder = task.parent.path.parent / BLOBS_DIRNAME
+    return [path for path in folder.rglob("*") if path.is_file()]
+
+
+def test_put_and_get(tmp_path):
+    store = BlobStore(tmp_path)
+    ref = store.put(LARGE_INPUT)
+    assert is_blob_ref(ref)
+    assert store.put(LARGE_INPUT) == ref
+    assert store.get(ref) == LARGE_INPUT
+
+    # Resolved text is shared, including after a cold read
+    store.clear_cache()
+    first = store.get(ref)
+    assert store.get(ref) is first
+
+    with pytest.raises(ValueError, match="Invalid blob reference"):
+        store.get(BLOB_REF_PREFIX + "not-a-hash")
+    with pytest.raises(FileNotFoundError):
+        store.get(BLOB_REF_PREFIX + "0" * 64)
+
+
+def test_cache_bounded(tmp_path):
+    store = BlobStore(tmp_path, max_cached_chars=len(LARGE_INPUT) + 10)
+    input_ref = store.put(LARGE_INPUT)
+    store.put(LARGE_OUTPUT)
+    assert store._cached_chars <= store.max_cached_chars
+    # Evicted text is read back from disk
+    assert store.get(input_ref) == LARGE_INPUT
+
+
+def test_for_model_path(tmp_path):
+    assert (
+        BlobStore.for_model_path(tmp_path / "runs" / "1 - a" / "task_run.kiln") is None
+    )
+
+    # The project file may be saved after a failed lookup
+    (tmp_path / "project.kiln").write_text("{}")
+    store = BlobStore.for_model_path(tmp_path / "runs" / "1 - a" / "task_run.kiln")
+    assert store is not None
+    assert store.folder == tmp_path / BLOBS_DIRNAME
+    assert BlobStore.for_model_path(tmp_path / "task.kiln") is store
+
+
+def test_save_and_load_with_blobs(task, blobs_enabled):
+    run = make_run(task)
+    run.save_to_file()
+
+    data = json.loads(run.path.read_text())
+    assert is_blob_ref(data["input"])
+    assert is_blob_ref(data["output"]["output"])
+    assert len(blob_files(task)) == 2
+
+    loaded = TaskRun.load_from_file(run.path)
+    assert loaded.input == LARGE_INPUT
+    assert loaded.output.output == LARGE_OUTPUT
+
+    # API responses hold the text, not references
+    assert json.loads(loaded.model_dump_json())["input"] == LARGE_INPUT
+
+
+def test_small_values_inline(task, blobs_enabled):
+    run = make_run(task, input="Small input", output="Small output")
+    run.save_to_file()
+    data = json.loads(run.path.read_text())
+    assert data["input"] == "Small input"
+    assert data["output"]["output"] == "Small output"
+    assert blob_files(task) == []
+
+
+LOOKS_LIKE_REFS = [
+    BLOB_REF_PREFIX + "0" * 64,
+    BLOB_REF_PREFIX + "see docs",
+    BLOB_ESCAPE_PREFIX + "already escaped",
+    BLOB_MARKER,
+]
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+@pytest.mark.parametrize("value", LOOKS_LIKE_REFS)
+def test_value_like_reference_round_trips(task, enabled, value):
+    with patch("kiln_ai.datamodel.blob_store.blob_store_enabled", return_value=enabled):
+        run = make_run(task, input=value, output=value)
+        run.save_to_file()
+        data = json.loads(run.path.read_text())
+        assert data["input"] == BLOB_ESCAPE_PREFIX + value
+        assert blob_files(task) == []
+
+        loaded = TaskRun.load_from_file(run.path)
+        assert loaded.input == value
+        assert loaded.output.output == value
+        assert task.runs()[0].input == value
+        fields = TaskRun.load_fields(run.path, ["input", "output.output"])
+        assert fields == {"input": value, "output.output": value}
+        # Only file saves are escaped
+        assert run.model_dump()["input"] == value
+
+
+def test_unescaped_text_saved_by_older_versions_loads(task):
+    run = make_run(task, input="small")
+    run.save_to_file()
+    data = json.loads(run.path.read_text())
+    data["input"] = BLOB_REF_PREFIX + "see docs"
+    run.path.write_text(json.dumps(data))
+    # Not a valid reference, so it's text
+    assert TaskRun.load_from_file(run.path).input == BLOB_REF_PREFIX + "see docs"
+
+
+def test_load_fields_only_resolves_blob_fields(task, blobs_enabled):
+    run = make_run(task, input="small")
+    run.save_to_file()
+    data = json.loads(run.path.read_text())
+    data["repair_instructions"] = BLOB_ESCAPE_PREFIX + "not a blob field"
+    run.path.write_text(json.dumps(data))
+    fields = TaskRun.load_fields(run.path, ["repair_instructions"])
+    assert fields["repair_instructions"] == BLOB_ESCAPE_PREFIX + "not a blob field"
+
+
+def test_disabled_saves_inline_and_still_reads_refs(task, blobs_enabled):
+    run = make_run(task)
+    run.save_to_file()
+
+    with patch("kiln_ai.datamodel.blob_store.blob_store_enabled", return_value=False):
+        assert TaskRun.load_from_file(run.path).input == LARGE_INPUT
+        other = make_run(task)
+        other.save_to_file()
+    assert json.loads(other.path.read_text())["input"] == LARGE_INPUT
+
+
+def test_eval_runs_share_blobs(task, eval_config, blobs_enabled):
+    eval_runs = [
+        EvalRun(
+            parent=eval_config,
+            dataset_id="123",
+            task_run_config_id=None,
+            eval_config_eval=True,
+            input=LARGE_INPUT,
+            output=LARGE_OUTPUT,
+            scores={"accuracy": 1.0},
+        )
+        for _ in range(5)
+    ]
+    EvalRun.save_many(eval_runs)
+    run = make_run(task)
+    run.save_to_file()
+
+    # One blob each for the input and output, shared by every run
+    assert len(blob_files(task)) == 2
+    loaded = eval_config.runs()
+    assert len(loaded) == 5
+    assert all(r.input == LARGE_INPUT and r.output == LARGE_OUTPUT for r in loaded)
+    assert loaded[0].input is loaded[1].input
+    assert eval_runs[0].path.stat().st_size < BLOB_MIN_CHARS
+
+
+def test_packed_children_with_blobs(task, blobs_enabled):
+    runs = [make_run(task, input=LARGE_INPUT + str(i)) for i in range(3)]
+    KilnBaseModel.save_many(runs)
+    pack_children(task.path, TaskRun)
+    make_run(task, input=LARGE_INPUT + "3").save_to_file()
+
+    loaded = sorted(r.input for r in task.runs())
+    assert loaded == sorted(LARGE_INPUT + str(i) for i in range(4))
+
+
+def test_load_fields_and_index_resolve_refs(task, blobs_enabled):
+    run = make_run(task)
+    run.save_to_file()
+
+    fields = TaskRun.load_fields(run.path, ["input", "output.output", "id"])
+    assert fields["input"] == LARGE_INPUT
+    assert fields["output.output"] == LARGE_OUTPUT
+    entry = task.run_index().entry_for_id(run.id)
+    assert entry is not None
+    assert LARGE_INPUT.startswith(entry.input_preview)
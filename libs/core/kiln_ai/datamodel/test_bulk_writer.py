@@ -0,0 +1,231 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.bulk_writer import (
+    STAGING_DIR_PREFIX,
+    BulkWriter,
+    _sync_dir,
+    bulk_writer,
+)
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_runs(task, count):
+    return [
+        TaskRun(
+            parent=task,
+            input=f"Test input {i}",
+            output=TaskOutput(output=f"Test output {i}"),
+        )
+        for i in range(count)
+    ]
+
+
+def staging_dirs(root):
+    return [p for p in root.rglob(f"{STAGING_DIR_PREFIX}*")]
+
+
+def test_save_many(task, tmp_path):
+    runs = make_runs(task, 20)
+    TaskRun.save_many(runs)
+
+    for run in runs:
+        assert run.path is not None
+        assert run.path.exists()
+        loaded = TaskRun.load_from_file(run.path)
+        assert loaded.input == run.input
+    assert len(task.runs()) == 20
+    assert staging_dirs(tmp_path) == []
+
+
+def test_save_many_matches_save_to_file(task):
+    [bulk_run, single_run] = make_runs(task, 2)
+    TaskRun.save_many([bulk_run])
+    single_run.save_to_file()
+
+    assert bulk_run.path.parent.parent == single_run.path.parent.parent
+    assert bulk_run.path.read_text(encoding="utf-8") == bulk_run.model_dump_json(
+        indent=2, exclude={"path"}
+    )
+
+
+def test_save_many_updates_existing_files(task):
+    runs = make_runs(task, 3)
+    TaskRun.save_many(runs)
+    paths = [run.path for run in runs]
+
+    for run in runs:
+        run.tags = ["updated"]
+    TaskRun.save_many(runs)
+
+    assert [run.path for run in runs] == paths
+    assert all(run.tags == ["updated"] for run in task.runs())
+
+
+def test_save_many_invalidates_cache(task):
+    [run] = make_runs(task, 1)
+    TaskRun.save_many([run])
+    cache = MagicMock()
+    with patch("kiln_ai.datamodel.bulk_writer.ModelCache.shared", return_value=cache):
+        TaskRun.save_many([run])
+    cache.invalidate.assert_called_once_with(run.path)
+
+
+def test_missing_path_writes_nothing(task, tmp_path):
+    runs = make_runs(task, 2)
+    orphan = TaskRun(input="orphan", output=TaskOutput(output="output"))
+    with pytest.raises(ValueError, match="'path' is not set"):
+        TaskRun.save_many([*runs, orphan])
+    assert task.runs() == []
+
+
+def test_staging_failure_writes_nothing(task, tmp_path):
+    runs = make_runs(task, 10)
+    codec = MagicMock()
+    codec.dumps.side_effect = [b"{}"] * 5 + [RuntimeError("disk full")] * 5
+    with patch("kiln_ai.datamodel.basemodel.json_codec", return_value=codec):
+        with pytest.raises(RuntimeError, match="disk full"):
+            TaskRun.save_many(runs)
+
+    assert task.runs() == []
+    assert all(run.path is None for run in runs)
+    assert staging_dirs(tmp_path) == []
+
+
+def test_publish_failure_rolls_back_new_folders(task, tmp_path):
+    [existing, *runs] = make_runs(task, 4)
+    existing.save_to_file()
+    real_rename = os.rename
+    calls = 0
+
+    def failing_rename(src, dst):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise OSError("rename failed")
+        return real_rename(src, dst)
+
+    with patch("kiln_ai.datamodel.bulk_writer.os.rename", side_effect=failing_rename):
+        with pytest.raises(OSError, match="rename failed"):
+            TaskRun.save_many(runs)
+
+    assert [run.id for run in task.runs()] == [existing.id]
+    assert staging_dirs(tmp_path) == []
+
+
+def test_new_tree_published_with_one_rename(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project" / "project.kiln")
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    runs = make_runs(task, 5)
+
+    with patch("kiln_ai.datamodel.bulk_writer.os.rename", wraps=os.rename) as rename:
+        Project.save_many([project, task, *runs])
+    rename.assert_called_once()
+    assert len(project.tasks()[0].runs()) == 5
+
+
+def test_bulk_writer_context(task):
+    runs = make_runs(task, 3)
+    with bulk_writer() as writer:
+        writer.add_all(runs)
+        assert len(writer) == 3
+        # Nothing written until the block exits
+        assert task.runs() == []
+    assert len(task.runs()) == 3
+
+
+def test_bulk_writer_context_aborts_on_error(task):
+    runs = make_runs(task, 3)
+    with pytest.raises(RuntimeError):
+        with bulk_writer() as writer:
+            writer.add_all(runs)
+            raise RuntimeError("oops")
+    assert task.runs() == []
+
+
+def test_duplicate_adds_write_once(task):
+    [run] = make_runs(task, 1)
+    writer = BulkWriter()
+    writer.add(run)
+    run.tags = ["latest"]
+    writer.add(run)
+    assert len(writer) == 1
+    writer.commit()
+    assert task.runs()[0].tags == ["latest"]
+
+
+def test_commit_twice_raises(task):
+    writer = BulkWriter()
+    writer.commit()
+    with pytest.raises(ValueError, match="already been committed"):
+        writer.commit()
+    with pytest.raises(ValueError, match="already been committed"):
+        writer.add(make_runs(task, 1)[0])
+
+
+def test_sync_batches(task):
+    runs = make_runs(task, 5)
+    writer = BulkWriter(sync_batch_size=2)
+    writer.add_all(runs)
+    with patch.object(BulkWriter, "_sync_batch", autospec=True) as sync_batch:
+        writer.commit()
+    # batches of 2, 2, 1
+    assert [len(call.args[2]) for call in sync_batch.call_args_list] == [2, 2, 1]
+
+
+def test_fsync_per_file_not_global_sync(task):
+    runs = make_runs(task, 3)
+    writer = BulkWriter()
+    writer.add_all(runs)
+    with (
+        patch("os.sync", create=True) as sync,
+        patch("os.fsync", wraps=os.fsync) as fsync,
+    ):
+        writer.commit()
+    sync.assert_not_called()
+    # 3 files, their 3 run folders, the staged "runs" folder, and the published parent
+    assert fsync.call_count == 3 + 3 + 1 + 1
+
+
+def test_fsync_published_folders(task):
+    # Existing runs folder: new run folders are renamed into it, existing files replaced in place
+    existing = make_runs(task, 1)[0]
+    existing.save_to_file()
+    runs_folder = str(task.path.parent / "runs")
+    existing_folder = str(existing.path.parent)
+    writer = BulkWriter()
+    writer.add_all(make_runs(task, 2) + [existing])
+    with patch("kiln_ai.datamodel.bulk_writer._sync_dir", wraps=_sync_dir) as sync_dir:
+        writer.commit()
+    synced = [call.args[0] for call in sync_dir.call_args_list]
+    assert runs_folder in synced
+    assert existing_folder in synced
+
+
+def test_fsync_disabled_skips_folders(task):
+    writer = BulkWriter(fsync=False)
+    writer.add_all(make_runs(task, 2))
+    with patch("kiln_ai.datamodel.bulk_writer._sync_dir") as sync_dir:
+        writer.commit()
+    sync_dir.assert_not_called()
+
+
+def test_fsync_disabled(task):
+    runs = make_runs(task, 3)
+    writer = BulkWriter(fsync=False)
+    writer.add_all(runs)
+    with patch.object(BulkWriter, "_sync_batch") as sync_batch:
+        writer.commit()
+    sync_batch.assert_not_called()
+    assert len(task.runs()) == 3
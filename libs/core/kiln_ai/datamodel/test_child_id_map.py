@@ -0,0 +1,148 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.child_id_map import ChildIdMap, id_from_child_dirname
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_run(task, input="Test input"):
+    run = TaskRun(parent=task, input=input, output=TaskOutput(output="Test output"))
+    run.save_to_file()
+    return run
+
+
+def bump_mtime(folder):
+    # Coarse filesystem timestamps may not change within a test, force it
+    stat = folder.stat()
+    os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.parametrize(
+    "dirname,expected",
+    [
+        ("123456789012 - Some Name", "123456789012"),
+        ("123456789012", "123456789012"),
+        ("123 - name - with - dashes", "123"),
+    ],
+)
+def test_id_from_child_dirname(dirname, expected):
+    assert id_from_child_dirname(dirname) == expected
+
+
+def test_dirname_for_id(tmp_path):
+    (tmp_path / "111 - first").mkdir()
+    (tmp_path / "222").mkdir()
+    (tmp_path / "not_a_folder.txt").write_text("hi")
+    id_map = ChildIdMap()
+
+    assert id_map.dirname_for_id(tmp_path, "111") == "111 - first"
+    assert id_map.dirname_for_id(tmp_path, "222") == "222"
+    assert id_map.dirname_for_id(tmp_path, "333") is None
+    assert id_map.dirname_for_id(tmp_path / "missing", "111") is None
+
+
+def test_dirname_for_id_rebuilt_on_folder_change(tmp_path):
+    id_map = ChildIdMap()
+    assert id_map.dirname_for_id(tmp_path, "111") is None
+
+    (tmp_path / "111 - first").mkdir()
+    bump_mtime(tmp_path)
+    assert id_map.dirname_for_id(tmp_path, "111") == "111 - first"
+
+    # Unchanged folder: no rescan
+    with patch("kiln_ai.datamodel.child_id_map.os.scandir") as mock_scandir:
+        assert id_map.dirname_for_id(tmp_path, "111") == "111 - first"
+        mock_scandir.assert_not_called()
+
+
+def test_from_id_does_not_scan_children(task):
+    runs = [make_run(task, input=f"input {i}") for i in range(5)]
+    target = runs[3]
+
+    with patch.object(
+        TaskRun,
+        "iterate_children_paths_of_parent_path",
+        side_effect=AssertionError("should not scan"),
+    ):
+        found = TaskRun.from_id_and_parent_path(target.id, task.path)
+    assert found is not None
+    assert found.id == target.id
+    assert found.input == "input 3"
+
+
+def test_from_id_missing_and_no_parent(task):
+    run = make_run(task)
+    assert TaskRun.from_id_and_parent_path("missing", task.path) is None
+    assert TaskRun.from_id_and_parent_path(run.id, None) is None
+
+
+def test_from_id_folder_renamed_by_hand(task):
+    # Folder name no longer starts with the ID: not found, without loading every child
+    run = make_run(task)
+    run_folder = run.path.parent
+    shutil.move(run_folder, run_folder.parent / "renamed")
+    bump_mtime(run_folder.parent)
+
+    with patch.object(
+        TaskRun,
+        "iterate_children_paths_of_parent_path",
+        side_effect=AssertionError("should not scan"),
+    ):
+        assert TaskRun.from_id_and_parent_path(run.id, task.path) is None
+
+
+def test_from_id_miss_rebuilds_stale_map_once(task):
+    # A new child folder within the timestamp granularity: the map is stale, rebuilt on the miss
+    make_run(task)
+    runs_folder = task.path.parent / "runs"
+    assert ChildIdMap.shared().dirname_for_id(runs_folder, "missing") is None
+    stat = runs_folder.stat()
+    run = make_run(task)
+    os.utime(runs_folder, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    with patch(
+        "kiln_ai.datamodel.child_id_map.os.scandir", wraps=os.scandir
+    ) as mock_scandir:
+        found = TaskRun.from_id_and_parent_path(run.id, task.path)
+        assert found is not None
+        assert found.id == run.id
+        assert mock_scandir.call_count == 1
+
+        mock_scandir.reset_mock()
+        assert TaskRun.from_id_and_parent_path("missing", task.path) is None
+        assert mock_scandir.call_count == 1
+
+
+def test_from_id_verifies_in_file_id(task):
+    # Folder name says one ID, file says another: trust the file
+    run = make_run(task)
+    other = make_run(task)
+    runs_folder = run.path.parent.parent
+    shutil.move(run.path.parent, runs_folder / "tmp")
+    shutil.move(other.path.parent, run.path.parent)
+    shutil.move(runs_folder / "tmp", other.path.parent)
+    bump_mtime(runs_folder)
+
+    found = TaskRun.from_id_and_parent_path(run.id, task.path)
+    assert found is not None
+    assert found.id == run.id
+    assert found.path == other.path
+
+
+def test_from_id_after_delete(task):
+    run = make_run(task)
+    assert TaskRun.from_id_and_parent_path(run.id, task.path) is not None
+    run.delete()
+    assert TaskRun.from_id_and_parent_path(run.id, task.path) is None
@@ -0,0 +1,405 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import BaseModel
+
+from kiln_ai.datamodel import (
+    DataSource,
+    DataSourceType,
+    Project,
+    Task,
+    TaskOutput,
+    TaskOutputRating,
+    TaskRun,
+)
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.dataset_filters import (
+    DatasetFilterId,
+    MultiDatasetFilter,
+    dataset_filter_from_id,
+    index_filter_from_id,
+)
+from kiln_ai.datamodel.dataset_query import AndNode, DatasetQuery, NotNode, OrNode
+from kiln_ai.datamodel.dataset_split import AllSplitDefinition, DatasetSplit
+from kiln_ai.datamodel.eval import (
+    Eval,
+    EvalConfig,
+    EvalConfigType,
+    EvalOutputScore,
+    EvalRun,
+)
+from kiln_ai.datamodel.packed_storage import pack_children
+from kiln_ai.datamodel.run_frame import frame_filter_from_id
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_run(
+    task,
+    tags=None,
+    rating=None,
+    model_name="gpt_4o",
+    input="Test input",
+    output="Test output",
+    input_source=DataSourceType.human,
+    **kwargs,
+):
+    if input_source == DataSourceType.human:
+        input_properties = {"created_by": "Tester"}
+    else:
+        input_properties = {
+            "model_name": "gpt_4o",
+            "model_provider": "openai",
+            "adapter_name": "test_adapter",
+        }
+    run = TaskRun(
+        parent=task,
+        input=input,
+        input_source=DataSource(type=input_source, properties=input_properties),
+        output=TaskOutput(
+            output=output,
+            source=DataSource(
+                type=DataSourceType.synthetic,
+                properties={
+                    "model_name": model_name,
+                    "model_provider": "openai",
+                    "adapter_name": "test_adapter",
+                },
+            ),
+            rating=rating,
+        ),
+        tags=tags or [],
+        **kwargs,
+    )
+    run.save_to_file()
+    return run
+
+
+def add_eval_scores(task, run_ids):
+    eval = Eval(
+        name="Test Eval",
+        parent=task,
+        eval_set_filter_id="all",
+        eval_configs_filter_id="all",
+        output_scores=[
+            EvalOutputScore(name="accuracy", type=TaskOutputRatingType.pass_fail)
+        ],
+    )
+    eval.save_to_file()
+    config = EvalConfig(
+        parent=eval,
+        name="Test Config",
+        config_type=EvalConfigType.g_eval,
+        properties={"eval_steps": ["step1"]},
+        model_name="gpt-4",
+        model_provider="openai",
+    )
+    config.save_to_file()
+    for run_id in run_ids:
+        EvalRun(
+            parent=config,
+            dataset_id=run_id,
+            task_run_config_id="config456",
+            input="input",
+            output="output",
+            scores={"accuracy": 1.0},
+        ).save_to_file()
+    return eval
+
+
+def test_parse_precedence():
+    query = DatasetQuery("query::tag:a | tag:b & !tag:c")
+    assert isinstance(query.root, OrNode)
+    assert isinstance(query.root.children[1], AndNode)
+    assert isinstance(query.root.children[1].children[1], NotNode)
+
+    query = DatasetQuery("query::(tag:a | tag:b) & tag:c")
+    assert isinstance(query.root, AndNode)
+    assert isinstance(query.root.children[0], OrNode)
+
+
+def test_parse_values():
+    query = DatasetQuery(
+        r'query::output_contains:"a & (b) | \"c\"" & rating >= 4 & tag:x!'
+    )
+    predicates = query.root.children  # type: ignore
+    assert [p.text for p in predicates] == [
+        r'output_contains:"a & (b) | \"c\""',
+        "rating >= 4",
+        "tag:x!",
+    ]
+    run = TaskRun(
+        input="in",
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Tester"}
+        ),
+        output=TaskOutput(
+            output='some A & (B) | "c" text',
+            rating=TaskOutputRating(value=5, type="five_star"),
+        ),
+        tags=["x!"],
+    )
+    assert query(run)
+
+
+@pytest.mark.parametrize(
+    "filter_id,error",
+    [
+        ("query::", "no predicates"),
+        ("query::tag:a &", "expected a predicate"),
+        ("query::(tag:a", "expected '\\)'"),
+        ("query::tag:a)", "unexpected '\\)'"),
+        ("query::tag:a tag:b", "unexpected 'tag:b'"),
+        ("query::nope", "unknown predicate 'nope'"),
+        ("query::tag", "unknown predicate 'tag'"),
+        ("query::rating>=high", "must be compared to a number"),
+        ("query::created_at>yesterday", "ISO date or datetime"),
+        ("query::tag>=a", "only supports ':'"),
+        ("query::tag:a # tag:b", "unexpected character"),
+    ],
+)
+def test_invalid_queries(filter_id, error):
+    with pytest.raises(ValueError, match=error):
+        DatasetQuery(filter_id)
+
+
+def test_filter_id_validation():
+    class Model(BaseModel):
+        filter_id: DatasetFilterId
+
+    assert Model(filter_id="query::tag:a | high_rating").filter_id
+    # Queries inside a multi_filter, with or without escaped ampersands
+    assert Model(filter_id=r"multi_filter::high_rating&query::tag:a \& tag:b")
+    assert Model(filter_id="multi_filter::high_rating&query::tag:a & tag:b")
+    # A query must be last: later parts are part of the query
+    with pytest.raises(ValueError, match="must be the last filter"):
+        MultiDatasetFilter.parse_filter_string(
+            "multi_filter::query::tag:a & tag:b&tag::c"
+        )
+    with pytest.raises(ValueError, match="Invalid multi-filter"):
+        Model(filter_id="multi_filter::query::tag:a&multi_filter::high_rating")
+    with pytest.raises(ValueError, match="unknown predicate"):
+        Model(filter_id="query::bogus")
+    # Existing filter IDs are unchanged
+    for filter_id in ["all", "tag::a", "multi_filter::high_rating&tag::a"]:
+        assert Model(filter_id=filter_id).filter_id == filter_id
+
+
+@pytest.mark.parametrize(
+    "filter_id,expected",
+    [
+        (
+            "multi_filter::high_rating&query::tag:a & tag:b",
+            ["high_rating", "query::tag:a & tag:b"],
+        ),
+        (
+            r"multi_filter::tag::a\&b&query::tag:a \& (tag:b|tag:c)",
+            ["tag::a&b", "query::tag:a & (tag:b|tag:c)"],
+        ),
+        ('multi_filter::query::input_contains:"a&b"', ['query::input_contains:"a&b"']),
+    ],
+)
+def test_multi_filter_query_parts(filter_id, expected):
+    assert MultiDatasetFilter.parse_filter_string(filter_id) == expected
+
+
+QUERIES = [
+    "query::all",
+    "query::tag:golden | tag:x",
+    "query::!tag:golden",
+    "query::high_rating & !(tag:x | tag:y)",
+    "query::thinking_model_high_rated | has_repair",
+    "query::model_name:claude",
+    "query::model_name:gpt_4o & input_source:synthetic",
+    "query::output_source:synthetic & !input_source:human",
+    "query::rating_type:pass_fail | rating_type:pass_fail_critical",
+    "query::rating>=4",
+    "query::rating<1 | rating=1",
+    "query::rating!=5",
+    "query::!has_rating",
+    "query::created_at>=2024-03-01 & created_at<2024-06-01T12:00:00",
+    "query::created_at<2024-03-01T00:00:00+02:00",
+    "query::input_contains:SPECIAL",
+    "query::output_contains:special | tag:golden",
+    "query::!(output_contains:special & !tag:x)",
+    "query::has_eval_score | input_contains:special",
+    "query::!has_eval_score & rating>3",
+    # A query inside a multi_filter takes the rest of the string, & and all
+    "multi_filter::high_rating&query::tag:golden & !tag:x | has_repair",
+]
+
+
+@pytest.mark.parametrize("filter_id", QUERIES)
+def test_pushdown_matches_run_filter(task, filter_id):
+    rng = random.Random(7)
+    ratings = [
+        None,
+        TaskOutputRating(value=5, type="five_star"),
+        TaskOutputRating(value=3, type="five_star"),
+        TaskOutputRating(value=1.0, type="pass_fail"),
+        TaskOutputRating(value=0.0, type="pass_fail"),
+        TaskOutputRating(value=-1.0, type="pass_fail_critical"),
+    ]
+    runs = []
+    for i in range(40):
+        repair = {}
+        if rng.random() < 0.2:
+            repair = {
+                "repair_instructions": "Fix it",
+                "repaired_output": TaskOutput(
+                    output="Fixed",
+                    source=DataSource(
+                        type=DataSourceType.human, properties={"created_by": "Tester"}
+                    ),
+                ),
+            }
+        runs.append(
+            make_run(
+                task,
+                tags=rng.sample(["golden", "x", "y"], rng.randint(0, 3)),
+                rating=rng.choice(ratings),
+                model_name=rng.choice(["gpt_4o", "claude"]),
+                input=rng.choice(["plain", "has a special word"]),
+                output=rng.choice(["plain", "Very SPECIAL output"]),
+                input_source=rng.choice(
+                    [DataSourceType.human, DataSourceType.synthetic]
+                ),
+                intermediate_outputs=rng.choice([None, {"reasoning": "r"}]),
+                created_at=datetime(2024, 1, 1) + timedelta(days=4 * i),
+                **repair,
+            )
+        )
+    add_eval_scores(task, [run.id for run in runs[::3]])
+
+    query = dataset_filter_from_id(filter_id)
+    expected = sorted(run.id for run in runs if query(run))
+    assert sorted(task.run_index().ids_in_filter(filter_id)) == expected
+    frame = task.run_frame()
+    assert sorted(frame.ids_where(frame_filter_from_id(filter_id)(frame))) == expected
+    index_filter = index_filter_from_id(filter_id)
+    assert (
+        sorted(entry.id for entry in task.run_index().entries() if index_filter(entry))
+        == expected
+    )
+    # Reloaded runs give the same answer as the ones we created
+    assert sorted(run.id for run in task.runs(readonly=True) if query(run)) == expected
+
+
+def test_only_residual_runs_are_loaded(task, monkeypatch):
+    golden = [make_run(task, tags=["golden"], output="special") for _ in range(3)]
+    make_run(task, tags=["golden"])
+    for _ in range(10):
+        make_run(task, output="special")
+    frame = task.run_frame()
+
+    loaded = []
+    load_from_file = TaskRun.load_from_file
+
+    def counting_load(path, readonly=False):
+        loaded.append(path)
+        return load_from_file(path, readonly=readonly)
+
+    monkeypatch.setattr(TaskRun, "load_from_file", counting_load)
+
+    # tag:golden narrows the candidates, only those are loaded for the residual predicate
+    mask = frame.mask_for_filter("query::tag:golden & output_contains:special")
+    assert set(frame.ids_where(mask)) == {run.id for run in golden}
+    assert len(loaded) == 4
+
+    # No residual predicates: nothing loaded
+    loaded.clear()
+    mask = frame.mask_for_filter("query::tag:golden | !has_rating")
+    assert mask.sum() == 14
+    assert loaded == []
+
+    # OR with an indexed predicate decides some runs without loading them
+    loaded.clear()
+    frame.mask_for_filter("query::tag:golden | output_contains:special")
+    assert len(loaded) == 10
+
+
+def test_has_eval_score_by_eval_id(task):
+    runs = [make_run(task) for _ in range(3)]
+    first = add_eval_scores(task, [runs[0].id])
+    second = add_eval_scores(task, [runs[1].id])
+
+    index = task.run_index()
+    assert index.ids_in_filter(f"query::has_eval_score:{first.id}") == [runs[0].id]
+    assert index.ids_in_filter(f"query::has_eval_score:{second.id}") == [runs[1].id]
+    assert sorted(index.ids_in_filter("query::has_eval_score")) == sorted(
+        [runs[0].id, runs[1].id]
+    )
+    assert index.ids_in_filter("query::has_eval_score:missing") == []
+
+
+def test_kept_query_sees_new_eval_runs(task):
+    runs = [make_run(task) for _ in range(3)]
+    eval = add_eval_scores(task, [runs[0].id])
+    query = dataset_filter_from_id("query::has_eval_score")
+    frame = task.run_frame()
+    assert [run.id for run in runs if query(run)] == [runs[0].id]
+    assert frame.ids_where(frame_filter_from_id("query::has_eval_score")(frame)) == [
+        runs[0].id
+    ]
+
+    # Another run scored by the same config, and by a new eval
+    config = eval.configs()[0]
+    EvalRun(
+        parent=config,
+        dataset_id=runs[1].id,
+        task_run_config_id="config456",
+        input="input",
+        output="output",
+        scores={"accuracy": 1.0},
+    ).save_to_file()
+    add_eval_scores(task, [runs[2].id])
+    assert [run.id for run in runs if query(run)] == [run.id for run in runs]
+
+    # Deleted eval
+    eval.delete()
+    assert [run.id for run in runs if query(run)] == [runs[2].id]
+
+
+def test_kept_query_sees_new_packed_eval_runs(task):
+    runs = [make_run(task) for _ in range(2)]
+    eval = add_eval_scores(task, [runs[0].id])
+    config = eval.configs()[0]
+    pack_children(config.path, EvalRun)
+    query = dataset_filter_from_id("query::has_eval_score")
+    assert [run.id for run in runs if query(run)] == [runs[0].id]
+
+    EvalRun(
+        parent=config,
+        dataset_id=runs[1].id,
+        task_run_config_id="config456",
+        input="input",
+        output="output",
+        scores={"accuracy": 1.0},
+    ).save_to_file()
+    assert [run.id for run in runs if query(run)] == [run.id for run in runs]
+
+
+def test_dataset_split_from_query(task):
+    keep = [
+        make_run(
+            task, tags=["keep"], rating=TaskOutputRating(value=5, type="five_star")
+        )
+        for _ in range(2)
+    ]
+    make_run(task, tags=["keep"], rating=TaskOutputRating(value=2, type="five_star"))
+    make_run(task, rating=TaskOutputRating(value=5, type="five_star"))
+
+    filter_id = "query::tag:keep & rating>=4"
+    split = DatasetSplit.from_task(
+        "Split", task, AllSplitDefinition, filter_id=filter_id
+    )
+    assert split.filter == filter_id
+    assert set(split.split_contents["all"]) == {run.id for run in keep}
@@ -0,0 +1,252 @@
+import ctypes
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from kiln_ai.datamodel.file_watcher import (
+    InotifyWatcher,
+    PollingWatcher,
+    create_watcher,
+)
+
+
+class ChangeRecorder:
+    def __init__(self):
+        self.changed: list[Path] = []
+        self.event = threading.Event()
+
+    def __call__(self, path: Path):
+        self.changed.append(path)
+        self.event.set()
+
+    def wait(self, timeout: float = 5) -> bool:
+        result = self.event.wait(timeout)
+        self.event.clear()
+        return result
+
+
+def touch_later(path: Path, content: str = "changed"):
+    # Ensure a different mtime even on coarse filesystems
+    path.write_text(content)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def watched_file(tmp_path):
+    folder = tmp_path / "run"
+    folder.mkdir()
+    path = folder / "task_run.kiln"
+    path.write_text("{}")
+    return path
+
+
+def test_polling_watcher_reports_changes(watched_file):
+    recorder = ChangeRecorder()
+    watcher = PollingWatcher(recorder)
+    assert watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    watcher.poll()
+    assert recorder.changed == []
+
+    touch_later(watched_file)
+    watcher.poll()
+    assert recorder.changed == [watched_file]
+
+    # Reported once, then no longer watched
+    watcher.poll()
+    assert recorder.changed == [watched_file]
+
+
+def test_polling_watcher_rejects_missing_or_changed_files(watched_file):
+    watcher = PollingWatcher(ChangeRecorder())
+    mtime_ns = watched_file.stat().st_mtime_ns
+
+    # For example a record in a packed folder, which has no file to poll
+    assert not watcher.watch(watched_file.parent / "missing.kiln", mtime_ns)
+    assert not watcher.watch(watched_file, mtime_ns - 1)
+
+
+def test_polling_watcher_reports_deletes(watched_file):
+    recorder = ChangeRecorder()
+    watcher = PollingWatcher(recorder)
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+    watcher.unwatch(watched_file)
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    watched_file.unlink()
+    watcher.poll()
+    assert recorder.changed == [watched_file]
+
+
+def test_polling_watcher_unwatch(watched_file):
+    recorder = ChangeRecorder()
+    watcher = PollingWatcher(recorder)
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+    watcher.unwatch(watched_file)
+    touch_later(watched_file)
+    watcher.poll()
+    assert recorder.changed == []
+
+
+def test_polling_watcher_thread(watched_file):
+    recorder = ChangeRecorder()
+    watcher = PollingWatcher(recorder, interval_seconds=0.01)
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+    watcher.start()
+    try:
+        touch_later(watched_file)
+        assert recorder.wait()
+        assert recorder.changed == [watched_file]
+    finally:
+        watcher.stop()
+
+
+inotify_only = pytest.mark.skipif(
+    not InotifyWatcher.available(), reason="inotify not available"
+)
+
+
+@pytest.fixture
+def inotify_watcher():
+    recorder = ChangeRecorder()
+    watcher = InotifyWatcher(recorder)
+    watcher.start()
+    yield watcher, recorder
+    watcher.close()
+
+
+@inotify_only
+def test_inotify_reports_modification(inotify_watcher, watched_file):
+    watcher, recorder = inotify_watcher
+    assert watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    watched_file.write_text('{"changed": true}')
+    assert recorder.wait()
+    assert recorder.changed == [watched_file]
+
+
+@inotify_only
+def test_inotify_reports_replace_by_rename(inotify_watcher, watched_file):
+    # How git and editors write files
+    watcher, recorder = inotify_watcher
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    tmp = watched_file.parent / ".tmp_write"
+    tmp.write_text('{"changed": true}')
+    os.replace(tmp, watched_file)
+    assert recorder.wait()
+    assert recorder.changed == [watched_file]
+
+
+@inotify_only
+def test_inotify_reports_folder_delete(inotify_watcher, watched_file):
+    watcher, recorder = inotify_watcher
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    shutil.rmtree(watched_file.parent)
+    assert recorder.wait()
+    assert watched_file in recorder.changed
+
+
+@inotify_only
+def test_inotify_ignores_other_files(inotify_watcher, watched_file):
+    watcher, recorder = inotify_watcher
+    watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+
+    (watched_file.parent / "other.txt").write_text("hello")
+    assert not recorder.wait(timeout=0.2)
+
+    watcher.unwatch(watched_file)
+    watched_file.write_text("changed")
+    assert not recorder.wait(timeout=0.2)
+
+
+@inotify_only
+def test_inotify_rejects_stale_watch(inotify_watcher, watched_file):
+    # File changed between the caller reading it and the watch starting
+    watcher, _ = inotify_watcher
+    stale_mtime = watched_file.stat().st_mtime_ns - 1
+    assert not watcher.watch(watched_file, stale_mtime)
+    assert watcher._folder_files == {}
+
+
+class WatchLimitLibc:
+    """libc where inotify_add_watch fails as if fs.inotify.max_user_watches was reached."""
+
+    def __init__(self, libc):
+        self._libc = libc
+
+    def inotify_add_watch(self, *args):
+        ctypes.set_errno(errno.ENOSPC)
+        return -1
+
+    def __getattr__(self, name):
+        return getattr(self._libc, name)
+
+
+@inotify_only
+def test_inotify_falls_back_to_polling_at_watch_limit(watched_file, caplog):
+    recorder = ChangeRecorder()
+    watcher = InotifyWatcher(recorder, poll_interval_seconds=0.01)
+    watcher._libc = WatchLimitLibc(watcher._libc)
+    watcher.start()
+    try:
+        with caplog.at_level(logging.WARNING):
+            assert watcher.watch(watched_file, watched_file.stat().st_mtime_ns)
+        assert "inotify watch limit reached" in caplog.text
+        assert watcher._folder_files == {}
+        assert watcher._fallback is not None
+
+        touch_later(watched_file)
+        assert recorder.wait()
+        assert recorder.changed == [watched_file]
+    finally:
+        watcher.close()
+    assert watcher._fallback._thread is None
+
+
+@inotify_only
+def test_inotify_close_releases_fds():
+    watcher = InotifyWatcher(ChangeRecorder())
+    watcher.start()
+    fds = [watcher._fd, watcher._wake_read, watcher._wake_write]
+    watcher.close()
+    for fd in fds:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    # Idempotent
+    watcher.stop()
+    watcher.close()
+    with pytest.raises(ValueError, match="closed"):
+        watcher.start()
+
+
+def test_create_watcher():
+    def noop(path):
+        pass
+
+    assert create_watcher("off", noop) is None
+    assert isinstance(create_watcher("polling", noop), PollingWatcher)
+    auto = create_watcher("auto", noop)
+    if InotifyWatcher.available():
+        assert isinstance(auto, InotifyWatcher)
+        auto.close()
+    else:
+        assert isinstance(auto, PollingWatcher)
+    with pytest.raises(ValueError, match="Invalid model cache watch mode"):
+        create_watcher("magic", noop)  # type: ignore
+
+
+def test_polling_watcher_stop_is_prompt(watched_file):
+    watcher = PollingWatcher(ChangeRecorder(), interval_seconds=60)
+    watcher.start()
+    start = time.monotonic()
+    watcher.stop()
+    assert time.monotonic() - start < 5
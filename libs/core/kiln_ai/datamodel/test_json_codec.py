@@ -0,0 +1,117 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from kiln_ai.datamodel import DataSource, DataSourceType, TaskOutput, TaskRun
+from kiln_ai.datamodel.json_codec import (
+    DEFAULT_JSON_CODEC,
+    JSON_CODECS,
+    MsgspecCodec,
+    available_json_codecs,
+    compact_json_enabled,
+    json_codec,
+)
+
+
+@pytest.fixture
+def task_run(tmp_path):
+    run = TaskRun(
+        input="Test input ✨",
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Tester"}
+        ),
+        output=TaskOutput(
+            output='{"key": "value"}',
+            source=DataSource(
+                type=DataSourceType.synthetic,
+                properties={
+                    "model_name": "gpt_4o",
+                    "model_provider": "openai",
+                    "adapter_name": "test_adapter",
+                },
+            ),
+        ),
+        tags=["a", "b"],
+        path=tmp_path / "task_run.kiln",
+    )
+    return run
+
+
+@pytest.fixture
+def mock_config():
+    with patch("kiln_ai.datamodel.json_codec.Config.shared") as mock_shared:
+        config = MagicMock()
+        config.json_codec = DEFAULT_JSON_CODEC
+        config.compact_json = False
+        mock_shared.return_value = config
+        yield config
+
+
+def test_builtin_codecs_available():
+    available = available_json_codecs()
+    assert "pydantic" in available
+    assert "json" in available
+
+
+@pytest.mark.parametrize("name", list(JSON_CODECS.keys()))
+@pytest.mark.parametrize("compact", [True, False])
+def test_codec_round_trip(task_run, name, compact):
+    if name not in available_json_codecs():
+        pytest.skip(f"{name} not installed")
+    codec = json_codec(name)
+
+    data = codec.dumps(task_run, compact=compact, exclude={"path"})
+    assert isinstance(data, bytes)
+    assert (b"\n" in data) != compact
+
+    # Same content regardless of codec
+    parsed = codec.loads(data)
+    assert parsed == json.loads(task_run.model_dump_json(exclude={"path"}))
+    assert "path" not in parsed
+    assert parsed["model_type"] == "task_run"
+    assert TaskRun.model_validate(parsed).input == "Test input ✨"
+
+
+def test_default_codec_writes_existing_format(task_run):
+    data = json_codec("pydantic").dumps(task_run, exclude={"path"})
+    assert data.decode("utf-8") == task_run.model_dump_json(indent=2, exclude={"path"})
+
+
+def test_codec_from_config(mock_config):
+    mock_config.json_codec = "json"
+    assert json_codec().name == "json"
+    mock_config.json_codec = None
+    assert json_codec().name == DEFAULT_JSON_CODEC
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown JSON codec 'yaml'"):
+        json_codec("yaml")
+
+
+def test_unavailable_codec():
+    with patch.object(MsgspecCodec, "available", return_value=False):
+        with pytest.raises(ValueError, match="requires the 'msgspec' package"):
+            json_codec("msgspec")
+
+
+def test_compact_json_enabled(mock_config):
+    assert not compact_json_enabled()
+    mock_config.compact_json = True
+    assert compact_json_enabled()
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_save_and_load_with_codec(task_run, mock_config, compact):
+    mock_config.json_codec = "json"
+    mock_config.compact_json = compact
+    task_run.save_to_file()
+
+    contents = task_run.path.read_text(encoding="utf-8")
+    assert ("\n" in contents) != compact
+
+    mock_config.json_codec = "pydantic"
+    loaded = TaskRun.load_from_file(task_run.path)
+    assert loaded.input == task_run.input
+    assert loaded.tags == ["a", "b"]
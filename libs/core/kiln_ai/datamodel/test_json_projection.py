@@ -0,0 +1,133 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import DataSource, DataSourceType, TaskOutput, TaskRun
+from kiln_ai.datamodel.json_codec import json_codec
+from kiln_ai.datamodel.json_projection import load_json_fields, project_json_fields
+
+DOC = {
+    "v": 1,
+    "id": "123",
+    "input": 'a long input with "quotes" and {braces} and [brackets] \\ and unicode ☃',
+    "nested": {"list": [1, {"a": "}"}, "]"], "empty": {}, "empty_list": []},
+    "output": {
+        "output": "the output",
+        "rating": {"value": 5, "type": "five_star"},
+        "source": {"type": "human", "properties": {"created_by": "me"}},
+    },
+    "flag": True,
+    "nothing": None,
+    "number": -1.5e3,
+    "tags": ["a", "b"],
+}
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_project_fields(indent):
+    data = json.dumps(DOC, indent=indent)
+    result = project_json_fields(
+        data.encode("utf-8"),
+        [
+            "id",
+            "tags",
+            "output.rating",
+            "output.source.type",
+            "flag",
+            "nothing",
+            "number",
+            "missing",
+            "output.missing",
+            "id.not_an_object",
+        ],
+    )
+    assert result == {
+        "id": "123",
+        "tags": ["a", "b"],
+        "output.rating": {"value": 5, "type": "five_star"},
+        "output.source.type": "human",
+        "flag": True,
+        "nothing": None,
+        "number": -1500.0,
+        "missing": None,
+        "output.missing": None,
+        "id.not_an_object": None,
+    }
+
+
+def test_project_fields_after_skipped_values():
+    data = json.dumps(DOC)
+    assert project_json_fields(data.encode("utf-8"), ["nested", "input"]) == {
+        "nested": DOC["nested"],
+        "input": DOC["input"],
+    }
+    # Keys after complex skipped values are still found
+    assert project_json_fields(data.encode("utf-8"), ["tags"]) == {"tags": ["a", "b"]}
+
+
+def test_project_fields_parent_and_child_requested():
+    data = json.dumps(DOC)
+    result = project_json_fields(
+        data.encode("utf-8"), ["output", "output.rating.value"]
+    )
+    assert result["output"] == DOC["output"]
+    assert result["output.rating.value"] == 5
+
+
+def test_project_fields_early_exit_in_nested_object():
+    data = json.dumps({"a": {"b": 1, "c": {"d": "}"}}, "e": 2})
+    assert project_json_fields(data.encode("utf-8"), ["a.b", "e"]) == {"a.b": 1, "e": 2}
+
+
+def test_project_fields_empty_object():
+    assert project_json_fields(b"{}", ["a"]) == {"a": None}
+
+
+def test_project_fields_requires_object():
+    with pytest.raises(ValueError, match="JSON object"):
+        project_json_fields(b"[1, 2]", ["a"])
+
+
+def test_project_fields_invalid_json():
+    with pytest.raises(ValueError):
+        project_json_fields(b'{"a": "unterminated', ["b"])
+
+
+def test_load_fields_from_model_file(tmp_path):
+    run = TaskRun(
+        path=tmp_path / "task_run.kiln",
+        input="x" * 10000,
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Tester"}
+        ),
+        output=TaskOutput(
+            output="y" * 10000,
+            source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Tester"}
+            ),
+        ),
+        tags=["tag1"],
+    )
+    run.save_to_file()
+
+    fields = TaskRun.load_fields(run.path, ["id", "tags", "output.source.type"])
+    assert fields == {
+        "id": run.id,
+        "tags": ["tag1"],
+        "output.source.type": "human",
+    }
+    assert load_json_fields(str(run.path), ["input"])["input"] == "x" * 10000
+
+
+@pytest.mark.parametrize("codec", ["pydantic", "json"])
+def test_project_fields_with_codec(codec):
+    with patch(
+        "kiln_ai.datamodel.json_projection.json_codec",
+        return_value=json_codec(codec),
+    ):
+        data = json.dumps(DOC).encode("utf-8")
+        assert project_json_fields(data, ["input", "output.rating.value"]) == {
+            "input": DOC["input"],
+            "output.rating.value": 5,
+        }
@@ -1,10 +1,20 @@
+import os
+import threading
+import time
+import tracemalloc
 from pathlib import Path
 from unittest import mock
 
 import pytest
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from libs.core.kiln_ai.datamodel.model_cache import ModelCache
+from libs.core.kiln_ai.datamodel.model_cache import (
+    DEFAULT_MAX_BYTES,
+    CompactModel,
+    ModelCache,
+    _class_fingerprints,
+    copy_model_structure,
+)
 
 
 # Define a simple Pydantic model for testing
@@ -56,6 +66,21 @@ def test_invalidate_model(model_cache, test_path):
     assert cached_model is None
 
 
+def test_invalidate_many(test_path, tmp_path):
+    model_cache = make_enabled_cache()
+    other_path = tmp_path / "other.kiln"
+    other_path.write_text("{}")
+    model = ModelTest(name="test", value=123)
+    for path in [test_path, other_path]:
+        model_cache.set_model(path, model, path.stat().st_mtime_ns)
+    assert model_cache.get_model(test_path, ModelTest) is not None
+
+    model_cache.invalidate_many([test_path, other_path, tmp_path / "missing.kiln"])
+
+    assert model_cache.get_model(test_path, ModelTest) is None
+    assert model_cache.get_model(other_path, ModelTest) is None
+
+
 def test_clear_cache(model_cache, test_path):
     model = ModelTest(name="test", value=123)
     mtime = test_path.stat().st_mtime
@@ -266,3 +291,683 @@ def test_get_model_readonly(model_cache, test_path):
 
     # Both should have the same data
     assert readonly_model == copied_model == model
+
+
+def make_cached_file(tmp_path, name: str):
+    path = tmp_path / f"{name}.kiln"
+    path.touch()
+    return path, path.stat().st_mtime_ns
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    model_cache = ModelCache(max_entries=2)
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    paths = []
+    for name in ["a", "b", "c"]:
+        path, mtime_ns = make_cached_file(tmp_path, name)
+        paths.append(path)
+        model_cache.set_model(path, ModelTest(name=name, value=1), mtime_ns)
+        if name == "b":
+            # touch "a" so "b" is least recently used
+            assert model_cache.get_model(paths[0], ModelTest) is not None
+
+    assert model_cache.get_model(paths[1], ModelTest) is None
+    assert model_cache.get_model(paths[0], ModelTest) is not None
+    assert model_cache.get_model(paths[2], ModelTest) is not None
+    assert model_cache.stats().evictions == 1
+    assert model_cache.stats().entries == 2
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    model_cache = ModelCache(max_bytes=250)
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    for name in ["a", "b", "c"]:
+        path, mtime_ns = make_cached_file(tmp_path, name)
+        model_cache.set_model(path, ModelTest(name=name, value=1), mtime_ns, 100)
+
+    stats = model_cache.stats()
+    assert stats.entries == 2
+    assert stats.bytes == 200
+    assert stats.evictions == 1
+    assert model_cache.get_model(tmp_path / "a.kiln", ModelTest) is None
+
+
+def test_pinned_models_not_evicted(tmp_path):
+    model_cache = ModelCache(max_entries=2)
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    parent_path, mtime_ns = make_cached_file(tmp_path, "parent")
+    model_cache.set_model(
+        parent_path, ModelTest(name="parent", value=1), mtime_ns, pinned=True
+    )
+    for name in ["a", "b", "c"]:
+        path, mtime_ns = make_cached_file(tmp_path, name)
+        model_cache.set_model(path, ModelTest(name=name, value=1), mtime_ns)
+
+    # Parent is least recently used, but pinned. Children are evicted instead.
+    assert model_cache.get_model(parent_path, ModelTest) is not None
+    assert model_cache.get_model(tmp_path / "c.kiln", ModelTest) is not None
+    assert model_cache.get_model(tmp_path / "a.kiln", ModelTest) is None
+    assert model_cache.get_model(tmp_path / "b.kiln", ModelTest) is None
+    assert model_cache.stats().pinned == 1
+
+    # Once unpinned, it can be evicted to get back under budget
+    model_cache.max_entries = 1
+    model_cache.unpin(parent_path)
+    assert model_cache.get_model(parent_path, ModelTest) is None
+    assert model_cache.get_model(tmp_path / "c.kiln", ModelTest) is not None
+
+
+def test_eviction_cost_does_not_grow_with_cache_size(tmp_path):
+    model_cache = ModelCache(max_entries=20_000, max_bytes=None)
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    parent_path, mtime_ns = make_cached_file(tmp_path, "parent")
+    model_cache.set_model(
+        parent_path, ModelTest(name="parent", value=1), mtime_ns, pinned=True
+    )
+    model = ModelTest(name="child", value=1)
+    start = time.perf_counter()
+    # Every insert past the budget evicts one entry. Quadratic if each eviction walks the cache.
+    for i in range(40_000):
+        model_cache.set_model(tmp_path / f"{i}.kiln", model, 1)
+    assert time.perf_counter() - start < 10
+
+    stats = model_cache.stats()
+    assert stats.entries == 20_000
+    assert stats.evictions == 20_001
+    assert parent_path in model_cache.model_cache
+    assert tmp_path / "39999.kiln" in model_cache.model_cache
+    assert tmp_path / "19999.kiln" not in model_cache.model_cache
+
+
+def test_only_pinned_entries_over_budget(tmp_path):
+    model_cache = ModelCache(max_entries=1)
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    for name in ["a", "b"]:
+        path, mtime_ns = make_cached_file(tmp_path, name)
+        model_cache.set_model(
+            path, ModelTest(name=name, value=1), mtime_ns, pinned=True
+        )
+    assert model_cache.stats().entries == 2
+    assert model_cache.stats().evictions == 0
+
+
+def test_get_model_validates_without_holding_lock(model_cache, test_path):
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    model_cache.set_model(
+        test_path, ModelTest(name="test", value=1), test_path.stat().st_mtime_ns
+    )
+    is_cache_valid = model_cache._is_cache_valid
+    lock_free = []
+
+    def try_lock():
+        acquired = model_cache._lock.acquire(timeout=1)
+        lock_free.append(acquired)
+        if acquired:
+            model_cache._lock.release()
+
+    def checking_is_cache_valid(path, mtime_ns):
+        # Another reader can take the lock while we stat
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return is_cache_valid(path, mtime_ns)
+
+    with mock.patch.object(model_cache, "_is_cache_valid", checking_is_cache_valid):
+        assert model_cache.get_model(test_path, ModelTest) is not None
+    assert lock_free == [True]
+
+
+def test_get_model_entry_replaced_during_validation(model_cache, test_path):
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    mtime_ns = test_path.stat().st_mtime_ns
+    model_cache.set_model(test_path, ModelTest(name="old", value=1), mtime_ns)
+    is_cache_valid = model_cache._is_cache_valid
+
+    def replacing_is_cache_valid(path, cached_mtime_ns):
+        valid = is_cache_valid(path, cached_mtime_ns)
+        # A save lands while we stat the old entry
+        model_cache.set_model(path, ModelTest(name="new", value=2), mtime_ns + 1)
+        return valid
+
+    with mock.patch.object(model_cache, "_is_cache_valid", replacing_is_cache_valid):
+        assert model_cache.get_model(test_path, ModelTest) is None
+    # The newer entry isn't dropped
+    assert model_cache.model_cache[test_path][0].name == "new"  # type: ignore
+
+
+def test_pin_and_invalidate(model_cache, test_path):
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    model_cache.set_model(
+        test_path, ModelTest(name="test", value=1), test_path.stat().st_mtime_ns, 10
+    )
+    model_cache.pin(test_path)
+    assert model_cache.stats().pinned == 1
+    model_cache.invalidate(test_path)
+    stats = model_cache.stats()
+    assert stats.pinned == 0
+    assert stats.bytes == 0
+
+
+def test_stats_hits_and_misses(model_cache, test_path):
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    assert model_cache.get_model(test_path, ModelTest) is None
+    model_cache.set_model(
+        test_path, ModelTest(name="test", value=1), test_path.stat().st_mtime_ns
+    )
+    assert model_cache.get_model(test_path, ModelTest) is not None
+    assert model_cache.get_model_id(test_path, ModelTest) is None
+
+    stats = model_cache.stats()
+    assert stats.hits == 2
+    assert stats.misses == 1
+
+    model_cache.reset_stats()
+    assert model_cache.stats().hits == 0
+
+
+def test_shared_uses_config(tmp_path):
+    with (
+        mock.patch.object(ModelCache, "_shared_instance", None),
+        mock.patch("libs.core.kiln_ai.datamodel.model_cache.Config.shared") as shared,
+    ):
+        shared.return_value.model_cache_max_entries = 10
+        shared.return_value.model_cache_max_bytes = 0
+        shared.return_value.model_cache_snapshot = False
+        cache = ModelCache.shared()
+        assert cache.max_entries == 10
+        assert cache.max_bytes is None
+
+    with (
+        mock.patch.object(ModelCache, "_shared_instance", None),
+        mock.patch("libs.core.kiln_ai.datamodel.model_cache.Config.shared") as shared,
+    ):
+        shared.return_value.model_cache_max_entries = None
+        shared.return_value.model_cache_max_bytes = None
+        shared.return_value.model_cache_snapshot = False
+        cache = ModelCache.shared()
+        assert cache.max_entries is None
+        assert cache.max_bytes == DEFAULT_MAX_BYTES
+
+
+@pytest.fixture
+def watching_cache():
+    with mock.patch.object(
+        ModelCache, "_check_timestamp_granularity", return_value=True
+    ):
+        cache = ModelCache(watch_mode="auto", poll_interval_seconds=0.01)
+    yield cache
+    cache.close()
+
+
+def test_watched_hits_skip_stat(watching_cache, test_path):
+    model = ModelTest(name="test", value=123)
+    watching_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    assert watching_cache.stats().watched == 1
+
+    with mock.patch.object(Path, "stat", side_effect=AssertionError("no stat")):
+        assert watching_cache.get_model(test_path, ModelTest, readonly=True) is model
+
+
+def test_watched_external_change_invalidates(watching_cache, test_path):
+    model = ModelTest(name="test", value=123)
+    watching_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+
+    # External edit, not through the datamodel
+    test_path.write_text('{"name": "changed", "value": 1}')
+    stat = test_path.stat()
+    os.utime(test_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    for _ in range(500):
+        if test_path not in watching_cache.model_cache:
+            break
+        time.sleep(0.01)
+    assert watching_cache.get_model(test_path, ModelTest) is None
+    assert watching_cache.stats().watched == 0
+
+
+def test_watch_mode_invalid_falls_back_to_stat(test_path):
+    with (
+        mock.patch.object(
+            ModelCache, "_check_timestamp_granularity", return_value=True
+        ),
+        pytest.warns(UserWarning, match="file watcher disabled"),
+    ):
+        cache = ModelCache(watch_mode="magic")  # type: ignore
+    model = ModelTest(name="test", value=123)
+    cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    assert cache.stats().watched == 0
+    assert cache.get_model(test_path, ModelTest, readonly=True) is model
+
+
+def test_invalidate_unwatches(watching_cache, test_path):
+    model = ModelTest(name="test", value=123)
+    watching_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    watching_cache.invalidate(test_path)
+    assert watching_cache.stats().watched == 0
+    watching_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    watching_cache.clear()
+    assert watching_cache.stats().watched == 0
+
+
+def test_close_closes_watcher():
+    with mock.patch.object(
+        ModelCache, "_check_timestamp_granularity", return_value=True
+    ):
+        cache = ModelCache(watch_mode="polling")
+    watcher = cache._watcher
+    assert watcher is not None
+    with mock.patch.object(watcher, "close", wraps=watcher.close) as close:
+        cache.close()
+    close.assert_called_once()
+    assert cache._watcher is None
+
+
+class NestedModelTest(BaseModel):
+    label: str
+    values: list[int]
+
+
+class StructuredModelTest(BaseModel):
+    text: str
+    nested: NestedModelTest
+    tags: list[str]
+    properties: dict[str, NestedModelTest]
+    reference: BaseModel | None = Field(default=None, exclude=True)
+
+
+def make_structured_model():
+    return StructuredModelTest(
+        text="a long string " * 100,
+        nested=NestedModelTest(label="nested", values=[1, 2]),
+        tags=["a", "b"],
+        properties={"p": NestedModelTest(label="prop", values=[3])},
+        reference=ModelTest(name="parent", value=1),
+    )
+
+
+def test_copy_model_structure_shares_immutable_values():
+    model = make_structured_model()
+    copied = copy_model_structure(model)
+
+    assert copied.model_dump() == model.model_dump()
+    assert copied is not model
+    assert type(copied) is StructuredModelTest
+    # Strings are shared, not duplicated
+    assert copied.text is model.text
+    # Excluded fields are references to other models: reset, not aliased
+    assert model.reference is not None
+    assert copied.reference is None
+    assert copied.model_fields_set == model.model_fields_set
+    assert copied.model_dump_json() == model.model_dump_json()
+
+
+def test_copy_model_structure_mutations_dont_affect_original():
+    model = make_structured_model()
+    original = model.model_dump()
+    copied = copy_model_structure(model)
+
+    copied.text = "changed"
+    copied.nested.label = "changed"
+    copied.nested.values.append(3)
+    copied.tags.append("c")
+    copied.properties["p"].values[0] = 100
+    copied.properties["q"] = NestedModelTest(label="new", values=[])
+
+    assert model.model_dump() == original
+
+
+def test_get_model_returns_structural_copy(model_cache, test_path):
+    if not model_cache._enabled:
+        pytest.skip("Cache is disabled on this fs")
+
+    model = make_structured_model()
+    model_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+
+    copied = model_cache.get_model(test_path, StructuredModelTest)
+    assert copied is not model
+    assert copied.nested is not model.nested
+    assert copied.tags is not model.tags
+    assert copied.text is model.text
+
+    copied.tags.append("c")
+    assert model_cache.get_model(test_path, StructuredModelTest).tags == ["a", "b"]
+
+
+def make_enabled_cache(**kwargs):
+    with mock.patch.object(
+        ModelCache, "_check_timestamp_granularity", return_value=True
+    ):
+        return ModelCache(**kwargs)
+
+
+@pytest.fixture
+def enabled_cache():
+    cache = make_enabled_cache()
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def new_cache():
+    cache = make_enabled_cache()
+    yield cache
+    cache.close()
+
+
+def test_snapshot_round_trip(enabled_cache, new_cache, test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    model = make_structured_model()
+    enabled_cache.set_model(
+        test_path, model, test_path.stat().st_mtime_ns, size_bytes=50, pinned=True
+    )
+
+    assert enabled_cache.save_snapshot(snapshot_path) == 1
+    assert new_cache.load_snapshot(snapshot_path) == 1
+    assert new_cache.stats().snapshot_pending == 1
+    assert new_cache.stats().entries == 0
+
+    restored = new_cache.get_model(test_path, StructuredModelTest, readonly=True)
+    assert restored == model
+    stats = new_cache.stats()
+    assert stats.hits == 1
+    assert stats.snapshot_pending == 0
+    assert stats.entries == 1
+    assert stats.bytes == 50
+    assert stats.pinned == 1
+
+
+def test_snapshot_entry_for_changed_file_is_dropped(
+    enabled_cache, new_cache, test_path, tmp_path
+):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    enabled_cache.set_model(
+        test_path, ModelTest(name="old", value=1), test_path.stat().st_mtime_ns
+    )
+    enabled_cache.save_snapshot(snapshot_path)
+
+    stat = test_path.stat()
+    os.utime(test_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_cache.load_snapshot(snapshot_path)
+
+    assert new_cache.get_model(test_path, ModelTest) is None
+    assert new_cache.stats().snapshot_pending == 0
+    assert new_cache.stats().misses == 1
+
+
+def test_snapshot_entry_dropped_on_invalidate(
+    enabled_cache, new_cache, test_path, tmp_path
+):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    enabled_cache.set_model(
+        test_path, ModelTest(name="a", value=1), test_path.stat().st_mtime_ns
+    )
+    enabled_cache.save_snapshot(snapshot_path)
+    new_cache.load_snapshot(snapshot_path)
+
+    new_cache.invalidate(test_path)
+
+    assert new_cache.get_model(test_path, ModelTest) is None
+
+
+def test_snapshot_keeps_unused_entries(enabled_cache, new_cache, test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    enabled_cache.set_model(
+        test_path, ModelTest(name="a", value=1), test_path.stat().st_mtime_ns
+    )
+    enabled_cache.save_snapshot(snapshot_path)
+    new_cache.load_snapshot(snapshot_path)
+
+    # Not used since loading, but still written to the next snapshot
+    assert new_cache.save_snapshot(snapshot_path) == 1
+
+
+def test_load_missing_or_corrupt_snapshot(enabled_cache, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    assert enabled_cache.load_snapshot(snapshot_path) == 0
+
+    snapshot_path.write_bytes(b"not a pickle")
+    assert enabled_cache.load_snapshot(snapshot_path) == 0
+    assert enabled_cache.stats().snapshot_pending == 0
+
+
+def test_load_incompatible_snapshot(enabled_cache, new_cache, test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    enabled_cache.set_model(
+        test_path, ModelTest(name="a", value=1), test_path.stat().st_mtime_ns
+    )
+    enabled_cache.save_snapshot(snapshot_path)
+
+    with mock.patch(
+        "libs.core.kiln_ai.datamodel.model_cache.SNAPSHOT_FORMAT_VERSION", 999
+    ):
+        assert new_cache.load_snapshot(snapshot_path) == 0
+    with mock.patch(
+        "libs.core.kiln_ai.datamodel.model_cache._class_fingerprints",
+        return_value={"changed": "fields"},
+    ):
+        assert new_cache.load_snapshot(snapshot_path) == 0
+    assert new_cache.load_snapshot(snapshot_path) == 1
+
+
+def test_class_fingerprints_include_nested_fields():
+    before = _class_fingerprints({StructuredModelTest})
+    with mock.patch.dict(
+        NestedModelTest.model_fields, {"extra": NestedModelTest.model_fields["label"]}
+    ):
+        after = _class_fingerprints({StructuredModelTest})
+    assert before != after
+    assert before == _class_fingerprints({StructuredModelTest})
+
+
+def test_snapshot_disabled_cache_loads_nothing(test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    cache = make_enabled_cache()
+    cache.set_model(test_path, ModelTest(name="a", value=1), 1)
+    cache.save_snapshot(snapshot_path)
+
+    disabled = ModelCache()
+    disabled._enabled = False
+    assert disabled.load_snapshot(snapshot_path) == 0
+
+
+def test_enable_snapshots_loads_and_flushes(enabled_cache, test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    enabled_cache.set_model(
+        test_path, ModelTest(name="a", value=1), test_path.stat().st_mtime_ns
+    )
+    enabled_cache.save_snapshot(snapshot_path)
+
+    cache = make_enabled_cache()
+    cache.enable_snapshots(snapshot_path, interval_seconds=60)
+    for _ in range(500):
+        if cache.stats().snapshot_pending == 1:
+            break
+        time.sleep(0.01)
+    assert cache.stats().snapshot_pending == 1
+
+    # Nothing changed since loading: no write
+    with mock.patch.object(cache, "save_snapshot") as save:
+        cache.flush_snapshot()
+        save.assert_not_called()
+
+    assert cache.get_model(test_path, ModelTest) is not None
+    other_path = tmp_path / "other.kiln"
+    other_path.touch()
+    cache.set_model(
+        other_path, ModelTest(name="b", value=2), other_path.stat().st_mtime_ns
+    )
+    # Final snapshot on close
+    cache.close()
+
+    restarted = make_enabled_cache()
+    assert restarted.load_snapshot(snapshot_path) == 2
+
+
+def test_shared_enables_snapshots(tmp_path):
+    with (
+        mock.patch.object(ModelCache, "_shared_instance", None),
+        mock.patch("libs.core.kiln_ai.datamodel.model_cache.Config.shared") as shared,
+        mock.patch.object(ModelCache, "enable_snapshots") as enable_snapshots,
+        mock.patch(
+            "libs.core.kiln_ai.datamodel.model_cache.default_snapshot_path",
+            return_value=tmp_path / "model_cache.snapshot",
+        ),
+    ):
+        shared.return_value.model_cache_max_entries = None
+        shared.return_value.model_cache_max_bytes = None
+        shared.return_value.model_cache_snapshot = True
+        shared.return_value.model_cache_snapshot_interval_seconds = None
+        ModelCache.shared()
+        enable_snapshots.assert_called_once_with(tmp_path / "model_cache.snapshot", 300)
+
+
+def test_cached_strings_interned(enabled_cache, tmp_path):
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"model_{i}.kiln"
+        path.touch()
+        paths.append(path)
+        # Built from parts, so the strings are equal but not the same objects
+        model = StructuredModelTest(
+            text="".join(["long text ", str(i)]) * 100,
+            nested=NestedModelTest(label="".join(["lab", "el"]), values=[i]),
+            tags=["".join(["ta", "g"])],
+            properties={"".join(["ke", "y"]): NestedModelTest(label="x", values=[])},
+        )
+        enabled_cache.set_model(path, model, path.stat().st_mtime_ns)
+
+    first, second = [
+        enabled_cache.get_model(path, StructuredModelTest, readonly=True)
+        for path in paths
+    ]
+    assert first.tags[0] is second.tags[0]
+    assert first.nested.label is second.nested.label
+    assert list(first.properties)[0] is list(second.properties)[0]
+    # Long strings aren't interned
+    assert first.text != second.text
+
+
+@pytest.fixture
+def compact_cache():
+    cache = make_enabled_cache(compact=True)
+    yield cache
+    cache.close()
+
+
+def test_compact_get_model(compact_cache, test_path):
+    model = make_structured_model()
+    compact_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    assert isinstance(compact_cache.model_cache[test_path][0], CompactModel)
+
+    for readonly in [True, False]:
+        loaded = compact_cache.get_model(
+            test_path, StructuredModelTest, readonly=readonly
+        )
+        assert loaded == model
+        assert type(loaded.nested) is NestedModelTest
+        assert loaded.model_fields_set == model.model_fields_set
+        assert loaded.model_dump_json() == model.model_dump_json()
+        # Strings and excluded references are shared
+        assert loaded.text is model.text
+        assert loaded.reference is model.reference
+
+    # Each get is a new instance, edits don't reach the cache
+    loaded.nested.values.append(99)
+    loaded.tags.append("c")
+    again = compact_cache.get_model(test_path, StructuredModelTest, readonly=True)
+    assert again == model
+    assert again is not loaded
+
+    with pytest.raises(ValueError):
+        compact_cache.get_model(test_path, ModelTest)
+
+
+def test_compact_pinned_models_stay_instances(compact_cache, tmp_path):
+    pinned_path = tmp_path / "pinned.kiln"
+    pinned_path.touch()
+    model = ModelTest(name="parent", value=1)
+    compact_cache.set_model(
+        pinned_path, model, pinned_path.stat().st_mtime_ns, pinned=True
+    )
+    assert compact_cache.get_model(pinned_path, ModelTest, readonly=True) is model
+
+    other_path = tmp_path / "other.kiln"
+    other_path.touch()
+    compact_cache.set_model(
+        other_path, ModelTest(name="b", value=2), other_path.stat().st_mtime_ns
+    )
+    compact_cache.pin(other_path)
+    pinned = compact_cache.get_model(other_path, ModelTest, readonly=True)
+    assert pinned is compact_cache.get_model(other_path, ModelTest, readonly=True)
+
+
+def test_compact_get_model_id(compact_cache, test_path):
+    class ModelWithId(BaseModel):
+        id: str
+        name: str
+
+    compact_cache.set_model(
+        test_path, ModelWithId(id="123", name="a"), test_path.stat().st_mtime_ns
+    )
+    assert compact_cache.get_model_id(test_path, ModelWithId) == "123"
+    assert compact_cache.get_model_id(test_path, ModelWithId) == "123"
+
+
+def test_compact_snapshot_round_trip(compact_cache, test_path, tmp_path):
+    snapshot_path = tmp_path / "model_cache.snapshot"
+    model = make_structured_model()
+    model.reference = None
+    compact_cache.set_model(test_path, model, test_path.stat().st_mtime_ns)
+    assert compact_cache.save_snapshot(snapshot_path) == 1
+
+    # Compact entries load in either mode
+    for compact in [True, False]:
+        restarted = make_enabled_cache(compact=compact)
+        assert restarted.load_snapshot(snapshot_path) == 1
+        assert restarted.get_model(test_path, StructuredModelTest) == model
+        restarted.close()
+
+
+def test_compact_uses_less_memory(tmp_path):
+    def cached_bytes(cache):
+        # Models as loaded, and dropped by the loader once cached
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        models = [
+            StructuredModelTest(
+                text=f"text {i}",
+                nested=NestedModelTest(label="label", values=[i]),
+                tags=["tag"],
+                properties={"key": NestedModelTest(label="x", values=[])},
+            )
+            for i in range(200)
+        ]
+        for i, model in enumerate(models):
+            cache.set_model(tmp_path / f"{i}.kiln", model, 1)
+        del models
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        cache.close()
+        return used
+
+    assert cached_bytes(make_enabled_cache(compact=True)) < cached_bytes(
+        make_enabled_cache()
+    )
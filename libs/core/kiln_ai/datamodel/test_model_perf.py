@@ -1,5 +1,6 @@
 import shutil
 import uuid
+from unittest.mock import patch
 
 import pytest
 
@@ -9,8 +10,16 @@ from kiln_ai.datamodel import (
     Project,
     Task,
     TaskOutput,
+    TaskOutputRating,
     TaskRun,
 )
+from kiln_ai.datamodel.eval import EvalRun
+from kiln_ai.datamodel.json_codec import (
+    JSON_CODECS,
+    available_json_codecs,
+    json_codec,
+)
+from kiln_ai.datamodel.model_cache import ModelCache
 
 test_json_schema = """{
   "type": "object",
@@ -124,3 +133,109 @@ def test_benchmark_load_from_file(benchmark, task_run):
     # sys.stdout.write(f"Ops per second: {ops_per_second:.6f}")
     if ops_per_second < 500:
         pytest.fail(f"Ops per second: {ops_per_second:.6f}, expected more than 1k ops")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("child_count", [10, 100, 500])
+@pytest.mark.parametrize("max_workers", [1, 4], ids=["sequential", "threads"])
+def test_benchmark_all_children_crossover(
+    benchmark, task_run, child_count, max_workers
+):
+    """
+    Cold-cache child loading: sequential vs thread pool, at a few child counts.
+
+    Used to pick PARALLEL_LOAD_MIN_CHILDREN (the threshold is disabled here, so small counts show the overhead). Compare the groups with:
+    pytest -k crossover --benchmark-only --benchmark-group-by=param:child_count
+    """
+    task = task_run.parent
+    run_folder = task_run.path.parent
+    for i in range(child_count - 1):
+        shutil.copytree(run_folder, run_folder.parent / f"{i} - copy")
+
+    def load_cold():
+        # Fresh cache for each round, so every round loads from disk
+        cache = ModelCache()
+        cache._enabled = True
+        with (
+            patch("kiln_ai.datamodel.basemodel.ModelCache.shared", return_value=cache),
+            patch("kiln_ai.datamodel.basemodel.PARALLEL_LOAD_MIN_CHILDREN", 0),
+        ):
+            runs = TaskRun.all_children_of_parent_path(
+                task.path, max_workers=max_workers
+            )
+        assert len(runs) == child_count
+
+    benchmark.pedantic(load_cold, rounds=3, iterations=1)
+
+
+def realistic_model(tmp_path, model_kind: str):
+    # Sizes in the range of typical LLM generated inputs/outputs with reasoning
+    if model_kind == "task_run":
+        return TaskRun(
+            input="Input text. " * 300,
+            input_source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Tester"}
+            ),
+            output=TaskOutput(
+                output="Output text. " * 400,
+                source=DataSource(
+                    type=DataSourceType.synthetic,
+                    properties={
+                        "model_name": "test-model",
+                        "model_provider": "test-provider",
+                        "adapter_name": "test-adapter",
+                    },
+                ),
+                rating=TaskOutputRating(value=4, type="five_star"),
+            ),
+            intermediate_outputs={"reasoning": "Thinking. " * 500},
+            tags=["golden", "reviewed"],
+            path=tmp_path / "task_run.kiln",
+        )
+    return EvalRun(
+        dataset_id="123456789012",
+        task_run_config_id="210987654321",
+        eval_config_eval=False,
+        input="Input text. " * 300,
+        output="Output text. " * 400,
+        intermediate_outputs={"chain_of_thought": "Thinking. " * 500},
+        scores={"accuracy": 4.0, "overall_rating": 3.5},
+        path=tmp_path / "eval_run.kiln",
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("model_kind", ["task_run", "eval_run"])
+@pytest.mark.parametrize("codec_name", list(JSON_CODECS.keys()))
+def test_benchmark_codec_load(benchmark, tmp_path, codec_name, model_kind):
+    """
+    Load throughput (read + parse + validate, no model cache) per JSON codec. Compare with:
+    pytest -k test_benchmark_codec --benchmark-only --benchmark-group-by=func,param:model_kind
+    """
+    if codec_name not in available_json_codecs():
+        pytest.skip(f"{codec_name} not installed")
+    codec = json_codec(codec_name)
+    model = realistic_model(tmp_path, model_kind)
+    with patch("kiln_ai.datamodel.basemodel.json_codec", return_value=codec):
+        model.save_to_file()
+        model_class = type(model)
+        path = model.path
+        loaded, _, _ = benchmark(model_class._read_model_file, path)
+    assert loaded.id == model.id
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("compact", [False, True], ids=["indented", "compact"])
+@pytest.mark.parametrize("model_kind", ["task_run", "eval_run"])
+@pytest.mark.parametrize("codec_name", list(JSON_CODECS.keys()))
+def test_benchmark_codec_save(benchmark, tmp_path, codec_name, model_kind, compact):
+    if codec_name not in available_json_codecs():
+        pytest.skip(f"{codec_name} not installed")
+    codec = json_codec(codec_name)
+    model = realistic_model(tmp_path, model_kind)
+    with (
+        patch("kiln_ai.datamodel.basemodel.json_codec", return_value=codec),
+        patch("kiln_ai.datamodel.basemodel.compact_json_enabled", return_value=compact),
+    ):
+        benchmark(model.save_to_file)
+    assert model.path.exists()
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pytest
 from pydantic import Field, ValidationError
 
@@ -128,6 +130,20 @@ def test_persist_model_a_without_children(tmp_path):
     assert len(loaded_instance.bs()) == 0
 
 
+def test_persist_hierarchy_skips_fsync(tmp_path):
+    root_path = tmp_path / "model_a.kiln"
+    data = {"name": "Root", "bs": [{"value": 1, "cs": [{"code": "ABC"}]}]}
+
+    # Same durability as save_to_file: the nested save doesn't fsync
+    with patch("kiln_ai.datamodel.bulk_writer.os.fsync") as mock_fsync:
+        instance = ModelA.validate_and_save_with_subrelations(data, path=root_path)
+
+    mock_fsync.assert_not_called()
+    loaded = ModelA.load_from_file(root_path)
+    assert loaded.bs()[0].cs()[0].code == "ABC"
+    assert instance.bs()[0].value == 1
+
+
 def test_validate_without_saving(tmp_path):
     data = {
         "name": "ValidateOnly",
@@ -138,7 +154,7 @@ def test_validate_without_saving(tmp_path):
     }
 
     # Validate the data without saving
-    ModelA._validate_nested(data, save=False)
+    ModelA._validate_nested(data)
 
     data = {
         "name": "ValidateOnly",
@@ -149,7 +165,7 @@ def test_validate_without_saving(tmp_path):
     }
 
     with pytest.raises(ValidationError):
-        ModelA._validate_nested(data, save=False)
+        ModelA._validate_nested(data)
 
 
 def test_validation_error_in_multiple_levels():
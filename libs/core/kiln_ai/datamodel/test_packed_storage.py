@@ -0,0 +1,461 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.eval import (
+    Eval,
+    EvalConfig,
+    EvalConfigType,
+    EvalOutputScore,
+    EvalRun,
+)
+from kiln_ai.datamodel.model_cache import ModelCache
+from kiln_ai.datamodel.packed_storage import (
+    PACK_DIRNAME,
+    UNLOCKED_REFRESH_ATTEMPTS,
+    PackStore,
+    encode_record,
+    main,
+    pack_children,
+    pack_folder,
+    segment_filename,
+    unpack_children,
+    unpack_folder,
+)
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_runs(task, count):
+    runs = [
+        TaskRun(
+            parent=task,
+            input=f"Test input {i}\nsecond line",
+            output=TaskOutput(output=f"Test output {i}"),
+        )
+        for i in range(count)
+    ]
+    for run in runs:
+        run.save_to_file()
+    return runs
+
+
+def runs_folder(task):
+    return task.path.parent / "runs"
+
+
+def store_for(task):
+    store = PackStore.for_folder(runs_folder(task))
+    assert store is not None
+    return store
+
+
+def test_pack_and_unpack_round_trip(task):
+    runs = make_runs(task, 5)
+
+    assert pack_children(task.path, TaskRun) == 5
+    assert [p.name for p in runs_folder(task).iterdir()] == [PACK_DIRNAME]
+
+    packed = {run.id: run for run in task.runs()}
+    assert set(packed) == {run.id for run in runs}
+    for run in runs:
+        assert packed[run.id].input == run.input
+        # Children keep their usual path
+        assert packed[run.id].path == run.path
+        assert packed[run.id].parent.id == task.id
+
+    assert unpack_children(task.path, TaskRun) == 5
+    assert not (runs_folder(task) / PACK_DIRNAME).exists()
+    for run in runs:
+        assert run.path.is_file()
+        assert json.loads(run.path.read_text(encoding="utf-8"))["input"] == run.input
+    assert {run.id for run in task.runs()} == {run.id for run in runs}
+
+
+def test_unpacked_files_match_saved_files(task):
+    [run] = make_runs(task, 1)
+    original = run.path.read_text(encoding="utf-8")
+
+    pack_children(task.path, TaskRun)
+    unpack_children(task.path, TaskRun)
+
+    assert run.path.read_text(encoding="utf-8") == original
+
+
+def test_save_appends_to_pack(task):
+    make_runs(task, 2)
+    pack_children(task.path, TaskRun)
+
+    [new_run] = make_runs(task, 1)
+
+    assert not new_run.path.parent.exists()
+    assert len(task.runs()) == 3
+    loaded = TaskRun.load_from_file(new_run.path)
+    assert loaded.input == new_run.input
+
+
+def test_update_and_delete_packed_run(task):
+    make_runs(task, 3)
+    pack_children(task.path, TaskRun)
+    [run, deleted, _] = task.runs()
+
+    run.tags = ["updated"]
+    run.save_to_file()
+    deleted.delete()
+
+    assert deleted.path is None
+    runs = {r.id: r for r in task.runs()}
+    assert len(runs) == 2
+    assert runs[run.id].tags == ["updated"]
+    assert store_for(task).dead_bytes() > 0
+    with pytest.raises(FileNotFoundError):
+        TaskRun.load_from_file(runs_folder(task) / "missing" / "task_run.kiln")
+
+
+def test_delete_twice_raises(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    [run] = task.runs()
+    path = run.path
+    run.delete()
+
+    run.path = path
+    with pytest.raises(FileNotFoundError):
+        run.delete()
+
+
+def test_from_id_and_parent_path(task):
+    runs = make_runs(task, 3)
+    pack_children(task.path, TaskRun)
+
+    found = TaskRun.from_id_and_parent_path(runs[1].id, task.path)
+    assert found is not None
+    assert found.input == runs[1].input
+    assert TaskRun.from_id_and_parent_path("missing", task.path) is None
+
+
+def test_loose_folder_takes_precedence(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    [run] = task.runs()
+
+    run.path.parent.mkdir()
+    run.tags = ["loose"]
+    with open(run.path, "w", encoding="utf-8") as file:
+        file.write(run.model_dump_json(indent=2, exclude={"path"}))
+
+    [loaded] = task.runs()
+    assert loaded.tags == ["loose"]
+    # Saves to a loose file stay loose
+    loaded.tags = ["loose", "saved"]
+    loaded.save_to_file()
+    assert json.loads(run.path.read_text(encoding="utf-8"))["tags"] == [
+        "loose",
+        "saved",
+    ]
+
+
+def test_save_many_into_pack(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    runs = [
+        TaskRun(parent=task, input=f"Bulk {i}", output=TaskOutput(output="out"))
+        for i in range(10)
+    ]
+
+    TaskRun.save_many(runs)
+
+    assert [p.name for p in runs_folder(task).iterdir()] == [PACK_DIRNAME]
+    assert len(task.runs()) == 11
+    assert all(run.path is not None for run in runs)
+
+
+def test_run_index_over_pack(task):
+    runs = make_runs(task, 3)
+    index = task.run_index()
+    assert len(index.entries()) == 3
+
+    pack_children(task.path, TaskRun)
+    entries = index.entries()
+    assert {entry.id for entry in entries} == {run.id for run in runs}
+
+    [new_run] = make_runs(task, 1)
+    entry = index.entry_for_id(new_run.id)
+    assert entry is not None
+    assert entry.load().input == new_run.input
+
+
+def test_parallel_loading(task):
+    runs = make_runs(task, 6)
+    pack_children(task.path, TaskRun)
+
+    loaded = TaskRun.all_children_of_parent_path(task.path, max_workers=3)
+
+    assert {run.id for run in loaded} == {run.id for run in runs}
+
+
+def test_eval_runs_packed(task):
+    eval = Eval(
+        name="Test Eval",
+        parent=task,
+        eval_set_filter_id="all",
+        eval_configs_filter_id="all",
+        output_scores=[
+            EvalOutputScore(name="score", type=TaskOutputRatingType.pass_fail)
+        ],
+    )
+    eval.save_to_file()
+    config = EvalConfig(
+        parent=eval,
+        name="Test Config",
+        config_type=EvalConfigType.g_eval,
+        properties={"eval_steps": ["step1"]},
+        model_name="gpt-4",
+        model_provider="openai",
+    )
+    config.save_to_file()
+    for i in range(3):
+        EvalRun(
+            parent=config,
+            dataset_id=f"dataset{i}",
+            task_run_config_id="config",
+            input="input",
+            output="output",
+            scores={"score": 1.0},
+        ).save_to_file()
+
+    assert pack_children(config.path, EvalRun) == 3
+    assert sorted(run.dataset_id for run in config.runs()) == [
+        "dataset0",
+        "dataset1",
+        "dataset2",
+    ]
+
+
+def test_pack_rejects_parent_models(task):
+    with pytest.raises(ValueError, match="Only leaf models"):
+        pack_children(task.path.parent.parent.parent / "project.kiln", Task)
+
+
+def test_pack_rejects_folders_with_other_files(task):
+    [run] = make_runs(task, 1)
+    (run.path.parent / "attachment.txt").write_text("data")
+
+    with pytest.raises(ValueError, match="Only leaf models"):
+        pack_children(task.path, TaskRun)
+    assert run.path.is_file()
+    assert not (runs_folder(task) / PACK_DIRNAME).exists()
+
+
+def test_compact(task):
+    make_runs(task, 4)
+    pack_children(task.path, TaskRun)
+    runs = task.runs()
+    for i in range(3):
+        runs[0].tags = [f"version_{i}"]
+        runs[0].save_to_file()
+    runs[1].delete()
+    store = store_for(task)
+    assert store.dead_bytes() > 0
+
+    store.compact()
+
+    assert store.dead_bytes() == 0
+    segments = sorted(p.name for p in store.pack_folder.glob("segment-*"))
+    assert segments == [segment_filename(2), segment_filename(3)]
+    loaded = {run.id: run for run in task.runs()}
+    assert len(loaded) == 3
+    assert loaded[runs[0].id].tags == ["version_2"]
+
+    # New writes land after the compacted segment
+    runs[2].tags = ["after_compaction"]
+    runs[2].save_to_file()
+    assert TaskRun.load_from_file(runs[2].path).tags == ["after_compaction"]
+
+
+def test_compaction_seen_by_other_instances(task):
+    make_runs(task, 2)
+    pack_children(task.path, TaskRun)
+    [run, _] = task.runs()
+    run.tags = ["updated"]
+    run.save_to_file()
+    other = PackStore(runs_folder(task))
+    assert other.stamp(run.path.parent.name) is not None
+
+    store_for(task).compact()
+
+    assert set(other.dirnames()) == set(store_for(task).dirnames())
+    assert other.stamp(run.path.parent.name) == store_for(task).stamp(
+        run.path.parent.name
+    )
+
+
+def test_background_compaction(task):
+    make_runs(task, 2)
+    pack_children(task.path, TaskRun)
+    [run, _] = task.runs()
+
+    with (
+        patch("kiln_ai.datamodel.packed_storage.COMPACTION_MIN_DEAD_BYTES", 0),
+        patch("kiln_ai.datamodel.packed_storage.COMPACTION_MIN_DEAD_RATIO", 0),
+        patch.object(PackStore, "_compact_in_background") as compact,
+        patch("kiln_ai.datamodel.packed_storage.threading.Thread") as thread,
+    ):
+        run.save_to_file()
+        thread.assert_called_once()
+        assert thread.call_args.kwargs["target"] == compact
+        thread.return_value.start.assert_called_once()
+
+
+def test_torn_write_is_skipped(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    store = store_for(task)
+    segment = store.pack_folder / segment_filename(1)
+    with open(segment, "ab") as file:
+        file.write(b'{"op":"put","dirname":"123 - torn"}\t{"input": "tr')
+
+    assert len(task.runs()) == 1
+    [new_run] = make_runs(task, 1)
+
+    # The torn record is dropped, not merged with the next write
+    assert "123 - torn" not in store.dirnames()
+    assert len(task.runs()) == 2
+    assert TaskRun.load_from_file(new_run.path).input == new_run.input
+
+
+def test_segments_roll_over(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    store = store_for(task)
+    store.segment_max_bytes = 1
+
+    make_runs(task, 2)
+
+    segments = sorted(p.name for p in store.pack_folder.glob("segment-*"))
+    assert segments == [segment_filename(1), segment_filename(2), segment_filename(3)]
+    assert len(task.runs()) == 3
+
+
+def test_compaction_during_refresh(task):
+    make_runs(task, 3)
+    pack_children(task.path, TaskRun)
+    store = store_for(task)
+    expected = set(store.dirnames())
+    # Another process's view: its own instance, and its own handle on the lock file
+    reader = PackStore(runs_folder(task))
+    scan_segment = PackStore._scan_segment_locked
+    compactions = []
+
+    def compact_then_scan(self, number):
+        # Compact between the scandir and the scan of every unlocked attempt, so each one sees a removed segment
+        if self is reader and not reader._file_locked:
+            store.compact()
+            compactions.append(number)
+        return scan_segment(self, number)
+
+    with patch.object(PackStore, "_scan_segment_locked", compact_then_scan):
+        assert set(reader.dirnames()) == expected
+
+    # Every unlocked attempt raced with a compaction, the scan under the lock didn't
+    assert len(compactions) == UNLOCKED_REFRESH_ATTEMPTS
+    assert reader.stamps() == store.stamps()
+    [run] = [run for run in task.runs() if run.input == "Test input 0\nsecond line"]
+    assert run.output.output == "Test output 0"
+
+
+def test_changes_from_other_processes_are_seen(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    [run] = task.runs()
+    dirname = run.path.parent.name
+    store_for(task).refresh()
+
+    # Append as another process would, bypassing this process's store
+    run.tags = ["external"]
+    with open(store_for(task).pack_folder / segment_filename(1), "ab") as file:
+        file.write(
+            encode_record(dirname, run.model_dump_json(exclude={"path"}).encode())
+        )
+
+    assert TaskRun.load_from_file(run.path).tags == ["external"]
+
+
+def test_file_lock_excludes_other_writers(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    store = store_for(task)
+    acquired = threading.Event()
+
+    def other_writer():
+        # Each _file_lock opens its own handle, as another process would
+        with store._file_lock():
+            acquired.set()
+
+    with store._file_lock():
+        thread = threading.Thread(target=other_writer)
+        thread.start()
+        assert not acquired.wait(timeout=0.2)
+    assert acquired.wait(timeout=5)
+    thread.join()
+
+
+def test_model_cache_validates_packed_records(task):
+    make_runs(task, 1)
+    pack_children(task.path, TaskRun)
+    [run] = task.runs()
+    store = store_for(task)
+    cache = ModelCache()
+    stamp = store.stamp(run.path.parent.name)
+    assert stamp is not None
+
+    assert cache._is_cache_valid(run.path, stamp)
+    run.save_to_file()
+    assert not cache._is_cache_valid(run.path, stamp)
+
+
+def test_encode_record_rejects_multiline_body():
+    with pytest.raises(ValueError, match="single line"):
+        encode_record("dir", b"{\n}")
+
+
+def test_unpack_not_packed(tmp_path):
+    with pytest.raises(ValueError, match="not packed"):
+        unpack_folder(tmp_path)
+
+
+def test_repack_adds_loose_children(task):
+    make_runs(task, 2)
+    pack_children(task.path, TaskRun)
+    # Write a loose folder directly, as a git checkout of an unpacked copy would
+    loose = TaskRun(parent=task, input="Loose", output=TaskOutput(output="out"))
+    path = loose.build_path()
+    path.parent.mkdir()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(loose.model_dump_json(indent=2, exclude={"path"}))
+
+    assert pack_folder(runs_folder(task)) == 1
+    assert [p.name for p in runs_folder(task).iterdir()] == [PACK_DIRNAME]
+    assert len(task.runs()) == 3
+
+
+def test_cli(task, capsys):
+    make_runs(task, 2)
+
+    main(["pack", str(runs_folder(task))])
+    assert "Packed 2 children" in capsys.readouterr().out
+    main(["compact", str(runs_folder(task))])
+    main(["unpack", str(runs_folder(task))])
+    assert "Unpacked 2 children" in capsys.readouterr().out
+    assert len(task.runs()) == 2
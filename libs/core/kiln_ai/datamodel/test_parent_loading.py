@@ -0,0 +1,104 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.model_cache import ModelCache
+
+INPUT_SCHEMA = json.dumps(
+    {
+        "type": "object",
+        "properties": {"text": {"type": "string"}},
+        "required": ["text"],
+    }
+)
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(
+        name="Test Task",
+        instruction="Test Instruction",
+        input_json_schema=INPUT_SCHEMA,
+        parent=project,
+    )
+    task.save_to_file()
+    return task
+
+
+@pytest.fixture
+def run_paths(task):
+    paths = []
+    for i in range(3):
+        run = TaskRun(
+            parent=task,
+            input=json.dumps({"text": f"input {i}"}),
+            output=TaskOutput(output="Test output"),
+        )
+        run.save_to_file()
+        paths.append(run.path)
+    return paths
+
+
+@pytest.fixture
+def enabled_cache():
+    with patch.object(ModelCache, "_check_timestamp_granularity", return_value=True):
+        cache = ModelCache()
+    with patch.object(ModelCache, "_shared_instance", cache):
+        yield cache
+    cache.close()
+
+
+def test_readonly_children_share_cached_parent(enabled_cache, task, run_paths):
+    runs = [TaskRun.load_from_file(path, readonly=True) for path in run_paths]
+
+    parents = [run.parent for run in runs]
+
+    assert parents[0] is not None
+    assert parents[0].path == task.path
+    assert all(parent is parents[0] for parent in parents)
+    assert parents[0] is enabled_cache.get_model(task.path, Task, readonly=True)
+    assert runs[0].cached_parent() is parents[0]
+
+
+def test_mutable_children_get_private_parent(enabled_cache, task, run_paths):
+    shared = TaskRun.load_from_file(run_paths[0], readonly=True).parent
+    # First load (cache miss) and later loads (cache hits) alike
+    runs = [TaskRun.load_from_file(path) for path in run_paths]
+    runs.append(TaskRun.load_from_file(run_paths[0]))
+
+    parents = [run.parent for run in runs]
+
+    assert all(parent is not None for parent in parents)
+    assert all(parent is not shared for parent in parents)
+    assert len({id(parent) for parent in parents}) == len(parents)
+
+    # Edits stay with the child's copy
+    parents[0].name = "Edited"
+    cached_task = enabled_cache.get_model(task.path, Task, readonly=True)
+    assert cached_task is not None
+    assert cached_task.name == "Test Task"
+
+
+def test_mutable_copy_does_not_alias_cached_parent(enabled_cache, task, run_paths):
+    cached_run = TaskRun.load_from_file(run_paths[0], readonly=True)
+    assert cached_run.parent is not None
+    assert cached_run.cached_parent() is not None
+
+    copied = TaskRun.load_from_file(run_paths[0])
+    assert copied is not cached_run
+    assert copied.cached_parent() is None
+    assert copied.parent is not None
+    assert copied.parent.path == task.path
+
+
+def test_missing_parent(tmp_path):
+    run = TaskRun(
+        input="Test input",
+        output=TaskOutput(output="Test output"),
+        path=tmp_path / "runs" / "1 - run" / "task_run.kiln",
+    )
+    assert run.parent is None
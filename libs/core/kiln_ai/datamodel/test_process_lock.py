@@ -0,0 +1,62 @@
+import os
+
+from kiln_ai.datamodel import process_lock
+from kiln_ai.datamodel.process_lock import (
+    _try_lock,
+    register_process,
+    running_processes,
+)
+
+
+def hold_lock(pid):
+    # Another running process, as seen from this one: a separate handle holding the lock
+    lock_dir = process_lock.process_lock_dir()
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    file = open(lock_dir / f"{pid}.lock", "ab")
+    assert _try_lock(file)
+    return file
+
+
+def test_no_other_processes():
+    assert running_processes() == []
+
+
+def test_running_process_detected():
+    file = hold_lock(999999)
+    try:
+        assert running_processes() == [999999]
+        # Still held, not removed
+        assert running_processes() == [999999]
+    finally:
+        file.close()
+
+
+def test_stale_lock_removed():
+    hold_lock(999999).close()
+    stale = process_lock.process_lock_dir() / "999999.lock"
+    assert stale.exists()
+
+    assert running_processes() == []
+    assert not stale.exists()
+
+
+def test_own_process_ignored(monkeypatch):
+    monkeypatch.setattr(process_lock, "_registered", None)
+    register_process()
+    try:
+        assert (process_lock.process_lock_dir() / f"{os.getpid()}.lock").exists()
+        assert running_processes() == []
+        # Idempotent
+        registered = process_lock._registered
+        register_process()
+        assert process_lock._registered is registered
+    finally:
+        if process_lock._registered is not None:
+            process_lock._registered.close()
+
+
+def test_other_files_ignored():
+    lock_dir = process_lock.process_lock_dir()
+    lock_dir.mkdir(parents=True)
+    (lock_dir / "notes.lock").write_text("")
+    assert running_processes() == []
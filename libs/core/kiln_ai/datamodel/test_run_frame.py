@@ -0,0 +1,265 @@
+import json
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from kiln_ai.datamodel import (
+    DataSource,
+    DataSourceType,
+    Project,
+    Task,
+    TaskOutput,
+    TaskOutputRating,
+    TaskRun,
+)
+from kiln_ai.datamodel.dataset_filters import dataset_filter_from_id
+from kiln_ai.datamodel.run_frame import (
+    INDEX_COLUMNS,
+    Categorical,
+    RunFrame,
+    frame_filter_from_id,
+)
+from kiln_ai.datamodel.task_run import Usage
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_run(task, tags=None, rating=None, model_name="gpt_4o", **kwargs):
+    run = TaskRun(
+        parent=task,
+        input="Test input",
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Tester"}
+        ),
+        output=TaskOutput(
+            output="Test output",
+            source=DataSource(
+                type=DataSourceType.synthetic,
+                properties={
+                    "model_name": model_name,
+                    "model_provider": "openai",
+                    "adapter_name": "test_adapter",
+                },
+            ),
+            rating=rating,
+        ),
+        tags=tags or [],
+        **kwargs,
+    )
+    run.save_to_file()
+    return run
+
+
+def test_frame_columns(task):
+    run = make_run(
+        task,
+        tags=["a", "b"],
+        rating=TaskOutputRating(value=5, type="five_star"),
+        intermediate_outputs={"reasoning": "hmm"},
+        usage=Usage(input_tokens=10, output_tokens=5, total_tokens=15, cost=0.5),
+    )
+    other = make_run(task, tags=["b"], model_name="claude")
+
+    frame = task.run_frame()
+    assert len(frame) == 2
+    i = list(frame.ids).index(run.id)
+    j = list(frame.ids).index(other.id)
+    assert frame.created_at[i] == np.datetime64(run.created_at, "us")
+    assert frame.tags_of(i) == ["a", "b"]
+    assert frame.rating_value[i] == 5
+    assert np.isnan(frame.rating_value[j])
+    assert frame.rating_type.categories[frame.rating_type.codes[i]] == "five_star"
+    assert frame.rating_type.codes[j] == -1
+    assert frame.has_thinking_training_data[i]
+    assert not frame.has_repaired_output[i]
+    assert frame.model_name.value_counts() == {"gpt_4o": 1, "claude": 1}
+    assert frame.output_source_type.value_counts() == {"synthetic": 2}
+    assert frame.paths_where(frame.ids == run.id) == [run.path.resolve()]
+
+    assert frame.usage_totals() == {
+        "input_tokens": 10.0,
+        "output_tokens": 5.0,
+        "total_tokens": 15.0,
+        "cost": 0.5,
+    }
+    assert frame.usage_totals(frame.ids == other.id)["total_tokens"] == 0.0
+
+    entry = task.run_index().entry_for_id(run.id)
+    assert entry is not None
+    assert entry.total_tokens == 15
+    assert entry.cost == 0.5
+
+
+def test_tag_mask(task):
+    tagged = [make_run(task, tags=["golden", "x"]) for _ in range(3)]
+    make_run(task, tags=["x"])
+
+    frame = task.run_frame()
+    mask = frame.tag_mask("golden")
+    assert set(frame.ids[mask]) == {run.id for run in tagged}
+    # Cached bitset gives the same answer
+    assert (frame.tag_mask("golden") == mask).all()
+    assert frame.tag_mask("x").sum() == 4
+    assert frame.tag_mask("missing").sum() == 0
+
+
+def test_frame_cached_until_index_changes(task):
+    make_run(task)
+    index = task.run_index()
+    frame = index.frame()
+    assert index.frame() is frame
+
+    run = make_run(task)
+    updated = index.frame()
+    assert updated is not frame
+    assert len(updated) == 2
+    # Frames are snapshots
+    assert len(frame) == 1
+
+    task.delete_runs([run.id])
+    assert len(index.frame()) == 1
+
+
+def test_empty_task(task):
+    frame = task.run_frame()
+    assert len(frame) == 0
+    assert frame.mask_for_filter("high_rating").sum() == 0
+    assert frame.ids_where(frame.tag_mask("golden")) == []
+    assert frame.usage_totals()["cost"] == 0.0
+
+
+def test_timezone_aware_created_at():
+    row = {name: None for name in INDEX_COLUMNS}
+    row.update(
+        dirname="1 - a",
+        id="1",
+        created_at="2024-01-01T12:00:00+02:00",
+        tags="[]",
+        has_output=1,
+        has_repair_instructions=0,
+        has_repaired_output=0,
+        has_thinking_training_data=0,
+    )
+    frame = RunFrame.from_index_rows(
+        [tuple(row[name] for name in INDEX_COLUMNS)],
+        None,  # type: ignore
+    )
+    assert frame.created_at[0] == np.datetime64("2024-01-01T10:00:00", "us")
+
+
+def test_categorical():
+    column = Categorical.from_values(["a", None, "b", "a"])
+    assert column.codes.tolist() == [0, -1, 1, 0]
+    assert column.mask_equals("a").tolist() == [True, False, False, True]
+    assert column.mask_equals("c").sum() == 0
+    assert column.value_counts() == {"a": 2, "b": 1}
+    assert column.value_counts(np.array([False, True, True, False])) == {"b": 1}
+
+
+@pytest.mark.parametrize(
+    "filter_id",
+    [
+        "all",
+        "high_rating",
+        "thinking_model",
+        "thinking_model_high_rated",
+        "tag::golden",
+        "tag::missing",
+        "multi_filter::high_rating&tag::golden",
+        "multi_filter::thinking_model&tag::x",
+    ],
+)
+def test_frame_filters_match_dataset_filters(task, filter_id):
+    rng = random.Random(42)
+    ratings = [
+        None,
+        TaskOutputRating(value=5, type="five_star"),
+        TaskOutputRating(value=3, type="five_star"),
+        TaskOutputRating(value=1.0, type="pass_fail"),
+        TaskOutputRating(value=0.0, type="pass_fail"),
+        TaskOutputRating(value=-1.0, type="pass_fail_critical"),
+        TaskOutputRating(value=None, type="five_star"),
+    ]
+    runs = []
+    for _ in range(40):
+        repair = {}
+        if rng.random() < 0.2:
+            repair = {
+                "repair_instructions": "Fix it",
+                "repaired_output": TaskOutput(
+                    output="Fixed",
+                    source=DataSource(
+                        type=DataSourceType.human, properties={"created_by": "Tester"}
+                    ),
+                ),
+            }
+        run = make_run(
+            task,
+            tags=rng.sample(["golden", "x", "y"], rng.randint(0, 3)),
+            rating=rng.choice(ratings),
+            intermediate_outputs=rng.choice([None, {"reasoning": "r"}]),
+            **repair,
+        )
+        runs.append(run)
+
+    dataset_filter = dataset_filter_from_id(filter_id)
+    expected = sorted(run.id for run in runs if dataset_filter(run))
+    frame = task.run_frame()
+    mask = frame_filter_from_id(filter_id)(frame)
+    assert sorted(frame.ids_where(mask)) == expected
+    assert sorted(task.run_index().ids_in_filter(filter_id)) == expected
+
+
+def test_invalid_filter_id():
+    with pytest.raises(ValueError, match="Invalid dataset filter ID"):
+        frame_filter_from_id("nope")
+
+
+def test_legacy_rating_without_type(task):
+    run = make_run(task, rating=TaskOutputRating(value=4, type="five_star"))
+    data = json.loads(run.path.read_text())
+    del data["output"]["rating"]["type"]
+    run.path.write_text(json.dumps(data))
+
+    frame = task.run_frame()
+    assert frame.mask_for_filter("high_rating").tolist() == [True]
+
+
+def test_frame_filters_fast_on_large_frame():
+    count = 200_000
+    rows = [
+        (
+            f"{i} - run",
+            str(i),
+            datetime(2024, 1, 1).isoformat(),
+            json.dumps(["golden"] if i % 3 == 0 else []),
+            "five_star" if i % 2 else None,
+            float(i % 5 + 1) if i % 2 else None,
+            "synthetic",
+            "gpt_4o",
+            1,
+            0,
+            0,
+            i % 7 == 0,
+            10,
+            5,
+            15,
+            None,
+            "human",
+        )
+        for i in range(count)
+    ]
+    frame = RunFrame.from_index_rows(rows, None)  # type: ignore
+    mask = frame.mask_for_filter("multi_filter::high_rating&tag::golden")
+    expected = sum(1 for i in range(count) if i % 3 == 0 and i % 2 and i % 5 + 1 >= 4)
+    assert mask.sum() == expected
+    assert frame.usage_totals(mask)["total_tokens"] == 15 * expected
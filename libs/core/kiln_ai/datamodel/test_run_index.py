@@ -0,0 +1,548 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from kiln_ai.datamodel import (
+    DataSource,
+    DataSourceType,
+    Project,
+    Task,
+    TaskOutput,
+    TaskOutputRating,
+    TaskRun,
+)
+from kiln_ai.datamodel.dataset_split import AllSplitDefinition, DatasetSplit
+from kiln_ai.datamodel.run_index import (
+    LEGACY_RUN_INDEX_FILENAME,
+    MAX_OPEN_RUN_INDEXES,
+    RunIndex,
+    RunSearchField,
+    RunSortKey,
+)
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_run(task, input="Test input", tags=None, rating=None, **kwargs):
+    run = TaskRun(
+        parent=task,
+        input=input,
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Tester"}
+        ),
+        output=TaskOutput(
+            output="Test output",
+            source=DataSource(
+                type=DataSourceType.synthetic,
+                properties={
+                    "model_name": "gpt_4o",
+                    "model_provider": "openai",
+                    "adapter_name": "test_adapter",
+                },
+            ),
+            rating=rating,
+        ),
+        tags=tags or [],
+        **kwargs,
+    )
+    run.save_to_file()
+    return run
+
+
+def test_entries_match_runs(task):
+    run = make_run(
+        task,
+        tags=["a", "b"],
+        rating=TaskOutputRating(value=5, type="five_star"),
+        intermediate_outputs={"reasoning": "hmm"},
+    )
+
+    entries = task.run_index().entries()
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry.id == run.id
+    assert entry.path == run.path.resolve()
+    assert entry.created_at == run.created_at
+    assert entry.tags == ["a", "b"]
+    assert entry.rating is not None
+    assert entry.rating.value == 5
+    assert entry.model_name == "gpt_4o"
+    assert entry.output_source_type == "synthetic"
+    assert entry.input_source_type == "human"
+    assert entry.input_preview == "Test input"
+    assert entry.output_preview == "Test output"
+    assert entry.has_thinking_training_data
+    assert not entry.has_repaired_output
+    # Stored per user, not in the (possibly git synced) task folder
+    assert task.run_index().db_path.exists()
+    assert [p.name for p in task.path.parent.iterdir() if p.is_file()] == ["task.kiln"]
+
+    loaded = entry.load()
+    assert loaded.id == run.id
+    assert loaded.input == run.input
+
+
+def test_preview_truncated(task):
+    make_run(task, input="x" * 500)
+    entry = task.run_index().entries()[0]
+    assert entry.input_preview == "x" * 101
+
+
+def test_incremental_refresh(task):
+    run1 = make_run(task)
+    run2 = make_run(task)
+    index = task.run_index()
+    assert {e.id for e in index.entries()} == {run1.id, run2.id}
+
+    # Modified runs are re-indexed
+    run1.tags = ["updated"]
+    run1.save_to_file()
+    entry = index.entry_for_id(run1.id)
+    assert entry is not None
+    assert entry.tags == ["updated"]
+
+    # Deleted runs are removed, new runs are added
+    run2.delete()
+    run3 = make_run(task)
+    assert {e.id for e in index.entries()} == {run1.id, run3.id}
+
+
+def test_unchanged_runs_are_not_reparsed(task, monkeypatch):
+    make_run(task)
+    index = task.run_index()
+    index.refresh()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Should not parse unchanged runs")
+
+    monkeypatch.setattr(TaskRun, "load_fields", fail)
+    assert len(index.entries()) == 1
+
+
+def test_index_rebuilt_if_deleted(task):
+    run = make_run(task)
+    index = task.run_index()
+    assert len(index.entries()) == 1
+    os.remove(index.db_path)
+    assert [e.id for e in index.entries()] == [run.id]
+
+
+def test_index_rebuilt_on_schema_change(task):
+    run = make_run(task)
+    index = task.run_index()
+    index.refresh()
+    index.close()
+
+    conn = sqlite3.connect(index.db_path)
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    assert [e.id for e in index.entries()] == [run.id]
+
+
+def test_for_task_path_shared(task):
+    assert RunIndex.for_task_path(task.path) is RunIndex.for_task_path(task.path)
+    assert task.run_index() is RunIndex.for_task_path(task.path)
+
+
+def test_index_per_task_outside_project(task, tmp_path):
+    index = task.run_index()
+    assert index.db_path.parent == tmp_path / "run_indexes"
+    other = RunIndex.for_task_path(tmp_path / "other_task" / "task.kiln")
+    assert other.db_path != index.db_path
+    # Same task, however the path is spelled
+    assert RunIndex(task.path.parent / "." / "task.kiln").db_path == index.db_path
+
+
+def test_legacy_index_in_task_folder_removed(task):
+    legacy = task.path.parent / LEGACY_RUN_INDEX_FILENAME
+    legacy.write_bytes(b"old index")
+    run = make_run(task)
+    assert [e.id for e in task.run_index().entries()] == [run.id]
+    assert not legacy.exists()
+
+
+def test_open_indexes_bounded(task, tmp_path):
+    index = task.run_index()
+    index.refresh()
+    assert index._conn is not None
+    for i in range(MAX_OPEN_RUN_INDEXES):
+        RunIndex.for_task_path(tmp_path / f"task_{i}")
+    assert len(RunIndex._instances) <= MAX_OPEN_RUN_INDEXES
+    # Least recently used: closed, and reconnects if still in use
+    assert index._conn is None
+    assert task.run_index() is not index
+    make_run(task)
+    assert len(index.entries()) == 1
+
+
+def test_unsaved_task_has_no_index():
+    task = Task(name="Test Task", instruction="Test Instruction")
+    with pytest.raises(ValueError, match="must be saved"):
+        task.run_index()
+
+
+def test_ids_in_filter(task):
+    high = make_run(task, rating=TaskOutputRating(value=5, type="five_star"))
+    low = make_run(task, rating=TaskOutputRating(value=1, type="five_star"))
+    tagged = make_run(task, tags=["golden"])
+
+    index = task.run_index()
+    assert set(index.ids_in_filter("all")) == {high.id, low.id, tagged.id}
+    assert index.ids_in_filter("high_rating") == [high.id]
+    assert index.ids_in_filter("tag::golden") == [tagged.id]
+    assert index.ids_in_filter("multi_filter::high_rating&tag::golden") == []
+
+
+def test_dataset_split_from_task_uses_index(task):
+    runs = [make_run(task, tags=["keep"]) for _ in range(3)]
+    make_run(task)
+
+    split = DatasetSplit.from_task(
+        "Split", task, AllSplitDefinition, filter_id="tag::keep"
+    )
+    assert set(split.split_contents["all"]) == {run.id for run in runs}
+
+
+def test_refresh_does_not_load_full_models(task, monkeypatch):
+    make_run(task, rating=TaskOutputRating(value=5, type="five_star"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Index refresh should use projection loading")
+
+    monkeypatch.setattr(TaskRun, "load_from_file", fail)
+    entries = task.run_index().entries()
+    assert len(entries) == 1
+    assert entries[0].rating is not None
+    assert entries[0].rating.value == 5
+
+
+def test_legacy_rating_format_upgraded(task):
+    run = make_run(task)
+    with open(run.path, "r") as f:
+        data = json.load(f)
+    data["output"]["rating"] = {
+        "value": 4,
+        "type": "five_star",
+        "requirement_ratings": {"req1": 5},
+    }
+    with open(run.path, "w") as f:
+        json.dump(data, f)
+
+    entry = task.run_index().entry_for_id(run.id)
+    assert entry is not None
+    assert entry.rating is not None
+    assert entry.rating.requirement_ratings["req1"].value == 5
+
+
+def test_tag_index(task):
+    golden = [make_run(task, tags=["golden", "x"]) for _ in range(2)]
+    make_run(task, tags=["x"])
+
+    index = task.run_index()
+    assert index.tag_counts() == {"golden": 2, "x": 3}
+    assert set(index.ids_with_tag("golden")) == {run.id for run in golden}
+    assert index.ids_with_tag("missing") == []
+
+
+def test_tag_index_updated_on_save_and_delete(task, monkeypatch):
+    run = make_run(task, tags=["a"])
+    index = task.run_index()
+    assert index.tag_counts() == {"a": 1}
+
+    # Saves and deletes through the datamodel are indexed as they're written: no scan needed
+    def fail(*args, **kwargs):
+        raise AssertionError("Tag queries should not rescan the runs folder")
+
+    monkeypatch.setattr(index, "_refresh_locked", fail)
+
+    run.tags = ["b", "c"]
+    run.save_to_file()
+    other = make_run(task, tags=["b"])
+    assert index.tag_counts() == {"b": 2, "c": 1}
+    assert index.ids_in_filter("tag::c") == [run.id]
+
+    run.delete()
+    assert index.tag_counts() == {"b": 1}
+    assert index.ids_with_tag("b") == [other.id]
+
+    task.delete_runs([other.id])
+    assert index.tag_counts() == {}
+
+
+def test_tag_index_updated_on_save_many(task):
+    make_run(task, tags=["a"])
+    index = task.run_index()
+    assert index.tag_counts() == {"a": 1}
+
+    runs = [
+        TaskRun(
+            parent=task,
+            input="bulk",
+            input_source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Tester"}
+            ),
+            output=TaskOutput(
+                output="bulk",
+                source=DataSource(
+                    type=DataSourceType.human, properties={"created_by": "Tester"}
+                ),
+            ),
+            tags=["bulk"],
+        )
+        for _ in range(3)
+    ]
+    TaskRun.save_many(runs)
+    assert index.tag_counts() == {"a": 1, "bulk": 3}
+
+
+def test_tag_index_picks_up_external_changes(task, monkeypatch):
+    run = make_run(task, tags=["a"])
+    index = task.run_index()
+    assert index.tag_counts() == {"a": 1}
+
+    # Edited outside the datamodel: seen once the last scan is older than the staleness window
+    data = json.loads(run.path.read_text())
+    data["tags"] = ["b"]
+    run.path.write_text(json.dumps(data))
+    monkeypatch.setattr("kiln_ai.datamodel.run_index.QUERY_MAX_STALENESS_SECONDS", 0)
+    assert index.tag_counts() == {"b": 1}
+    assert index.ids_with_tag("a") == []
+    # Other queries always scan
+    monkeypatch.undo()
+    data["tags"] = ["c"]
+    run.path.write_text(json.dumps(data))
+    os.utime(run.path, ns=(1, 1))
+    assert index.entries()[0].tags == ["c"]
+    assert index.tag_counts() == {"c": 1}
+
+
+def test_tag_index_not_built_by_saves(task):
+    run = make_run(task, tags=["a"])
+    run.save_to_file()
+    run.delete()
+    assert not RunIndex.for_task_path(task.path).db_path.exists()
+
+
+def all_pages(index, limit, **kwargs):
+    pages = [index.page(limit, **kwargs)]
+    while pages[-1].next_cursor is not None:
+        pages.append(index.page(limit, cursor=pages[-1].next_cursor, **kwargs))
+    return pages
+
+
+@pytest.mark.parametrize("sort", list(RunSortKey))
+@pytest.mark.parametrize("descending", [True, False])
+def test_page_sort_and_cursor(task, sort, descending):
+    ratings = [None, 1, 3, 5, 3]
+    models = ["b", None, "a", "a", "c"]
+    runs = []
+    for i in range(15):
+        runs.append(
+            make_run(
+                task,
+                rating=None
+                if ratings[i % 5] is None
+                else TaskOutputRating(value=ratings[i % 5], type="five_star"),
+                created_at=datetime(2024, 1, 1) + timedelta(hours=i * 7 % 15),
+            )
+        )
+        # Model name can't be set through make_run
+        data = json.loads(runs[-1].path.read_text())
+        data["output"]["source"]["properties"]["model_name"] = models[i % 5]
+        runs[-1].path.write_text(json.dumps(data))
+
+    index = task.run_index()
+    index.refresh()
+    pages = all_pages(index, 4, sort=sort, descending=descending)
+    assert [len(page.entries) for page in pages] == [4, 4, 4, 3]
+    assert all(page.total == 15 for page in pages)
+    entries = [entry for page in pages for entry in page.entries]
+    assert len({entry.id for entry in entries}) == 15
+
+    def key(entry):
+        if sort == RunSortKey.created_at:
+            return entry.created_at
+        if sort == RunSortKey.rating:
+            return entry.rating.value if entry.rating else float("-inf")
+        return entry.model_name or ""
+
+    keys = [key(entry) for entry in entries]
+    assert keys == sorted(keys, reverse=descending)
+
+
+def test_page_filter_and_search(task):
+    golden = [
+        make_run(
+            task,
+            input=f"Golden {i}",
+            tags=["golden"],
+            rating=TaskOutputRating(value=5, type="five_star"),
+        )
+        for i in range(3)
+    ]
+    make_run(task, input="Golden but untagged")
+    make_run(task, input="100%_match")
+    index = task.run_index()
+
+    page = index.page(2, filter_id="tag::golden")
+    assert page.total == 3
+    assert len(page.entries) == 2
+    rest = index.page(2, cursor=page.next_cursor, filter_id="tag::golden")
+    assert rest.next_cursor is None
+    assert {e.id for e in page.entries + rest.entries} == {r.id for r in golden}
+
+    # Non-tag filters are evaluated on the frame
+    page = index.page(10, filter_id="query::rating>=5 & input_contains:golden")
+    assert {e.id for e in page.entries} == {r.id for r in golden}
+    assert index.page(10, filter_id="all").total == 5
+
+    assert index.page(10, search="golden").total == 4
+    assert index.page(10, search="GOLDEN", filter_id="tag::golden").total == 3
+    # Full-text search syntax, same as search()
+    assert [e.input_preview for e in index.page(10, search="mat*").entries] == [
+        "100%_match"
+    ]
+    assert index.page(10, search='"golden but"').total == 1
+    assert index.page(10, search="golden NOT untagged").total == 0
+    with pytest.raises(ValueError, match="empty"):
+        index.page(10, search='""')
+
+
+def test_page_search_matches_full_text(task):
+    long_input = "x " * 100 + "needle"
+    run = make_run(task, input=long_input)
+    make_run(task, input="haystack")
+    index = task.run_index()
+    # Past the end of the preview
+    assert "needle" not in index.entries()[0].input_preview
+    page = index.page(10, search="needle")
+    assert [e.id for e in page.entries] == [run.id]
+    assert page.total == 1
+
+
+def test_page_search_finds_just_saved_runs(task, monkeypatch):
+    make_run(task, input="first run")
+    index = task.run_index()
+    assert index.page(10, search="run").total == 1
+
+    # Indexed as it's saved, no scan needed
+    def fail(*args, **kwargs):
+        raise AssertionError("Page queries should not rescan the runs folder")
+
+    monkeypatch.setattr(index, "_refresh_locked", fail)
+    second = make_run(task, input="second run")
+    page = index.page(10, search="second")
+    assert [e.id for e in page.entries] == [second.id]
+    assert index.page(10, search="run").total == 2
+
+
+def test_page_invalid_cursor(task):
+    make_run(task)
+    make_run(task)
+    index = task.run_index()
+    cursor = index.page(1).next_cursor
+    assert cursor is not None
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        index.page(1, cursor="nope")
+    with pytest.raises(ValueError, match="different sort"):
+        index.page(1, cursor=cursor, sort=RunSortKey.rating)
+    with pytest.raises(ValueError, match="different sort"):
+        index.page(1, cursor=cursor, descending=False)
+
+
+def test_search(task):
+    apples = make_run(task, input="I like apples and pears")
+    repaired = make_run(
+        task,
+        input="Fruit question",
+        repair_instructions="Mention apples",
+        repaired_output=TaskOutput(
+            output="Apples, obviously",
+            source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Tester"}
+            ),
+        ),
+    )
+    thinking = make_run(
+        task,
+        input="Another question",
+        intermediate_outputs={"chain_of_thought": "Maybe the café sells apples"},
+    )
+    make_run(task, input="Nothing relevant")
+    index = task.run_index()
+
+    results = index.search("apples")
+    assert {r.id for r in results} == {apples.id, repaired.id, thinking.id}
+    assert results == sorted(results, key=lambda r: r.score, reverse=True)
+    assert index.search("apples", limit=1) == results[:1]
+    assert {r.id for r in index.search("apples pears")} == {apples.id}
+    # Case, accents and prefixes
+    assert [r.id for r in index.search("CAFE")] == [thinking.id]
+    assert [r.id for r in index.search("pea*")] == [apples.id]
+    # Phrases, and FTS syntax in the search is matched as text
+    assert [r.id for r in index.search('"like apples"')] == [apples.id]
+    assert index.search('"apples like"') == []
+    assert index.search("apples NOT pears OR (x") == []
+    assert len(index.search("test output")) == 4
+
+    assert [r.id for r in index.search("apples", fields=[RunSearchField.input])] == [
+        apples.id
+    ]
+    assert [
+        r.id for r in index.search("apples", fields=[RunSearchField.repaired_output])
+    ] == [repaired.id]
+    assert [
+        r.id
+        for r in index.search("apples", fields=[RunSearchField.intermediate_outputs])
+    ] == [thinking.id]
+    assert "pears" in index.search("pears")[0].snippet
+
+    with pytest.raises(ValueError, match="empty"):
+        index.search(' "" * ')
+
+
+def test_search_index_updated_on_save_and_delete(task, monkeypatch):
+    run = make_run(task, input="Original words")
+    other = make_run(task, input="Other words")
+    index = task.run_index()
+    assert len(index.search("words")) == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Searches should not rescan the runs folder")
+
+    monkeypatch.setattr(index, "_refresh_locked", fail)
+
+    run.input = "Replacement text"
+    run.save_to_file()
+    assert index.search("original") == []
+    assert [r.id for r in index.search("replacement")] == [run.id]
+
+    run.delete()
+    assert index.search("replacement") == []
+    task.delete_runs([other.id])
+    assert index.search("words") == []
+
+
+def test_search_picks_up_external_changes(task, monkeypatch):
+    run = make_run(task, input="Before edit")
+    index = task.run_index()
+    assert [r.id for r in index.search("before")] == [run.id]
+
+    data = json.loads(run.path.read_text())
+    data["input"] = "After edit"
+    run.path.write_text(json.dumps(data))
+    monkeypatch.setattr("kiln_ai.datamodel.run_index.QUERY_MAX_STALENESS_SECONDS", 0)
+    assert index.search("before") == []
+    assert [r.id for r in index.search("after")] == [run.id]
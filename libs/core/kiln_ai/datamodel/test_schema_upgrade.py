@@ -0,0 +1,197 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from kiln_ai.datamodel import (
+    Project,
+    Task,
+    TaskOutput,
+    TaskOutputRating,
+    TaskRun,
+)
+from kiln_ai.datamodel.packed_storage import pack_children
+from kiln_ai.datamodel.prompt_id import PromptGenerators
+from kiln_ai.datamodel.schema_upgrade import (
+    main,
+    upgrade_project,
+    upgraded_model_json,
+)
+from kiln_ai.datamodel.task import RunConfigProperties, TaskRunConfig
+from kiln_ai.utils.synthetic_project import (
+    SyntheticProjectSpec,
+    generate_synthetic_project,
+)
+
+
+@pytest.fixture
+def task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_legacy_run(task, index=0):
+    """A run saved with requirement ratings in the old format (a dict of floats)."""
+    run = TaskRun(
+        parent=task,
+        input=f"Test input {index}",
+        output=TaskOutput(
+            output="Test output",
+            rating=TaskOutputRating(value=4),
+        ),
+    )
+    run.save_to_file()
+    data = json.loads(run.path.read_text())
+    data["output"]["rating"]["requirement_ratings"] = {"req_1": 5.0, "req_2": 3.0}
+    run.path.write_text(json.dumps(data, indent=2))
+    return run
+
+
+def make_legacy_run_config(task):
+    """A run config saved before structured_output_mode was stored."""
+    config = TaskRunConfig(
+        parent=task,
+        name="Test Config",
+        run_config_properties=RunConfigProperties(
+            model_name="gpt_4o",
+            model_provider_name="openai",
+            prompt_id=PromptGenerators.SIMPLE,
+            structured_output_mode="json_schema",
+        ),
+    )
+    config.save_to_file()
+    data = json.loads(config.path.read_text())
+    del data["run_config_properties"]["structured_output_mode"]
+    config.path.write_text(json.dumps(data, indent=2))
+    return config
+
+
+def test_upgraded_model_json(task):
+    run = make_legacy_run(task)
+    upgraded = upgraded_model_json(run.path.read_bytes(), TaskRun)
+    assert upgraded is not None
+    ratings = json.loads(upgraded)["output"]["rating"]["requirement_ratings"]
+    assert ratings["req_1"] == {"value": 5.0, "type": "five_star"}
+
+    # Formatting differences aren't changes
+    compact = json.dumps(json.loads(upgraded)).encode("utf-8")
+    assert upgraded_model_json(compact, TaskRun) is None
+
+    with pytest.raises(ValueError, match="Expected model type task_run"):
+        upgraded_model_json(task.path.read_bytes(), TaskRun)
+
+
+def test_upgrade_project(task):
+    runs = [make_legacy_run(task, i) for i in range(3)]
+    config = make_legacy_run_config(task)
+    current_run = TaskRun(
+        parent=task, input="Current", output=TaskOutput(output="Current output")
+    )
+    current_run.save_to_file()
+    current_mtime = current_run.path.stat().st_mtime_ns
+
+    report = upgrade_project(task.parent.path)
+
+    assert report.checked == 7
+    assert sorted(report.upgraded) == sorted([r.path for r in runs] + [config.path])
+    assert report.upgraded_by_type == {"task_run": 3, "task_run_config": 1}
+    assert report.errors == {}
+    # Unchanged files aren't rewritten
+    assert current_run.path.stat().st_mtime_ns == current_mtime
+
+    data = json.loads(config.path.read_text())
+    assert data["run_config_properties"]["structured_output_mode"] == "unknown"
+    loaded = TaskRun.load_from_file(runs[0].path)
+    assert loaded.output.rating.requirement_ratings["req_2"].value == 3.0
+
+    # Nothing left to upgrade
+    assert upgrade_project(task.parent.path).upgraded == []
+
+
+def test_upgrade_project_dry_run(task):
+    run = make_legacy_run(task)
+    before = run.path.read_bytes()
+
+    report = upgrade_project(task.path, dry_run=True)
+
+    assert report.dry_run
+    assert report.upgraded == [run.path]
+    assert run.path.read_bytes() == before
+
+
+def test_upgrade_project_reports_errors(task):
+    run = make_legacy_run(task)
+    broken = task.path.parent / "runs" / "123 - broken" / "task_run.kiln"
+    broken.parent.mkdir()
+    broken.write_text("{not json")
+
+    report = upgrade_project(task.parent.path)
+
+    assert list(report.errors) == [broken]
+    assert report.upgraded == [run.path]
+    assert broken.read_text() == "{not json"
+
+
+def test_upgrade_packed(task):
+    runs = [make_legacy_run(task, i) for i in range(2)]
+    pack_children(task.path, TaskRun)
+
+    report = upgrade_project(task.parent.path)
+
+    assert sorted(report.upgraded) == sorted(r.path for r in runs)
+    loaded = task.runs()
+    assert len(loaded) == 2
+    assert upgrade_project(task.parent.path).upgraded == []
+
+
+def test_upgrade_process_pool(task):
+    make_legacy_run(task)
+    report = upgrade_project(task.parent.path, max_workers=2, pool="process")
+    assert report.upgraded_by_type == {"task_run": 1}
+
+
+def test_upgrade_current_project_is_noop(tmp_path):
+    spec = SyntheticProjectSpec(
+        runs_per_task=20, eval_configs_per_eval=1, eval_runs_per_config=5
+    )
+    project = generate_synthetic_project(tmp_path / "project", spec)
+
+    report = upgrade_project(project.path)
+
+    assert report.checked > 25
+    assert report.upgraded == []
+    assert report.errors == {}
+
+
+def test_main(task, capsys):
+    make_legacy_run(task)
+
+    main([str(task.parent.path), "--dry-run"])
+    out = capsys.readouterr().out
+    assert "Would upgrade 1" in out
+    assert "task_run: 1" in out
+
+    main([str(task.parent.path)])
+    assert "Upgraded 1" in capsys.readouterr().out
+
+
+def test_upgrade_refuses_while_app_running(task, capsys):
+    legacy = make_legacy_run(task)
+    before = legacy.path.read_bytes()
+
+    with patch(
+        "kiln_ai.datamodel.schema_upgrade.running_processes", return_value=[1234]
+    ):
+        with pytest.raises(ValueError, match="Kiln is running"):
+            upgrade_project(task.parent.path)
+        assert legacy.path.read_bytes() == before
+
+        # Dry runs don't write
+        assert len(upgrade_project(task.parent.path, dry_run=True).upgraded) == 1
+
+        with pytest.raises(SystemExit, match="Close the app"):
+            main([str(task.parent.path)])
+    assert legacy.path.read_bytes() == before
@@ -0,0 +1,252 @@
+from pathlib import Path
+
+import pytest
+
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRun
+from kiln_ai.datamodel.packed_storage import pack_children, pack_folder
+from kiln_ai.datamodel.sharded_layout import (
+    SHARDS_FILENAME,
+    ShardLayout,
+    is_shard_name,
+    main,
+    relationship_folder_of_child_path,
+    shard_children,
+    shard_folder,
+    unshard_children,
+    unshard_folder,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    return project
+
+
+@pytest.fixture
+def task(project):
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_runs(task, count, prefix="Test"):
+    runs = []
+    for i in range(count):
+        run = TaskRun(
+            parent=task,
+            input=f"{prefix} input {i}",
+            output=TaskOutput(output=f"{prefix} output {i}"),
+        )
+        run.save_to_file()
+        runs.append(run)
+    return runs
+
+
+def runs_folder(task):
+    return task.path.parent / "runs"
+
+
+def test_shard_for_id():
+    layout = ShardLayout(chars=2)
+    shard = layout.shard_for_id("123456789012")
+    assert len(shard) == 2
+    assert is_shard_name(shard)
+    assert layout.shard_for_id("123456789012") == shard
+    assert ShardLayout(chars=3).shard_for_id("123456789012").startswith(shard)
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [("3f", True), ("a", True), ("00ff", True), ("abcde", False), ("", False)],
+)
+def test_is_shard_name(name, expected):
+    assert is_shard_name(name) == expected
+    assert not is_shard_name("3F")
+    assert not is_shard_name("123 - name")
+
+
+def test_relationship_folder_of_child_path():
+    runs = Path("/project/task/runs")
+    assert (
+        relationship_folder_of_child_path(runs / "1 - a" / "task_run.kiln", "runs")
+        == runs
+    )
+    assert (
+        relationship_folder_of_child_path(
+            runs / "3f" / "1 - a" / "task_run.kiln", "runs"
+        )
+        == runs
+    )
+    # A shard-like folder not under the relationship folder: the default layout
+    other = Path("/other/ab/1 - a/task_run.kiln")
+    assert relationship_folder_of_child_path(other, "runs") == Path("/other/ab")
+
+
+def test_shard_folder(task):
+    runs = make_runs(task, 5)
+    folder = runs_folder(task)
+
+    assert shard_folder(folder) == 5
+    assert (folder / SHARDS_FILENAME).is_file()
+    layout = ShardLayout.for_folder(folder)
+    assert layout == ShardLayout(chars=2)
+    for run in runs:
+        shard = layout.shard_for_id(run.id)
+        assert (folder / shard / run.path.parent.name / "task_run.kiln").is_file()
+        assert not run.path.exists()
+
+    loaded = task.runs()
+    assert sorted(r.input for r in loaded) == sorted(r.input for r in runs)
+    for run in loaded:
+        assert run.path.parent.parent.parent == folder
+        assert run.parent.id == task.id
+
+    # Safe to re-run
+    assert shard_folder(folder) == 0
+    with pytest.raises(ValueError, match="already sharded with 2 character"):
+        shard_folder(folder, chars=3)
+
+
+def test_new_children_saved_in_shards(task):
+    folder = runs_folder(task)
+    old_runs = make_runs(task, 2, prefix="Old")
+    shard_folder(folder)
+
+    new_run = make_runs(task, 1, prefix="New")[0]
+    layout = ShardLayout.for_folder(folder)
+    assert new_run.path == (
+        folder
+        / layout.shard_for_id(new_run.id)
+        / new_run.path.parent.name
+        / "task_run.kiln"
+    )
+    assert new_run.path.is_file()
+
+    loaded = TaskRun.load_from_file(new_run.path)
+    assert loaded.parent_task().id == task.id
+
+    found = TaskRun.from_id_and_parent_path(new_run.id, task.path)
+    assert found is not None
+    assert found.input == "New input 0"
+    assert len(task.runs()) == 3
+
+    # Saving an existing child keeps its path
+    moved = TaskRun.from_id_and_parent_path(old_runs[0].id, task.path)
+    moved.input = "Edited"
+    moved.save_to_file()
+    assert TaskRun.load_from_file(moved.path).input == "Edited"
+
+
+def test_reads_mixed_layout(task):
+    folder = runs_folder(task)
+    old_runs = make_runs(task, 2, prefix="Old")
+    # Sharded metadata with children still at the top level, like an interrupted migration
+    (folder / SHARDS_FILENAME).write_text('{"v": 1, "chars": 2}')
+    new_runs = make_runs(task, 2, prefix="New")
+
+    assert old_runs[0].path.parent.parent == folder
+    assert new_runs[0].path.parent.parent.parent == folder
+    assert len(task.runs()) == 4
+    for run in old_runs + new_runs:
+        found = TaskRun.from_id_and_parent_path(run.id, task.path)
+        assert found is not None
+        assert found.input == run.input
+
+
+def test_run_index_sharded(task):
+    runs = make_runs(task, 3)
+    index = task.run_index()
+    assert len(index.entries()) == 3
+
+    shard_folder(runs_folder(task))
+
+    entries = index.entries()
+    assert len(entries) == 3
+    for entry in entries:
+        assert entry.path.is_file()
+        assert entry.load().id == entry.id
+    assert sorted(index.ids_in_filter("all")) == sorted(r.id for r in runs)
+
+
+def test_unshard_folder(task):
+    runs = make_runs(task, 4)
+    folder = runs_folder(task)
+    shard_folder(folder)
+
+    assert unshard_folder(folder) == 4
+    assert not (folder / SHARDS_FILENAME).exists()
+    assert sorted(p.name for p in folder.iterdir()) == sorted(
+        r.path.parent.name for r in runs
+    )
+    for run in runs:
+        assert run.path.is_file()
+    assert len(task.runs()) == 4
+
+    with pytest.raises(ValueError, match="is not sharded"):
+        unshard_folder(folder)
+
+
+def test_shard_parent_models(project):
+    # Children with children of their own move with their whole folder
+    tasks = []
+    for i in range(3):
+        task = Task(name=f"Task {i}", instruction="Test Instruction", parent=project)
+        task.save_to_file()
+        make_runs(task, 2)
+        tasks.append(task)
+
+    assert shard_children(project.path, Task) == 3
+
+    loaded_tasks = project.tasks()
+    assert len(loaded_tasks) == 3
+    for task in loaded_tasks:
+        assert task.parent_project().id == project.id
+        runs = task.runs()
+        assert len(runs) == 2
+        assert runs[0].parent_task().id == task.id
+
+    assert unshard_children(project.path, Task) == 3
+    assert len(project.tasks()) == 3
+
+
+def test_shard_and_pack_are_exclusive(task):
+    make_runs(task, 2)
+    folder = runs_folder(task)
+    shard_folder(folder)
+    with pytest.raises(ValueError, match="is sharded"):
+        pack_folder(folder)
+
+    unshard_folder(folder)
+    pack_children(task.path, TaskRun)
+    with pytest.raises(ValueError, match="is packed"):
+        shard_folder(folder)
+
+
+def test_shard_invalid_chars(task):
+    with pytest.raises(ValueError, match="Shard length"):
+        shard_folder(runs_folder(task), chars=0)
+    with pytest.raises(ValueError, match="Shard length"):
+        shard_folder(runs_folder(task), chars=5)
+
+
+def test_metadata_from_newer_version(task):
+    make_runs(task, 1)
+    (runs_folder(task) / SHARDS_FILENAME).write_text('{"v": 99, "chars": 2}')
+    with pytest.raises(ValueError, match="newer version"):
+        ShardLayout.for_folder(runs_folder(task))
+
+
+def test_main(task, capsys):
+    make_runs(task, 3)
+    folder = runs_folder(task)
+
+    main(["shard", str(folder), "--chars", "1"])
+    assert "Moved 3 children into shards" in capsys.readouterr().out
+    assert ShardLayout.for_folder(folder) == ShardLayout(chars=1)
+    assert len(task.runs()) == 3
+
+    main(["unshard", str(folder)])
+    assert "Moved 3 children out of shards" in capsys.readouterr().out
+    assert len(task.runs()) == 3
@@ -1,8 +1,13 @@
+from unittest.mock import patch
+
 import pytest
 from pydantic import ValidationError
 
+from kiln_ai.datamodel import Project, TaskOutput, TaskRun
 from kiln_ai.datamodel.datamodel_enums import StructuredOutputMode, TaskOutputRatingType
+from kiln_ai.datamodel.packed_storage import pack_children, unpack_children
 from kiln_ai.datamodel.prompt_id import PromptGenerators
+from kiln_ai.datamodel.sharded_layout import shard_children
 from kiln_ai.datamodel.task import RunConfig, RunConfigProperties, Task, TaskRunConfig
 from kiln_ai.datamodel.task_output import normalize_rating
 
@@ -328,3 +333,141 @@ def test_run_config_upgrade_old_entries():
 def test_task_name_unicode_name():
     task = Task(name="你好", instruction="Do something")
     assert task.name == "你好"
+
+
+@pytest.fixture
+def saved_task(tmp_path):
+    project = Project(name="Test Project", path=tmp_path / "project.kiln")
+    project.save_to_file()
+    task = Task(name="Test Task", instruction="Test Instruction", parent=project)
+    task.save_to_file()
+    return task
+
+
+def make_runs(task, count):
+    runs = [
+        TaskRun(
+            parent=task,
+            input=f"Test input {i}",
+            output=TaskOutput(output=f"Test output {i}"),
+        )
+        for i in range(count)
+    ]
+    for run in runs:
+        run.save_to_file()
+    return runs
+
+
+def test_delete_runs(saved_task):
+    runs = make_runs(saved_task, 5)
+    index = saved_task.run_index()
+    assert len(index.entries()) == 5
+
+    failures = saved_task.delete_runs([runs[0].id, runs[1].id, runs[1].id])
+
+    assert failures == {}
+    assert not runs[0].path.parent.exists()
+    assert not runs[1].path.parent.exists()
+    assert sorted(r.id for r in saved_task.runs()) == sorted(r.id for r in runs[2:])
+    assert TaskRun.from_id_and_parent_path(runs[0].id, saved_task.path) is None
+    assert index.entry_for_id(runs[0].id) is None
+    assert len(index.entries()) == 3
+
+
+def test_delete_runs_reports_failures(saved_task):
+    runs = make_runs(saved_task, 2)
+
+    with patch(
+        "kiln_ai.datamodel.basemodel.shutil.rmtree",
+        side_effect=[None, PermissionError("Denied")],
+    ):
+        failures = saved_task.delete_runs([runs[0].id, runs[1].id, "missing"])
+
+    assert set(failures) == {runs[1].id, "missing"}
+    assert isinstance(failures["missing"], FileNotFoundError)
+    assert "not found" in str(failures["missing"])
+    assert str(failures[runs[1].id]) == "Denied"
+
+
+def test_delete_runs_renamed_folder(saved_task):
+    # IDs which can't be found from folder names fall back to a scan
+    run = make_runs(saved_task, 1)[0]
+    renamed = run.path.parent.parent / "renamed by hand"
+    run.path.parent.rename(renamed)
+
+    assert saved_task.delete_runs([run.id]) == {}
+    assert not renamed.exists()
+    assert saved_task.runs() == []
+
+
+def test_delete_runs_packed_and_sharded(saved_task):
+    runs = make_runs(saved_task, 4)
+    pack_children(saved_task.path, TaskRun)
+    assert saved_task.delete_runs([runs[0].id, runs[1].id]) == {}
+    assert sorted(r.id for r in saved_task.runs()) == sorted(r.id for r in runs[2:])
+
+    unpack_children(saved_task.path, TaskRun)
+    shard_children(saved_task.path, TaskRun)
+    assert saved_task.delete_runs([runs[2].id]) == {}
+    assert [r.id for r in saved_task.runs()] == [runs[3].id]
+
+
+async def test_adelete_runs(saved_task):
+    runs = make_runs(saved_task, 2)
+    assert await saved_task.adelete_runs([runs[0].id]) == {}
+    assert [r.id for r in await saved_task.aruns()] == [runs[1].id]
+
+
+def test_delete_runs_unsaved_task():
+    task = Task(name="Test Task", instruction="Test Instruction")
+    with pytest.raises(ValueError, match="must be saved"):
+        task.delete_runs(["123"])
+
+
+def test_count_children_and_has_child(saved_task):
+    assert saved_task.count_children("runs") == 0
+    runs = make_runs(saved_task, 3)
+    assert saved_task.count_children("runs") == 3
+    assert saved_task.has_child("runs", runs[0].id)
+    assert not saved_task.has_child("runs", "missing")
+    assert not saved_task.has_child("evals", runs[0].id)
+
+    counts = saved_task.child_counts()
+    assert counts["runs"] == 3
+    assert counts["evals"] == 0
+    assert set(counts) == set(Task._parent_of)
+
+    with pytest.raises(ValueError, match="no child relationship named 'nope'"):
+        saved_task.count_children("nope")
+
+
+def test_count_children_packed_and_renamed(saved_task):
+    runs = make_runs(saved_task, 3)
+    pack_children(saved_task.path, TaskRun)
+    make_runs(saved_task, 1)
+    assert saved_task.count_children("runs") == 4
+    assert saved_task.has_child("runs", runs[0].id)
+
+    unpack_children(saved_task.path, TaskRun)
+    runs[1].path.parent.rename(runs[1].path.parent.parent / "renamed by hand")
+    assert saved_task.has_child("runs", runs[1].id)
+
+
+def test_count_children_doesnt_load_models(saved_task):
+    make_runs(saved_task, 2)
+    with patch.object(TaskRun, "load_from_file") as load_from_file:
+        assert saved_task.count_children("runs") == 2
+        load_from_file.assert_not_called()
+
+
+def test_count_children_unsaved_task():
+    task = Task(name="Test Task", instruction="Test Instruction")
+    assert task.count_children("runs") == 0
+    assert not task.has_child("runs", "123")
+
+
+async def test_async_counts(saved_task):
+    runs = make_runs(saved_task, 2)
+    assert await saved_task.acount_children("runs") == 2
+    assert await saved_task.ahas_child("runs", runs[0].id)
+    assert (await saved_task.achild_counts())["runs"] == 2
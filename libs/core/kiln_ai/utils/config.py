@@ -137,6 +137,52 @@ class Config:
                 default_lambda=lambda: [],
                 sensitive_keys=["api_key"],
             ),
+            "model_cache_max_entries": ConfigProperty(
+                int,
+                env_var="KILN_MODEL_CACHE_MAX_ENTRIES",
+            ),
+            "model_cache_max_bytes": ConfigProperty(
+                int,
+                env_var="KILN_MODEL_CACHE_MAX_BYTES",
+            ),
+            "model_cache_watch_mode": ConfigProperty(
+                str,
+                env_var="KILN_MODEL_CACHE_WATCH_MODE",
+                default="off",
+            ),
+            "model_cache_snapshot": ConfigProperty(
+                bool,
+                env_var="KILN_MODEL_CACHE_SNAPSHOT",
+                default=False,
+            ),
+            "model_cache_snapshot_interval_seconds": ConfigProperty(
+                int,
+                env_var="KILN_MODEL_CACHE_SNAPSHOT_INTERVAL_SECONDS",
+            ),
+            "model_cache_compact": ConfigProperty(
+                bool,
+                env_var="KILN_MODEL_CACHE_COMPACT",
+                default=False,
+            ),
+            "datamodel_io_workers": ConfigProperty(
+                int,
+                env_var="KILN_DATAMODEL_IO_WORKERS",
+            ),
+            "json_codec": ConfigProperty(
+                str,
+                env_var="KILN_JSON_CODEC",
+                default="pydantic",
+            ),
+            "compact_json": ConfigProperty(
+                bool,
+                env_var="KILN_COMPACT_JSON",
+                default=False,
+            ),
+            "blob_store": ConfigProperty(
+                bool,
+                env_var="KILN_BLOB_STORE",
+                default=False,
+            ),
         }
         self._lock = threading.Lock()
         self._settings = self.load_settings()
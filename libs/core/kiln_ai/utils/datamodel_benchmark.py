@@ -0,0 +1,333 @@
+"""
+Benchmarks for the datamodel, run against a synthetic project (see synthetic_project.py).
+
+Results are JSON, including the Kiln version and the project spec, so runs can be saved and compared across versions to catch regressions.
+
+Usage:
+    python -m kiln_ai.utils.datamodel_benchmark --runs 5000 --output results.json
+    python -m kiln_ai.utils.datamodel_benchmark --runs 5000 --baseline results.json
+
+"Cold" timings clear Kiln's in-process caches first (model cache, child ID map), but not the OS page cache. "Warm" timings repeat the operation with the caches populated. Note the model cache is disabled on filesystems with coarse timestamps, so cold and warm match there (reported as model_cache_enabled).
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from kiln_ai.adapters.fine_tune.dataset_formatter import DatasetFormat, DatasetFormatter
+from kiln_ai.datamodel import DatasetSplit, Project, Task, TaskRun
+from kiln_ai.datamodel.child_id_map import ChildIdMap
+from kiln_ai.datamodel.datamodel_enums import ChatStrategy
+from kiln_ai.datamodel.dataset_filters import (
+    StaticDatasetFilters,
+    dataset_filter_from_id,
+)
+from kiln_ai.datamodel.dataset_split import (
+    AllSplitDefinition,
+    Train80Test20SplitDefinition,
+)
+from kiln_ai.datamodel.model_cache import ModelCache
+from kiln_ai.utils.synthetic_project import (
+    SyntheticProjectSpec,
+    generate_synthetic_project,
+)
+
+RESULTS_FORMAT_VERSION = 1
+
+# Number of random lookups / saves per timed repeat
+SAMPLE_SIZE = 50
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far, or None where unsupported (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def kiln_version() -> str:
+    try:
+        return version("kiln-ai")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def clear_caches() -> None:
+    ModelCache.shared().clear()
+    ChildIdMap.shared().clear()
+
+
+class BenchmarkRunner:
+    def __init__(self, task: Task, repeats: int = 3, seed: int = 0):
+        self.task = task
+        self.repeats = repeats
+        self.rng = random.Random(seed)
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def time(
+        self, name: str, fn: Callable[[], Any], cold: bool = False, **extra: Any
+    ) -> None:
+        """Time fn, repeats times. Cold timings clear the caches before each repeat (not timed)."""
+        seconds = []
+        for _ in range(self.repeats):
+            if cold:
+                clear_caches()
+            start = time.perf_counter()
+            fn()
+            seconds.append(time.perf_counter() - start)
+        self.results[name] = {
+            "seconds": seconds,
+            "min": min(seconds),
+            "median": statistics.median(seconds),
+            "peak_rss_bytes": peak_rss_bytes(),
+            **extra,
+        }
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        task = self.task
+        run_count = len(task.runs(readonly=True))
+
+        self.time("task_runs_cold", task.runs, cold=True, items=run_count)
+        self.time("task_runs_warm", task.runs, items=run_count)
+        self.time(
+            "task_runs_readonly_warm",
+            lambda: task.runs(readonly=True),
+            items=run_count,
+        )
+
+        run_ids = [run.id for run in task.runs(readonly=True) if run.id is not None]
+        sample_ids = self.rng.sample(run_ids, min(SAMPLE_SIZE, len(run_ids)))
+
+        def lookup_runs():
+            for id in sample_ids:
+                TaskRun.from_id_and_parent_path(id, task.path)
+
+        self.time(
+            "from_id_and_parent_path_cold",
+            lookup_runs,
+            cold=True,
+            items=len(sample_ids),
+        )
+        self.time("from_id_and_parent_path_warm", lookup_runs, items=len(sample_ids))
+
+        def save_runs():
+            for id in sample_ids:
+                run = TaskRun.from_id_and_parent_path(id, task.path)
+                if run is not None:
+                    run.save_to_file()
+
+        self.time("save_to_file", save_runs, items=len(sample_ids))
+
+        filter_ids = [filter_id.value for filter_id in StaticDatasetFilters]
+        for filter_id in filter_ids + ["tag::train"]:
+            dataset_filter = dataset_filter_from_id(filter_id)
+
+            def apply_filter():
+                return [run for run in task.runs(readonly=True) if dataset_filter(run)]
+
+            name = filter_id.replace("::", "_")
+            self.time(f"dataset_filter_{name}", apply_filter, items=run_count)
+
+        self.time(
+            "split_from_task_index",
+            lambda: DatasetSplit.from_task(
+                "Benchmark Split", task, Train80Test20SplitDefinition, "high_rating"
+            ),
+            items=run_count,
+        )
+        self.time(
+            "split_build_contents",
+            lambda: DatasetSplit.build_split_contents(
+                task,
+                Train80Test20SplitDefinition,
+                dataset_filter_from_id("high_rating"),
+            ),
+            items=run_count,
+        )
+
+        split = DatasetSplit.from_task("Benchmark All", task, AllSplitDefinition)
+        formatter = DatasetFormatter(split, "You are a helpful assistant.")
+        with tempfile.TemporaryDirectory() as output_dir:
+
+            def dump():
+                formatter.dump_to_file(
+                    "all",
+                    DatasetFormat.OPENAI_CHAT_JSONL,
+                    ChatStrategy.single_turn,
+                    path=Path(output_dir) / "dataset.jsonl",
+                )
+
+            self.time("dataset_formatter_dump_cold", dump, cold=True, items=run_count)
+            self.time("dataset_formatter_dump_warm", dump, items=run_count)
+
+        index = task.run_index()
+
+        def build_index():
+            # From scratch: the index is a cache, deleting it forces a full rebuild
+            index.close()
+            index.db_path.unlink(missing_ok=True)
+            index.refresh()
+
+        self.time("run_index_build", build_index, items=run_count)
+        # Synthetic text draws from a small vocabulary, so words match most runs. Every match is ranked, the worst case.
+        for name, text in [
+            ("word", "customer"),
+            ("phrase", '"customer product"'),
+            ("prefix", "cust*"),
+        ]:
+            self.time(
+                f"run_index_search_{name}",
+                lambda text=text: index.search(text, limit=50),
+                items=run_count,
+            )
+        self.time(
+            "run_index_page_search",
+            lambda: index.page(100, search="customer"),
+            items=run_count,
+        )
+
+        eval_configs = [
+            config for eval in task.evals(readonly=True) for config in eval.configs()
+        ]
+
+        def load_eval_runs():
+            return [run for config in eval_configs for run in config.runs()]
+
+        eval_run_count = len(load_eval_runs())
+        self.time("eval_runs_cold", load_eval_runs, cold=True, items=eval_run_count)
+        self.time("eval_runs_warm", load_eval_runs, items=eval_run_count)
+
+        return self.results
+
+
+def run_benchmarks(
+    spec: SyntheticProjectSpec | None = None,
+    project_path: Path | None = None,
+    repeats: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite and return the results as a JSON serializable dict.
+
+    Args:
+        spec: Generate a synthetic project with this spec, in a temp folder. Ignored if project_path is set.
+        project_path: Benchmark an existing project file instead of generating one. Benchmarks save runs, so use a copy.
+        repeats: Timed repeats of each benchmark
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generate_seconds = None
+        if project_path is None:
+            spec = spec or SyntheticProjectSpec()
+            start = time.perf_counter()
+            project = generate_synthetic_project(Path(tmp_dir) / "project", spec)
+            generate_seconds = time.perf_counter() - start
+            project_path = project.path
+        else:
+            spec = None
+        assert project_path is not None
+
+        # Benchmark the largest task in the project
+        project = Project.load_from_file(project_path)
+        tasks = project.tasks()
+        if not tasks:
+            raise ValueError(f"Project has no tasks: {project_path}")
+        task = max(tasks, key=lambda t: t.count_children("runs"))
+
+        results = BenchmarkRunner(task, repeats=repeats).run()
+        clear_caches()
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "kiln_version": kiln_version(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now().isoformat(),
+        "spec": asdict(spec) if spec is not None else None,
+        "model_cache_enabled": ModelCache.shared().enabled,
+        "repeats": repeats,
+        "generate_seconds": generate_seconds,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "benchmarks": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> Dict[str, float]:
+    """
+    Ratio of current to baseline median time for each benchmark in both results. Above 1.0 is slower than baseline.
+    """
+    ratios = {}
+    for name, result in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None or base["median"] <= 0:
+            continue
+        ratios[name] = result["median"] / base["median"]
+    return ratios
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Kiln datamodel")
+    defaults = SyntheticProjectSpec()
+    parser.add_argument("--tasks", type=int, default=defaults.tasks)
+    parser.add_argument("--runs", type=int, default=defaults.runs_per_task)
+    parser.add_argument("--evals", type=int, default=defaults.evals_per_task)
+    parser.add_argument(
+        "--eval-configs", type=int, default=defaults.eval_configs_per_eval
+    )
+    parser.add_argument("--eval-runs", type=int, default=defaults.eval_runs_per_config)
+    parser.add_argument("--input-chars", type=int, default=defaults.input_chars)
+    parser.add_argument("--output-chars", type=int, default=defaults.output_chars)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--project",
+        type=Path,
+        help="Benchmark a copy of an existing project.kiln instead of a synthetic project",
+    )
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Earlier JSON results to compare against",
+    )
+    args = parser.parse_args(argv)
+
+    spec = SyntheticProjectSpec(
+        tasks=args.tasks,
+        runs_per_task=args.runs,
+        evals_per_task=args.evals,
+        eval_configs_per_eval=args.eval_configs,
+        eval_runs_per_config=args.eval_runs,
+        input_chars=args.input_chars,
+        output_chars=args.output_chars,
+        seed=args.seed,
+    )
+    results = run_benchmarks(spec, project_path=args.project, repeats=args.repeats)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        for name, ratio in compare_results(baseline, results).items():
+            sys.stderr.write(f"{name}: {ratio:.2f}x baseline\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Generate synthetic Kiln projects on disk, for benchmarking the datamodel at realistic scale.
+
+Output is reproducible: the same spec and seed produce the same IDs and contents. Text fields are random words, sized around the spec's target lengths with some variation, so file sizes look like real projects rather than tiny fixtures.
+
+See datamodel_benchmark.py for the benchmarks run against these projects.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from kiln_ai.datamodel import (
+    DataSource,
+    DataSourceType,
+    Project,
+    Task,
+    TaskOutput,
+    TaskOutputRating,
+    TaskRun,
+)
+from kiln_ai.datamodel.basemodel import KilnBaseModel
+from kiln_ai.datamodel.datamodel_enums import TaskOutputRatingType
+from kiln_ai.datamodel.eval import (
+    Eval,
+    EvalConfig,
+    EvalConfigType,
+    EvalOutputScore,
+    EvalRun,
+)
+from kiln_ai.datamodel.task_run import Usage
+
+_WORDS = (
+    "the model task input output user answer question reason step data result "
+    "value example context detail because which would should could every summary "
+    "analysis response review score format report customer product issue request "
+    "update account order feature system error message time first second final"
+).split()
+
+_TAGS = ["train", "eval", "golden", "needs_review", "synthetic", "v2"]
+
+# Fixed base time so runs are reproducible
+_BASE_TIME = datetime(2025, 1, 1)
+
+
+@dataclass
+class SyntheticProjectSpec:
+    """Size and shape of a synthetic project"""
+
+    tasks: int = 1
+    runs_per_task: int = 1000
+    evals_per_task: int = 1
+    eval_configs_per_eval: int = 2
+    eval_runs_per_config: int = 100
+    # Target length of text fields, in characters. Each value varies +/- 50%.
+    input_chars: int = 1500
+    output_chars: int = 3000
+    reasoning_chars: int = 4000
+    # Share of runs with each optional feature
+    rated_fraction: float = 0.7
+    reasoning_fraction: float = 0.3
+    tagged_fraction: float = 0.5
+    seed: int = 0
+
+
+class _Generator:
+    def __init__(self, spec: SyntheticProjectSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.clock = 0
+
+    def id(self) -> str:
+        return str(self.rng.randrange(10**11, 10**12))
+
+    def created_at(self) -> datetime:
+        self.clock += 1
+        return _BASE_TIME + timedelta(seconds=self.clock)
+
+    def text(self, target_chars: int) -> str:
+        length = int(target_chars * self.rng.uniform(0.5, 1.5))
+        words = []
+        size = 0
+        while size < length:
+            word = self.rng.choice(_WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return " ".join(words)
+
+    def chance(self, fraction: float) -> bool:
+        return self.rng.random() < fraction
+
+    def task_run(self, task: Task) -> TaskRun:
+        spec = self.spec
+        rating = None
+        if self.chance(spec.rated_fraction):
+            rating = TaskOutputRating(
+                type=TaskOutputRatingType.five_star,
+                value=float(self.rng.randint(1, 5)),
+            )
+        intermediate_outputs = None
+        if self.chance(spec.reasoning_fraction):
+            intermediate_outputs = {"reasoning": self.text(spec.reasoning_chars)}
+        tags = []
+        if self.chance(spec.tagged_fraction):
+            tags = self.rng.sample(_TAGS, self.rng.randint(1, 2))
+        return TaskRun(
+            id=self.id(),
+            created_at=self.created_at(),
+            parent=task,
+            input=self.text(spec.input_chars),
+            input_source=DataSource(
+                type=DataSourceType.human,
+                properties={"created_by": "synthetic"},
+            ),
+            output=TaskOutput(
+                output=self.text(spec.output_chars),
+                source=DataSource(
+                    type=DataSourceType.synthetic,
+                    properties={
+                        "model_name": "synthetic-model",
+                        "model_provider": "synthetic-provider",
+                        "adapter_name": "synthetic-adapter",
+                    },
+                ),
+                rating=rating,
+            ),
+            intermediate_outputs=intermediate_outputs,
+            tags=tags,
+            usage=Usage(
+                input_tokens=self.rng.randint(100, 2000),
+                output_tokens=self.rng.randint(100, 2000),
+                cost=self.rng.uniform(0.0001, 0.01),
+            ),
+        )
+
+    def eval_run(self, config: EvalConfig, dataset_ids: list[str]) -> EvalRun:
+        spec = self.spec
+        return EvalRun(
+            id=self.id(),
+            created_at=self.created_at(),
+            parent=config,
+            dataset_id=self.rng.choice(dataset_ids) if dataset_ids else self.id(),
+            task_run_config_id=None,
+            eval_config_eval=True,
+            input=self.text(spec.input_chars),
+            output=self.text(spec.output_chars),
+            intermediate_outputs={"reasoning": self.text(spec.reasoning_chars)},
+            scores={
+                "overall_rating": float(self.rng.randint(1, 5)),
+                "accuracy": float(self.rng.randint(0, 1)),
+            },
+        )
+
+
+def generate_synthetic_project(
+    root: Path, spec: SyntheticProjectSpec | None = None
+) -> Project:
+    """
+    Write a synthetic project into root, which should be an empty folder.
+
+    Returns:
+        Project: the saved project
+    """
+    spec = spec or SyntheticProjectSpec()
+    gen = _Generator(spec)
+    root.mkdir(parents=True, exist_ok=True)
+    project = Project(
+        id=gen.id(),
+        name="Synthetic Project",
+        description="Generated for benchmarking",
+        path=root / Project.base_filename(),
+    )
+    project.save_to_file()
+
+    for task_index in range(spec.tasks):
+        task = Task(
+            id=gen.id(),
+            name=f"Synthetic Task {task_index + 1}",
+            instruction=gen.text(600),
+            parent=project,
+        )
+        task.save_to_file()
+
+        runs = [gen.task_run(task) for _ in range(spec.runs_per_task)]
+        KilnBaseModel.save_many(runs)
+        run_ids = [run.id for run in runs if run.id is not None]
+
+        for eval_index in range(spec.evals_per_task):
+            eval = Eval(
+                id=gen.id(),
+                name=f"Synthetic Eval {eval_index + 1}",
+                parent=task,
+                eval_set_filter_id="tag::eval",
+                eval_configs_filter_id="tag::golden",
+                output_scores=[
+                    EvalOutputScore(
+                        name="Overall Rating", type=TaskOutputRatingType.five_star
+                    ),
+                    EvalOutputScore(
+                        name="Accuracy", type=TaskOutputRatingType.pass_fail
+                    ),
+                ],
+            )
+            eval.save_to_file()
+            for config_index in range(spec.eval_configs_per_eval):
+                config = EvalConfig(
+                    id=gen.id(),
+                    name=f"Synthetic Config {config_index + 1}",
+                    parent=eval,
+                    model_name="synthetic-model",
+                    model_provider="synthetic-provider",
+                    config_type=EvalConfigType.g_eval,
+                    properties={
+                        "eval_steps": [gen.text(200) for _ in range(3)],
+                        "task_description": gen.text(300),
+                    },
+                )
+                config.save_to_file()
+                eval_runs = [
+                    gen.eval_run(config, run_ids)
+                    for _ in range(spec.eval_runs_per_config)
+                ]
+                KilnBaseModel.save_many(eval_runs)
+
+    return project
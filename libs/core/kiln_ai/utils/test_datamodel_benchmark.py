@@ -0,0 +1,88 @@
+import json
+
+from kiln_ai.utils.datamodel_benchmark import compare_results, main, run_benchmarks
+from kiln_ai.utils.synthetic_project import (
+    SyntheticProjectSpec,
+    generate_synthetic_project,
+)
+
+TINY_SPEC = SyntheticProjectSpec(
+    runs_per_task=5,
+    eval_configs_per_eval=1,
+    eval_runs_per_config=2,
+    input_chars=50,
+    output_chars=50,
+    reasoning_chars=50,
+)
+
+EXPECTED_BENCHMARKS = {
+    "task_runs_cold",
+    "task_runs_warm",
+    "task_runs_readonly_warm",
+    "from_id_and_parent_path_cold",
+    "from_id_and_parent_path_warm",
+    "save_to_file",
+    "dataset_filter_all",
+    "dataset_filter_high_rating",
+    "dataset_filter_thinking_model",
+    "dataset_filter_thinking_model_high_rated",
+    "dataset_filter_tag_train",
+    "split_from_task_index",
+    "split_build_contents",
+    "dataset_formatter_dump_cold",
+    "dataset_formatter_dump_warm",
+    "run_index_build",
+    "run_index_search_word",
+    "run_index_search_phrase",
+    "run_index_search_prefix",
+    "run_index_page_search",
+    "eval_runs_cold",
+    "eval_runs_warm",
+}
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(TINY_SPEC, repeats=1)
+
+    assert set(results["benchmarks"].keys()) == EXPECTED_BENCHMARKS
+    assert results["spec"]["runs_per_task"] == 5
+    assert results["generate_seconds"] > 0
+    task_runs = results["benchmarks"]["task_runs_cold"]
+    assert len(task_runs["seconds"]) == 1
+    assert task_runs["items"] == 5
+    assert results["benchmarks"]["eval_runs_warm"]["items"] == 2
+    # Must round trip through JSON to track results across versions
+    assert json.loads(json.dumps(results)) == results
+
+
+def test_run_benchmarks_existing_project(tmp_path):
+    project = generate_synthetic_project(tmp_path / "project", TINY_SPEC)
+
+    results = run_benchmarks(project_path=project.path, repeats=1)
+
+    assert results["spec"] is None
+    assert results["generate_seconds"] is None
+    assert results["benchmarks"]["task_runs_warm"]["items"] == 5
+
+
+def test_compare_results():
+    baseline = {"benchmarks": {"a": {"median": 2.0}, "b": {"median": 1.0}}}
+    current = {"benchmarks": {"a": {"median": 1.0}, "c": {"median": 1.0}}}
+
+    assert compare_results(baseline, current) == {"a": 0.5}
+
+
+def test_main_writes_results(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    args = ["--runs", "3", "--eval-runs", "1", "--repeats", "1"]
+    args += ["--input-chars", "50", "--output-chars", "50"]
+
+    main(args + ["--output", str(output)])
+    results = json.loads(output.read_text())
+    assert results["spec"]["runs_per_task"] == 3
+
+    main(args + ["--output", str(tmp_path / "next.json"), "--baseline", str(output)])
+    assert "task_runs_cold:" in capsys.readouterr().err
+
+    main(args)
+    assert json.loads(capsys.readouterr().out)["spec"]["runs_per_task"] == 3
@@ -0,0 +1,56 @@
+from kiln_ai.datamodel import Project
+from kiln_ai.utils.synthetic_project import (
+    SyntheticProjectSpec,
+    generate_synthetic_project,
+)
+
+SMALL_SPEC = SyntheticProjectSpec(
+    tasks=2,
+    runs_per_task=10,
+    evals_per_task=1,
+    eval_configs_per_eval=2,
+    eval_runs_per_config=3,
+    input_chars=200,
+    output_chars=400,
+    reasoning_chars=300,
+)
+
+
+def test_generate_synthetic_project(tmp_path):
+    project = generate_synthetic_project(tmp_path / "project", SMALL_SPEC)
+
+    loaded = Project.load_from_file(project.path)
+    tasks = loaded.tasks()
+    assert len(tasks) == 2
+    for task in tasks:
+        runs = task.runs()
+        assert len(runs) == 10
+        for run in runs:
+            assert 100 <= len(run.input) <= 310
+            assert run.output.source is not None
+        evals = task.evals()
+        assert len(evals) == 1
+        configs = evals[0].configs()
+        assert len(configs) == 2
+        for config in configs:
+            eval_runs = config.runs()
+            assert len(eval_runs) == 3
+            assert set(eval_runs[0].scores.keys()) == {"overall_rating", "accuracy"}
+
+
+def test_generate_synthetic_project_is_reproducible(tmp_path):
+    first = generate_synthetic_project(tmp_path / "first", SMALL_SPEC)
+    second = generate_synthetic_project(tmp_path / "second", SMALL_SPEC)
+
+    def snapshot(project):
+        return sorted(
+            (run.id, run.input, run.output.output, tuple(run.tags))
+            for task in project.tasks()
+            for run in task.runs()
+        )
+
+    assert snapshot(first) == snapshot(second)
+
+    other_seed = SyntheticProjectSpec(**{**SMALL_SPEC.__dict__, "seed": 1})
+    third = generate_synthetic_project(tmp_path / "third", other_seed)
+    assert snapshot(first) != snapshot(third)
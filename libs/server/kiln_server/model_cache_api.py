@@ -0,0 +1,13 @@
+from fastapi import FastAPI
+from kiln_ai.datamodel.model_cache import ModelCache, ModelCacheStats
+
+
+def connect_model_cache_api(app: FastAPI):
+    @app.get("/api/model_cache/stats")
+    async def get_model_cache_stats() -> ModelCacheStats:
+        return ModelCache.shared().stats()
+
+    @app.post("/api/model_cache/clear")
+    async def clear_model_cache():
+        ModelCache.shared().clear()
+        return {"success": True}
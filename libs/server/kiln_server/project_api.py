@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 from fastapi import FastAPI, HTTPException
 from kiln_ai.datamodel import Project
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from kiln_ai.datamodel.registry import project_from_id as project_from_id_core
 from kiln_ai.utils.config import Config
 
@@ -44,7 +45,7 @@ def connect_project_api(app: FastAPI):
         os.makedirs(project_path)
         project_file = os.path.join(project_path, "project.kiln")
         project.path = Path(project_file)
-        project.save_to_file()
+        await project.asave()
 
         # add to projects list
         add_project_to_config(project_file)
@@ -56,11 +57,11 @@ def connect_project_api(app: FastAPI):
     async def update_project(
         project_id: str, project_updates: Dict[str, Any]
     ) -> Project:
-        original_project = project_from_id(project_id)
+        original_project = await run_datamodel_io(project_from_id, project_id)
         updated_project = original_project.model_copy(update=project_updates)
         # Force validation using model_validate()
         Project.model_validate(updated_project.model_dump())
-        updated_project.save_to_file()
+        await updated_project.asave()
         return updated_project
 
     @app.get("/api/projects")
@@ -69,7 +70,7 @@ def connect_project_api(app: FastAPI):
         projects = []
         for project_path in project_paths if project_paths is not None else []:
             try:
-                project = Project.load_from_file(project_path)
+                project = await Project.aload_from_file(project_path)
                 json_project = project.model_dump()
                 json_project["path"] = project_path
                 projects.append(json_project)
@@ -81,12 +82,12 @@ def connect_project_api(app: FastAPI):
 
     @app.get("/api/projects/{project_id}")
     async def get_project(project_id: str) -> Project:
-        return project_from_id(project_id)
+        return await run_datamodel_io(project_from_id, project_id)
 
     # Removes the project, but does not delete the files from disk
     @app.delete("/api/projects/{project_id}")
     async def delete_project(project_id: str) -> dict:
-        project = project_from_id(project_id)
+        project = await run_datamodel_io(project_from_id, project_id)
 
         # Remove from config
         projects_before = Config.shared().projects
@@ -104,7 +105,7 @@ def connect_project_api(app: FastAPI):
             )
 
         try:
-            project = Project.load_from_file(Path(project_path))
+            project = await Project.aload_from_file(Path(project_path))
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -2,6 +2,7 @@ from datetime import datetime
 
 from fastapi import FastAPI, HTTPException
 from kiln_ai.datamodel import BasePrompt, Prompt, PromptId
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from pydantic import BaseModel
 
 from kiln_server.task_api import task_from_id
@@ -61,7 +62,7 @@ def connect_prompt_api(app: FastAPI):
     async def create_prompt(
         project_id: str, task_id: str, prompt_data: PromptCreateRequest
     ) -> Prompt:
-        parent_task = task_from_id(project_id, task_id)
+        parent_task = await run_datamodel_io(task_from_id, project_id, task_id)
         prompt = Prompt(
             parent=parent_task,
             name=prompt_data.name,
@@ -69,20 +70,20 @@ def connect_prompt_api(app: FastAPI):
             prompt=prompt_data.prompt,
             chain_of_thought_instructions=prompt_data.chain_of_thought_instructions,
         )
-        prompt.save_to_file()
+        await prompt.asave()
         return prompt
 
     @app.get("/api/projects/{project_id}/task/{task_id}/prompts")
     async def get_prompts(project_id: str, task_id: str) -> PromptResponse:
-        parent_task = task_from_id(project_id, task_id)
+        parent_task = await run_datamodel_io(task_from_id, project_id, task_id)
 
         prompts: list[ApiPrompt] = []
-        for prompt in parent_task.prompts():
+        for prompt in await parent_task.aprompts():
             properties = prompt.model_dump(exclude={"id"})
             prompts.append(ApiPrompt(id=f"id::{prompt.id}", **properties))
 
         # Add any task run config prompts to the list
-        task_run_configs = parent_task.run_configs()
+        task_run_configs = await parent_task.arun_configs()
         for task_run_config in task_run_configs:
             if task_run_config.prompt:
                 properties = task_run_config.prompt.model_dump(exclude={"id"})
@@ -102,16 +103,20 @@ def connect_prompt_api(app: FastAPI):
     async def update_prompt(
         project_id: str, task_id: str, prompt_id: str, prompt_data: PromptUpdateRequest
     ) -> Prompt:
-        prompt = editable_prompt_from_id(project_id, task_id, prompt_id)
+        prompt = await run_datamodel_io(
+            editable_prompt_from_id, project_id, task_id, prompt_id
+        )
         prompt.name = prompt_data.name
         prompt.description = prompt_data.description
-        prompt.save_to_file()
+        await prompt.asave()
         return prompt
 
     @app.delete("/api/projects/{project_id}/tasks/{task_id}/prompts/{prompt_id}")
     async def delete_prompt(project_id: str, task_id: str, prompt_id: str) -> None:
-        prompt = editable_prompt_from_id(project_id, task_id, prompt_id)
-        prompt.delete()
+        prompt = await run_datamodel_io(
+            editable_prompt_from_id, project_id, task_id, prompt_id
+        )
+        await prompt.adelete()
 
 
 # User friendly descriptions of the prompt generators
@@ -4,9 +4,9 @@ import os
 import tempfile
 from asyncio import Lock
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Literal
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
 from kiln_ai.adapters.adapter_registry import adapter_for_task
 from kiln_ai.adapters.ml_model_list import ModelProviderName
 from kiln_ai.adapters.model_adapters.base_adapter import AdapterConfig
@@ -16,7 +16,14 @@ from kiln_ai.datamodel import (
     TaskOutputRatingType,
     TaskRun,
 )
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from kiln_ai.datamodel.basemodel import ID_TYPE
+from kiln_ai.datamodel.run_index import (
+    RunIndexEntry,
+    RunSearchField,
+    RunSearchResult,
+    RunSortKey,
+)
 from kiln_ai.datamodel.task import RunConfigProperties
 from kiln_ai.utils.dataset_import import (
     DatasetFileImporter,
@@ -33,6 +40,9 @@ logger = logging.getLogger(__name__)
 # Lock to prevent overwriting via concurrent updates. We use a load/update/write pattern that is not atomic.
 update_run_lock = Lock()
 
+# Threads used to load the runs of a task not already in the model cache
+RUNS_LOAD_WORKERS = 4
+
 
 def deep_update(
     source: Dict[str, Any] | None, update: Dict[str, Any | None]
@@ -84,27 +94,37 @@ class RunSummary(BaseModel):
 
     @classmethod
     def repair_status_display_name(cls, run: TaskRun) -> str:
-        if run.repair_instructions:
+        return cls.repair_state_display_name(
+            has_repair_instructions=bool(run.repair_instructions),
+            has_output=bool(run.output),
+            has_output_text=bool(run.output and run.output.output),
+            rating=run.output.rating if run.output else None,
+        )
+
+    @classmethod
+    def repair_state_display_name(
+        cls,
+        has_repair_instructions: bool,
+        has_output: bool,
+        has_output_text: bool,
+        rating: TaskOutputRating | None,
+    ) -> str:
+        if has_repair_instructions:
             return "Repaired"
-        elif run.output and not run.output.rating:
+        elif has_output and not rating:
             # A repair isn't requested until rated < 5 stars
             return "NA"
-        elif not run.output or not run.output.output:
+        elif not has_output_text:
             return "No output"
         elif (
-            run.output.rating
-            and run.output.rating.value == 5.0
-            and run.output.rating.type == TaskOutputRatingType.five_star
+            rating
+            and rating.value == 5.0
+            and rating.type == TaskOutputRatingType.five_star
         ):
             return "No repair needed"
-        elif (
-            run.output.rating
-            and run.output.rating.type != TaskOutputRatingType.five_star
-        ):
+        elif rating and rating.type != TaskOutputRatingType.five_star:
             return "Unknown"
-        elif run.output.output:
-            return "Repair needed"
-        return "Unknown"
+        return "Repair needed"
 
     @classmethod
     def from_run(cls, run: TaskRun) -> "RunSummary":
@@ -129,6 +149,33 @@ class RunSummary(BaseModel):
             input_source=run.input_source.type if run.input_source else None,
         )
 
+    @classmethod
+    def from_index_entry(cls, entry: RunIndexEntry) -> "RunSummary":
+        return RunSummary(
+            id=entry.id,
+            rating=entry.rating,
+            tags=entry.tags,
+            input_preview=RunSummary.format_preview(entry.input_preview),
+            output_preview=RunSummary.format_preview(entry.output_preview),
+            created_at=entry.created_at,
+            repair_state=RunSummary.repair_state_display_name(
+                has_repair_instructions=entry.has_repair_instructions,
+                has_output=entry.has_output,
+                has_output_text=bool(entry.output_preview),
+                rating=entry.rating,
+            ),
+            model_name=entry.model_name,
+            input_source=entry.input_source_type,
+        )
+
+
+class RunSummaryPage(BaseModel):
+    summaries: list[RunSummary]
+    # Pass as the cursor parameter to get the next page. None on the last page.
+    next_cursor: str | None = None
+    # Runs matching the filter and search, over all pages
+    total: int
+
 
 class BulkUploadResponse(BaseModel):
     success: bool
@@ -156,53 +203,94 @@ def task_and_run_from_id(
 
 
 def connect_run_api(app: FastAPI):
+    # Disk work runs on the datamodel I/O pool (run_datamodel_io and the async datamodel methods), so large listings don't block the event loop
     @app.get("/api/projects/{project_id}/tasks/{task_id}/runs/{run_id}")
     async def get_run(project_id: str, task_id: str, run_id: str) -> TaskRun:
-        return run_from_id(project_id, task_id, run_id)
+        return await run_datamodel_io(run_from_id, project_id, task_id, run_id)
 
     @app.delete("/api/projects/{project_id}/tasks/{task_id}/runs/{run_id}")
     async def delete_run(project_id: str, task_id: str, run_id: str):
-        run = run_from_id(project_id, task_id, run_id)
-        run.delete()
+        run = await run_datamodel_io(run_from_id, project_id, task_id, run_id)
+        await run.adelete()
 
     @app.get("/api/projects/{project_id}/tasks/{task_id}/runs")
     async def get_runs(project_id: str, task_id: str) -> list[TaskRun]:
-        task = task_from_id(project_id, task_id)
-        return list(task.runs(readonly=True))
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        # Large tasks load in parallel, see all_children_of_parent_path
+        return await task.aruns(readonly=True, max_workers=RUNS_LOAD_WORKERS)
 
     @app.get("/api/projects/{project_id}/tasks/{task_id}/runs_summaries")
     async def get_runs_summary(project_id: str, task_id: str) -> list[RunSummary]:
-        task = task_from_id(project_id, task_id)
-        # Readonly since we are not mutating the runs. Faster as we don't need to copy them.
-        runs = task.runs(readonly=True)
-        run_summaries: list[RunSummary] = []
-        for run in runs:
-            summary = RunSummary.from_run(run)
-            run_summaries.append(summary)
-        return run_summaries
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        # Served from the run index, so we don't need to load every run
+        entries = await run_datamodel_io(lambda: task.run_index().entries())
+        return [RunSummary.from_index_entry(entry) for entry in entries]
+
+    @app.get("/api/projects/{project_id}/tasks/{task_id}/runs_summaries/page")
+    async def get_runs_summary_page(
+        project_id: str,
+        task_id: str,
+        limit: int = Query(default=100, ge=1, le=1000),
+        cursor: str | None = None,
+        sort: RunSortKey = RunSortKey.created_at,
+        order: Literal["asc", "desc"] = "desc",
+        filter_id: str | None = None,
+        search: str | None = None,
+    ) -> RunSummaryPage:
+        """
+        One page of run summaries, sorted, filtered and searched server side. Pass next_cursor back as cursor for the next page. search uses the full-text syntax of runs_search.
+        """
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        try:
+            page = await run_datamodel_io(
+                lambda: task.run_index().page(
+                    limit,
+                    cursor=cursor,
+                    sort=sort,
+                    descending=order == "desc",
+                    filter_id=filter_id,
+                    search=search,
+                )
+            )
+        except ValueError as e:
+            # Invalid cursor, filter ID or search
+            raise HTTPException(status_code=400, detail=str(e))
+        return RunSummaryPage(
+            summaries=[RunSummary.from_index_entry(entry) for entry in page.entries],
+            next_cursor=page.next_cursor,
+            total=page.total,
+        )
+
+    @app.get("/api/projects/{project_id}/tasks/{task_id}/runs_search")
+    async def search_runs(
+        project_id: str,
+        task_id: str,
+        q: str,
+        limit: int = Query(default=50, ge=1, le=1000),
+        fields: list[RunSearchField] | None = Query(default=None),
+    ) -> list[RunSearchResult]:
+        """
+        Full-text search of run inputs and outputs: the IDs of matching runs, best match first.
+        """
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        try:
+            return await run_datamodel_io(
+                lambda: task.run_index().search(q, limit=limit, fields=fields)
+            )
+        except ValueError as e:
+            # Nothing to search for
+            raise HTTPException(status_code=400, detail=str(e))
 
     @app.post("/api/projects/{project_id}/tasks/{task_id}/runs/delete")
     async def delete_runs(project_id: str, task_id: str, run_ids: list[str]):
-        task = task_from_id(project_id, task_id)
-        failed_runs: list[str] = []
-        last_error: Exception | None = None
-        for run_id in run_ids:
-            try:
-                run = TaskRun.from_id_and_parent_path(run_id, task.path)
-                if run:
-                    run.delete()
-                else:
-                    failed_runs.append(run_id)
-                    last_error = Exception("Run not found")
-            except Exception as e:
-                last_error = e
-                failed_runs.append(run_id)
-        if failed_runs:
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        failures = await task.adelete_runs(run_ids)
+        if failures:
             raise HTTPException(
                 status_code=500,
                 detail={
-                    "failed_runs": failed_runs,
-                    "error": str(last_error) if last_error else "Unknown error",
+                    "failed_runs": list(failures.keys()),
+                    "error": str(list(failures.values())[-1]),
                 },
             )
         return {"success": True}
@@ -211,7 +299,7 @@ def connect_run_api(app: FastAPI):
     async def run_task(
         project_id: str, task_id: str, request: RunTaskRequest
     ) -> TaskRun:
-        task = task_from_id(project_id, task_id)
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
 
         run_config_properties = request.run_config_properties
 
@@ -247,25 +335,10 @@ def connect_run_api(app: FastAPI):
         add_tags: list[str] | None = None,
         remove_tags: list[str] | None = None,
     ):
-        task = task_from_id(project_id, task_id)
-        failed_runs: list[str] = []
-        for run_id in run_ids:
-            run = TaskRun.from_id_and_parent_path(run_id, task.path)
-            if not run:
-                failed_runs.append(run_id)
-            else:
-                modified = False
-                if remove_tags and any(tag in (run.tags or []) for tag in remove_tags):
-                    run.tags = list(
-                        set(tag for tag in (run.tags or []) if tag not in remove_tags)
-                    )
-                    modified = True
-                if add_tags and any(tag not in (run.tags or []) for tag in add_tags):
-                    run.tags = list(set((run.tags or []) + add_tags))
-                    modified = True
-                if modified:
-                    run.save_to_file()
-
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        failed_runs = await run_datamodel_io(
+            edit_tags_util, task, run_ids, add_tags, remove_tags
+        )
         if failed_runs:
             raise HTTPException(
                 status_code=500,
@@ -284,7 +357,7 @@ def connect_run_api(app: FastAPI):
         # JSON string since multipart/form-data doesn't support dictionary types
         splits: str | None = Form(None),
     ) -> BulkUploadResponse:
-        task = task_from_id(project_id, task_id)
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
 
         # Parse splits from json form data
         splits_dict = parse_splits(splits)
@@ -310,7 +383,7 @@ def connect_run_api(app: FastAPI):
                     tag_splits=splits_dict,
                 ),
             )
-            imported_count = importer.create_runs_from_file()
+            imported_count = await run_datamodel_io(importer.create_runs_from_file)
         except KilnInvalidImportFormat as e:
             logger.error(
                 f"Invalid import format in {file_name}: {str(e)}",
@@ -333,9 +406,9 @@ async def update_run_util(
 ) -> TaskRun:
     # Lock to prevent overwriting concurrent updates
     async with update_run_lock:
-        task = task_from_id(project_id, task_id)
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
 
-        run = TaskRun.from_id_and_parent_path(run_id, task.path)
+        run = await TaskRun.afrom_id_and_parent_path(run_id, task.path)
         if run is None:
             raise HTTPException(
                 status_code=404,
@@ -347,10 +420,37 @@ async def update_run_util(
         merged = deep_update(old_run_dumped, run_data)
         updated_run = TaskRun.model_validate(merged)
         updated_run.path = run.path
-        updated_run.save_to_file()
+        await updated_run.asave()
         return updated_run
 
 
+def edit_tags_util(
+    task: Task,
+    run_ids: list[str],
+    add_tags: list[str] | None,
+    remove_tags: list[str] | None,
+) -> list[str]:
+    """Add and remove tags on runs by ID. Returns the IDs which weren't found."""
+    failed_runs: list[str] = []
+    for run_id in run_ids:
+        run = TaskRun.from_id_and_parent_path(run_id, task.path)
+        if not run:
+            failed_runs.append(run_id)
+        else:
+            modified = False
+            if remove_tags and any(tag in (run.tags or []) for tag in remove_tags):
+                run.tags = list(
+                    set(tag for tag in (run.tags or []) if tag not in remove_tags)
+                )
+                modified = True
+            if add_tags and any(tag not in (run.tags or []) for tag in add_tags):
+                run.tags = list(set((run.tags or []) + add_tags))
+                modified = True
+            if modified:
+                run.save_to_file()
+    return failed_runs
+
+
 def model_provider_from_string(provider: str) -> ModelProviderName:
     if not provider or provider not in ModelProviderName.__members__:
         raise ValueError(f"Unsupported provider: {provider}")
@@ -3,6 +3,7 @@ from typing import Any, Dict, List
 
 from fastapi import FastAPI, HTTPException
 from kiln_ai.datamodel import Task, TaskRequirement
+from kiln_ai.datamodel.async_io import run_datamodel_io
 from pydantic import BaseModel
 
 from kiln_server.project_api import project_from_id
@@ -40,10 +41,10 @@ def connect_task_api(app: FastAPI):
                 status_code=400,
                 detail="Task ID cannot be set by client.",
             )
-        parent_project = project_from_id(project_id)
+        parent_project = await run_datamodel_io(project_from_id, project_id)
 
-        task = Task.validate_and_save_with_subrelations(
-            task_data, parent=parent_project
+        task = await run_datamodel_io(
+            Task.validate_and_save_with_subrelations, task_data, parent=parent_project
         )
         if task is None:
             raise HTTPException(
@@ -72,10 +73,14 @@ def connect_task_api(app: FastAPI):
                 status_code=400,
                 detail="Task ID cannot be changed by client in a patch.",
             )
-        original_task = task_from_id(project_id, task_id)
+        original_task = await run_datamodel_io(task_from_id, project_id, task_id)
+        # Lazy loads the project from disk
+        parent = await run_datamodel_io(original_task.load_parent)
         updated_task_data = original_task.model_copy(update=task_updates)
-        updated_task = Task.validate_and_save_with_subrelations(
-            updated_task_data.model_dump(), parent=original_task.parent
+        updated_task = await run_datamodel_io(
+            Task.validate_and_save_with_subrelations,
+            updated_task_data.model_dump(),
+            parent=parent,
         )
         if updated_task is None:
             raise HTTPException(
@@ -92,24 +97,40 @@ def connect_task_api(app: FastAPI):
 
     @app.delete("/api/projects/{project_id}/task/{task_id}")
     async def delete_task(project_id: str, task_id: str) -> None:
-        task = task_from_id(project_id, task_id)
-        task.delete()
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        await task.adelete()
 
     @app.get("/api/projects/{project_id}/tasks")
     async def get_tasks(project_id: str) -> List[Task]:
-        parent_project = project_from_id(project_id)
-        return parent_project.tasks()
+        parent_project = await run_datamodel_io(project_from_id, project_id)
+        return await parent_project.atasks()
 
     @app.get("/api/projects/{project_id}/tasks/{task_id}")
     async def get_task(project_id: str, task_id: str) -> Task:
-        return task_from_id(project_id, task_id)
+        return await run_datamodel_io(task_from_id, project_id, task_id)
+
+    @app.get("/api/projects/{project_id}/tasks/{task_id}/counts")
+    async def get_task_counts(project_id: str, task_id: str) -> Dict[str, int]:
+        """
+        Number of children in each of the task's relationships (runs, evals, finetunes, etc). Counted from the file system, without loading them.
+        """
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        return await task.achild_counts()
+
+    @app.get("/api/projects/{project_id}/tasks/{task_id}/tag_counts")
+    async def get_task_tag_counts(project_id: str, task_id: str) -> Dict[str, int]:
+        """
+        Number of the task's runs with each tag. Read from the task's tag index, without loading the runs.
+        """
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
+        return await run_datamodel_io(task.run_index().tag_counts)
 
     @app.get("/api/projects/{project_id}/tasks/{task_id}/rating_options")
     async def get_rating_options(project_id: str, task_id: str) -> RatingOptionResponse:
         """
         Generates an object which determines which rating options should be shown for a given dataset item.
         """
-        task = task_from_id(project_id, task_id)
+        task = await run_datamodel_io(task_from_id, project_id, task_id)
         results: List[RatingOption] = []
 
         # First add all task requirements. We want these to be shown for all items.
@@ -123,7 +144,7 @@ def connect_task_api(app: FastAPI):
             )
 
         # Then add eval requirements. We want these to be shown for all items in the eval's golden set filter.
-        for eval in task.evals(readonly=True):
+        for eval in await task.aevals(readonly=True):
             if not eval.eval_configs_filter_id.startswith("tag::"):
                 logger.warning(
                     "Eval '%s' has non-tag filter '%s'. This isn't compatible with the web UI for automatic rating visibility.",
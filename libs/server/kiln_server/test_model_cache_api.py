@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from kiln_ai.datamodel.model_cache import ModelCache
+from pydantic import BaseModel
+
+from kiln_server.model_cache_api import connect_model_cache_api
+
+
+class ModelTest(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def cache():
+    cache = ModelCache(max_entries=10)
+    cache._enabled = True
+    with patch.object(ModelCache, "shared", return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    connect_model_cache_api(app)
+    return TestClient(app)
+
+
+def test_get_model_cache_stats(client, cache, tmp_path):
+    path = tmp_path / "model.kiln"
+    path.touch()
+    cache.set_model(path, ModelTest(name="a"), path.stat().st_mtime_ns, 100)
+    cache.get_model(path, ModelTest)
+    cache.get_model(tmp_path / "missing.kiln", ModelTest)
+
+    response = client.get("/api/model_cache/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+        "bytes": 100,
+        "pinned": 0,
+        "max_entries": 10,
+        "max_bytes": 512 * 1024 * 1024,
+        "watched": 0,
+        "snapshot_pending": 0,
+    }
+
+
+def test_clear_model_cache(client, cache, tmp_path):
+    path = tmp_path / "model.kiln"
+    path.touch()
+    cache.set_model(path, ModelTest(name="a"), path.stat().st_mtime_ns, 100)
+
+    response = client.post("/api/model_cache/clear")
+
+    assert response.status_code == 200
+    assert cache.stats().entries == 0
@@ -573,7 +573,7 @@ async def test_get_runs_success(client, task_run_setup):
 
     with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
         mock_task = MagicMock()
-        mock_task.runs.return_value = [task_run]
+        mock_task.aruns = AsyncMock(return_value=[task_run])
         mock_task_from_id.return_value = mock_task
 
         response = client.get(f"/api/projects/{project.id}/tasks/{task.id}/runs")
@@ -594,7 +594,7 @@ async def test_get_runs_empty(client, task_run_setup):
 
     with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
         mock_task = MagicMock()
-        mock_task.runs.return_value = []
+        mock_task.aruns = AsyncMock(return_value=[])
         mock_task_from_id.return_value = mock_task
 
         response = client.get(f"/api/projects/{project.id}/tasks/{task.id}/runs")
@@ -756,9 +756,7 @@ async def test_get_runs_summaries_success(client, task_run_setup):
     task_run = task_run_setup["task_run"]
 
     with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
-        mock_task = MagicMock()
-        mock_task.runs.return_value = [task_run]
-        mock_task_from_id.return_value = mock_task
+        mock_task_from_id.return_value = task
 
         response = client.get(
             f"/api/projects/{project.id}/tasks/{task.id}/runs_summaries"
@@ -780,6 +778,117 @@ async def test_get_runs_summaries_success(client, task_run_setup):
     assert result[0]["input_source"] == task_run.input_source.type
 
 
+@pytest.mark.asyncio
+async def test_get_runs_summary_page(client, task_run_setup):
+    project = task_run_setup["project"]
+    task = task_run_setup["task"]
+    first = task_run_setup["task_run"]
+    others = []
+    for i in range(4):
+        run = TaskRun(
+            parent=task,
+            input=f"Other input {i}",
+            input_source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Test User"}
+            ),
+            output=TaskOutput(
+                output="Other output",
+                source=DataSource(
+                    type=DataSourceType.human, properties={"created_by": "Test User"}
+                ),
+            ),
+            tags=["other"],
+        )
+        run.save_to_file()
+        others.append(run)
+
+    url = f"/api/projects/{project.id}/tasks/{task.id}/runs_summaries/page"
+    with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
+        mock_task_from_id.return_value = task
+
+        response = client.get(url, params={"limit": 3, "order": "asc"})
+        assert response.status_code == 200
+        page = response.json()
+        assert page["total"] == 5
+        assert len(page["summaries"]) == 3
+        assert page["summaries"][0]["id"] == first.id
+        assert page["next_cursor"] is not None
+
+        response = client.get(
+            url, params={"limit": 3, "order": "asc", "cursor": page["next_cursor"]}
+        )
+        assert response.status_code == 200
+        rest = response.json()
+        assert len(rest["summaries"]) == 2
+        assert rest["next_cursor"] is None
+        ids = [s["id"] for s in page["summaries"] + rest["summaries"]]
+        assert ids == [first.id] + [run.id for run in others]
+
+        response = client.get(url, params={"filter_id": "tag::other", "limit": 10})
+        assert response.json()["total"] == 4
+        response = client.get(url, params={"search": "other input 2"})
+        assert [s["id"] for s in response.json()["summaries"]] == [others[2].id]
+        response = client.get(url, params={"sort": "model_name", "order": "desc"})
+        assert response.json()["summaries"][0]["model_name"] == "gpt_4o"
+
+        # Bad cursor, filter and parameters
+        response = client.get(url, params={"cursor": "nope"})
+        assert response.status_code == 400
+        response = client.get(url, params={"filter_id": "query::nope"})
+        assert response.status_code == 400
+        response = client.get(url, params={"search": '""'})
+        assert response.status_code == 400
+        response = client.get(url, params={"limit": 0})
+        assert response.status_code == 422
+        response = client.get(url, params={"sort": "input"})
+        assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_runs(client, task_run_setup):
+    project = task_run_setup["project"]
+    task = task_run_setup["task"]
+    run = TaskRun(
+        parent=task,
+        input="Where is the lighthouse?",
+        input_source=DataSource(
+            type=DataSourceType.human, properties={"created_by": "Test User"}
+        ),
+        output=TaskOutput(
+            output="On the northern cliffs",
+            source=DataSource(
+                type=DataSourceType.human, properties={"created_by": "Test User"}
+            ),
+        ),
+    )
+    run.save_to_file()
+
+    url = f"/api/projects/{project.id}/tasks/{task.id}/runs_search"
+    with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
+        mock_task_from_id.return_value = task
+
+        response = client.get(url, params={"q": "lighthouse"})
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["id"] for r in results] == [run.id]
+        assert "lighthouse" in results[0]["snippet"]
+        assert results[0]["score"] > 0
+
+        response = client.get(url, params={"q": "lighthouse", "fields": ["output"]})
+        assert response.json() == []
+        response = client.get(
+            url, params={"q": "north*", "fields": ["input", "output"]}
+        )
+        assert [r["id"] for r in response.json()] == [run.id]
+
+        response = client.get(url, params={"q": "  "})
+        assert response.status_code == 400
+        response = client.get(url, params={"q": "a", "fields": ["tags"]})
+        assert response.status_code == 422
+        response = client.get(url)
+        assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_get_runs_summaries_task_not_found(client):
     with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
@@ -882,8 +991,8 @@ async def test_delete_multiple_runs_with_exception(client, task_run_setup):
     with patch("kiln_server.run_api.task_from_id") as mock_task_from_id:
         mock_task_from_id.return_value = task
         # Simulate an unexpected error during deletion
-        with patch.object(TaskRun, "delete") as mock_delete:
-            mock_delete.side_effect = Exception("Unexpected error")
+        with patch("kiln_ai.datamodel.basemodel.shutil.rmtree") as mock_rmtree:
+            mock_rmtree.side_effect = Exception("Unexpected error")
             response = client.post(
                 f"/api/projects/{project.id}/tasks/{task.id}/runs/delete", json=run_ids
             )
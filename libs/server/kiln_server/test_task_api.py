@@ -1,9 +1,10 @@
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
-from kiln_ai.datamodel import Project, Task, TaskRequirement
+from kiln_ai.datamodel import Project, Task, TaskOutput, TaskRequirement, TaskRun
 
 from kiln_server.custom_errors import connect_custom_errors
 from kiln_server.task_api import connect_task_api, task_from_id
@@ -160,6 +161,31 @@ def test_create_task_real_project(client, tmp_path):
         assert task_from_disk_reloaded.id == task_from_disk.id
 
 
+def test_update_task_loads_parent_off_event_loop(client, project_and_task):
+    project, task = project_and_task
+    load_threads = []
+    load_parent = Task.load_parent
+
+    def recording_load_parent(self):
+        load_threads.append(threading.current_thread().name)
+        return load_parent(self)
+
+    with (
+        patch("kiln_server.task_api.project_from_id") as mock_project_from_id,
+        patch.object(Task, "load_parent", recording_load_parent),
+    ):
+        mock_project_from_id.return_value = project
+        response = client.patch(
+            f"/api/projects/project1-id/task/{task.id}",
+            json={"description": "Updated"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Updated"
+    assert load_threads
+    assert all(name.startswith("kiln_datamodel_io") for name in load_threads)
+
+
 def test_get_task_success(client, project_and_task):
     project, task = project_and_task
 
@@ -411,7 +437,7 @@ def test_get_rating_options_with_evals(client, project_and_task):
 
     with (
         patch("kiln_server.task_api.project_from_id") as mock_project_from_id,
-        patch("kiln_ai.datamodel.Task.evals") as mock_evals,
+        patch("kiln_ai.datamodel.Task.aevals", new_callable=AsyncMock) as mock_evals,
     ):
         mock_project_from_id.return_value = project
         mock_evals.return_value = [eval_mock, eval_mock_2]
@@ -448,7 +474,7 @@ def test_get_rating_options_with_non_tag_filter(client, project_and_task, caplog
 
     with (
         patch("kiln_server.task_api.project_from_id") as mock_project_from_id,
-        patch("kiln_ai.datamodel.Task.evals") as mock_evals,
+        patch("kiln_ai.datamodel.Task.aevals", new_callable=AsyncMock) as mock_evals,
     ):
         mock_project_from_id.return_value = project
         mock_evals.return_value = [eval_mock]
@@ -490,7 +516,7 @@ def test_get_rating_options_duplicate_requirements(client, project_and_task):
 
     with (
         patch("kiln_server.task_api.project_from_id") as mock_project_from_id,
-        patch("kiln_ai.datamodel.Task.evals") as mock_evals,
+        patch("kiln_ai.datamodel.Task.aevals", new_callable=AsyncMock) as mock_evals,
     ):
         mock_project_from_id.return_value = project
         mock_evals.return_value = [eval1, eval2]
@@ -506,3 +532,49 @@ def test_get_rating_options_duplicate_requirements(client, project_and_task):
     assert option["requirement"]["name"] == "Duplicate Score"
     assert option["show_for_all"] is False
     assert set(option["show_for_tags"]) == {"golden_set1", "golden_set2"}
+
+
+def test_get_task_counts(client, project_and_task):
+    project, task = project_and_task
+    for i in range(2):
+        TaskRun(
+            parent=task,
+            input=f"Test input {i}",
+            output=TaskOutput(output="Test output"),
+        ).save_to_file()
+
+    with patch("kiln_server.task_api.project_from_id") as mock_project_from_id:
+        mock_project_from_id.return_value = project
+        response = client.get(f"/api/projects/{project.id}/tasks/{task.id}/counts")
+
+    assert response.status_code == 200
+    counts = response.json()
+    assert counts["runs"] == 2
+    assert counts["evals"] == 0
+    assert counts["finetunes"] == 0
+
+
+def test_get_task_tag_counts(client, project_and_task):
+    project, task = project_and_task
+    for tags in [["a", "b"], ["a"], []]:
+        TaskRun(
+            parent=task,
+            input="Test input",
+            output=TaskOutput(output="Test output"),
+            tags=tags,
+        ).save_to_file()
+
+    with patch("kiln_server.task_api.project_from_id") as mock_project_from_id:
+        mock_project_from_id.return_value = project
+        response = client.get(f"/api/projects/{project.id}/tasks/{task.id}/tag_counts")
+
+    assert response.status_code == 200
+    assert response.json() == {"a": 2, "b": 1}
+
+
+def test_get_task_counts_not_found(client, project_and_task):
+    project, _ = project_and_task
+    with patch("kiln_server.task_api.project_from_id") as mock_project_from_id:
+        mock_project_from_id.return_value = project
+        response = client.get(f"/api/projects/{project.id}/tasks/missing/counts")
+    assert response.status_code == 404